@@ -1,9 +1,10 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_from_directory, abort
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, abort
 import json
 import datetime
 import os  # Untuk mendapatkan waktu saat ini dan Secret Key
 import math
 import time
+import contextlib
 import gspread
 from itertools import groupby
 from pathlib import Path
@@ -11,6 +12,16 @@ from oauth2client.service_account import ServiceAccountCredentials
 from pathlib import Path
 from dotenv import load_dotenv
 from media_upload import save_asesmen_photos, photos_to_photo_path_value, save_lokasi_photo
+from media_serving import register_media_routes
+from image_pipeline import submit_images, process_images
+from job_queue import enqueue, job_handler, jobs_queued, register_job_routes
+from batch_ingest import register_batch_routes
+from idempotency import register_idempotency
+from media_store import CAS_TMP_DIR
+from upload_limits import register_upload_limits
+from geo_math import haversine_km, coords_from_rows, nearest_index
+from map_layers import register_map_layer_routes, invalidate_layer_cache, get_layer_data, layer_versions, combined_layers_body
+from fast_json import install_json_provider, EncodedCache
 from zoneinfo import ZoneInfo
 
 CACHE_STOK = {"data": [], "timestamp": 0}
@@ -70,6 +81,7 @@ try:
         pg_update_data_lokasi_jenis,
         pg_insert_data_lokasi,
         pg_update_data_lokasi_photo_path,
+        pg_update_wilayah_bulk,
         pg_get_ref_jenis_lokasi,
         pg_get_ref_kabkota,
         pg_get_ref_status_lokasi,
@@ -83,6 +95,7 @@ try:
         pg_next_id,
         pg_get_asesmen_rekap_by_kabkota,
         pg_get_kel_desa_featurecollection_bbox,
+        pg_get_kel_desa_geojson_bytes,
     )
 except Exception as _pg_err:
     print(f"[PG] Error import pg_data: {_pg_err}")
@@ -123,12 +136,14 @@ except Exception as _pg_err:
     pg_update_data_lokasi_jenis = None
     pg_insert_data_lokasi = None
     pg_update_data_lokasi_photo_path = None
+    pg_update_wilayah_bulk = None
     pg_get_ref_jenis_lokasi = None
     pg_get_ref_kabkota = None
     pg_get_ref_status_lokasi = None
     pg_get_ref_tingkat_akses = None
     pg_get_ref_kondisi = None
     pg_get_kel_desa_featurecollection_bbox = None
+    pg_get_kel_desa_geojson_bytes = None
 
 try:
     from asesmen_oxfam import register_asesmen_oxfam_routes
@@ -136,24 +151,209 @@ except Exception as _ox_err:
     print(f"[OXFAM] Error import asesmen_oxfam: {_ox_err}")
     register_asesmen_oxfam_routes = None
 
+try:
+    from geo_coverage import register_coverage_routes, invalidate_coverage_cache
+except Exception as _cov_err:
+    print(f"[COVERAGE] Error import geo_coverage: {_cov_err}")
+    register_coverage_routes = None
+    invalidate_coverage_cache = None
+
+try:
+    from map_cluster import register_map_cluster_routes, invalidate_cluster_cache
+except Exception as _cl_err:
+    print(f"[CLUSTER] Error import map_cluster: {_cl_err}")
+    register_map_cluster_routes = None
+    invalidate_cluster_cache = None
+
+try:
+    from heatmap_hex import register_heatmap_routes, invalidate_heatmap_cache
+except Exception as _hx_err:
+    print(f"[HEATMAP] Error import heatmap_hex: {_hx_err}")
+    register_heatmap_routes = None
+    invalidate_heatmap_cache = None
+
+try:
+    from wilayah_geocoder import register_wilayah_geocoder_routes, reverse_geocode, reverse_geocode_many
+except Exception as _wg_err:
+    print(f"[WILAYAH] Error import wilayah_geocoder: {_wg_err}")
+    register_wilayah_geocoder_routes = None
+    reverse_geocode = None
+    reverse_geocode_many = None
+
+try:
+    from wilayah_search import register_wilayah_search_routes, canonical_wilayah
+except Exception as _ws_err:
+    print(f"[WILAYAH] Error import wilayah_search: {_ws_err}")
+    register_wilayah_search_routes = None
+    canonical_wilayah = None
+
+try:
+    from ref_registry import register_ref_routes, get_ref, get_refs
+except Exception as _ref_err:
+    print(f"[REFS] Error import ref_registry: {_ref_err}")
+    register_ref_routes = None
+    get_ref = None
+    get_refs = None
+
+try:
+    from relawan_directory import register_relawan_routes, get_relawan_dropdown, find_relawan_for_login
+except Exception as _rl_err:
+    print(f"[RELAWAN] Error import relawan_directory: {_rl_err}")
+    register_relawan_routes = None
+    get_relawan_dropdown = None
+    find_relawan_for_login = None
+
+try:
+    from credentials import relawan_has_kode, verify_relawan_kode
+except Exception as _cred_err:
+    print(f"[CRED] Error import credentials: {_cred_err}")
+    relawan_has_kode = None
+    verify_relawan_kode = None
+
+try:
+    from metrics import register_metrics_routes, sheets_timer
+except Exception as _mx_err:
+    print(f"[METRICS] Error import metrics: {_mx_err}")
+    register_metrics_routes = None
+    sheets_timer = None
+
+try:
+    from profiler import register_profiler_routes, phase_timer
+except Exception as _pf_err:
+    print(f"[PROFILE] Error import profiler: {_pf_err}")
+    register_profiler_routes = None
+    phase_timer = None
+
+try:
+    from static_assets import register_static_assets
+except Exception as _as_err:
+    print(f"[ASSET] Error import static_assets: {_as_err}")
+    register_static_assets = None
+
+try:
+    from compression import register_compression
+except Exception as _cmp_err:
+    print(f"[COMPRESS] Error import compression: {_cmp_err}")
+    register_compression = None
+
+try:
+    from log_sink import init_log_sink, log_event
+except Exception as _log_err:
+    print(f"[LOG] Error import log_sink: {_log_err}")
+    init_log_sink = None
+    log_event = None
+
 app = Flask(__name__)
+# jsonify() lewat orjson (fallback json stdlib), tanpa sort_keys
+install_json_provider(app)
 
 @app.route("/api/_routes", methods=["GET"])
 def api__routes():
     return "<br>".join(sorted([str(r) for r in app.url_map.iter_rules()]))
 
+if register_static_assets:
+    register_static_assets(app)
+else:
+    # Tanpa fingerprint: template tetap bisa memakai asset_url()
+    app.add_template_global(lambda filename: url_for("static", filename=filename), "asset_url")
+
+if register_metrics_routes:
+    register_metrics_routes(app)
+
+if register_profiler_routes:
+    register_profiler_routes(app)
+
 if register_asesmen_oxfam_routes:
     register_asesmen_oxfam_routes(app)
 
+if register_coverage_routes:
+    register_coverage_routes(app)
+
+if register_map_cluster_routes:
+    register_map_cluster_routes(app)
+
+if register_heatmap_routes:
+    register_heatmap_routes(app)
+
+if register_wilayah_geocoder_routes:
+    register_wilayah_geocoder_routes(app)
+
+if register_wilayah_search_routes:
+    register_wilayah_search_routes(app)
+
+if register_ref_routes:
+    register_ref_routes(app)
+
+if register_relawan_routes:
+    register_relawan_routes(app)
+
+register_job_routes(app)
+
+# Didaftarkan setelah metrics/profiler: after_request jalan terbalik, jadi
+# kompresi jalan lebih dulu dan waktunya ikut terukur.
+if register_compression:
+    register_compression(app)
+
+
+# ------------------------------------------------------------------------------
+# Invalidasi cache analitik setelah ada perubahan data (submit / aksi admin)
+# Catatan: per-proses (tiap worker gunicorn punya cache sendiri), sisanya
+# dibatasi oleh TTL masing-masing cache.
+# ------------------------------------------------------------------------------
+DATA_MUTATING_ENDPOINTS = {
+    "submit_absensi",
+    "submit_permintaan",
+    "submit_lokasi",
+    "submit_asesmen_kesehatan",
+    "submit_asesmen_pendidikan",
+    "submit_asesmen_psikososial",
+    "submit_asesmen_infrastruktur",
+    "submit_asesmen_wash",
+    "submit_asesmen_kondisi",
+    "asesmen_oxfam_submit",
+    "api_batch_submit",
+    "api_update_permintaan_status",
+    "api_set_asesmen_active",
+    "api_deactivate_asesmen",
+    "api_set_lokasi_active",
+    "api_update_lokasi_jenis",
+}
+
+# Form submit: token idempotency_key -> klik dobel / kirim ulang tidak insert 2x
+register_idempotency(app, {e for e in DATA_MUTATING_ENDPOINTS if e.startswith("submit_")})
+
+DATA_CHANGE_LISTENERS = [invalidate_layer_cache]
+if invalidate_coverage_cache:
+    DATA_CHANGE_LISTENERS.append(invalidate_coverage_cache)
+if invalidate_cluster_cache:
+    DATA_CHANGE_LISTENERS.append(invalidate_cluster_cache)
+if invalidate_heatmap_cache:
+    DATA_CHANGE_LISTENERS.append(invalidate_heatmap_cache)
+
+
+def notify_data_changed():
+    for fn in DATA_CHANGE_LISTENERS:
+        try:
+            fn()
+        except Exception as e:
+            print(f"[CACHE] invalidasi gagal ({getattr(fn, '__name__', fn)}): {e}")
+
+
+@app.after_request
+def _invalidate_caches_after_submit(response):
+    if request.method == "POST" and request.endpoint in DATA_MUTATING_ENDPOINTS and response.status_code < 400:
+        notify_data_changed()
+    return response
+
 # ------------------------------------------------------------------------------
 # Serve MEDIA (foto relawan) dari folder lokal "media/"
-# URL: /media/<path>
+# URL: /media/<path>  (ETag, Range, immutable bila ber-hash; lihat media_serving)
 # ------------------------------------------------------------------------------
 MEDIA_DIR = os.environ.get("MEDIA_DIR", str(Path(app.root_path) / "media"))
 
-@app.route("/media/<path:filename>")
-def media_files(filename):
-    return send_from_directory(MEDIA_DIR, filename)
+register_media_routes(app, MEDIA_DIR)
+# Upload foto: batas ukuran + cek magic bytes saat streaming, temp di folder CAS
+register_upload_limits(app, os.path.join(MEDIA_DIR, CAS_TMP_DIR))
 
 
 # HARUS diganti dengan kunci rahasia yang kuat untuk mengamankan sesi
@@ -200,23 +400,34 @@ def convert_tanggal_indo_ke_iso(tgl_str):
     return ""
 
 
+def _sheets_call(name):
+    # Timer metrik panggilan Google Sheets (no-op bila modul metrics tidak ada)
+    return sheets_timer(name) if sheets_timer else contextlib.nullcontext()
+
+
+def _phase(name):
+    # Fase Server-Timing: fetch / serialize / render (no-op bila profiler tidak ada)
+    return phase_timer(name) if phase_timer else contextlib.nullcontext()
+
+
 def get_rekap_from_spreadsheet():
     # Cek cache
     if time.time() - CACHE_REKAP["timestamp"] < 300 and CACHE_REKAP["data"]:
         return CACHE_REKAP["data"]
 
     try:
-        # Setup Auth
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name('service_account.json', scope)
-        client = gspread.authorize(creds)
-        
-        # URL dari snippet kamu
-        url_sheet = "https://docs.google.com/spreadsheets/d/170n5uyiW3zftwZFV77e_mxd8ythgGpgby6RAuVV47oM/edit?usp=sharing"
-        sheet = client.open_by_url(url_sheet).worksheet("rekapitulasi_data_kabkota")
-        
-        # Ambil data mentah
-        raw_data = sheet.get_all_records()
+        with _sheets_call("rekap_kabkota"):
+            # Setup Auth
+            scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+            creds = ServiceAccountCredentials.from_json_keyfile_name('service_account.json', scope)
+            client = gspread.authorize(creds)
+
+            # URL dari snippet kamu
+            url_sheet = "https://docs.google.com/spreadsheets/d/170n5uyiW3zftwZFV77e_mxd8ythgGpgby6RAuVV47oM/edit?usp=sharing"
+            sheet = client.open_by_url(url_sheet).worksheet("rekapitulasi_data_kabkota")
+
+            # Ambil data mentah
+            raw_data = sheet.get_all_records()
         
         # --- PROSES CLEANING DATA ---
         cleaned_data = []
@@ -254,15 +465,16 @@ def get_logistik_keluar_grouped():
         return CACHE_DISTRIBUSI["data"]
 
     try:
-        # Setup Auth
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_name('service_account.json', scope)
-        client = gspread.authorize(creds)
-        
-        # URL Spreadsheet kamu
-        url_sheet = "https://docs.google.com/spreadsheets/d/1ZO4m71gw_veXszakUP4SURYdh_sX0I6h4nPjegr73XQ/edit?usp=sharing"
-        sheet = client.open_by_url(url_sheet).worksheet("pembersihan_data")
-        raw_data = sheet.get_all_records()
+        with _sheets_call("logistik_keluar"):
+            # Setup Auth
+            scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+            creds = ServiceAccountCredentials.from_json_keyfile_name('service_account.json', scope)
+            client = gspread.authorize(creds)
+
+            # URL Spreadsheet kamu
+            url_sheet = "https://docs.google.com/spreadsheets/d/1ZO4m71gw_veXszakUP4SURYdh_sX0I6h4nPjegr73XQ/edit?usp=sharing"
+            sheet = client.open_by_url(url_sheet).worksheet("pembersihan_data")
+            raw_data = sheet.get_all_records()
         
         grouped_data = {}
         
@@ -361,11 +573,15 @@ def _is_active_row(row: dict) -> bool:
     return True
 
 def get_ref_jenis_lokasi_any() -> list:
-    if _pg_enabled() and pg_get_ref_jenis_lokasi is not None:
-        try:
+    if not _pg_enabled():
+        return []
+    try:
+        if get_ref is not None:
+            return get_ref("jenis_lokasi")
+        if pg_get_ref_jenis_lokasi is not None:
             return pg_get_ref_jenis_lokasi() or []
-        except Exception as e:
-            print(f"[PG] get_ref_jenis_lokasi_any error: {e}")
+    except Exception as e:
+        print(f"[PG] get_ref_jenis_lokasi_any error: {e}")
     return []
 
 try:
@@ -391,39 +607,61 @@ def _parse_waktu_form(v: str):
     return dt_local.astimezone(datetime.timezone.utc).replace(tzinfo=None)
 
 def get_ref_kabkota_any() -> list:
-    if _pg_enabled() and pg_get_ref_kabkota is not None:
-        try:
+    if not _pg_enabled():
+        return []
+    try:
+        if get_ref is not None:
+            return get_ref("kabkota")
+        if pg_get_ref_kabkota is not None:
             return pg_get_ref_kabkota() or []
-        except Exception as e:
-            print(f"[PG] get_ref_kabkota_any error: {e}")
+    except Exception as e:
+        print(f"[PG] get_ref_kabkota_any error: {e}")
     return []
 
 def get_ref_status_lokasi_any() -> list:
-    if _pg_enabled() and pg_get_ref_status_lokasi is not None:
-        try:
+    if not _pg_enabled():
+        return []
+    try:
+        if get_ref is not None:
+            return get_ref("status_lokasi")
+        if pg_get_ref_status_lokasi is not None:
             return pg_get_ref_status_lokasi() or []
-        except Exception as e:
-            print(f"[PG] get_ref_status_lokasi_any error: {e}")
+    except Exception as e:
+        print(f"[PG] get_ref_status_lokasi_any error: {e}")
     return []
 
 def get_ref_tingkat_akses_any() -> list:
-    if _pg_enabled() and pg_get_ref_tingkat_akses is not None:
-        try:
+    if not _pg_enabled():
+        return []
+    try:
+        if get_ref is not None:
+            return get_ref("tingkat_akses")
+        if pg_get_ref_tingkat_akses is not None:
             return pg_get_ref_tingkat_akses() or []
-        except Exception as e:
-            print(f"[PG] get_ref_tingkat_akses_any error: {e}")
+    except Exception as e:
+        print(f"[PG] get_ref_tingkat_akses_any error: {e}")
     return []
 
 def get_ref_kondisi_any() -> list:
-    if _pg_enabled() and pg_get_ref_kondisi is not None:
-        try:
+    if not _pg_enabled():
+        return []
+    try:
+        if get_ref is not None:
+            return get_ref("kondisi")
+        if pg_get_ref_kondisi is not None:
             return pg_get_ref_kondisi() or []
-        except Exception as e:
-            print(f"[PG] get_ref_kondisi_any error: {e}")
+    except Exception as e:
+        print(f"[PG] get_ref_kondisi_any error: {e}")
     return []
 
 def get_relawan_list_any() -> list:
-    """Ambil daftar relawan dari Postgres untuk login."""
+    """Ambil daftar relawan (tanpa kode akses) untuk dropdown login."""
+    if _pg_enabled() and get_relawan_dropdown is not None:
+        try:
+            return get_relawan_dropdown()
+        except Exception as e:
+            print(f"[PG] get_relawan_list_any error: {e}")
+            return []
     if _pg_enabled() and pg_get_relawan_list is not None:
         try:
             lst = pg_get_relawan_list() or []
@@ -453,6 +691,8 @@ def write_lokasi_relawan_any(data: dict) -> bool:
                 lokasi_posko=data.get("lokasi_posko"),
                 photo_link=data.get("photo_link"),
                 waktu=data.get("waktu"),
+                kecamatan=data.get("kecamatan"),
+                desa_kelurahan=data.get("desa_kelurahan"),
             )
         )
     except Exception as e:
@@ -534,14 +774,20 @@ def get_log_directory():
     return log_dir
 
 
+# Setup folder logs + writer asinkron SEKALI saat startup (bukan per request)
+try:
+    LOG_DIR = get_log_directory()
+    if init_log_sink is not None:
+        init_log_sink(LOG_DIR)
+except Exception as _e:
+    print(f"[LOG] gagal setup folder logs: {_e}")
+    LOG_DIR = None
+
+
 def log_permintaan_posko(data_permintaan, nama_relawan, id_relawan, nama_posko=None):
-    """Log permintaan posko ke file log.txt dengan format yang aman."""
+    """Log permintaan posko ke logs/log.txt (JSON lines, ditulis thread latar)."""
     try:
-        log_dir = get_log_directory()
-        log_file = log_dir / "log.txt"
-
         # Sanitasi semua input
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         nama_relawan_safe = sanitize_for_log(nama_relawan)
         id_relawan_safe = sanitize_for_log(id_relawan)
         id_permintaan = sanitize_for_log(data_permintaan.get("id_permintaan", "UNKNOWN"))
@@ -551,20 +797,26 @@ def log_permintaan_posko(data_permintaan, nama_relawan, id_relawan, nama_posko=N
         status = sanitize_for_log(data_permintaan.get("status", "Usulan"))
         tanggal = sanitize_for_log(data_permintaan.get("tanggal", ""))
 
-        # Format log yang terstruktur dan mudah dibaca
-        log_entry = (
-            f"[{timestamp}] PERMINTAAN_POSKO | "
-            f"ID: {id_permintaan} | "
-            f"Peminta: {nama_relawan_safe} (ID: {id_relawan_safe}) | "
-            f"Posko: {nama_posko_safe} ({kode_posko}) | "
-            f"Status: {status} | "
-            f"Tanggal: {tanggal} | "
-            f"Keterangan: {keterangan if keterangan else '(tidak ada)'}"
-        )
+        fields = {
+            "id_permintaan": id_permintaan,
+            "nama_relawan": nama_relawan_safe,
+            "id_relawan": id_relawan_safe,
+            "nama_posko": nama_posko_safe,
+            "kode_posko": kode_posko,
+            "status": status,
+            "tanggal": tanggal,
+            "keterangan": keterangan,
+        }
+
+        if log_event is not None and log_event("PERMINTAAN_POSKO", **fields):
+            return
 
-        # Tulis ke file dengan mode append
-        with open(log_file, "a", encoding="utf-8") as f:
-            f.write(log_entry + "\n")
+        # Fallback (log_sink tidak tersedia): tulis langsung 1 baris JSON
+        if LOG_DIR is not None:
+            entry = {"ts": datetime.datetime.now().astimezone().isoformat(timespec="seconds"), "event": "PERMINTAAN_POSKO"}
+            entry.update(fields)
+            with open(LOG_DIR / "log.txt", "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
 
     except Exception as e:
         # Jangan crash aplikasi jika logging gagal, cukup print error
@@ -585,56 +837,24 @@ def block_logs_access(filename):
 # ==============================================================================
 @app.route("/api/refresh_map", methods=["GET"])
 def api_refresh_map():
-    """API endpoint untuk mendapatkan data map terbaru."""
+    """API endpoint untuk mendapatkan data map terbaru (gabungan semua layer /api/layers/<nama>)."""
     try:
-        data_lokasi_raw = get_data_lokasi_any()
-        data_lokasi = [d for d in data_lokasi_raw if d.get("latitude") and d.get("longitude") and _is_active_row(d)]
-
-        status_map = get_status_map_any()
-
-        # Lokasi relawan (Postgres) - marker di map
-        relawan_lokasi = []
-        if pg_get_relawan_locations_last24h:
-            try:
-                relawan_lokasi = pg_get_relawan_locations_last24h(720)
-            except Exception as e:
-                print(f"Warning: gagal ambil lokasi_relawan dari Postgres: {e}")
-
-        
-        # Permintaan logistik (Postgres) - marker di map (ambil last 24 jam)
-        permintaan_logistik = []
-        if pg_get_logistik_permintaan_last24h:
-            try:
-                permintaan_logistik = pg_get_logistik_permintaan_last24h(720) or []
-            except Exception as e:
-                print(f"Warning: gagal ambil logistik_permintaan dari Postgres: {e}")
-
-        return jsonify(
-            {
-                "success": True,
-                "data_lokasi": data_lokasi,
-                "status_map": status_map,
-                "relawan_lokasi": relawan_lokasi,
-                "asesmen_kesehatan": pg_get_asesmen_kesehatan_last24h(720) if pg_get_asesmen_kesehatan_last24h else [],
-                "asesmen_pendidikan": pg_get_asesmen_pendidikan_last24h(720) if pg_get_asesmen_pendidikan_last24h else [],
-                "asesmen_psikososial": pg_get_asesmen_psikososial_last24h(720) if pg_get_asesmen_psikososial_last24h else [],
-                "asesmen_infrastruktur": pg_get_asesmen_infrastruktur_last24h(720) if pg_get_asesmen_infrastruktur_last24h else [],
-                "asesmen_wash": pg_get_asesmen_wash_last24h(720) if pg_get_asesmen_wash_last24h else [],
-                "asesmen_kondisi": pg_get_asesmen_kondisi_last24h(720) if pg_get_asesmen_kondisi_last24h else [],
-                "asesmen_oxfam": pg_get_asesmen_oxfam_last24h(hours=720) if pg_get_asesmen_oxfam_last24h else [],
-                "permintaan_logistik": permintaan_logistik
-            }
-        )
+        with _phase("fetch"):
+            body = combined_layers_body(MAP_LAYER_LOADERS.keys(), extra={"success": True})
+        return app.response_class(body, mimetype="application/json")
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 
-
-
-
 # ==============================================================================
 # API ENDPOINT: Geo Kel/Desa (batas administrasi detail)
 # ==============================================================================
+# Batas kel/desa statis -> bytes GeoJSON per (bbox, zoom, limit) di-cache lama.
+# Client membulatkan bbox 3 desimal -> key berulang saat pan kecil / kembali.
+KELDESA_CACHE_TTL_SECONDS = int(os.environ.get("KELDESA_CACHE_TTL_SECONDS", "3600") or "3600")
+CACHE_KELDESA = EncodedCache(maxsize=256, ttl=KELDESA_CACHE_TTL_SECONDS)
+
+
 @app.route("/api/geo/kel_desa", methods=["GET"])
 def api_geo_kel_desa():
     """Return GeoJSON FeatureCollection batas kel/desa untuk area yang sedang terlihat (bbox).
@@ -646,7 +866,7 @@ def api_geo_kel_desa():
 
     Dipakai oleh map.html saat zoom >= threshold.
     """
-    if not _pg_enabled() or pg_get_kel_desa_featurecollection_bbox is None:
+    if not _pg_enabled() or pg_get_kel_desa_geojson_bytes is None:
         return jsonify({"type": "FeatureCollection", "features": [], "error": "Fitur belum aktif"}), 500
 
     bbox_s = (request.args.get("bbox") or "").strip()
@@ -664,21 +884,65 @@ def api_geo_kel_desa():
         return jsonify({"type": "FeatureCollection", "features": [], "error": "Parameter bbox/zoom invalid"}), 400
 
     try:
-        fc = pg_get_kel_desa_featurecollection_bbox((minx, miny, maxx, maxy), zoom=zoom, limit=limit)
-        return jsonify(fc)
+        key = (minx, miny, maxx, maxy, zoom, limit)
+        body = CACHE_KELDESA.get(key)
+        if body is None:
+            body = pg_get_kel_desa_geojson_bytes((minx, miny, maxx, maxy), zoom=zoom, limit=limit)
+            CACHE_KELDESA.put(key, body)
+        return app.response_class(body, mimetype="application/json")
     except Exception as e:
         return jsonify({"type": "FeatureCollection", "features": [], "error": str(e)}), 500
 # ==============================================================================
 # ROUTE UTAMA
 # ==============================================================================
-@app.route("/")
-def map_view():
+# ------------------------------------------------------------------------------
+# Layer data peta: di-load & di-serialize lewat map_layers (cache + ETag),
+# dipakai /api/layers/<nama>, /api/refresh_map, dan data_posko di halaman peta.
+# ------------------------------------------------------------------------------
+def _layer_relawan_lokasi():
+    if not pg_get_relawan_locations_last24h:
+        return []
+    try:
+        return pg_get_relawan_locations_last24h(720) or []
+    except Exception as e:
+        print(f"Warning: gagal ambil lokasi_relawan dari Postgres: {e}")
+        return []
+
+
+def _layer_permintaan_logistik():
+    if not pg_get_logistik_permintaan_last24h:
+        return []
+    try:
+        return pg_get_logistik_permintaan_last24h(720) or []
+    except Exception as e:
+        print(f"Warning: gagal ambil logistik_permintaan dari Postgres: {e}")
+        return []
+
+
+MAP_LAYER_LOADERS = {
+    "data_lokasi": lambda: [d for d in get_data_lokasi_any() if d.get("latitude") and d.get("longitude") and _is_active_row(d)],
+    "status_map": get_status_map_any,
+    "relawan_lokasi": _layer_relawan_lokasi,
+    "asesmen_kesehatan": lambda: pg_get_asesmen_kesehatan_last24h(720) if pg_get_asesmen_kesehatan_last24h else [],
+    "asesmen_pendidikan": lambda: pg_get_asesmen_pendidikan_last24h(720) if pg_get_asesmen_pendidikan_last24h else [],
+    "asesmen_psikososial": lambda: pg_get_asesmen_psikososial_last24h(720) if pg_get_asesmen_psikososial_last24h else [],
+    "asesmen_infrastruktur": lambda: pg_get_asesmen_infrastruktur_last24h(720) if pg_get_asesmen_infrastruktur_last24h else [],
+    "asesmen_wash": lambda: pg_get_asesmen_wash_last24h(720) if pg_get_asesmen_wash_last24h else [],
+    "asesmen_kondisi": lambda: pg_get_asesmen_kondisi_last24h(720) if pg_get_asesmen_kondisi_last24h else [],
+    "asesmen_oxfam": lambda: pg_get_asesmen_oxfam_last24h(hours=720) if pg_get_asesmen_oxfam_last24h else [],
+    "permintaan_logistik": _layer_permintaan_logistik,
+}
+
+register_map_layer_routes(app, MAP_LAYER_LOADERS)
+
+
+def _map_view_data():
+    """Data shell map.html (fase "fetch"). Layer peta TIDAK di-embed; browser
+    mengambilnya dari /api/layers/<nama> (versi layer yang sudah di-cache ikut
+    dikirim agar bisa langsung dipakai dari cache browser)."""
     # Pastikan GeoJSON kab/kota siap (dipakai cek wilayah absensi)
     ensure_kabkota_geojson_ready()
 
-    data_lokasi_raw = get_data_lokasi_any()
-    data_lokasi = [d for d in data_lokasi_raw if d.get("latitude") and d.get("longitude") and _is_active_row(d)]
-
     # Opsional: stok gudang / master logistik / rekap (kalau ada tabelnya)
     stok_gudang = []
     try:
@@ -688,8 +952,6 @@ def map_view():
 
     # dd(stok_gudang)
 
-    status_map = get_status_map_any()
-
     rekap_kabkota = []
     try:
         # Panggil fungsi baru tadi
@@ -697,15 +959,15 @@ def map_view():
     except Exception as e:
         print(f"[SHEET] get_rekap_kabkota error: {e}")
 
-    latest_rekap = {}
-    for row in rekap_kabkota:
-        kabkota = row.get("kabkota") or row.get("kabupaten_kota") or row.get("nama_kabkota")
-        if kabkota and kabkota not in latest_rekap:
-            latest_rekap[kabkota] = row
-
     data_relawan = get_relawan_list_any()
 
-    # Ambil daftar posko untuk form permintaan dengan nama dan kode
+    # Ambil daftar posko untuk form permintaan dengan nama dan kode (dari cache layer data_lokasi)
+    data_lokasi = []
+    try:
+        data_lokasi = get_layer_data("data_lokasi")
+    except Exception as e:
+        print(f"[PG] layer data_lokasi error: {e}")
+
     data_posko_list = []
     for d in data_lokasi:
         if d.get("jenis_lokasi") == "Posko Pengungsian":
@@ -723,86 +985,49 @@ def map_view():
         )
     )
 
-    # Lokasi relawan (Postgres) - marker di map (ambil last 24 jam)
-    relawan_lokasi = []
-    if pg_get_relawan_locations_last24h:
-        try:
-            relawan_lokasi = pg_get_relawan_locations_last24h(720)
-        except Exception as e:
-            print(f"Warning: gagal ambil lokasi_relawan dari Postgres: {e}")
-
-    # Permintaan logistik (Postgres) - marker di map (ambil last 24 jam)
-    permintaan_logistik = []
-    if pg_get_logistik_permintaan_last24h:
-        try:
-            permintaan_logistik = pg_get_logistik_permintaan_last24h(720)
-        except Exception as e:
-            print(f"Warning: gagal ambil logistik_permintaan dari Postgres: {e}")
-
     data_barang = []
-    if _pg_enabled() and pg_get_master_logistik_codes is not None:
+    if _pg_enabled():
         try:
-            data_barang = pg_get_master_logistik_codes() or []
+            if get_ref is not None:
+                data_barang = get_ref("master_logistik")
+            elif pg_get_master_logistik_codes is not None:
+                data_barang = pg_get_master_logistik_codes() or []
         except Exception as e:
             print(f"[PG] get_master_logistik_codes error: {e}")
-    # --- dropdown refs untuk INPUT LOKASI (data_lokasi) ---
-    ref_jenis_lokasi = []
-    ref_kabkota = []
-    ref_status_lokasi = []
-    ref_tingkat_akses = []
-    ref_kondisi = []
-    if _pg_enabled():
-        asesmen_oxfam = pg_get_asesmen_oxfam_last24h(hours=720) if pg_get_asesmen_oxfam_last24h else []
-        try:
-            ref_jenis_lokasi = (pg_get_ref_jenis_lokasi() or [])
-        except Exception:
-            ref_jenis_lokasi = []
-        try:
-            ref_kabkota = (pg_get_ref_kabkota() or [])
-        except Exception:
-            ref_kabkota = []
-        try:
-            ref_status_lokasi = (pg_get_ref_status_lokasi() or [])
-        except Exception:
-            ref_status_lokasi = []
-        try:
-            ref_tingkat_akses = (pg_get_ref_tingkat_akses() or [])
-        except Exception:
-            ref_tingkat_akses = []
-        try:
-            ref_kondisi = (pg_get_ref_kondisi() or [])
-        except Exception:
-            ref_kondisi = []
-
-    return render_template(
-        "map.html",
-        data_lokasi=json.dumps(data_lokasi),
+    # --- dropdown refs untuk INPUT LOKASI (data_lokasi) -> dari cache ref_registry ---
+    ref_jenis_lokasi = get_ref_jenis_lokasi_any()
+    ref_kabkota = get_ref_kabkota_any()
+    ref_status_lokasi = get_ref_status_lokasi_any()
+    ref_tingkat_akses = get_ref_tingkat_akses_any()
+    ref_kondisi = get_ref_kondisi_any()
+
+    return dict(
         stok_gudang=stok_gudang,
         rekap_kabkota=rekap_kabkota,
-        relawan_lokasi=json.dumps(relawan_lokasi),
         relawan_list=data_relawan,
         data_posko=data_posko_list,
         data_barang=data_barang,
         logged_in=session.get("logged_in", False),
         nama_relawan=session.get("nama_relawan", ""),
         is_admin=session.get("is_admin", False),
-        status_map=json.dumps(status_map),
-        asesmen_kesehatan=json.dumps(pg_get_asesmen_kesehatan_last24h(720) if pg_get_asesmen_kesehatan_last24h else []),
-        asesmen_pendidikan=json.dumps(pg_get_asesmen_pendidikan_last24h(720) if pg_get_asesmen_pendidikan_last24h else []),
-        asesmen_psikososial=json.dumps(pg_get_asesmen_psikososial_last24h(720) if pg_get_asesmen_psikososial_last24h else []),
-        asesmen_infrastruktur=json.dumps(pg_get_asesmen_infrastruktur_last24h(720) if pg_get_asesmen_infrastruktur_last24h else []),
-        asesmen_wash=json.dumps(pg_get_asesmen_wash_last24h(720) if pg_get_asesmen_wash_last24h else []),
-        asesmen_oxfam=asesmen_oxfam,
+        map_layer_versions=layer_versions(load=False),
         ref_jenis_lokasi=ref_jenis_lokasi,
         ref_kabkota=ref_kabkota,
         ref_status_lokasi=ref_status_lokasi,
         ref_tingkat_akses=ref_tingkat_akses,
         ref_kondisi=ref_kondisi,
-        asesmen_kondisi=json.dumps(pg_get_asesmen_kondisi_last24h(720) if pg_get_asesmen_kondisi_last24h else []),
-        permintaan_logistik=json.dumps(permintaan_logistik)
     )
 
 
+@app.route("/")
+def map_view():
+    with _phase("fetch"):
+        ctx = _map_view_data()
+
+    with _phase("render"):
+        return render_template("map.html", **ctx)
+
+
 @app.route("/rekap_asesmen")
 def rekap_asesmen():
     """Halaman rekap data asesmen per kabupaten/kota."""
@@ -1012,26 +1237,28 @@ def login():
         flash("Login gagal: Nama dan Kode Akses harus diisi.", "danger")
         return redirect(url_for("map_view"))
 
-    relawan_list = get_relawan_list_any()
-
-    # Cari relawan sesuai nama (case-insensitive)
+    # Cari relawan sesuai nama (case-insensitive, lookup terindeks)
     matched = None
-    for r in relawan_list:
-        if r.get("nama_relawan", "").strip().lower() == (nama or "").strip().lower():
-            matched = r
-            break
+    if _pg_enabled() and find_relawan_for_login is not None:
+        try:
+            matched = find_relawan_for_login(nama)
+        except Exception as e:
+            print(f"[PG] find_relawan_for_login error: {e}")
 
     if not matched:
         flash(f"Login gagal: Nama relawan '{nama}' tidak ditemukan di database.", "danger")
         return redirect(url_for("map_view"))
 
-    expected_code = (matched.get("kode_akses") or "").strip()
-    if not expected_code:
+    if verify_relawan_kode is None:
+        flash("Login gagal: modul kredensial belum siap. Hubungi admin.", "danger")
+        return redirect(url_for("map_view"))
+
+    if not relawan_has_kode(matched):
         flash("Login gagal: Relawan belum memiliki kode akses terdaftar. Hubungi admin.", "danger")
         return redirect(url_for("map_view"))
 
-    # Cocokkan kode akses sesuai relawan (case-insensitive)
-    if kode_akses.strip().lower() != expected_code.lower():
+    # Cocokkan kode akses (hash scrypt, case-insensitive seperti sebelumnya)
+    if not verify_relawan_kode(matched, kode_akses):
         flash("Login gagal: Kode akses salah.", "danger")
         return redirect(url_for("map_view"))
 
@@ -1482,6 +1709,8 @@ def api_update_lokasi_jenis():
             actor_id_relawan=session.get("id_relawan"),
             actor_nama_relawan=session.get("nama_relawan"),
             note=note,
+            # cache kosong (ref belum termuat) -> None: pg_data membaca tabel ref langsung
+            allowed_jenis=(get_ref("jenis_lokasi") or None) if get_ref is not None else None,
         )
         if ok:
             return jsonify({"success": True})
@@ -1567,17 +1796,65 @@ def cek_wilayah_geojson(user_lat, user_lon):
 
 
 def haversine_distance(lat1, lon1, lat2, lon2):
-    """Return distance in kilometers between two lat/lon points."""
+    """Return distance in kilometers between two lat/lon points (delegasi ke geo_math)."""
+    return haversine_km(lat1, lon1, lat2, lon2)
+
+
+def _nearest_posko_codes(lats, lons) -> list:
+    """kode_lokasi posko terdekat untuk tiap titik ("" bila tidak ada), 1 kali hitung NumPy."""
+    codes = [""] * len(lats)
     try:
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        return 6371.0 * c
-    except Exception:
-        return float("inf")
+        data_lokasi_raw = get_data_lokasi_any()
+
+        # Prioritaskan Posko Pengungsian; jika tidak ada, gunakan semua lokasi dengan koordinat
+        candidates = [
+            l
+            for l in data_lokasi_raw
+            if l.get("jenis_lokasi") == "Posko Pengungsian" and l.get("latitude") and l.get("longitude")
+        ]
+        if not candidates:
+            candidates = [l for l in data_lokasi_raw if l.get("latitude") and l.get("longitude")]
+
+        if candidates and codes:
+            c_lat, c_lon, c_idx = coords_from_rows(candidates)
+            idx, _dist = nearest_index([float(v) for v in lats], [float(v) for v in lons], c_lat, c_lon)
+            for i, j in enumerate(idx):
+                if j >= 0:
+                    nearest = candidates[int(c_idx[j])]
+                    codes[i] = nearest.get("kode_lokasi") or nearest.get("kode") or ""
+
+    except Exception as e:
+        print(f"Error mencari posko terdekat: {e}")
+    return codes
+
+
+def _enrich_absensi_rows(rows) -> None:
+    """Batch offline: lokasi (wilayah GeoJSON), posko terdekat & kecamatan/desa untuk banyak titik."""
+    lats = [r["latitude"] for r in rows]
+    lons = [r["longitude"] for r in rows]
+    codes = _nearest_posko_codes(lats, lons)
+    if reverse_geocode_many is not None:
+        wilayah_list = reverse_geocode_many(list(zip(lats, lons)))
+    else:
+        wilayah_list = [None] * len(rows)
+    for r, code, wilayah in zip(rows, codes, wilayah_list):
+        r["lokasi"] = cek_wilayah_geojson(r["latitude"], r["longitude"])
+        r["lokasi_posko"] = code
+        if wilayah:
+            r["kecamatan"] = wilayah.get("kecamatan")
+            r["desa_kelurahan"] = wilayah.get("desa_kelurahan")
+
+
+def _enrich_lokasi_rows(rows) -> None:
+    """Batch offline: kecamatan/desa lokasi (sama dengan submit_lokasi) sebelum INSERT."""
+    for r in rows:
+        r["kecamatan"], r["desa_kelurahan"] = _resolve_wilayah_lokasi(
+            r["nama_kabkota"], r["kecamatan"], r["desa_kelurahan"], r["latitude"], r["longitude"]
+        )
+
+
+# Batch offline: POST /api/batch/submit (asesmen/absensi/lokasi dari HP tanpa sinyal)
+register_batch_routes(app, enrich_absensi=_enrich_absensi_rows, enrich_lokasi=_enrich_lokasi_rows)
 
 
 @app.route("/submit_absensi", methods=["POST"])
@@ -1592,42 +1869,18 @@ def submit_absensi():
     waktu_utc = _parse_waktu_form(request.form.get("waktu"))
 
     lokasi_terdeteksi = "Mencari..."
+    wilayah = None
 
     if latitude and longitude:
         lokasi_terdeteksi = cek_wilayah_geojson(latitude, longitude)
+        # Kecamatan & desa/kelurahan dari index polygon kel/desa
+        if reverse_geocode is not None:
+            wilayah = reverse_geocode(latitude, longitude)
 
     # Cari posko terdekat berdasarkan koordinat absensi
     lokasi_posko_code = ""
-    try:
-        data_lokasi_raw = get_data_lokasi_any()
-
-        # Prioritaskan Posko Pengungsian; jika tidak ada, gunakan semua lokasi dengan koordinat
-        candidates = [
-            l
-            for l in data_lokasi_raw
-            if l.get("jenis_lokasi") == "Posko Pengungsian" and l.get("latitude") and l.get("longitude")
-        ]
-        if not candidates:
-            candidates = [l for l in data_lokasi_raw if l.get("latitude") and l.get("longitude")]
-
-        min_dist = None
-        nearest = None
-        for p in candidates:
-            try:
-                plat = float(p.get("latitude"))
-                plong = float(p.get("longitude"))
-                dist = haversine_distance(latitude, longitude, plat, plong)
-                if min_dist is None or dist < min_dist:
-                    min_dist = dist
-                    nearest = p
-            except Exception:
-                continue
-
-        if nearest:
-            lokasi_posko_code = nearest.get("kode_lokasi") or nearest.get("kode") or ""
-
-    except Exception as e:
-        print(f"Error mencari posko terdekat: {e}")
+    if latitude and longitude:
+        lokasi_posko_code = _nearest_posko_codes([latitude], [longitude])[0]
 
     data = {
         "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
@@ -1639,11 +1892,16 @@ def submit_absensi():
         "catatan": catatan,
         "photo_link": "",
         "waktu": waktu_utc,
+        "kecamatan": wilayah.get("kecamatan") if wilayah else None,
+        "desa_kelurahan": wilayah.get("desa_kelurahan") if wilayah else None,
     }
 
     write_lokasi_relawan_any(data)
     msg_type = "success" if lokasi_terdeteksi != "Luar Wilayah Sumut" else "warning"
-    flash(f"Absensi berhasil! Posisi Anda terdeteksi di: {lokasi_terdeteksi}", msg_type)
+    posisi = lokasi_terdeteksi
+    if wilayah:
+        posisi = f"{wilayah['desa_kelurahan']}, Kec. {wilayah['kecamatan']}, {lokasi_terdeteksi}"
+    flash(f"Absensi berhasil! Posisi Anda terdeteksi di: {posisi}", msg_type)
     return redirect(url_for("map_view"))
 
 
@@ -1672,8 +1930,63 @@ def _get_asesmen_photo_path(asesmen_name: str):
         id_relawan=session.get("id_relawan", "UNKNOWN"),
         media_root=MEDIA_DIR,
     )
+    if paths:
+        enqueue("image.variants", {"paths": paths})  # thumbnail/WebP oleh worker
     return photos_to_photo_path_value(paths)
 
+
+# ------------------------------------------------------------------------------
+# Job background (job_queue): efek samping submit dikerjakan worker
+# ------------------------------------------------------------------------------
+@job_handler("image.variants", fallback=lambda p: submit_images(MEDIA_DIR, p.get("paths") or []))
+def _job_image_variants(payload):
+    """Varian thumbnail/display WebP untuk foto yang baru di-upload."""
+    process_images(MEDIA_DIR, payload.get("paths") or [])
+
+
+def _resolve_wilayah_lokasi(nama_kabkota, kecamatan, desa_kelurahan, latitude, longitude):
+    """Isi kecamatan/desa yang kosong dari koordinat + samakan ejaan dengan data wilayah baku."""
+    # Kecamatan/desa kosong -> isi otomatis dari koordinat (polygon kel/desa)
+    if (not kecamatan or not desa_kelurahan) and reverse_geocode is not None:
+        wilayah = reverse_geocode(latitude, longitude)
+        if wilayah:
+            kecamatan = kecamatan or wilayah.get("kecamatan")
+            desa_kelurahan = desa_kelurahan or wilayah.get("desa_kelurahan")
+
+    # Samakan ejaan kecamatan/desa dengan data wilayah baku (CSV)
+    if canonical_wilayah is not None and kecamatan:
+        try:
+            kec_baku = canonical_wilayah(nama_kabkota, kecamatan)
+            if kec_baku:
+                kecamatan = kec_baku["kecamatan"]
+                desa_baku = canonical_wilayah(nama_kabkota, kecamatan, desa_kelurahan) if desa_kelurahan else None
+                if desa_baku:
+                    desa_kelurahan = desa_baku["desa_kelurahan"]
+        except Exception as e:
+            print(f"[WILAYAH] normalisasi nama wilayah gagal: {e}")
+    return kecamatan, desa_kelurahan
+
+
+@job_handler("lokasi.wilayah")
+def _job_lokasi_wilayah(payload):
+    """Lengkapi kecamatan/desa data_lokasi setelah submit (idempoten)."""
+    kecamatan, desa_kelurahan = _resolve_wilayah_lokasi(
+        payload.get("nama_kabkota"),
+        payload.get("kecamatan"),
+        payload.get("desa_kelurahan"),
+        payload.get("latitude"),
+        payload.get("longitude"),
+    )
+    if (kecamatan, desa_kelurahan) == (payload.get("kecamatan"), payload.get("desa_kelurahan")):
+        return
+    if pg_update_wilayah_bulk is None:
+        raise RuntimeError("pg_data tidak tersedia")
+    pg_update_wilayah_bulk(
+        "data_lokasi",
+        [{"id": payload["id_lokasi"], "kecamatan": kecamatan, "desa_kelurahan": desa_kelurahan}],
+    )
+    notify_data_changed()
+
 def _require_login():
     if not session.get("logged_in"):
         flash("Silahkan login terlebih dahulu!", "danger")
@@ -2214,6 +2527,15 @@ def submit_lokasi():
         flash("Gagal simpan lokasi: Jenis Lokasi, Kab/Kota, dan Nama Lokasi wajib diisi.", "danger")
         return redirect(url_for("map_view"))
 
+    # Kecamatan/desa otomatis (reverse geocoding + ejaan baku): oleh worker bila
+    # antrian aktif, selain itu langsung sebelum INSERT (tanpa UPDATE susulan)
+    wilayah_queued = jobs_queued()
+    if not wilayah_queued:
+        kecamatan, desa_kelurahan = _resolve_wilayah_lokasi(
+            nama_kabkota, kecamatan, desa_kelurahan, latitude, longitude
+        )
+
+    new_id = None
     try:
         new_id = pg_insert_data_lokasi(
             id_lokasi=id_lokasi,
@@ -2240,12 +2562,24 @@ def submit_lokasi():
     except Exception as e:
         flash(f"Gagal simpan lokasi: {e}", "danger")
 
+    if new_id and wilayah_queued:
+        enqueue("lokasi.wilayah", {
+            "id_lokasi": new_id,
+            "nama_kabkota": nama_kabkota,
+            "kecamatan": kecamatan,
+            "desa_kelurahan": desa_kelurahan,
+            "latitude": latitude,
+            "longitude": longitude,
+        })
+
     # Upload foto lokasi (opsional) -> media/photo_lokasi/<ID_LOKASI>.<ext>
     try:
-        if photo_file and getattr(photo_file, "filename", ""):
+        if new_id and photo_file and getattr(photo_file, "filename", ""):
             saved = save_lokasi_photo(photo_file, id_lokasi=new_id, media_root=MEDIA_DIR)
             if saved and pg_update_data_lokasi_photo_path is not None:
                 pg_update_data_lokasi_photo_path(new_id, saved)
+            if saved:
+                enqueue("image.variants", {"paths": [saved]})
     except Exception as e:
         flash(f"Lokasi tersimpan, tapi upload foto gagal: {e}", "warning")
 
@@ -0,0 +1,307 @@
+# batch_ingest.py
+# SATGAS USU Peduli - Kirim batch data offline (asesmen / absensi / lokasi)
+# ---------------------------------------------------------------
+# - Relawan di area tanpa sinyal menyimpan form di HP; begitu dapat sinyal
+#   semua dikirim sekaligus ke POST /api/batch/submit (JSON), bukan ratusan
+#   POST form + redirect.
+# - Tiap item membawa client_uuid (dibuat di HP) + waktu asli pengisian.
+#   Kirim ulang batch yang sama aman: baris dengan client_uuid yang sudah ada
+#   dilewati (ON CONFLICT DO NOTHING) dan dilaporkan "duplicate".
+# - Semua item divalidasi dulu; item tidak valid dilaporkan per item, sisanya
+#   tetap disimpan. Insert per tabel = 1 statement multi-row (UNNEST), semua
+#   tabel dalam 1 transaksi (pg_data.pg_insert_batch).
+# - Skor/status asesmen dihitung sama dengan route submit_asesmen_*.
+# - Foto tidak ikut batch (upload terpisah saat sinyal bagus).
+# Format:
+#   {"items": [{"uuid": "...", "type": "asesmen_kesehatan", "waktu": "2025-01-02T08:30",
+#               "latitude": 3.59, "longitude": 98.67, "p1": 3, ...}, ...]}
+#   type: asesmen_<kesehatan|pendidikan|psikososial|infrastruktur|wash|kondisi>,
+#         absensi, lokasi. Nama field = nama field form masing-masing.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import datetime
+import math
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from flask import jsonify, request, session
+
+from job_queue import enqueue, jobs_queued
+
+try:
+    from pg_data import BATCH_TARGETS, pg_insert_batch
+except Exception as _pg_err:
+    print(f"[BATCH] Error import pg_data: {_pg_err}")
+    BATCH_TARGETS = {}
+    pg_insert_batch = None
+
+# ==========================
+# CONFIG
+# ==========================
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "500") or "500")
+# Waktu sebelum tahun ini pasti jam HP yang salah (atau input rusak) -> ditolak
+WAKTU_MIN_YEAR = int(os.environ.get("BATCH_WAKTU_MIN_YEAR", "2020") or "2020")
+
+_TZ_WIB = ZoneInfo("Asia/Jakarta")
+
+# Bobot per soal (skala 1-5), sama dengan submit_asesmen_* di app_postgres
+_WEIGHTS_10 = {
+    "p1": 1.4, "p2": 1.0, "p3": 1.0, "p4": 1.0, "p5": 0.8,
+    "p6": 1.5, "p7": 0.9, "p8": 1.3, "p9": 0.8, "p10": 0.9,
+}
+ASESMEN_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "kesehatan": {"p1": 1.0, "p2": 1.0, "p3": 1.0, "p4": 1.5, "p5": 1.5},
+    "pendidikan": _WEIGHTS_10,
+    "psikososial": _WEIGHTS_10,
+    "infrastruktur": _WEIGHTS_10,
+    "wash": _WEIGHTS_10,
+}
+
+
+# ==========================
+# PARSING / VALIDASI
+# ==========================
+def _int_1_5(val: Any, default: int = 1) -> int:
+    try:
+        return min(5, max(1, int(val)))
+    except Exception:
+        return default
+
+
+def _radius(val: Any) -> float:
+    try:
+        r = float(val) if val not in (None, "") else 2.0
+    except Exception:
+        r = 2.0
+    # "nan"/"inf" lolos float(); nan <= 0 False & min(nan, 50) = nan -> tolak
+    if not math.isfinite(r) or r <= 0:
+        r = 2.0
+    return min(r, 50.0)
+
+
+def _text(item: Dict[str, Any], key: str) -> Optional[str]:
+    v = item.get(key)
+    if v is None:
+        return None
+    v = str(v).strip()
+    return v or None
+
+
+def _parse_waktu(v: Any) -> Optional[datetime.datetime]:
+    """ISO (tanpa tz = WIB, seperti input datetime-local) -> UTC naive. Kosong -> None (now() di DB)."""
+    s = str(v or "").strip()
+    if not s:
+        return None
+    try:
+        dt = datetime.datetime.fromisoformat(s.replace("Z", "+00:00"))
+        if dt.year < WAKTU_MIN_YEAR:
+            raise ValueError
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=_TZ_WIB)
+        dt = dt.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    except (ValueError, OverflowError):
+        raise ValueError("waktu tidak valid (format ISO, mis. 2025-01-02T08:30)")
+    if dt > datetime.datetime.utcnow() + datetime.timedelta(days=1):
+        raise ValueError("waktu di masa depan (cek jam HP)")
+    return dt
+
+
+def _coord(item: Dict[str, Any], required: bool) -> Tuple[Optional[float], Optional[float]]:
+    lat, lon = item.get("latitude"), item.get("longitude")
+    if lat in (None, "") or lon in (None, ""):
+        if required:
+            raise ValueError("latitude/longitude wajib diisi")
+        return None, None
+    try:
+        lat_f, lon_f = float(lat), float(lon)
+    except (TypeError, ValueError):
+        raise ValueError("latitude/longitude tidak valid")
+    if not (-90 <= lat_f <= 90 and -180 <= lon_f <= 180):
+        raise ValueError("latitude/longitude di luar jangkauan")
+    return lat_f, lon_f
+
+
+def _skor_status(answers: Dict[str, int], weights: Dict[str, float]) -> Tuple[float, str]:
+    skor_100 = sum(answers[k] * weights[k] for k in answers) / sum(5 * weights[k] for k in answers) * 100.0
+    if skor_100 >= 80:
+        return skor_100, "Kritis"
+    if skor_100 >= 60:
+        return skor_100, "Waspada"
+    return skor_100, "Aman"
+
+
+def _kondisi_jawaban(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Sama dengan submit_asesmen_kondisi: p1 lokasi, p2 titik banjir, p3..p11 = k1..k9."""
+    points = item.get("banjir")
+    if points is None:
+        points = list(zip(item.get("banjir_lat[]") or item.get("banjir_lat") or [],
+                          item.get("banjir_lon[]") or item.get("banjir_lon") or []))
+    p2 = {}
+    try:
+        for i, (lat, lon) in enumerate(points, start=1):
+            lat_f, lon_f = float(lat), float(lon)
+            if not (math.isfinite(lat_f) and math.isfinite(lon_f)):
+                raise ValueError
+            p2[f"b{i}"] = [lat_f, lon_f]
+        ks = {f"p{i}": int(item.get(f"k{i - 2}", 0) or 0) for i in range(3, 12)}
+    except (TypeError, ValueError):
+        raise ValueError("titik banjir / nilai k1..k9 tidak valid")
+    return {"p1": item.get("lokasi"), "p2": p2, **ks}
+
+
+def parse_item(item: Dict[str, Any], id_relawan: str) -> Tuple[str, Dict[str, Any]]:
+    """1 item JSON -> (target, baris siap insert). ValueError bila tidak valid."""
+    kind = str(item.get("type") or "").strip().lower()
+    if kind not in BATCH_TARGETS:
+        raise ValueError(f"type tidak dikenal: {kind or '-'}")
+    waktu = _parse_waktu(item.get("waktu"))
+    row: Dict[str, Any] = {"waktu": waktu, "id_relawan": id_relawan}
+
+    if kind == "absensi":
+        lat, lon = _coord(item, required=True)
+        row.update(latitude=lat, longitude=lon, catatan=_text(item, "catatan"))
+        return kind, row
+
+    if kind == "lokasi":
+        lat, lon = _coord(item, required=True)
+        row.update(
+            latitude=lat,
+            longitude=lon,
+            id_lokasi=None,  # diisi pg_data (nomor lanjut per jenis + kab/kota)
+            jenis_lokasi=_text(item, "jenis_lokasi"),
+            nama_kabkota=_text(item, "nama_kabkota"),
+            nama_lokasi=_text(item, "nama_lokasi"),
+            status_lokasi=_text(item, "status_lokasi") or "Aktif",
+            tingkat_akses=_text(item, "tingkat_akses") or "Public",
+            kondisi=_text(item, "kondisi") or "Normal",
+        )
+        if not row["jenis_lokasi"] or not row["nama_kabkota"] or not row["nama_lokasi"]:
+            raise ValueError("Jenis Lokasi, Kab/Kota, dan Nama Lokasi wajib diisi")
+        for key in ("alamat", "kecamatan", "desa_kelurahan", "lokasi_text", "catatan", "pic", "pic_hp"):
+            row[key] = _text(item, key)
+        return kind, row
+
+    # asesmen_<jenis>
+    jenis = kind[len("asesmen_"):]
+    lat, lon = _coord(item, required=False)
+    if jenis == "kondisi":
+        jawaban, skor, status = _kondisi_jawaban(item), 0.0, "Aman"
+    else:
+        weights = ASESMEN_WEIGHTS[jenis]
+        jawaban = {k: _int_1_5(item.get(k)) for k in weights}
+        skor, status = _skor_status(jawaban, weights)
+    row.update(
+        kode_posko=_text(item, "kode_posko"),
+        jawaban=jawaban,
+        skor=float(skor),
+        status=status,
+        latitude=lat,
+        longitude=lon,
+        catatan=_text(item, "catatan"),
+        radius=_radius(item.get("radius")),
+    )
+    return kind, row
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_batch_routes(app, enrich_absensi: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                          enrich_lokasi: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+    """enrich_absensi(rows): isi lokasi / lokasi_posko / kecamatan / desa untuk banyak titik sekaligus.
+    enrich_lokasi(rows): isi kecamatan/desa lokasi sebelum INSERT bila antrian job nonaktif."""
+
+    @app.route("/api/batch/submit", methods=["POST"])
+    def api_batch_submit():
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if pg_insert_batch is None or not os.environ.get("DATABASE_URL"):
+            return jsonify({"success": False, "error": "DATABASE_URL/pg_data belum siap"}), 503
+
+        body = request.get_json(silent=True)
+        items = body.get("items") if isinstance(body, dict) else body
+        if not isinstance(items, list) or not items:
+            return jsonify({"success": False, "error": "items (array) wajib diisi"}), 400
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({"success": False, "error": f"Maksimal {BATCH_MAX_ITEMS} item per batch"}), 413
+
+        id_relawan = str(session.get("id_relawan") or "UNKNOWN")
+        results: List[Dict[str, Any]] = []
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        pending: List[Tuple[int, str, Dict[str, Any]]] = []
+        seen = set()
+
+        for i, item in enumerate(items):
+            raw_uuid = item.get("uuid") or item.get("client_uuid") if isinstance(item, dict) else None
+            res: Dict[str, Any] = {"index": i, "uuid": raw_uuid}
+            results.append(res)
+            try:
+                if not isinstance(item, dict):
+                    raise ValueError("item harus object")
+                try:
+                    cu = str(uuid.UUID(str(raw_uuid)))
+                except ValueError:
+                    raise ValueError("uuid tidak valid")
+                target, row = parse_item(item, id_relawan)
+            except ValueError as e:
+                res.update(status="invalid", error=str(e))
+                continue
+            res["uuid"] = cu
+            if (target, cu) in seen:
+                res["status"] = "duplicate"  # terkirim 2x dalam batch yang sama
+                continue
+            seen.add((target, cu))
+            row["client_uuid"] = cu
+            groups.setdefault(target, []).append(row)
+            pending.append((i, target, row))
+
+        if enrich_absensi is not None and groups.get("absensi"):
+            try:
+                enrich_absensi(groups["absensi"])
+            except Exception as e:
+                print(f"[BATCH] enrich absensi gagal: {e}")
+
+        # Kecamatan/desa lokasi: oleh worker bila antrian aktif, selain itu sebelum INSERT
+        wilayah_queued = jobs_queued() or enrich_lokasi is None
+        if not wilayah_queued and groups.get("lokasi"):
+            try:
+                enrich_lokasi(groups["lokasi"])
+            except Exception as e:
+                print(f"[BATCH] enrich lokasi gagal: {e}")
+
+        try:
+            inserted = pg_insert_batch(groups)
+        except Exception as e:
+            # 1 transaksi: tidak ada yang tersimpan -> klien boleh kirim ulang batch utuh
+            for i, _target, _row in pending:
+                results[i].update(status="error", error="gagal simpan batch")
+            print(f"[BATCH] gagal simpan {len(pending)} item: {e}")
+            return jsonify({"success": False, "error": f"Gagal simpan batch: {e}", "results": results}), 500
+
+        for i, target, row in pending:
+            new = inserted.get(target, {})
+            if row["client_uuid"] in new:
+                results[i]["status"] = "inserted"
+                if new[row["client_uuid"]] is not None:
+                    results[i]["id"] = new[row["client_uuid"]]
+                if target == "lokasi" and wilayah_queued:
+                    enqueue("lokasi.wilayah", {
+                        "id_lokasi": new[row["client_uuid"]],
+                        "nama_kabkota": row["nama_kabkota"],
+                        "kecamatan": row["kecamatan"],
+                        "desa_kelurahan": row["desa_kelurahan"],
+                        "latitude": row["latitude"],
+                        "longitude": row["longitude"],
+                    })
+            else:
+                results[i]["status"] = "duplicate"  # sudah tersimpan di kiriman sebelumnya
+
+        counts: Dict[str, int] = {}
+        for r in results:
+            counts[r["status"]] = counts.get(r["status"], 0) + 1
+        print(f"[BATCH] {id_relawan}: {len(items)} item -> {counts}")
+        return jsonify({"success": True, "counts": counts, "results": results})
@@ -0,0 +1,96 @@
+"""Microbenchmark geo_math: loop haversine scalar vs versi NumPy.
+
+Jalankan:
+    python benchmarks/bench_geo.py
+
+Data sintetis di sekitar Sumatera Utara (tidak butuh DATABASE_URL).
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from geo_math import (  # noqa: E402
+    buffer_overlap_counts,
+    haversine_km,
+    nearest_index,
+    within_radius_pairs,
+)
+
+# Kira-kira bbox Sumut
+LAT_MIN, LAT_MAX = 0.5, 4.3
+LON_MIN, LON_MAX = 97.0, 100.5
+
+
+def _random_points(rng, n):
+    return rng.uniform(LAT_MIN, LAT_MAX, n), rng.uniform(LON_MIN, LON_MAX, n)
+
+
+def _timeit(label, fn, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<55s} {best * 1000:10.2f} ms")
+    return result
+
+
+def main():
+    rng = np.random.default_rng(42)
+
+    n_relawan, n_posko, n_asesmen = 2_000, 10_000, 200_000
+    r_lat, r_lon = _random_points(rng, n_relawan)
+    p_lat, p_lon = _random_points(rng, n_posko)
+    a_lat, a_lon = _random_points(rng, n_asesmen)
+    a_rad = rng.uniform(0.5, 5.0, n_asesmen)
+
+    print(f"relawan={n_relawan} posko={n_posko} asesmen={n_asesmen}")
+    print("-" * 68)
+
+    # Posko terdekat: loop Python (cara lama submit_absensi) untuk 50 relawan
+    sample = 50
+
+    def loop_nearest():
+        out = []
+        for i in range(sample):
+            best_d, best_j = None, -1
+            for j in range(n_posko):
+                d = haversine_km(r_lat[i], r_lon[i], p_lat[j], p_lon[j])
+                if best_d is None or d < best_d:
+                    best_d, best_j = d, j
+            out.append(best_j)
+        return out
+
+    loop_idx = _timeit(f"nearest posko, loop scalar ({sample} relawan)", loop_nearest, repeat=1)
+    vec_idx, _ = _timeit(
+        f"nearest posko, numpy ({sample} relawan)",
+        lambda: nearest_index(r_lat[:sample], r_lon[:sample], p_lat, p_lon),
+    )
+    assert list(vec_idx) == loop_idx, "hasil nearest_index beda dengan loop scalar"
+
+    _timeit(
+        f"nearest posko, numpy ({n_relawan} relawan)",
+        lambda: nearest_index(r_lat, r_lon, p_lat, p_lon),
+    )
+
+    ia, _ib, _d = _timeit(
+        "posko dalam radius asesmen (grid join)",
+        lambda: within_radius_pairs(p_lat, p_lon, a_lat, a_lon, a_rad),
+    )
+    print(f"{'  -> pasangan':<55s} {ia.size:10d}")
+
+    counts = _timeit(
+        "buffer overlap counts (20k asesmen)",
+        lambda: buffer_overlap_counts(a_lat[:20_000], a_lon[:20_000], a_rad[:20_000]),
+    )
+    print(f"{'  -> rata-rata irisan per buffer':<55s} {counts.mean():10.2f}")
+
+
+if __name__ == "__main__":
+    main()
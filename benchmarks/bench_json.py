@@ -0,0 +1,129 @@
+"""Microbenchmark serialisasi JSON: jalur lama vs fast_json.
+
+Jalankan:
+    python benchmarks/bench_json.py [--rows 50000]
+
+Data sintetis 50k baris asesmen (bentuk sama dengan hasil pg_fetchall:
+Decimal lat/lon/skor, datetime bertz, jawaban jsonb -> dict). Tidak butuh
+DATABASE_URL. Yang dibandingkan:
+  - lama   : _json_safe_row versi copy dict + Flask DefaultJSONProvider (sort_keys)
+  - stdlib : _json_safe_row in-place + json.dumps kompak (fallback fast_json)
+  - orjson : _json_safe_row in-place + fast_json.dumps (bila orjson terpasang)
+  - orjson mentah: tanpa _json_safe_row, Decimal/datetime ditangani default
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from pathlib import Path
+
+import numpy as np
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fast_json  # noqa: E402
+from pg_data import _json_safe_row, _json_safe_value  # noqa: E402
+
+STATUS_ASESMEN = ("Aman", "Waspada", "Kritis")
+
+
+def _make_rows(n, seed=42):
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(0.5, 4.3, n)
+    lon = rng.uniform(97.0, 100.5, n)
+    skor = rng.integers(0, 100, n)
+    ages = rng.integers(0, 90 * 24 * 3600, n)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(n):
+        jawaban = {f"p{k}": int(rng.integers(0, 5)) for k in range(1, 13)}
+        rows.append(
+            {
+                "id": i + 1,
+                "waktu": now - timedelta(seconds=int(ages[i])),
+                "id_relawan": f"REL{i % 2000:04d}",
+                "kode_posko": f"P{i % 10000:05d}",
+                "jawaban": jawaban,
+                "skor": Decimal(int(skor[i])),
+                "status": STATUS_ASESMEN[i % 3],
+                "latitude": Decimal(f"{lat[i]:.6f}"),
+                "longitude": Decimal(f"{lon[i]:.6f}"),
+                "catatan": "Catatan lapangan ✓" if i % 7 == 0 else None,
+                "radius": Decimal("1.5"),
+                "photo_path": None,
+                "is_active": True,
+            }
+        )
+    return rows
+
+
+def _fresh(rows):
+    # _json_safe_row in-place mengubah dict -> tiap ulangan butuh salinan baru
+    # (disiapkan di luar pengukuran, setara dict baru dari pg_fetchall)
+    return [dict(r) for r in rows]
+
+
+def _timeit(label, prepare, fn, repeat=3):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        arg = prepare()
+        t0 = time.perf_counter()
+        out = fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    size = len(out) / 1024 / 1024
+    print(f"{label:<48s} {best * 1000:10.2f} ms  {size:7.2f} MB")
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=50_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    rows = _make_rows(args.rows)
+    app = Flask(__name__)
+    old_provider = DefaultJSONProvider(app)  # jsonify bawaan: sort_keys=True
+
+    def old_copy_row(row):
+        return {k: _json_safe_value(v) for k, v in row.items()}
+
+    def old_path(rs):
+        return old_provider.dumps([old_copy_row(r) for r in rs]).encode("utf-8")
+
+    def stdlib_path(rs):
+        data = [_json_safe_row(r) for r in rs]
+        return json.dumps(data, default=fast_json._default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def fast_path(rs):
+        return fast_json.dumps([_json_safe_row(r) for r in rs])
+
+    def fast_raw(rs):
+        return fast_json.dumps(rs)
+
+    print(f"rows={args.rows} backend={fast_json.BACKEND}")
+    print("-" * 78)
+    t_old, b_old = _timeit("lama: copy row + DefaultJSONProvider", lambda: rows, old_path, args.repeat)
+    t_std, b_std = _timeit("stdlib: in-place row + json.dumps", lambda: _fresh(rows), stdlib_path, args.repeat)
+    if fast_json.BACKEND == "orjson":
+        t_fast, b_fast = _timeit("orjson: in-place row + fast_json.dumps", lambda: _fresh(rows), fast_path, args.repeat)
+        t_raw, b_raw = _timeit("orjson: row mentah (default Decimal/datetime)", lambda: rows, fast_raw, args.repeat)
+        # Isi harus identik dengan jalur lama (urutan key boleh beda)
+        assert json.loads(b_fast) == json.loads(b_old), "fast_json beda dengan jalur lama"
+        assert json.loads(b_raw) == json.loads(b_old), "fast_json (mentah) beda dengan jalur lama"
+        print("-" * 78)
+        print(f"speedup orjson vs lama: {t_old / t_fast:5.1f}x (mentah {t_old / t_raw:5.1f}x)")
+    else:
+        print("(orjson tidak terpasang / FAST_JSON=0: hanya fallback stdlib)")
+    assert json.loads(b_std) == json.loads(b_old), "stdlib beda dengan jalur lama"
+    print(f"speedup stdlib vs lama: {t_old / t_std:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,470 @@
+"""Load test: simulasi lonjakan relawan di hari bencana (asyncio, stdlib saja).
+
+Tiap "virtual user" (VU) punya cookie session sendiri dan menjalankan alur
+nyata lewat HTTP ke server yang sedang jalan (flask run / gunicorn):
+  relawan: login -> buka peta (/) -> berulang: /api/refresh_map berkala,
+           submit_absensi, submit_asesmen_<jenis> + foto, sesekali buka peta
+  admin  : login -> buka peta -> berulang: /api/admin_asesmen_list,
+           /api/set_asesmen_active (moderasi), /api/admin_action_logs
+
+Persiapan (DB lokal + fixture sintetis, Google Sheets palsu):
+    python benchmarks/fixtures.py --dsn postgresql://... --scale 0.1 --env > /tmp/bench.env
+    set -a; . /tmp/bench.env; set +a
+    SECRET_KEY=x gunicorn -w 4 --threads 8 --pythonpath benchmarks wsgi_bench:app -b 127.0.0.1:5000
+
+Jalankan:
+    python benchmarks/loadtest.py --base-url http://127.0.0.1:5000 --profile ramp
+    python benchmarks/loadtest.py --stages 30:20,10:300,120:300,30:0 --admins 3
+
+Ramp profile = daftar stage "durasi_detik:jumlah_vu"; jumlah VU berubah
+linear dari target stage sebelumnya ke target stage ini (mirip k6).
+
+Hasil: tabel p50/p95/p99 + error rate per endpoint, dan JSON lengkap
+(termasuk timeline per detik: VU aktif, rps, p95, error) di
+benchmarks/results/load-<waktu>-<git sha>.json.
+
+Error = status >= 400, timeout/koneksi gagal, atau (untuk form POST yang
+selalu redirect) flash terakhir di cookie session berkategori "danger".
+Catatan: latency diukur di sisi klien; jalankan load generator di mesin
+lain bila CPU server ikut jenuh.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_routes import RESULTS_DIR, _git, _pct, tiny_png  # noqa: E402
+from fixtures import ADMIN_KODE, ADMIN_NAMA, RELAWAN_KODE  # noqa: E402
+
+ASESMEN_KINDS = ("kesehatan", "pendidikan", "psikososial", "infrastruktur", "wash", "kondisi")
+
+PROFILES = {
+    "smoke": "10:5,20:5",
+    "ramp": "120:200,180:200,30:0",
+    "step": "1:50,60:50,1:100,60:100,1:200,60:200,1:400,60:400,10:0",
+    "spike": "30:20,10:300,90:300,10:20,60:20",
+    "soak": "60:100,1800:100,30:0",
+}
+
+# Sumut kira-kira (koordinat acak absensi/asesmen)
+LAT_RANGE = (1.0, 4.0)
+LON_RANGE = (97.5, 100.0)
+
+
+# ==========================
+# RAMP PROFILE
+# ==========================
+def parse_stages(spec):
+    stages = []
+    for part in str(spec).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        dur, users = part.split(":")
+        stages.append((max(0.0, float(dur)), max(0, int(users))))
+    if not stages:
+        raise ValueError("stages kosong")
+    return stages
+
+
+def target_users(stages, t):
+    """Jumlah VU target pada detik ke-t (interpolasi linear per stage); None = selesai."""
+    prev = 0
+    for dur, users in stages:
+        if t < dur:
+            return round(prev + (users - prev) * (t / dur)) if dur > 0 else users
+        t -= dur
+        prev = users
+    return None
+
+
+# ==========================
+# HTTP (urllib di thread pool)
+# ==========================
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Redirect form POST diukur apa adanya (tidak ikut GET halaman tujuan)
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for k, v in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode("utf-8"))
+    for field, filename, content, ctype in files:
+        head = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {ctype}\r\n\r\n"
+        )
+        parts.append(head.encode("utf-8") + content + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("ascii"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def _last_flash_category(set_cookies):
+    """Kategori flash terbaru dari cookie session Flask (payload hanya ditandatangani, tidak dienkripsi)."""
+    for c in set_cookies or []:
+        if not c.startswith("session="):
+            continue
+        val = c.split(";", 1)[0][len("session="):]
+        compressed = val.startswith(".")
+        payload = (val[1:] if compressed else val).split(".")[0]
+        try:
+            raw = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            if compressed:
+                raw = zlib.decompress(raw)
+            flashes = json.loads(raw).get("_flashes") or []
+        except Exception:
+            return None
+        if not flashes:
+            return None
+        last = flashes[-1]
+        if isinstance(last, dict):  # tagged JSON: {" t": [kategori, pesan]}
+            last = last.get(" t") or []
+        return last[0] if last else None
+    return None
+
+
+def photo_bytes(kb):
+    """PNG valid berukuran ~kb KB (dipad chunk tEXt) -> upload realistis seukuran foto HP."""
+    png = tiny_png()
+    pad = max(0, kb * 1024 - len(png))
+    if pad <= 0:
+        return png
+    data = b"Comment\x00" + os.urandom(pad // 2 + 1).hex()[:pad].encode("ascii")
+    chunk = len(data).to_bytes(4, "big") + b"tEXt" + data + (zlib.crc32(b"tEXt" + data) & 0xFFFFFFFF).to_bytes(4, "big")
+    return png[:-12] + chunk + png[-12:]  # sebelum IEND
+
+
+class VirtualUser:
+    def __init__(self, ctx, vu_id, is_admin):
+        self.ctx = ctx
+        self.vu_id = vu_id
+        self.is_admin = is_admin
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), _NoRedirect())
+
+    def _do(self, method, path, body, ctype):
+        req = urllib.request.Request(self.ctx.base_url + path, data=body, method=method)
+        if ctype:
+            req.add_header("Content-Type", ctype)
+        try:
+            with self.opener.open(req, timeout=self.ctx.timeout) as resp:
+                return resp.status, resp.read(), resp.headers.get_all("Set-Cookie")
+        except urllib.error.HTTPError as e:
+            with e:
+                return e.code, e.read(), e.headers.get_all("Set-Cookie")
+
+    async def call(self, name, method, path, form=None, json_body=None, files=None, check_flash=False):
+        body, ctype = None, None
+        if files:
+            body, ctype = _multipart(form or {}, files)
+        elif form is not None:
+            body, ctype = urllib.parse.urlencode(form).encode("utf-8"), "application/x-www-form-urlencoded"
+        elif json_body is not None:
+            body, ctype = json.dumps(json_body).encode("utf-8"), "application/json"
+
+        loop = asyncio.get_running_loop()
+        t0 = time.perf_counter()
+        status, data, error = None, b"", None
+        try:
+            status, data, cookies = await loop.run_in_executor(self.ctx.pool, self._do, method, path, body, ctype)
+            if status >= 400:
+                error = f"http_{status}"
+            elif check_flash and _last_flash_category(cookies) == "danger":
+                error = "flash_danger"
+        except Exception as e:
+            error = type(e).__name__
+        self.ctx.stats.record(name, (time.perf_counter() - t0) * 1000, error, len(data))
+        return status, data, error
+
+    async def think(self):
+        await asyncio.sleep(self.ctx.think * random.uniform(0.5, 1.5))
+
+
+# ==========================
+# SKENARIO
+# ==========================
+def _rand_coord():
+    return f"{random.uniform(*LAT_RANGE):.6f}", f"{random.uniform(*LON_RANGE):.6f}"
+
+
+async def relawan_flow(vu):
+    ctx = vu.ctx
+    nama = ctx.relawan_template.format(n=(vu.vu_id % ctx.relawan_pool) + 1)
+    await vu.call("login", "POST", "/login", form={"nama": nama, "kode_akses": ctx.relawan_kode}, check_flash=True)
+    await vu.call("map_view", "GET", "/")
+    next_refresh = time.monotonic() + ctx.refresh_every * random.random()
+
+    while True:
+        await vu.think()
+        if time.monotonic() >= next_refresh:
+            await vu.call("api_refresh_map", "GET", "/api/refresh_map")
+            next_refresh = time.monotonic() + ctx.refresh_every
+            continue
+
+        r = random.random()
+        lat, lon = _rand_coord()
+        if r < ctx.p_absensi:
+            await vu.call(
+                "submit_absensi", "POST", "/submit_absensi",
+                form={"latitude": lat, "longitude": lon, "catatan": "loadtest"}, check_flash=True,
+            )
+        elif r < ctx.p_absensi + ctx.p_asesmen:
+            kind = random.choice(ASESMEN_KINDS)
+            form = {
+                "kode_posko": f"L{random.randint(1, ctx.lokasi_pool):06d}",
+                "latitude": lat,
+                "longitude": lon,
+                "radius": "3",
+                "catatan": "loadtest",
+                **{f"p{i}": str(random.randint(1, 5)) for i in range(1, 13)},
+            }
+            files = [("photos", f"foto{i}.png", ctx.photo, "image/png") for i in range(ctx.photos)]
+            await vu.call(f"submit_asesmen_{kind}", "POST", f"/submit_asesmen_{kind}", form=form, files=files, check_flash=True)
+        elif r < ctx.p_absensi + ctx.p_asesmen + ctx.p_map:
+            await vu.call("map_view", "GET", "/")
+
+
+async def admin_flow(vu):
+    ctx = vu.ctx
+    await vu.call("login", "POST", "/login", form={"nama": ctx.admin_nama, "kode_akses": ctx.admin_kode}, check_flash=True)
+    await vu.call("map_view", "GET", "/")
+
+    while True:
+        await vu.think()
+        _, data, error = await vu.call("api_admin_asesmen_list", "GET", "/api/admin_asesmen_list?hours=24&limit=20")
+        rows = []
+        if not error:
+            try:
+                rows = json.loads(data).get("rows") or []
+            except Exception:
+                rows = []
+
+        r = random.random()
+        if rows and r < 0.7:
+            row = random.choice(rows)
+            await vu.think()
+            await vu.call(
+                "api_set_asesmen_active", "POST", "/api/set_asesmen_active",
+                json_body={"kind": row.get("kind"), "id": row.get("id"), "is_active": not row.get("is_active"), "note": "loadtest"},
+            )
+        elif r < 0.85:
+            await vu.call("api_admin_action_logs", "GET", "/api/admin_action_logs")
+        else:
+            await vu.call("api_admin_lokasi_list", "GET", "/api/admin_lokasi_list")
+
+
+# ==========================
+# STATISTIK
+# ==========================
+class Stats:
+    """Dipanggil hanya dari event loop (1 thread) -> tanpa lock."""
+
+    def __init__(self):
+        self.t_start = time.monotonic()
+        self.users = 0
+        self.lat = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.bytes = Counter()
+        self.timeline = defaultdict(lambda: {"users": 0, "req": 0, "err": 0, "ms": []})
+
+    def record(self, name, ms, error, nbytes):
+        self.lat[name].append(ms)
+        self.bytes[name] += nbytes
+        if error:
+            self.errors[name][error] += 1
+        sec = self.timeline[int(time.monotonic() - self.t_start)]
+        sec["users"] = max(sec["users"], self.users)
+        sec["req"] += 1
+        sec["err"] += 1 if error else 0
+        sec["ms"].append(ms)
+
+    def summary(self, duration_s):
+        endpoints = {}
+        for name in sorted(self.lat):
+            ms = self.lat[name]
+            n_err = sum(self.errors[name].values())
+            endpoints[name] = {
+                "n": len(ms),
+                "rps": round(len(ms) / duration_s, 2) if duration_s else None,
+                "ms": {
+                    "p50": round(_pct(ms, 0.50), 1),
+                    "p95": round(_pct(ms, 0.95), 1),
+                    "p99": round(_pct(ms, 0.99), 1),
+                    "max": round(max(ms), 1),
+                },
+                "error_rate": round(n_err / len(ms), 4),
+                "errors": dict(self.errors[name]),
+                "avg_bytes": int(self.bytes[name] / len(ms)),
+            }
+        timeline = [
+            {
+                "t": t,
+                "users": s["users"],
+                "rps": s["req"],
+                "err": s["err"],
+                "p95_ms": round(_pct(s["ms"], 0.95), 1),
+            }
+            for t, s in sorted(self.timeline.items())
+        ]
+        return endpoints, timeline
+
+
+def print_report(endpoints, duration_s):
+    print(f"\n{'endpoint':32} {'n':>7} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>7}  errors")
+    total_n = total_err = 0
+    for name, e in endpoints.items():
+        total_n += e["n"]
+        total_err += sum(e["errors"].values())
+        errs = ", ".join(f"{k}={v}" for k, v in sorted(e["errors"].items()))
+        print(
+            f"{name:32} {e['n']:7d} {e['rps']:7.2f} {e['ms']['p50']:8.1f} {e['ms']['p95']:8.1f} "
+            f"{e['ms']['p99']:8.1f} {e['error_rate'] * 100:6.2f}%  {errs}"
+        )
+    if total_n:
+        print(f"{'TOTAL':32} {total_n:7d} {total_n / duration_s:7.2f} {'':8} {'':8} {'':8} {total_err / total_n * 100:6.2f}%")
+
+
+# ==========================
+# RUNNER
+# ==========================
+class Context:
+    def __init__(self, args, stats, pool):
+        self.base_url = args.base_url.rstrip("/")
+        self.timeout = args.timeout
+        self.think = args.think
+        self.refresh_every = args.refresh_every
+        self.p_absensi = args.p_absensi
+        self.p_asesmen = args.p_asesmen
+        self.p_map = args.p_map
+        self.photos = args.photos
+        self.photo = photo_bytes(args.photo_kb)
+        self.relawan_template = args.relawan_template
+        self.relawan_pool = max(1, args.relawan_pool)
+        self.relawan_kode = args.relawan_kode
+        self.admin_nama = args.admin_nama
+        self.admin_kode = args.admin_kode
+        self.lokasi_pool = max(1, args.lokasi_pool)
+        self.stats = stats
+        self.pool = pool
+
+
+async def _run_vu(vu):
+    try:
+        await (admin_flow(vu) if vu.is_admin else relawan_flow(vu))
+    except asyncio.CancelledError:
+        pass
+
+
+async def run_load(args, stages):
+    stats = Stats()
+    max_users = max(u for _, u in stages) + args.admins
+    pool = ThreadPoolExecutor(max_workers=max(4, max_users), thread_name_prefix="vu")
+    ctx = Context(args, stats, pool)
+    running = []  # [(VirtualUser, Task)] ; VU terbaru dihentikan lebih dulu
+    next_id = 0
+
+    try:
+        while True:
+            t = time.monotonic() - stats.t_start
+            target = target_users(stages, t)
+            if target is None:
+                break
+            # admin ikut hidup selama ada relawan aktif
+            want = target + (args.admins if target > 0 else 0)
+            while len(running) < want:
+                is_admin = len(running) < args.admins
+                vu = VirtualUser(ctx, next_id, is_admin)
+                next_id += 1
+                running.append((vu, asyncio.create_task(_run_vu(vu))))
+            while len(running) > want:
+                running.pop()[1].cancel()
+            stats.users = len(running)
+            if int(t) % 10 == 0 and t - int(t) < args.tick:
+                print(f"[LOAD] t={t:5.0f}s users={len(running)} requests={sum(len(v) for v in stats.lat.values())}")
+            await asyncio.sleep(args.tick)
+    finally:
+        for _, task in running:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in running), return_exceptions=True)
+        # request yang sedang jalan di thread dibiarkan selesai/timeout sendiri
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    duration_s = time.monotonic() - stats.t_start
+    return stats, duration_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test lonjakan relawan (asyncio)")
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="smoke")
+    parser.add_argument("--stages", help='override profile, mis. "60:100,120:100,30:0" (detik:VU)')
+    parser.add_argument("--admins", type=int, default=1, help="VU admin (moderasi) selama test")
+    parser.add_argument("--think", type=float, default=3.0, help="jeda rata-rata antar aksi (detik)")
+    parser.add_argument("--refresh-every", type=float, default=60.0, help="interval /api/refresh_map per relawan")
+    parser.add_argument("--p-absensi", type=float, default=0.25)
+    parser.add_argument("--p-asesmen", type=float, default=0.10)
+    parser.add_argument("--p-map", type=float, default=0.05)
+    parser.add_argument("--photos", type=int, default=1, help="foto per submit asesmen")
+    parser.add_argument("--photo-kb", type=int, default=300, help="ukuran tiap foto (KB)")
+    parser.add_argument("--relawan-template", default="Relawan {n:04d}")
+    parser.add_argument("--relawan-pool", type=int, default=199, help="jumlah nama relawan yang dipakai bergiliran")
+    parser.add_argument("--relawan-kode", default=RELAWAN_KODE)
+    parser.add_argument("--admin-nama", default=ADMIN_NAMA)
+    parser.add_argument("--admin-kode", default=ADMIN_KODE)
+    parser.add_argument("--lokasi-pool", type=int, default=1000, help="kode_posko acak L000001..N")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--tick", type=float, default=0.5, help="resolusi controller ramp (detik)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--out", help="path JSON hasil (default benchmarks/results/load-...)")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    spec = args.stages or PROFILES[args.profile]
+    stages = parse_stages(spec)
+    print(f"[LOAD] {args.base_url} stages={spec} admins={args.admins} (total {sum(d for d, _ in stages):.0f}s)")
+
+    stats, duration_s = asyncio.run(run_load(args, stages))
+    endpoints, timeline = stats.summary(duration_s)
+    print_report(endpoints, duration_s)
+
+    sha = _git("rev-parse", "--short", "HEAD")
+    result = {
+        "meta": {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "git_sha": sha,
+            "base_url": args.base_url,
+            "stages": spec,
+            "admins": args.admins,
+            "duration_s": round(duration_s, 1),
+            "config": {k: v for k, v in vars(args).items() if k not in ("admin_kode", "relawan_kode")},
+        },
+        "endpoints": endpoints,
+        "timeline": timeline,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"load-{time.strftime('%Y%m%d-%H%M%S')}-{sha or 'nogit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\n[LOAD] hasil: {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Entry WSGI untuk load test: app_postgres + Google Sheets palsu.
+
+    SECRET_KEY=x gunicorn -w 4 --threads 8 --pythonpath benchmarks wsgi_bench:app
+
+ENV DATABASE_URL & PG_*_TABLE diambil dari `fixtures.py --env` (lihat
+benchmarks/loadtest.py). SHEETS_LATENCY_MS meniru lambatnya Google Sheets.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import app_postgres  # noqa: E402
+from bench_routes import fake_sheet_data, install_fake_sheets  # noqa: E402
+from fixtures import load_wilayah_csv  # noqa: E402
+
+_kabkota = sorted({r["kabkota"] for r in load_wilayah_csv()})
+install_fake_sheets(
+    app_module=app_postgres,
+    sheets=fake_sheet_data(_kabkota),
+    latency_s=float(os.environ.get("SHEETS_LATENCY_MS", "300") or "300") / 1000.0,
+)
+
+app = app_postgres.app
@@ -0,0 +1,214 @@
+# compression.py
+# SATGAS USU Peduli - Kompresi response (gzip / brotli) di level app
+# ---------------------------------------------------------------
+# - after_request: response teks (JSON, HTML, JS, CSS, SVG, CSV) >=
+#   COMPRESS_MIN_BYTES dikompres sesuai Accept-Encoding (br bila modul
+#   `brotli` terpasang, selain itu gzip). Vary: Accept-Encoding selalu diset.
+# - Dilewati: Content-Encoding sudah ada (mis. /assets/ precompressed),
+#   file langsung (send_file / media), 204/304, HEAD, Cache-Control: no-transform.
+# - Hasil kompresi body besar (>= COMPRESS_CACHE_MIN_BYTES) di-cache per
+#   (ETag | hash isi, encoding): snapshot layer peta, /api/refs, GeoJSON
+#   kel/desa yang identik tidak dikompres ulang tiap request.
+# - Response streaming dikompres per chunk (tanpa buffer seluruh body).
+# - ETag yang dikompres dijadikan weak (W/"..."); route memakai
+#   if_none_match.contains_weak sehingga 304 tetap jalan.
+# Catatan: di belakang nginx yang sudah gzip, set COMPRESS_ENABLED=0.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from flask import request
+
+try:
+    import brotli  # type: ignore
+except Exception:
+    brotli = None
+
+# ==========================
+# CONFIG
+# ==========================
+COMPRESS_ENABLED = str(os.environ.get("COMPRESS_ENABLED", "1")).strip().lower() in ("1", "true", "yes")
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", "1024") or "1024")
+COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", "6") or "6")
+COMPRESS_BR_QUALITY = int(os.environ.get("COMPRESS_BR_QUALITY", "5") or "5")
+COMPRESS_CACHE_MIN_BYTES = int(os.environ.get("COMPRESS_CACHE_MIN_BYTES", "32768") or "32768")
+COMPRESS_CACHE_MAX_MB = int(os.environ.get("COMPRESS_CACHE_MAX_MB", "64") or "64")
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/geo+json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+def _compress(data: bytes, enc: str) -> bytes:
+    if enc == "br":
+        return brotli.compress(data, quality=COMPRESS_BR_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+class CompressedCache:
+    """LRU (thread-safe) body terkompres, dibatasi total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[bytes]:
+        with self._lock:
+            body = self._data.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Tuple[str, str], body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._data[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes and self._data:
+                _, dropped = self._data.popitem(last=False)
+                self.size -= len(dropped)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.size = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._data), "bytes": self.size, "hits": self.hits, "misses": self.misses}
+
+
+CACHE_COMPRESSED = CompressedCache(COMPRESS_CACHE_MAX_MB * 1024 * 1024)
+
+
+def compress_cached(data: bytes, enc: str, key: Optional[str] = None) -> bytes:
+    """Kompres data; body besar di-cache per (key atau sha1 isi, enc)."""
+    if len(data) < COMPRESS_CACHE_MIN_BYTES:
+        return _compress(data, enc)
+    ck = (key or hashlib.sha1(data).hexdigest(), enc)
+    out = CACHE_COMPRESSED.get(ck)
+    if out is None:
+        out = _compress(data, enc)
+        CACHE_COMPRESSED.put(ck, out)
+    return out
+
+
+def _stream_compress(chunks: Iterable[bytes], enc: str) -> Iterator[bytes]:
+    if enc == "br":
+        comp = brotli.Compressor(quality=COMPRESS_BR_QUALITY)
+        for chunk in chunks:
+            out = comp.process(chunk)
+            if out:
+                yield out
+        yield comp.finish()
+    else:
+        comp = zlib.compressobj(COMPRESS_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            out = comp.compress(chunk)
+            if out:
+                yield out
+        yield comp.flush()
+
+
+def _pick_encoding() -> Optional[str]:
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compressible(response) -> bool:
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or "Content-Encoding" in response.headers:
+        return False
+    if "no-transform" in (response.headers.get("Cache-Control") or ""):
+        return False
+    mimetype = response.mimetype or ""
+    return mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def _add_vary(response) -> None:
+    vary = response.headers.get("Vary", "")
+    if "accept-encoding" not in vary.lower():
+        response.headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+
+
+def _weaken_etag(response) -> Optional[str]:
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return etag
+
+
+# ==========================
+# REGISTRATION
+# ==========================
+def register_compression(app):
+    if not COMPRESS_ENABLED:
+        print("[COMPRESS] nonaktif (COMPRESS_ENABLED=0)")
+        return
+    print(f"[COMPRESS] min={COMPRESS_MIN_BYTES}B, gzip={COMPRESS_GZIP_LEVEL}, brotli={'ya' if brotli else 'tidak'}")
+
+    @app.after_request
+    def _compress_response(response):
+        if request.method == "HEAD" or not _compressible(response):
+            return response
+        _add_vary(response)
+
+        if response.is_streamed:
+            enc = _pick_encoding()
+            if enc is None:
+                return response
+            response.response = _stream_compress(response.response, enc)
+            response.headers.pop("Content-Length", None)
+            response.headers["Content-Encoding"] = enc
+            _weaken_etag(response)
+            return response
+
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        enc = _pick_encoding()
+        if enc is None:
+            return response
+
+        # ETag di repo ini = hash isi -> aman dipakai sebagai key cache
+        etag, weak = response.get_etag()
+        key = f"{etag}:{len(data)}" if etag and not weak else None
+        body = compress_cached(data, enc, key)
+        if len(body) >= len(data):
+            return response
+
+        response.set_data(body)  # set_data memperbarui Content-Length
+        response.headers["Content-Encoding"] = enc
+        _weaken_etag(response)
+        return response
+
+    return CACHE_COMPRESSED
@@ -0,0 +1,240 @@
+# credentials.py
+# SATGAS USU Peduli - Hash kode akses relawan + cache verifikasi
+# ---------------------------------------------------------------
+# - Kode akses disimpan sebagai hash bersalt di data_relawan.kode_akses_hash:
+#     scrypt$<n>$<r>$<p>$<salt_b64>$<hash_b64>
+#   Biaya KDF bisa diatur lewat ENV (CREDENTIAL_SCRYPT_N/R/P).
+# - Kode dinormalisasi (trim + lowercase) sebelum di-hash, sama dengan
+#   perilaku login lama yang case-insensitive.
+# - Cache verifikasi sukses (LRU terbatas + TTL) per proses: login ulang saat
+#   pergantian shift tidak menghitung scrypt lagi. Yang disimpan hanya HMAC
+#   kode dengan kunci acak per proses (bukan kode aslinya).
+# - Begitu kode_akses_hash terisi, plaintext kode_akses tidak dipakai lagi:
+#   menyimpan hash sekaligus mengosongkan kode_akses (1 UPDATE). Ganti kode:
+#   isi kode_akses_hash dengan output `python credentials.py hash <kode>`.
+# - Migrasi (plaintext dikosongkan): python credentials.py migrate
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from dotenv import load_dotenv  # dipakai juga sebagai script (migrasi)
+
+    load_dotenv()
+except Exception:
+    pass
+
+try:
+    from pg_data import (
+        pg_clear_relawan_plain_codes,
+        pg_ensure_relawan_credential_column,
+        pg_get_relawan_unhashed_codes,
+        pg_relawan_has_hash_column,
+        pg_set_relawan_kode_hash,
+    )
+except Exception as _pg_err:
+    print(f"[CRED] Error import pg_data: {_pg_err}")
+    pg_clear_relawan_plain_codes = None
+    pg_ensure_relawan_credential_column = None
+    pg_get_relawan_unhashed_codes = None
+    pg_relawan_has_hash_column = None
+    pg_set_relawan_kode_hash = None
+
+
+# ==========================
+# CONFIG
+# ==========================
+SCRYPT_N = int(os.environ.get("CREDENTIAL_SCRYPT_N", "16384") or "16384")
+SCRYPT_R = int(os.environ.get("CREDENTIAL_SCRYPT_R", "8") or "8")
+SCRYPT_P = int(os.environ.get("CREDENTIAL_SCRYPT_P", "1") or "1")
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+CREDENTIAL_CACHE_SIZE = int(os.environ.get("CREDENTIAL_CACHE_SIZE", "512") or "512")
+CREDENTIAL_CACHE_TTL_SECONDS = int(os.environ.get("CREDENTIAL_CACHE_TTL_SECONDS", "900") or "900")
+
+# (id_relawan, stored_hash) -> (hmac kode, waktu simpan)
+_VERIFY_CACHE: "OrderedDict[Tuple[str, str], Tuple[bytes, float]]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_CACHE_KEY = secrets.token_bytes(32)
+
+
+def normalize_kode(kode: Any) -> str:
+    return str(kode or "").strip().lower()
+
+
+def _b64(b: bytes) -> str:
+    return base64.b64encode(b).decode("ascii")
+
+
+def _unb64(s: str) -> bytes:
+    return base64.b64decode(s.encode("ascii"))
+
+
+def _scrypt(kode: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        kode.encode("utf-8"), salt=salt, n=n, r=r, p=p, dklen=HASH_BYTES, maxmem=256 * n * r + (1 << 20)
+    )
+
+
+# ==========================
+# HASH / VERIFY
+# ==========================
+def hash_kode(kode: Any) -> str:
+    """Hash kode akses (scrypt bersalt) -> string untuk kolom kode_akses_hash."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    dk = _scrypt(normalize_kode(kode), salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(dk)}"
+
+
+def _parse(stored: str) -> Optional[Tuple[int, int, int, bytes, bytes]]:
+    try:
+        algo, n, r, p, salt, dk = str(stored).split("$")
+        if algo != "scrypt":
+            return None
+        return int(n), int(r), int(p), _unb64(salt), _unb64(dk)
+    except Exception:
+        return None
+
+
+def needs_rehash(stored: str) -> bool:
+    """True bila hash dibuat dengan parameter KDF lama (biaya berubah via ENV)."""
+    parsed = _parse(stored)
+    return parsed is None or parsed[:3] != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+def verify_kode(kode: Any, stored: str) -> bool:
+    """Verifikasi kode terhadap hash tersimpan (constant-time compare)."""
+    parsed = _parse(stored)
+    if parsed is None:
+        return False
+    n, r, p, salt, dk = parsed
+    return hmac.compare_digest(_scrypt(normalize_kode(kode), salt, n, r, p), dk)
+
+
+def _cache_mac(kode: str) -> bytes:
+    return hmac.new(_CACHE_KEY, kode.encode("utf-8"), hashlib.sha256).digest()
+
+
+def verify_kode_cached(cache_id: Any, kode: Any, stored: str) -> bool:
+    """verify_kode + cache LRU verifikasi sukses (key: id relawan + hash tersimpan)."""
+    norm = normalize_kode(kode)
+    key = (str(cache_id), str(stored))
+    mac = _cache_mac(norm)
+    now = time.time()
+
+    with _CACHE_LOCK:
+        hit = _VERIFY_CACHE.get(key)
+        if hit is not None:
+            if now - hit[1] < CREDENTIAL_CACHE_TTL_SECONDS and hmac.compare_digest(hit[0], mac):
+                _VERIFY_CACHE.move_to_end(key)
+                return True
+            if now - hit[1] >= CREDENTIAL_CACHE_TTL_SECONDS:
+                _VERIFY_CACHE.pop(key, None)
+
+    if not verify_kode(norm, stored):
+        return False
+
+    with _CACHE_LOCK:
+        _VERIFY_CACHE[key] = (mac, now)
+        _VERIFY_CACHE.move_to_end(key)
+        while len(_VERIFY_CACHE) > CREDENTIAL_CACHE_SIZE:
+            _VERIFY_CACHE.popitem(last=False)
+    return True
+
+
+def clear_verify_cache() -> None:
+    with _CACHE_LOCK:
+        _VERIFY_CACHE.clear()
+
+
+# ==========================
+# LOGIN RELAWAN
+# ==========================
+def relawan_has_kode(row: Dict[str, Any]) -> bool:
+    return bool((row.get("kode_akses_hash") or "").strip() or (row.get("kode_akses") or "").strip())
+
+
+def verify_relawan_kode(row: Dict[str, Any], kode: Any) -> bool:
+    """Cek kode akses relawan (row dari pg_get_relawan_by_nama).
+
+    - Ada hash -> HANYA verifikasi scrypt (via cache); plaintext diabaikan
+      (kode lama tidak bisa membatalkan rotasi). Rehash bila parameter KDF berubah.
+    - Belum ada hash (migrasi belum jalan) -> bandingkan plaintext secara
+      constant-time, lalu simpan hash-nya (migrasi bertahap saat login).
+    """
+    stored = (row.get("kode_akses_hash") or "").strip()
+    id_relawan = row.get("id_relawan")
+
+    if stored:
+        ok = verify_kode_cached(id_relawan, kode, stored)
+        if ok and needs_rehash(stored):
+            _save_hash(id_relawan, kode)
+        return ok
+
+    plain = normalize_kode(row.get("kode_akses"))
+    if not plain:
+        return False
+    ok = hmac.compare_digest(normalize_kode(kode).encode("utf-8"), plain.encode("utf-8"))
+    if ok:
+        _save_hash(id_relawan, kode)
+    return ok
+
+
+def _save_hash(id_relawan: Any, kode: Any) -> None:
+    if pg_set_relawan_kode_hash is None or id_relawan is None:
+        return
+    try:
+        # Kolom kode_akses_hash belum ada -> tunggu migrasi (tanpa hitung scrypt / UPDATE gagal)
+        if not pg_relawan_has_hash_column():
+            return
+        pg_set_relawan_kode_hash(id_relawan, hash_kode(kode))
+    except Exception as e:
+        print(f"[CRED] gagal simpan hash kode akses {id_relawan}: {e}")
+
+
+# ==========================
+# MIGRASI
+# ==========================
+def migrate_hash_existing_codes() -> Dict[str, int]:
+    """Tambah kolom kode_akses_hash, hash semua kode plaintext lalu kosongkan plaintext-nya."""
+    if pg_ensure_relawan_credential_column is None:
+        raise RuntimeError("pg_data belum siap (DATABASE_URL?)")
+
+    pg_ensure_relawan_credential_column()
+    rows = pg_get_relawan_unhashed_codes() or []
+
+    hashed = 0
+    for r in rows:
+        if pg_set_relawan_kode_hash(r.get("id_relawan"), hash_kode(r.get("kode_akses"))):
+            hashed += 1
+
+    # Sisa plaintext di baris yang sudah ber-hash (mis. diisi manual) -> tidak terpakai
+    cleared = pg_clear_relawan_plain_codes()
+    return {"kandidat": len(rows), "di_hash": hashed, "plaintext_dikosongkan": cleared}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kelola hash kode akses relawan")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("migrate", help="hash semua kode_akses yang belum ber-hash & kosongkan plaintext")
+    h = sub.add_parser("hash", help="cetak hash untuk 1 kode (untuk input manual)")
+    h.add_argument("kode")
+    args = parser.parse_args()
+
+    if args.cmd == "migrate":
+        print(migrate_hash_existing_codes())
+    elif args.cmd == "hash":
+        print(hash_kode(args.kode))
@@ -0,0 +1,151 @@
+# fast_json.py
+# SATGAS USU Peduli - Serialisasi JSON cepat (orjson, fallback stdlib)
+# ---------------------------------------------------------------
+# - dumps(obj) -> bytes. Pakai orjson bila terpasang (FAST_JSON=0 -> paksa
+#   stdlib). Decimal -> float, numpy -> list/angka, datetime -> ISO UTC + "Z"
+#   (sama dengan pg_data._json_safe_value: naive dianggap UTC, bertz
+#   dikonversi ke UTC), date/time -> ISO, UUID -> str.
+# - FastJSONProvider: dipasang ke app.json -> jsonify() ikut memakai dumps.
+# - EncodedCache: cache LRU + TTL untuk payload yang sudah di-encode (bytes),
+#   mis. GeoJSON kel/desa per bbox dan /api/refs.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import dataclasses
+import datetime as _dt
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Hashable, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+FAST_JSON = str(os.environ.get("FAST_JSON", "1")).strip().lower() in ("1", "true", "yes")
+BACKEND = "orjson" if (orjson is not None and FAST_JSON) else "stdlib"
+
+
+def _default(o: Any) -> Any:
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, _dt.datetime):
+        if o.tzinfo is not None and o.utcoffset() is not None:
+            o = o.astimezone(_dt.timezone.utc).replace(tzinfo=None)
+        return o.isoformat() + "Z"
+    if isinstance(o, (_dt.date, _dt.time)):
+        return o.isoformat()
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, (bytes, bytearray, memoryview)):
+        return bytes(o).decode("utf-8", "replace")
+    if isinstance(o, (set, frozenset, tuple)):
+        return list(o)
+    if np is not None:
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):  # markupsafe.Markup
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+if BACKEND == "orjson":
+    # datetime lewat _default agar format identik dengan _json_safe_value
+    # (orjson native menulis offset bertz apa adanya, front-end mengabaikan offset)
+    _OPTS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+    _OPTS_SORTED = _OPTS | orjson.OPT_SORT_KEYS
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTS_SORTED if sort_keys else _OPTS)
+
+    def loads(s: Any) -> Any:
+        return orjson.loads(s)
+
+else:
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        return json.dumps(
+            obj, default=_default, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys
+        ).encode("utf-8")
+
+    def loads(s: Any) -> Any:
+        return json.loads(s)
+
+
+def dumps_str(obj: Any, sort_keys: bool = False) -> str:
+    return dumps(obj, sort_keys=sort_keys).decode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Provider Flask: jsonify()/app.json.dumps() lewat fast_json.dumps.
+
+    sort_keys default dimatikan (urutan key tidak dipakai front-end, sorting mahal).
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj, sort_keys=kwargs.get("sort_keys", self.sort_keys)).decode("utf-8")
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
+
+
+class EncodedCache:
+    """Cache LRU kecil (thread-safe) untuk payload JSON yang sudah di-encode."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            ts, body = item
+            if time.time() - ts >= self.ttl:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return body
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), body)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+def install_json_provider(app) -> None:
+    app.json_provider_class = FastJSONProvider
+    app.json = FastJSONProvider(app)
+    print(f"[JSON] backend: {BACKEND}")
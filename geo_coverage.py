@@ -0,0 +1,246 @@
+# geo_coverage.py
+# SATGAS USU Peduli - Analitik celah cakupan asesmen per posko
+# ---------------------------------------------------------------
+# - Posko = data_lokasi aktif dengan jenis_lokasi "Posko Pengungsian" + koordinat.
+# - Posko dianggap "tercakup" asesmen jenis X jika posko berada di dalam
+#   buffer asesmen X (jarak <= kolom radius asesmen, default 2 km).
+# - Per posko & per jenis dihitung waktu asesmen terakhir + jam sejak itu.
+# - Dihitung bulk (grid join geo_math.within_radius_pairs), hasil di-cache
+#   dan di-invalidate saat ada submit / aksi admin (lihat app_postgres).
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from flask import jsonify, request
+
+from geo_math import coords_from_rows, within_radius_pairs
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+try:
+    from pg_data import ASESMEN_KIND_TABLES, pg_get_asesmen_points, pg_get_data_lokasi
+except Exception as _pg_err:
+    print(f"[COVERAGE] Error import pg_data: {_pg_err}")
+    ASESMEN_KIND_TABLES = []
+    pg_get_asesmen_points = None
+    pg_get_data_lokasi = None
+
+
+# ==========================
+# CONFIG
+# ==========================
+COVERAGE_TTL_SECONDS = int(os.environ.get("COVERAGE_TTL_SECONDS", "300") or "300")
+# Jendela waktu asesmen yang diperhitungkan (default 30 hari, sama dengan map)
+COVERAGE_LOOKBACK_HOURS = int(os.environ.get("COVERAGE_LOOKBACK_HOURS", "720") or "720")
+DEFAULT_RADIUS_KM = 2.0
+
+CACHE_COVERAGE: Dict[str, Any] = {"data": None, "timestamp": 0}
+_CACHE_LOCK = threading.Lock()
+
+
+def invalidate_coverage_cache() -> None:
+    """Buang cache (dipanggil setelah submit asesmen / perubahan data_lokasi)."""
+    CACHE_COVERAGE["data"] = None
+    CACHE_COVERAGE["timestamp"] = 0
+
+
+def _iso_utc(epoch: Optional[float]) -> Optional[str]:
+    if epoch is None:
+        return None
+    dt = datetime.fromtimestamp(float(epoch), tz=timezone.utc).replace(tzinfo=None)
+    return dt.isoformat() + "Z"
+
+
+def _is_active(row: Dict[str, Any]) -> bool:
+    v = row.get("is_active")
+    if v is False:
+        return False
+    if isinstance(v, str) and v.strip().lower() in ("false", "0", "no", "n"):
+        return False
+    return True
+
+
+def _posko_rows(lokasi_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out = []
+    for r in lokasi_rows or []:
+        if not _is_active(r):
+            continue
+        if str(r.get("jenis_lokasi") or "").strip().lower() != "posko pengungsian":
+            continue
+        if r.get("latitude") is None or r.get("longitude") is None:
+            continue
+        out.append(r)
+    return out
+
+
+# ==========================
+# CORE
+# ==========================
+def compute_coverage_gap(
+    posko_rows: List[Dict[str, Any]],
+    asesmen_by_kind: Dict[str, List[Dict[str, Any]]],
+    now_epoch: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """Hitung celah cakupan asesmen per posko (murni, tanpa DB).
+
+    asesmen_by_kind: {kind: [{"epoch", "latitude", "longitude", "radius"}, ...]}
+
+    Return list per posko (urut: celah terbesar dulu, posko tanpa asesmen paling atas):
+      {kode_posko, nama_lokasi, nama_kabkota, latitude, longitude,
+       jam_sejak_terakhir, kinds: {kind: {last_waktu, jam_sejak, jumlah}}}
+    """
+    now_epoch = time.time() if now_epoch is None else float(now_epoch)
+
+    p_lat, p_lon, p_idx = coords_from_rows(posko_rows)
+    n = p_lat.shape[0]
+
+    per_kind: Dict[str, Any] = {}
+    for kind, rows in (asesmen_by_kind or {}).items():
+        last = np.full(n, -np.inf, dtype=np.float64)
+        count = np.zeros(n, dtype=np.int64)
+
+        valid = [r for r in rows or [] if r.get("epoch") is not None]
+        if n and valid:
+            a_lat, a_lon, a_idx = coords_from_rows(valid)
+            epoch = np.asarray([valid[i]["epoch"] for i in a_idx], dtype=np.float64)
+            radius = np.asarray(
+                [(valid[i].get("radius") or DEFAULT_RADIUS_KM) for i in a_idx], dtype=np.float64
+            )
+            radius[radius <= 0] = DEFAULT_RADIUS_KM
+
+            ia, ib, _d = within_radius_pairs(p_lat, p_lon, a_lat, a_lon, radius)
+            if ia.size:
+                np.maximum.at(last, ia, epoch[ib])
+                count = np.bincount(ia, minlength=n)
+
+        per_kind[kind] = (last, count)
+
+    out: List[Dict[str, Any]] = []
+    for i in range(n):
+        r = posko_rows[int(p_idx[i])]
+        kinds: Dict[str, Any] = {}
+        worst: Optional[float] = 0.0
+        for kind, (last, count) in per_kind.items():
+            if np.isfinite(last[i]):
+                jam = max(0.0, (now_epoch - float(last[i])) / 3600.0)
+                kinds[kind] = {"last_waktu": _iso_utc(float(last[i])), "jam_sejak": round(jam, 1), "jumlah": int(count[i])}
+                if worst is not None:
+                    worst = max(worst, jam)
+            else:
+                kinds[kind] = {"last_waktu": None, "jam_sejak": None, "jumlah": 0}
+                worst = None
+
+        out.append(
+            {
+                "kode_posko": r.get("kode_lokasi") or r.get("id_lokasi") or "",
+                "nama_lokasi": r.get("nama_lokasi") or "",
+                "nama_kabkota": r.get("nama_kabkota") or "",
+                "latitude": float(p_lat[i]),
+                "longitude": float(p_lon[i]),
+                # None = ada jenis asesmen yang belum pernah menjangkau posko ini
+                "jam_sejak_terakhir": round(worst, 1) if worst is not None else None,
+                "kinds": kinds,
+            }
+        )
+
+    out.sort(key=lambda x: (x["jam_sejak_terakhir"] is not None, -(x["jam_sejak_terakhir"] or 0.0)))
+    return out
+
+
+def get_coverage_gap(force: bool = False) -> List[Dict[str, Any]]:
+    """Ambil hasil coverage dari cache; hitung ulang bila expired / di-invalidate."""
+    if pg_get_data_lokasi is None or pg_get_asesmen_points is None:
+        return []
+
+    if not force:
+        data = CACHE_COVERAGE["data"]
+        if data is not None and time.time() - CACHE_COVERAGE["timestamp"] < COVERAGE_TTL_SECONDS:
+            return data
+
+    with _CACHE_LOCK:
+        # Cek lagi: mungkin thread lain sudah menghitung
+        data = CACHE_COVERAGE["data"]
+        if not force and data is not None and time.time() - CACHE_COVERAGE["timestamp"] < COVERAGE_TTL_SECONDS:
+            return data
+
+        posko = _posko_rows(pg_get_data_lokasi() or [])
+
+        asesmen_by_kind: Dict[str, List[Dict[str, Any]]] = {}
+        for kind, _env, _default in ASESMEN_KIND_TABLES:
+            try:
+                asesmen_by_kind[kind] = pg_get_asesmen_points(kind, hours=COVERAGE_LOOKBACK_HOURS)
+            except Exception as e:
+                print(f"[COVERAGE] gagal ambil asesmen {kind}: {e}")
+                asesmen_by_kind[kind] = []
+
+        data = compute_coverage_gap(posko, asesmen_by_kind)
+        CACHE_COVERAGE["data"] = data
+        CACHE_COVERAGE["timestamp"] = time.time()
+        return data
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_coverage_routes(app):
+
+    @app.route("/api/coverage_gap", methods=["GET"])
+    def api_coverage_gap():
+        """Celah cakupan asesmen per posko.
+
+        Query params (opsional):
+          - kind=<jenis asesmen>   hanya jenis ini
+          - min_jam=<float>        hanya posko yang celahnya >= min_jam (atau belum pernah)
+          - limit=<int>
+        """
+        if np is None or pg_get_asesmen_points is None:
+            return jsonify({"success": False, "error": "Fitur belum aktif (numpy/pg_data belum siap)."}), 500
+
+        kind = (request.args.get("kind") or "").strip().lower() or None
+        try:
+            min_jam = float(request.args.get("min_jam")) if request.args.get("min_jam") else None
+        except Exception:
+            min_jam = None
+        try:
+            limit = int(request.args.get("limit", "0") or 0)
+        except Exception:
+            limit = 0
+
+        try:
+            rows = get_coverage_gap()
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+        out = []
+        for r in rows:
+            if kind:
+                k = r["kinds"].get(kind)
+                if k is None:
+                    continue
+                r = {**r, "kinds": {kind: k}, "jam_sejak_terakhir": k["jam_sejak"]}
+            if min_jam is not None and r["jam_sejak_terakhir"] is not None and r["jam_sejak_terakhir"] < min_jam:
+                continue
+            out.append(r)
+
+        if kind:
+            out.sort(key=lambda x: (x["jam_sejak_terakhir"] is not None, -(x["jam_sejak_terakhir"] or 0.0)))
+        if limit > 0:
+            out = out[:limit]
+
+        return jsonify(
+            {
+                "success": True,
+                "lookback_jam": COVERAGE_LOOKBACK_HOURS,
+                "generated_at": _iso_utc(CACHE_COVERAGE["timestamp"] or time.time()),
+                "data": out,
+            }
+        )
@@ -0,0 +1,318 @@
+"""geo_math.py
+
+Utilitas jarak geografis (haversine) berbasis NumPy untuk analitik kedekatan.
+
+Dipakai untuk:
+1) jarak tunggal (haversine_km) -> dipakai app untuk posko terdekat saat absensi
+2) jarak batch / matriks jarak (haversine_km_many, distance_matrix_km)
+3) relawan -> posko terdekat / area layanan posko (nearest_index)
+4) join "dalam radius" antar dua himpunan titik (within_radius_pairs),
+   mis. posko yang masuk radius asesmen (kolom `radius`, km)
+5) hitung buffer asesmen yang saling beririsan (buffer_overlap_counts)
+
+Catatan:
+- Semua jarak dalam kilometer, koordinat dalam derajat (EPSG:4326).
+- Join radius memakai grid index (sel berukuran radius maksimum) supaya tidak
+  menghitung N x M pasangan penuh.
+- Fungsi scalar tidak butuh NumPy; fungsi batch butuh NumPy.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+EARTH_RADIUS_KM = 6371.0
+
+# 1 derajat lintang pada bola haversine (EARTH_RADIUS_KM) ~ 111.195 km.
+# Harus konsisten dengan haversine: sel grid lebih kecil dari jangkauan
+# -> pasangan di tepi radius lolos dari 3x3 sel tetangga.
+_KM_PER_DEG_LAT = EARTH_RADIUS_KM * math.pi / 180.0
+# Sel grid diperbesar sedikit (pembulatan float / floor di batas sel)
+_GRID_MARGIN = 1.001
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("NumPy tidak ditemukan. Install: numpy")
+
+
+# ------------------------------------------------------------------------------
+# 1) Scalar
+# ------------------------------------------------------------------------------
+def haversine_km(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> float:
+    """Jarak (km) antara dua titik lat/lon. Input tidak valid -> inf."""
+    try:
+        lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    except Exception:
+        return float("inf")
+
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2.0 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+# ------------------------------------------------------------------------------
+# 2) Konversi rows -> array
+# ------------------------------------------------------------------------------
+def coords_from_rows(
+    rows: Sequence[Dict[str, Any]],
+    lat_key: str = "latitude",
+    lon_key: str = "longitude",
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Ambil lat/lon dari list dict (hasil pg_get_*).
+
+    Return: (lat, lon, idx) -> idx = index baris asal yang koordinatnya valid.
+    Baris tanpa koordinat / koordinat tidak bisa di-parse di-skip.
+    """
+    _require_numpy()
+
+    lat_out: List[float] = []
+    lon_out: List[float] = []
+    idx_out: List[int] = []
+    for i, r in enumerate(rows or []):
+        try:
+            la = float(r.get(lat_key))
+            lo = float(r.get(lon_key))
+        except Exception:
+            continue
+        if math.isnan(la) or math.isnan(lo):
+            continue
+        lat_out.append(la)
+        lon_out.append(lo)
+        idx_out.append(i)
+
+    return (
+        np.asarray(lat_out, dtype=np.float64),
+        np.asarray(lon_out, dtype=np.float64),
+        np.asarray(idx_out, dtype=np.int64),
+    )
+
+
+def _as_float_array(v: Any) -> "np.ndarray":
+    return np.asarray(v, dtype=np.float64)
+
+
+# ------------------------------------------------------------------------------
+# 3) Batch / matriks jarak
+# ------------------------------------------------------------------------------
+def haversine_km_many(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> "np.ndarray":
+    """Haversine ter-vektorisasi (mengikuti aturan broadcasting NumPy)."""
+    _require_numpy()
+
+    p1 = np.radians(_as_float_array(lat1))
+    l1 = np.radians(_as_float_array(lon1))
+    p2 = np.radians(_as_float_array(lat2))
+    l2 = np.radians(_as_float_array(lon2))
+
+    a = np.sin((p2 - p1) * 0.5) ** 2 + np.cos(p1) * np.cos(p2) * np.sin((l2 - l1) * 0.5) ** 2
+    np.clip(a, 0.0, 1.0, out=a)
+    return 2.0 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def distance_matrix_km(a_lat: Any, a_lon: Any, b_lat: Any, b_lon: Any) -> "np.ndarray":
+    """Matriks jarak (len(a), len(b)) dalam km.
+
+    Hati-hati memori: untuk himpunan besar pakai nearest_index / within_radius_pairs.
+    """
+    _require_numpy()
+    a_lat = _as_float_array(a_lat)
+    a_lon = _as_float_array(a_lon)
+    b_lat = _as_float_array(b_lat)
+    b_lon = _as_float_array(b_lon)
+    return haversine_km_many(a_lat[:, None], a_lon[:, None], b_lat[None, :], b_lon[None, :])
+
+
+def nearest_index(
+    a_lat: Any,
+    a_lon: Any,
+    b_lat: Any,
+    b_lon: Any,
+    max_km: Optional[float] = None,
+    chunk_elems: int = 4_000_000,
+) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Untuk tiap titik a, cari index titik b terdekat.
+
+    - Dihitung per-chunk agar matriks jarak tidak melebihi chunk_elems elemen.
+    - max_km: kalau jarak terdekat > max_km -> index -1 (di luar area layanan).
+
+    Return: (idx, dist_km) dengan panjang len(a).
+    """
+    _require_numpy()
+    a_lat = _as_float_array(a_lat)
+    a_lon = _as_float_array(a_lon)
+    b_lat = _as_float_array(b_lat)
+    b_lon = _as_float_array(b_lon)
+
+    n = a_lat.shape[0]
+    idx = np.full(n, -1, dtype=np.int64)
+    dist = np.full(n, np.inf, dtype=np.float64)
+    if n == 0 or b_lat.shape[0] == 0:
+        return idx, dist
+
+    step = max(1, int(chunk_elems) // max(1, b_lat.shape[0]))
+    for s in range(0, n, step):
+        e = min(n, s + step)
+        d = distance_matrix_km(a_lat[s:e], a_lon[s:e], b_lat, b_lon)
+        j = np.argmin(d, axis=1)
+        idx[s:e] = j
+        dist[s:e] = d[np.arange(e - s), j]
+
+    if max_km is not None:
+        idx[dist > float(max_km)] = -1
+    return idx, dist
+
+
+# ------------------------------------------------------------------------------
+# 4) Join dalam radius (grid index)
+# ------------------------------------------------------------------------------
+def _cell_keys(lat: "np.ndarray", lon: "np.ndarray", dlat: float, dlon: float) -> Tuple["np.ndarray", "np.ndarray"]:
+    return (
+        np.floor(lat / dlat).astype(np.int64),
+        np.floor(lon / dlon).astype(np.int64),
+    )
+
+
+def _pack_key(ky: "np.ndarray", kx: "np.ndarray") -> "np.ndarray":
+    # ky/kx kecil (|k| << 2^31) untuk koordinat bumi, aman dipack ke int64
+    return (ky + (1 << 31)) * (1 << 32) + (kx + (1 << 31))
+
+
+def _grid_candidate_pairs(
+    a_lat: "np.ndarray",
+    a_lon: "np.ndarray",
+    b_lat: "np.ndarray",
+    b_lon: "np.ndarray",
+    reach_km: float,
+    chunk_size: int,
+) -> Iterable[Tuple["np.ndarray", "np.ndarray", "np.ndarray"]]:
+    """Yield (ia, ib, dist_km) untuk pasangan kandidat di sel grid bertetangga.
+
+    Sel grid berukuran >= reach_km, jadi semua pasangan berjarak <= reach_km
+    pasti ada di 9 sel tetangga (3x3).
+    """
+    if a_lat.shape[0] == 0 or b_lat.shape[0] == 0:
+        return
+
+    reach_km = max(float(reach_km), 1e-6)
+    max_abs_lat = float(min(89.0, max(np.abs(a_lat).max(), np.abs(b_lat).max()) + reach_km / _KM_PER_DEG_LAT))
+    dlat = reach_km * _GRID_MARGIN / _KM_PER_DEG_LAT
+    dlon = dlat / max(1e-6, math.cos(math.radians(max_abs_lat)))
+
+    by, bx = _cell_keys(b_lat, b_lon, dlat, dlon)
+    b_keys = _pack_key(by, bx)
+    order = np.argsort(b_keys, kind="stable")
+    b_keys_sorted = b_keys[order]
+
+    ay_all, ax_all = _cell_keys(a_lat, a_lon, dlat, dlon)
+
+    n = a_lat.shape[0]
+    for s in range(0, n, max(1, int(chunk_size))):
+        e = min(n, s + chunk_size)
+        ay = ay_all[s:e]
+        ax = ax_all[s:e]
+        local = np.arange(s, e, dtype=np.int64)
+
+        for oy in (-1, 0, 1):
+            for ox in (-1, 0, 1):
+                q = _pack_key(ay + oy, ax + ox)
+                starts = np.searchsorted(b_keys_sorted, q, side="left")
+                ends = np.searchsorted(b_keys_sorted, q, side="right")
+                counts = ends - starts
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+
+                ia = np.repeat(local, counts)
+                offs = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+                ib = order[np.repeat(starts, counts) + offs]
+
+                d = haversine_km_many(a_lat[ia], a_lon[ia], b_lat[ib], b_lon[ib])
+                yield ia, ib, d
+
+
+def within_radius_pairs(
+    a_lat: Any,
+    a_lon: Any,
+    b_lat: Any,
+    b_lon: Any,
+    radius_km: Any,
+    chunk_size: int = 20_000,
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Semua pasangan (a, b) dengan jarak <= radius.
+
+    radius_km boleh scalar atau array per-titik b (mis. kolom `radius` asesmen),
+    sehingga "posko di dalam buffer asesmen" = within_radius_pairs(posko, asesmen, asesmen.radius).
+
+    Return: (ia, ib, dist_km) terurut berdasarkan ia.
+    """
+    _require_numpy()
+    a_lat = _as_float_array(a_lat)
+    a_lon = _as_float_array(a_lon)
+    b_lat = _as_float_array(b_lat)
+    b_lon = _as_float_array(b_lon)
+
+    r = _as_float_array(radius_km)
+    per_b = r.ndim > 0
+    if per_b and r.shape[0] != b_lat.shape[0]:
+        raise ValueError("Panjang radius_km harus sama dengan jumlah titik b")
+
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+    if a_lat.shape[0] == 0 or b_lat.shape[0] == 0:
+        return empty
+
+    reach = float(np.nanmax(r)) if per_b else float(r)
+    if not math.isfinite(reach) or reach <= 0:
+        return empty
+
+    out_a: List["np.ndarray"] = []
+    out_b: List["np.ndarray"] = []
+    out_d: List["np.ndarray"] = []
+    for ia, ib, d in _grid_candidate_pairs(a_lat, a_lon, b_lat, b_lon, reach, chunk_size):
+        limit = r[ib] if per_b else reach
+        m = d <= limit
+        if m.any():
+            out_a.append(ia[m])
+            out_b.append(ib[m])
+            out_d.append(d[m])
+
+    if not out_a:
+        return empty
+
+    ia = np.concatenate(out_a)
+    ib = np.concatenate(out_b)
+    d = np.concatenate(out_d)
+    order = np.lexsort((ib, ia))
+    return ia[order], ib[order], d[order]
+
+
+def buffer_overlap_counts(lat: Any, lon: Any, radius_km: Any) -> "np.ndarray":
+    """Hitung, untuk tiap buffer lingkaran, berapa buffer lain yang beririsan.
+
+    Dua buffer beririsan jika jarak pusat <= r_i + r_j.
+    """
+    _require_numpy()
+    lat = _as_float_array(lat)
+    lon = _as_float_array(lon)
+    r = np.broadcast_to(_as_float_array(radius_km), lat.shape).astype(np.float64)
+
+    n = lat.shape[0]
+    counts = np.zeros(n, dtype=np.int64)
+    if n == 0:
+        return counts
+
+    reach = 2.0 * float(np.nanmax(r))
+    if not math.isfinite(reach) or reach <= 0:
+        return counts
+
+    for ia, ib, d in _grid_candidate_pairs(lat, lon, lat, lon, reach, 20_000):
+        m = (ia != ib) & (d <= r[ia] + r[ib])
+        if m.any():
+            counts += np.bincount(ia[m], minlength=n)
+    return counts
@@ -0,0 +1,379 @@
+# heatmap_hex.py
+# SATGAS USU Peduli - Heatmap hexagon tingkat keparahan asesmen
+# ---------------------------------------------------------------
+# - Semua tabel asesmen (kolom skor/status/latitude/longitude/waktu) di-bin ke
+#   grid hexagon (pointy-top, proyeksi equirectangular lokal Sumut) untuk
+#   beberapa resolusi sekaligus.
+# - Agregat disimpan per (resolusi, hari WIB, jenis asesmen, hex):
+#   n, jumlah skor, jumlah Kritis, jumlah Waspada, status terbaru.
+# - Update inkremental: setelah submit asesmen hanya baris dengan id baru yang
+#   diambil & ditambahkan. Aksi admin (aktif/nonaktif) -> bangun ulang penuh.
+# - Agregat yang sudah dipublikasikan tidak pernah diubah (copy-on-write):
+#   delta diagregasi terpisah, digabung ke salinan (hanya level yang
+#   tersentuh), lalu referensi ditukar. Query tanpa lock aman dari submit.
+# - Endpoint mengembalikan array kolom (compact) untuk slider waktu di peta.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import has_request_context, jsonify, request
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+try:
+    from pg_data import ASESMEN_KIND_TABLES, pg_get_asesmen_points
+except Exception as _pg_err:
+    print(f"[HEATMAP] Error import pg_data: {_pg_err}")
+    ASESMEN_KIND_TABLES = []
+    pg_get_asesmen_points = None
+
+
+# ==========================
+# CONFIG
+# ==========================
+# Ukuran hex (pusat -> sudut) dalam derajat terproyeksi, per resolusi
+HEX_RESOLUTIONS: Dict[int, float] = {0: 0.25, 1: 0.08, 2: 0.025, 3: 0.008}
+HEATMAP_LOOKBACK_HOURS = int(os.environ.get("HEATMAP_LOOKBACK_HOURS", "2160") or "2160")  # 90 hari
+HEATMAP_TTL_SECONDS = int(os.environ.get("HEATMAP_TTL_SECONDS", "900") or "900")
+
+_LAT0_COS = math.cos(math.radians(2.5))  # lintang tengah Sumut
+_SQRT3 = math.sqrt(3.0)
+_WIB_OFFSET = 7 * 3600
+_EPOCH_DAY0 = date(1970, 1, 1)
+
+# Endpoint admin yang bisa menghapus titik dari agregat -> wajib rebuild penuh
+_REBUILD_ENDPOINTS = {"api_set_asesmen_active", "api_deactivate_asesmen"}
+
+# CACHE_HEATMAP["agg"][res][(day, kind)][(q, r)] = [n, sum_skor, n_kritis, n_waspada, last_epoch, last_status]
+CACHE_HEATMAP: Dict[str, Any] = {"agg": None, "last_id": {}, "timestamp": 0, "dirty": False}
+_CACHE_LOCK = threading.Lock()
+
+
+def invalidate_heatmap_cache() -> None:
+    """Listener invalidasi (dipanggil app setelah submit / aksi admin)."""
+    endpoint = request.endpoint if has_request_context() else None
+    if endpoint in _REBUILD_ENDPOINTS:
+        CACHE_HEATMAP["agg"] = None
+        CACHE_HEATMAP["last_id"] = {}
+        CACHE_HEATMAP["timestamp"] = 0
+    else:
+        CACHE_HEATMAP["dirty"] = True
+
+
+# ==========================
+# HEX GRID
+# ==========================
+def latlon_to_hex(lat: "np.ndarray", lon: "np.ndarray", size: float) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Koordinat -> axial (q, r) hex pointy-top (vektor)."""
+    x = np.asarray(lon, dtype=np.float64) * _LAT0_COS
+    y = np.asarray(lat, dtype=np.float64)
+
+    qf = (_SQRT3 / 3.0 * x - y / 3.0) / size
+    rf = (2.0 / 3.0 * y) / size
+    sf = -qf - rf
+
+    q = np.round(qf)
+    r = np.round(rf)
+    s = np.round(sf)
+    dq = np.abs(q - qf)
+    dr = np.abs(r - rf)
+    ds = np.abs(s - sf)
+
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    q = np.where(fix_q, -r - s, q)
+    r = np.where(fix_r, -q - s, r)
+    return q.astype(np.int64), r.astype(np.int64)
+
+
+def hex_to_latlon(q: "np.ndarray", r: "np.ndarray", size: float) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Axial (q, r) -> pusat hex (lat, lon)."""
+    q = np.asarray(q, dtype=np.float64)
+    r = np.asarray(r, dtype=np.float64)
+    x = size * _SQRT3 * (q + r / 2.0)
+    y = size * 1.5 * r
+    return y, x / _LAT0_COS
+
+
+def _day_index(epoch: "np.ndarray") -> "np.ndarray":
+    return np.floor((epoch + _WIB_OFFSET) / 86400.0).astype(np.int64)
+
+
+def _day_to_iso(day: int) -> str:
+    return (_EPOCH_DAY0 + timedelta(days=int(day))).isoformat()
+
+
+def _iso_to_day(s: str) -> Optional[int]:
+    try:
+        return (datetime.strptime(s.strip(), "%Y-%m-%d").date() - _EPOCH_DAY0).days
+    except Exception:
+        return None
+
+
+# ==========================
+# AGGREGATION
+# ==========================
+def _status_flags(status: List[Any]) -> Tuple["np.ndarray", "np.ndarray"]:
+    up = [str(s or "").strip().upper() for s in status]
+    return (
+        np.asarray([s == "KRITIS" for s in up], dtype=np.int64),
+        np.asarray([s == "WASPADA" for s in up], dtype=np.int64),
+    )
+
+
+def aggregate_points(agg: Dict[int, Dict[Any, Dict[Any, list]]], kind: str, rows: List[Dict[str, Any]]) -> None:
+    """Tambahkan titik asesmen ke agregat (in-place, bisa dipanggil berulang).
+
+    Jangan dipanggil pada agregat yang sudah dipublikasikan di CACHE_HEATMAP
+    (pakai merge_aggregate).
+    """
+    rows = [
+        r for r in rows or []
+        if r.get("epoch") is not None and r.get("latitude") is not None and r.get("longitude") is not None
+    ]
+    if not rows:
+        return
+
+    lat = np.asarray([r["latitude"] for r in rows], dtype=np.float64)
+    lon = np.asarray([r["longitude"] for r in rows], dtype=np.float64)
+    epoch = np.asarray([r["epoch"] for r in rows], dtype=np.float64)
+    skor = np.asarray([r.get("skor") if r.get("skor") is not None else 0.0 for r in rows], dtype=np.float64)
+    status = [r.get("status") for r in rows]
+    kritis, waspada = _status_flags(status)
+    day = _day_index(epoch)
+
+    for res, size in HEX_RESOLUTIONS.items():
+        q, r = latlon_to_hex(lat, lon, size)
+        keys = np.stack([day, q, r], axis=1)
+        uniq, inv = np.unique(keys, axis=0, return_inverse=True)
+        inv = inv.reshape(-1)
+        n_groups = uniq.shape[0]
+
+        n = np.bincount(inv, minlength=n_groups)
+        s_skor = np.bincount(inv, weights=skor, minlength=n_groups)
+        n_kr = np.bincount(inv, weights=kritis, minlength=n_groups)
+        n_ws = np.bincount(inv, weights=waspada, minlength=n_groups)
+
+        # Titik terbaru per grup: urut (grup, epoch) lalu ambil elemen terakhir tiap grup
+        order = np.lexsort((epoch, inv))
+        last_pos = np.searchsorted(inv[order], np.arange(n_groups), side="right") - 1
+        last_idx = order[last_pos]
+
+        res_agg = agg.setdefault(res, {})
+        for g in range(n_groups):
+            d, hq, hr = (int(v) for v in uniq[g])
+            li = int(last_idx[g])
+            cell = res_agg.setdefault((d, kind), {}).get((hq, hr))
+            if cell is None:
+                res_agg[(d, kind)][(hq, hr)] = [
+                    int(n[g]), float(s_skor[g]), int(n_kr[g]), int(n_ws[g]), float(epoch[li]), status[li],
+                ]
+            else:
+                cell[0] += int(n[g])
+                cell[1] += float(s_skor[g])
+                cell[2] += int(n_kr[g])
+                cell[3] += int(n_ws[g])
+                if float(epoch[li]) >= cell[4]:
+                    cell[4] = float(epoch[li])
+                    cell[5] = status[li]
+
+
+def _merge_cell(dst: list, src: list) -> None:
+    dst[0] += src[0]
+    dst[1] += src[1]
+    dst[2] += src[2]
+    dst[3] += src[3]
+    if src[4] >= dst[4]:
+        dst[4] = src[4]
+        dst[5] = src[5]
+
+
+def merge_aggregate(
+    base: Dict[int, Dict[Any, Dict[Any, list]]],
+    delta: Dict[int, Dict[Any, Dict[Any, list]]],
+) -> Dict[int, Dict[Any, Dict[Any, list]]]:
+    """base + delta -> agregat BARU; base tidak diubah (dict/list yang tersentuh disalin)."""
+    out = dict(base)
+    for res, groups in delta.items():
+        res_out = dict(out.get(res) or {})
+        for gkey, cells in groups.items():
+            g_out = dict(res_out.get(gkey) or {})
+            for hkey, c in cells.items():
+                old = g_out.get(hkey)
+                if old is None:
+                    g_out[hkey] = list(c)
+                else:
+                    merged = list(old)
+                    _merge_cell(merged, c)
+                    g_out[hkey] = merged
+            res_out[gkey] = g_out
+        out[res] = res_out
+    return out
+
+
+def _max_id(rows: List[Dict[str, Any]], prev: Optional[int]) -> Optional[int]:
+    ids = [int(r["id"]) for r in rows or [] if r.get("id") is not None]
+    if not ids:
+        return prev
+    return max(ids + ([prev] if prev is not None else []))
+
+
+def get_aggregate() -> Dict[int, Dict[Any, Dict[Any, list]]]:
+    """Ambil agregat; bangun penuh bila belum ada/expired, atau delta bila dirty."""
+    if pg_get_asesmen_points is None:
+        return {}
+
+    agg = CACHE_HEATMAP["agg"]
+    fresh = time.time() - CACHE_HEATMAP["timestamp"] < HEATMAP_TTL_SECONDS
+    if agg is not None and fresh and not CACHE_HEATMAP["dirty"]:
+        return agg
+
+    with _CACHE_LOCK:
+        agg = CACHE_HEATMAP["agg"]
+        fresh = time.time() - CACHE_HEATMAP["timestamp"] < HEATMAP_TTL_SECONDS
+
+        if agg is None or not fresh:
+            # Rebuild penuh
+            agg = {}
+            last_id: Dict[str, Optional[int]] = {}
+            for kind, _env, _default in ASESMEN_KIND_TABLES:
+                try:
+                    rows = pg_get_asesmen_points(kind, hours=HEATMAP_LOOKBACK_HOURS)
+                except Exception as e:
+                    print(f"[HEATMAP] gagal ambil asesmen {kind}: {e}")
+                    rows = []
+                aggregate_points(agg, kind, rows)
+                last_id[kind] = _max_id(rows, None)
+
+            CACHE_HEATMAP["agg"] = agg
+            CACHE_HEATMAP["last_id"] = last_id
+            CACHE_HEATMAP["timestamp"] = time.time()
+            CACHE_HEATMAP["dirty"] = False
+            return agg
+
+        if CACHE_HEATMAP["dirty"]:
+            # Delta: hanya baris baru (id > id terakhir yang sudah diagregasi),
+            # digabung ke salinan -> pembaca agregat lama tidak terganggu
+            CACHE_HEATMAP["dirty"] = False
+            delta: Dict[int, Dict[Any, Dict[Any, list]]] = {}
+            last_id = dict(CACHE_HEATMAP["last_id"])
+            for kind, _env, _default in ASESMEN_KIND_TABLES:
+                prev = last_id.get(kind)
+                try:
+                    rows = pg_get_asesmen_points(kind, hours=HEATMAP_LOOKBACK_HOURS, after_id=prev)
+                except Exception as e:
+                    print(f"[HEATMAP] gagal ambil delta asesmen {kind}: {e}")
+                    continue
+                aggregate_points(delta, kind, rows)
+                last_id[kind] = _max_id(rows, prev)
+            if delta:
+                agg = merge_aggregate(agg, delta)
+                CACHE_HEATMAP["agg"] = agg
+            CACHE_HEATMAP["last_id"] = last_id
+
+        return agg
+
+
+def query_hex(
+    agg: Dict[int, Dict[Any, Dict[Any, list]]],
+    res: int,
+    day_from: Optional[int] = None,
+    day_to: Optional[int] = None,
+    kinds: Optional[List[str]] = None,
+    per_day: bool = False,
+) -> Dict[str, Any]:
+    """Gabungkan agregat dalam rentang hari -> array kolom compact."""
+    res_agg = agg.get(res) or {}
+
+    merged: Dict[Tuple[int, int, int], list] = {}
+    for (day, kind), cells in res_agg.items():
+        if day_from is not None and day < day_from:
+            continue
+        if day_to is not None and day > day_to:
+            continue
+        if kinds and kind not in kinds:
+            continue
+        dkey = day if per_day else 0
+        for (q, r), c in cells.items():
+            m = merged.get((dkey, q, r))
+            if m is None:
+                merged[(dkey, q, r)] = list(c)
+            else:
+                _merge_cell(m, c)
+
+    keys = sorted(merged.keys())
+    size = HEX_RESOLUTIONS[res]
+    q_arr = np.asarray([k[1] for k in keys], dtype=np.int64)
+    r_arr = np.asarray([k[2] for k in keys], dtype=np.int64)
+    lat, lon = hex_to_latlon(q_arr, r_arr, size)
+
+    out: Dict[str, Any] = {
+        "res": res,
+        "hex_size_deg": size,
+        "q": q_arr.tolist(),
+        "r": r_arr.tolist(),
+        "lat": np.round(lat, 6).tolist(),
+        "lon": np.round(lon, 6).tolist(),
+        "n": [merged[k][0] for k in keys],
+        "avg_skor": [round(merged[k][1] / merged[k][0], 1) if merged[k][0] else None for k in keys],
+        "n_kritis": [merged[k][2] for k in keys],
+        "n_waspada": [merged[k][3] for k in keys],
+        "latest_status": [merged[k][5] for k in keys],
+        "latest_waktu": [
+            datetime.fromtimestamp(merged[k][4], tz=timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+            for k in keys
+        ],
+    }
+    if per_day:
+        out["day"] = [_day_to_iso(k[0]) for k in keys]
+    return out
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_heatmap_routes(app):
+
+    @app.route("/api/heatmap_hex", methods=["GET"])
+    def api_heatmap_hex():
+        """Heatmap hexagon keparahan asesmen.
+
+        Query params (opsional):
+          - res=0..3            resolusi hex (default 1)
+          - start=YYYY-MM-DD    hari awal (WIB, inklusif)
+          - end=YYYY-MM-DD      hari akhir (WIB, inklusif)
+          - kind=kesehatan,wash jenis asesmen (default semua)
+          - per_day=1           pecah per hari (untuk animasi slider)
+        """
+        if np is None or pg_get_asesmen_points is None:
+            return jsonify({"success": False, "error": "Fitur belum aktif (numpy/pg_data belum siap)."}), 500
+
+        try:
+            res = int(request.args.get("res", "1") or 1)
+        except Exception:
+            res = 1
+        if res not in HEX_RESOLUTIONS:
+            return jsonify({"success": False, "error": "Resolusi tidak valid."}), 400
+
+        day_from = _iso_to_day(request.args.get("start") or "")
+        day_to = _iso_to_day(request.args.get("end") or "")
+        kinds = [k.strip().lower() for k in (request.args.get("kind") or "").split(",") if k.strip()] or None
+        per_day = (request.args.get("per_day") or "").strip().lower() in ("1", "true", "yes")
+
+        try:
+            agg = get_aggregate()
+            data = query_hex(agg, res, day_from, day_to, kinds, per_day)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+        return jsonify({"success": True, **data})
@@ -0,0 +1,222 @@
+# idempotency.py
+# SATGAS USU Peduli - Idempotency key untuk route submit_* (anti kirim dobel)
+# ---------------------------------------------------------------
+# - Tiap form submit membawa token unik: hidden input `idempotency_key`
+#   (template global idempotency_field(), token baru tiap halaman di-render)
+#   atau header Idempotency-Key. Klik dua kali / kirim ulang setelah koneksi
+#   putus -> token sama.
+# - before_request: token (di-scope per endpoint + relawan) dicek di
+#     1) cache memori (IDEMPOTENCY_TTL_SECONDS) berisi hasil request pertama
+#     2) Postgres (pg_data: idempotency_key, PK) -> klaim INSERT .. ON CONFLICT
+#   Sudah selesai -> hasil asli diputar ulang (flash + redirect yang sama)
+#   tanpa INSERT / simpan foto lagi. Masih diproses -> pesan tunggu.
+# - after_request: hasil (status, Location, flash) disimpan. Request gagal
+#   (flash 'danger', 5xx, exception) -> token dilepas agar bisa dicoba lagi.
+# - Tanpa token (klien lama) -> perilaku lama. Tanpa Postgres -> memori saja
+#   (per proses).
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from flask import flash, g, redirect, request, session, url_for
+from markupsafe import Markup
+
+try:
+    from pg_data import (
+        pg_claim_idempotency_key,
+        pg_complete_idempotency_key,
+        pg_release_idempotency_key,
+        pg_purge_idempotency_keys,
+    )
+except Exception as _pg_err:
+    print(f"[IDEMP] Error import pg_data: {_pg_err}")
+    pg_claim_idempotency_key = None
+    pg_complete_idempotency_key = None
+    pg_release_idempotency_key = None
+    pg_purge_idempotency_keys = None
+
+# ==========================
+# CONFIG
+# ==========================
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "600") or "600")
+IDEMPOTENCY_PENDING_SECONDS = int(os.environ.get("IDEMPOTENCY_PENDING_SECONDS", "120") or "120")
+IDEMPOTENCY_KEEP_HOURS = float(os.environ.get("IDEMPOTENCY_KEEP_HOURS", "24") or "24")
+IDEMPOTENCY_CACHE_MAX = 5000
+
+FIELD_NAME = "idempotency_key"
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{8,128}$")
+
+# key -> (kedaluwarsa epoch, hasil)
+_DONE: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# key yang sedang diproses di proses ini (klik dobel sebelum request pertama selesai)
+_PENDING: Set[str] = set()
+_LOCK = threading.Lock()
+_LAST_PURGE = [0.0]
+
+
+def idempotency_field() -> Markup:
+    """<input hidden> berisi token baru; taruh di dalam setiap <form> submit."""
+    return Markup(f'<input type="hidden" name="{FIELD_NAME}" value="{uuid.uuid4().hex}">')
+
+
+def _db_enabled() -> bool:
+    return pg_claim_idempotency_key is not None and bool(os.environ.get("DATABASE_URL"))
+
+
+def _request_key() -> Optional[str]:
+    token = request.headers.get("Idempotency-Key") or request.form.get(FIELD_NAME) or ""
+    token = token.strip()
+    if not _TOKEN_RE.match(token):
+        return None
+    relawan = session.get("id_relawan") or "-"
+    return f"{request.endpoint}:{relawan}:{token}"
+
+
+def _cache_get(key: str) -> Optional[Dict[str, Any]]:
+    now = time.time()
+    with _LOCK:
+        hit = _DONE.get(key)
+        if hit is None:
+            return None
+        if hit[0] < now:
+            _DONE.pop(key, None)
+            return None
+        return hit[1]
+
+
+def _cache_put(key: str, result: Dict[str, Any]) -> None:
+    with _LOCK:
+        _DONE[key] = (time.time() + IDEMPOTENCY_TTL_SECONDS, result)
+        _DONE.move_to_end(key)
+        while len(_DONE) > IDEMPOTENCY_CACHE_MAX:
+            _DONE.popitem(last=False)
+
+
+def _claim(key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Return ("claimed", None) | ("done", hasil) | ("pending", None)."""
+    with _LOCK:
+        if key in _PENDING:
+            return "pending", None
+        _PENDING.add(key)
+    if not _db_enabled():
+        return "claimed", None
+
+    _maybe_purge()
+    try:
+        row = pg_claim_idempotency_key(key, request.endpoint, session.get("id_relawan"), IDEMPOTENCY_PENDING_SECONDS)
+    except Exception as e:
+        # DB bermasalah: jangan blokir submit (dedup memori tetap jalan)
+        print(f"[IDEMP] klaim gagal ({e}); lanjut tanpa cek DB")
+        return "claimed", None
+    if row and row.get("claimed"):
+        return "claimed", None
+
+    with _LOCK:
+        _PENDING.discard(key)
+    if row and row.get("status") == "done" and row.get("response"):
+        _cache_put(key, row["response"])
+        return "done", row["response"]
+    return "pending", None
+
+
+def _release(key: str) -> None:
+    with _LOCK:
+        _PENDING.discard(key)
+    if _db_enabled():
+        try:
+            pg_release_idempotency_key(key)
+        except Exception as e:
+            print(f"[IDEMP] gagal lepas key: {e}")
+
+
+def _complete(key: str, result: Dict[str, Any]) -> None:
+    _cache_put(key, result)
+    with _LOCK:
+        _PENDING.discard(key)
+    if _db_enabled():
+        try:
+            pg_complete_idempotency_key(key, result)
+        except Exception as e:
+            print(f"[IDEMP] gagal simpan hasil: {e}")
+
+
+def _maybe_purge() -> None:
+    now = time.time()
+    with _LOCK:
+        if now - _LAST_PURGE[0] < 3600:
+            return
+        _LAST_PURGE[0] = now
+    try:
+        pg_purge_idempotency_keys(IDEMPOTENCY_KEEP_HOURS)
+    except Exception as e:
+        print(f"[IDEMP] purge gagal: {e}")
+
+
+def _replay(result: Dict[str, Any]):
+    for category, message in result.get("flashes") or []:
+        flash(message, category)
+    flash("Data ini sudah terkirim sebelumnya (tidak disimpan ulang).", "info")
+    resp = redirect(result.get("location") or url_for("map_view"))
+    resp.headers["Idempotent-Replayed"] = "true"
+    return resp
+
+
+# ==========================
+# REGISTRATION
+# ==========================
+def register_idempotency(app, endpoints: Iterable[str]):
+    endpoints = set(endpoints)
+    app.add_template_global(idempotency_field, "idempotency_field")
+    print(f"[IDEMP] {len(endpoints)} endpoint, db={'ya' if _db_enabled() else 'tidak'}")
+
+    @app.before_request
+    def _idempotency_check():
+        if request.method != "POST" or request.endpoint not in endpoints:
+            return None
+        key = _request_key()
+        if key is None:
+            return None
+
+        hit = _cache_get(key)
+        if hit is not None:
+            return _replay(hit)
+        state, result = _claim(key)
+        if state == "done":
+            return _replay(result)
+        if state == "pending":
+            flash("Kiriman sebelumnya masih diproses. Tunggu sebentar lalu cek peta sebelum mengirim ulang.", "warning")
+            return redirect(url_for("map_view"))
+
+        g._idem_key = key
+        g._idem_flash_start = len(session.get("_flashes") or [])
+        return None
+
+    @app.after_request
+    def _idempotency_store(response):
+        key = g.pop("_idem_key", None)
+        if key is None:
+            return response
+        flashes = [list(f) for f in (session.get("_flashes") or [])[g.pop("_idem_flash_start", 0):]]
+        if response.status_code >= 500 or any(cat == "danger" for cat, _msg in flashes):
+            _release(key)  # gagal: kiriman ulang harus diproses lagi
+        else:
+            _complete(key, {
+                "status": response.status_code,
+                "location": response.headers.get("Location"),
+                "flashes": flashes,
+            })
+        return response
+
+    @app.teardown_request
+    def _idempotency_teardown(exc):
+        key = g.pop("_idem_key", None)
+        if key is not None:  # exception: after_request tidak jalan
+            _release(key)
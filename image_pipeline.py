@@ -0,0 +1,315 @@
+# image_pipeline.py
+# SATGAS USU Peduli - Varian foto upload (thumbnail / display WebP)
+# ---------------------------------------------------------------
+# - Setelah foto asesmen/lokasi disimpan, job "image.variants" masuk
+#   job_queue (worker terpisah). Tanpa antrian: worker pool di proses web
+#   (IMAGE_WORKERS thread) -> request submit tetap langsung kembali.
+# - Per foto dibuat (di folder yang sama):
+#     <nama>.thumb.webp    sisi terpanjang <= IMAGE_THUMB_PX   (popup peta)
+#     <nama>.display.webp  sisi terpanjang <= IMAGE_DISPLAY_PX (galeri)
+#     <nama>.meta.json     path varian, ukuran asli, EXIF GPS/waktu (opsional)
+#   Orientasi EXIF diterapkan lalu semua EXIF dibuang dari varian.
+# - IMAGE_STRIP_ORIGINAL=1: EXIF (GPS, model HP, dll) dibuang dari file asli
+#   SEBELUM di-hash & diberi nama (media_store.store_upload -> strip_exif),
+#   jadi byte file CAS (immutable, di-cache 1 tahun) tidak pernah berubah.
+#   Ringkasan EXIF tetap dicatat di meta.json. File lama ber-nama tetap
+#   (non-hash) yang masih ber-EXIF ditulis ulang saat diproses/backfill.
+# - /media/<path>?variant=thumb|display (media_serving) mengirim varian bila
+#   sudah ada, fallback ke file asli.
+# - Butuh Pillow; tanpa Pillow pipeline nonaktif (upload tetap jalan).
+# Backfill foto lama:
+#     python image_pipeline.py media/photo_lokasi media/photo_relawan
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from PIL import Image, ImageOps  # type: ignore
+except Exception:
+    Image = None
+    ImageOps = None
+
+# ==========================
+# CONFIG
+# ==========================
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", "2") or "2")
+IMAGE_THUMB_PX = int(os.environ.get("IMAGE_THUMB_PX", "320") or "320")
+IMAGE_DISPLAY_PX = int(os.environ.get("IMAGE_DISPLAY_PX", "1280") or "1280")
+IMAGE_WEBP_QUALITY = int(os.environ.get("IMAGE_WEBP_QUALITY", "78") or "78")
+IMAGE_STRIP_ORIGINAL = str(os.environ.get("IMAGE_STRIP_ORIGINAL", "1")).strip().lower() in ("1", "true", "yes")
+IMAGE_EXIF_CAPTURE = str(os.environ.get("IMAGE_EXIF_CAPTURE", "1")).strip().lower() in ("1", "true", "yes")
+
+# nama varian -> sisi terpanjang (px)
+VARIANTS: Dict[str, int] = {"thumb": IMAGE_THUMB_PX, "display": IMAGE_DISPLAY_PX}
+SOURCE_EXT = {".jpg", ".jpeg", ".png", ".webp"}
+STRIP_FORMATS = ("JPEG", "PNG", "WEBP")
+
+# Nama ber-hash (cas/../<sha256>.<ext>, <nama>.<hex>.<ext>) = immutable (lihat media_serving)
+_HASHED_STEM_RE = re.compile(r"(?:^|\.)[0-9a-f]{12,64}$")
+
+# Tag EXIF
+_TAG_ORIENTATION = 0x0112
+_TAG_EXIF_IFD = 0x8769
+_TAG_GPS_IFD = 0x8825
+_TAG_DATETIME = 0x0132
+_TAG_DATETIME_ORIGINAL = 0x9003
+
+# Dipanggil (abs_path, meta) setelah varian selesai dibuat (mis. media_store)
+PROCESSED_LISTENERS: List[Callable[[str, Dict[str, Any]], None]] = []
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def enabled() -> bool:
+    return Image is not None
+
+
+def variant_path(path: str, variant: str) -> str:
+    """'a/b/foto.jpg' -> 'a/b/foto.thumb.webp' (berlaku untuk path relatif maupun absolut)."""
+    return f"{os.path.splitext(path)[0]}.{variant}.webp"
+
+
+def meta_path(path: str) -> str:
+    return f"{os.path.splitext(path)[0]}.meta.json"
+
+
+def is_variant_file(path: str) -> bool:
+    name = os.path.basename(path)
+    return name.endswith(".meta.json") or any(name.endswith(f".{v}.webp") for v in VARIANTS)
+
+
+def _gps_to_deg(values, ref) -> Optional[float]:
+    try:
+        d, m, s = (float(x) for x in values)
+    except Exception:
+        return None
+    deg = d + m / 60.0 + s / 3600.0
+    if str(ref or "").upper() in ("S", "W"):
+        deg = -deg
+    return round(deg, 7)
+
+
+def _exif_summary(exif) -> Dict[str, Any]:
+    """Ambil waktu & GPS dari EXIF (bila ada). Format waktu: ISO tanpa tz (jam kamera)."""
+    out: Dict[str, Any] = {}
+    try:
+        sub = exif.get_ifd(_TAG_EXIF_IFD)
+        raw = sub.get(_TAG_DATETIME_ORIGINAL) or exif.get(_TAG_DATETIME)
+        if raw:
+            out["taken_at"] = datetime.strptime(str(raw).strip(), "%Y:%m:%d %H:%M:%S").isoformat()
+    except Exception:
+        pass
+    try:
+        gps = exif.get_ifd(_TAG_GPS_IFD)
+        if gps:
+            lat = _gps_to_deg(gps.get(2), gps.get(1))
+            lon = _gps_to_deg(gps.get(4), gps.get(3))
+            if lat is not None and lon is not None:
+                out["latitude"], out["longitude"] = lat, lon
+    except Exception:
+        pass
+    return out
+
+
+def _atomic_save(img, dest: str, fmt: str, **kwargs) -> None:
+    tmp = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        img.save(tmp, format=fmt, **kwargs)
+        os.replace(tmp, dest)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _save_stripped(img, dest: str, fmt: str) -> None:
+    """Tulis ulang gambar (orientasi sudah diterapkan) tanpa EXIF, format sama."""
+    if fmt == "JPEG":
+        _atomic_save(img.convert("RGB"), dest, "JPEG", quality=90, optimize=True)
+    elif fmt == "PNG":
+        _atomic_save(img, dest, "PNG", optimize=True)
+    else:
+        _atomic_save(img, dest, "WEBP", quality=90)
+
+
+def _write_meta(abs_path: str, meta: Dict[str, Any]) -> None:
+    tmp = f"{meta_path(abs_path)}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False)
+    os.replace(tmp, meta_path(abs_path))
+
+
+def is_content_addressed(path: str) -> bool:
+    return bool(_HASHED_STEM_RE.search(os.path.splitext(os.path.basename(path))[0]))
+
+
+def strip_exif(path: str) -> Optional[Dict[str, Any]]:
+    """Buang EXIF dari file upload sebelum di-hash (ditulis ulang di tempat, format sama).
+
+    Return ringkasan EXIF (waktu/GPS, bisa {}) bila file ditulis ulang; None bila
+    tidak (tanpa Pillow, IMAGE_STRIP_ORIGINAL=0, bukan foto, atau memang tanpa EXIF).
+    """
+    if Image is None or not IMAGE_STRIP_ORIGINAL:
+        return None
+    try:
+        with Image.open(path) as src:
+            fmt = src.format
+            exif = src.getexif()
+            if len(exif) == 0 or fmt not in STRIP_FORMATS:
+                return None
+            info = _exif_summary(exif) if IMAGE_EXIF_CAPTURE else {}
+            img = ImageOps.exif_transpose(src)
+            img.load()
+    except Exception as e:
+        print(f"[IMAGE] strip EXIF dilewati ({os.path.basename(path)}): {e}")
+        return None
+    _save_stripped(img, path, fmt)
+    return info
+
+
+def save_exif_info(abs_path: str, info: Dict[str, Any]) -> None:
+    """Catat ringkasan EXIF hasil strip_exif di meta.json (dilengkapi varian oleh process_image)."""
+    if info and read_photo_meta(abs_path) is None:
+        _write_meta(abs_path, {"source": os.path.basename(abs_path), "exif": info})
+
+
+def _has_variants(abs_path: str) -> bool:
+    return bool((read_photo_meta(abs_path) or {}).get("variants"))
+
+
+def process_image(abs_path: str) -> Dict[str, Any]:
+    """Buat varian WebP + meta.json untuk 1 file. Return isi meta."""
+    if Image is None:
+        raise RuntimeError("Pillow belum terpasang")
+
+    # EXIF sudah dibuang saat upload -> ringkasannya ada di meta.json awal
+    prev_info = (read_photo_meta(abs_path) or {}).get("exif") or {}
+    with Image.open(abs_path) as src:
+        fmt = src.format
+        exif = src.getexif()
+        has_exif = len(exif) > 0
+        info = _exif_summary(exif) if (has_exif and IMAGE_EXIF_CAPTURE) else {}
+        img = ImageOps.exif_transpose(src)
+        img.load()
+
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+
+    meta: Dict[str, Any] = {
+        "source": os.path.basename(abs_path),
+        "width": img.width,
+        "height": img.height,
+        "variants": {},
+    }
+    for name, max_px in VARIANTS.items():
+        out = img.copy()
+        out.thumbnail((max_px, max_px), Image.LANCZOS)
+        dest = variant_path(abs_path, name)
+        _atomic_save(out, dest, "WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+        meta["variants"][name] = {"file": os.path.basename(dest), "width": out.width, "height": out.height}
+    if info or prev_info:
+        meta["exif"] = info or prev_info
+
+    # Asli: buang EXIF hanya untuk file lama ber-nama tetap. File ber-hash tidak
+    # pernah ditulis ulang (URL immutable; EXIF-nya sudah dibuang saat upload).
+    if IMAGE_STRIP_ORIGINAL and has_exif and fmt in STRIP_FORMATS and not is_content_addressed(abs_path):
+        _save_stripped(img, abs_path, fmt)
+        meta["exif_stripped"] = True
+
+    _write_meta(abs_path, meta)
+    return meta
+
+
+def read_photo_meta(abs_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(meta_path(abs_path), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _run_job(abs_path: str, force: bool = False) -> None:
+    # File CAS yang sama di-upload ulang -> varian sudah ada
+    if not force and _has_variants(abs_path):
+        return
+    try:
+        meta = process_image(abs_path)
+        print(f"[IMAGE] {os.path.basename(abs_path)}: {meta['width']}x{meta['height']} -> {', '.join(meta['variants'])}")
+    except Exception as e:
+        print(f"[IMAGE] gagal proses {abs_path}: {e}")
+        return
+    for fn in PROCESSED_LISTENERS:
+        try:
+            fn(abs_path, meta)
+        except Exception as e:
+            print(f"[IMAGE] listener gagal ({getattr(fn, '__name__', fn)}): {e}")
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=max(1, IMAGE_WORKERS), thread_name_prefix="image")
+        return _EXECUTOR
+
+
+def _abs_paths(media_root: str, rel_paths: List[str]) -> List[str]:
+    """Path relatif ke media_root -> absolut. Menerima juga prefix "media/" (photo_path foto lokasi)."""
+    out: List[str] = []
+    for rel in rel_paths or []:
+        if not rel:
+            continue
+        rel = rel.replace("\\", "/")
+        if rel.startswith("media/"):
+            rel = rel[len("media/"):]
+        out.append(os.path.join(media_root, rel))
+    return out
+
+
+def submit_images(media_root: str, rel_paths: List[str]) -> None:
+    """Antrikan pembuatan varian ke thread pool proses ini (tanpa job_queue)."""
+    if Image is None:
+        return
+    for p in _abs_paths(media_root, rel_paths):
+        _executor().submit(_run_job, p)
+
+
+def process_images(media_root: str, rel_paths: List[str]) -> None:
+    """Buat varian secara sinkron (dipanggil worker job_queue)."""
+    if Image is None:
+        return
+    for p in _abs_paths(media_root, rel_paths):
+        _run_job(p)
+
+
+def backfill(paths: List[str], force: bool = False) -> int:
+    """Proses file yang belum punya varian (sinkron). Return jumlah file diproses."""
+    done = 0
+    for root in paths:
+        for dirpath, _dirs, files in os.walk(root):
+            for name in sorted(files):
+                p = os.path.join(dirpath, name)
+                if os.path.splitext(name)[1].lower() not in SOURCE_EXT or is_variant_file(p) or "/.tmp" in p:
+                    continue
+                if not force and _has_variants(p):
+                    continue
+                _run_job(p, force=True)
+                done += 1
+    return done
+
+
+if __name__ == "__main__":
+    if Image is None:
+        sys.exit("Pillow belum terpasang (pip install Pillow)")
+    args = [a for a in sys.argv[1:] if a != "--force"]
+    n = backfill(args or ["media"], force="--force" in sys.argv)
+    print(f"[IMAGE] selesai: {n} file")
@@ -0,0 +1,306 @@
+# job_queue.py
+# SATGAS USU Peduli - Antrian job background untuk efek samping submit
+# ---------------------------------------------------------------
+# - Route submit_* cukup INSERT data utama lalu enqueue(kind, payload);
+#   pekerjaan sampingan (varian foto, isi kecamatan/desa, ...) dikerjakan
+#   worker terpisah -> latensi submit turun, lonjakan diserap antrian.
+# - Antrian = tabel Postgres (pg_data: job_queue). Worker mengklaim job
+#   dengan SELECT ... FOR UPDATE SKIP LOCKED -> banyak worker aman jalan
+#   bersamaan tanpa saling menunggu.
+# - Gagal -> retry dengan backoff eksponensial (+ jitter) sampai
+#   max_attempts, lalu status 'dead' (view <tabel>_dead, /api/admin/jobs).
+# - Worker mati di tengah job -> setelah JOB_LEASE_SECONDS job diklaim
+#   ulang. Handler harus idempoten. Worker lambat yang lease-nya sudah
+#   diambil alih tidak bisa lagi menandai job done/gagal (cek locked_by).
+# - JOBS_ENABLED=0 (default) / Postgres tidak tersedia -> job dijalankan
+#   langsung di proses web (fallback handler, mis. thread pool). Set
+#   JOBS_ENABLED=1 HANYA bila worker di bawah ini jalan; tanpa worker job
+#   hanya menumpuk di antrian.
+# - Efek samping yang hasilnya bisa ikut INSERT (kecamatan/desa lokasi) cek
+#   jobs_queued(): antrian nonaktif -> dikerjakan sebelum INSERT seperti
+#   semula (1 INSERT, tanpa UPDATE susulan).
+# - Handler didaftarkan app_postgres (@job_handler); worker meng-import
+#   app_postgres, jadi jalankan dari folder app (MEDIA_DIR/log sama).
+# Jalankan worker (systemd / supervisor, bisa lebih dari 1):
+#     python job_queue.py worker [--once]
+#     python job_queue.py dead | retry <id>
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from flask import jsonify, request, session
+
+try:
+    from pg_data import (
+        pg_enqueue_job,
+        pg_claim_jobs,
+        pg_complete_job,
+        pg_fail_job,
+        pg_get_job_stats,
+        pg_get_dead_jobs,
+        pg_retry_dead_job,
+        pg_purge_done_jobs,
+    )
+except Exception as _pg_err:
+    print(f"[JOB] Error import pg_data: {_pg_err}")
+    pg_enqueue_job = None
+    pg_claim_jobs = None
+    pg_complete_job = None
+    pg_fail_job = None
+    pg_get_job_stats = None
+    pg_get_dead_jobs = None
+    pg_retry_dead_job = None
+    pg_purge_done_jobs = None
+
+# ==========================
+# CONFIG
+# ==========================
+JOBS_ENABLED = str(os.environ.get("JOBS_ENABLED", "0")).strip().lower() in ("1", "true", "yes")
+JOB_POLL_SECONDS = float(os.environ.get("JOB_POLL_SECONDS", "1") or "1")
+JOB_BATCH = int(os.environ.get("JOB_BATCH", "10") or "10")
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "5") or "5")
+JOB_RETRY_BASE_SECONDS = float(os.environ.get("JOB_RETRY_BASE_SECONDS", "10") or "10")
+JOB_RETRY_MAX_SECONDS = float(os.environ.get("JOB_RETRY_MAX_SECONDS", "3600") or "3600")
+JOB_LEASE_SECONDS = float(os.environ.get("JOB_LEASE_SECONDS", "300") or "300")
+JOB_KEEP_DONE_HOURS = float(os.environ.get("JOB_KEEP_DONE_HOURS", "72") or "72")
+
+# kind -> handler(payload); payload = dict hasil JSON (datetime jadi string ISO)
+JOB_HANDLERS: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+# kind -> pengganti saat antrian tidak tersedia (default: handler itu sendiri)
+JOB_FALLBACKS: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+
+
+def job_handler(kind: str, fallback: Optional[Callable[[Dict[str, Any]], None]] = None):
+    """Decorator: daftarkan handler untuk jenis job `kind`."""
+
+    def deco(fn):
+        JOB_HANDLERS[kind] = fn
+        if fallback is not None:
+            JOB_FALLBACKS[kind] = fallback
+        return fn
+
+    return deco
+
+
+def _run_inline(kind: str, payload: Dict[str, Any]) -> None:
+    fn = JOB_FALLBACKS.get(kind) or JOB_HANDLERS.get(kind)
+    if fn is None:
+        print(f"[JOB] handler '{kind}' tidak terdaftar, job dibuang")
+        return
+    try:
+        fn(payload)
+    except Exception as e:
+        print(f"[JOB] {kind} (langsung) gagal: {e}")
+
+
+def jobs_queued() -> bool:
+    """True bila enqueue() masuk antrian (dikerjakan worker), bukan dijalankan langsung."""
+    return JOBS_ENABLED and pg_enqueue_job is not None
+
+
+def enqueue(kind: str, payload: Dict[str, Any], delay_seconds: float = 0,
+            max_attempts: Optional[int] = None) -> Optional[int]:
+    """Masukkan job ke antrian. Return id job; None bila dijalankan langsung (fallback)."""
+    if jobs_queued():
+        try:
+            return pg_enqueue_job(kind, payload, delay_seconds, max_attempts or JOB_MAX_ATTEMPTS)
+        except Exception as e:
+            print(f"[JOB] enqueue {kind} gagal, dijalankan langsung: {e}")
+    _run_inline(kind, payload)
+    return None
+
+
+def retry_delay(attempts: int) -> float:
+    """Backoff eksponensial: base * 2^(attempts-1), maks JOB_RETRY_MAX_SECONDS, jitter +-20%."""
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+# ==========================
+# WORKER
+# ==========================
+def _lost_lease(job_id: int, kind: str) -> None:
+    print(f"[JOB] #{job_id} {kind}: lease sudah diambil worker lain, hasil diabaikan")
+
+
+def run_job(job: Dict[str, Any], worker_id: str) -> bool:
+    """Jalankan 1 job hasil klaim lalu tandai done / antri ulang / dead."""
+    job_id = job["id"]
+    kind = job["kind"]
+    attempts = int(job.get("attempts") or 1)
+    max_attempts = int(job.get("max_attempts") or JOB_MAX_ATTEMPTS)
+
+    fn = JOB_HANDLERS.get(kind)
+    if fn is None:
+        if pg_fail_job(job_id, worker_id, f"handler '{kind}' tidak terdaftar", None):
+            print(f"[JOB] #{job_id} {kind}: handler tidak terdaftar -> dead")
+        else:
+            _lost_lease(job_id, kind)
+        return False
+    if attempts > max_attempts:
+        # Diklaim ulang setelah lease habis berkali-kali (worker mati/hang di job ini)
+        if pg_fail_job(job_id, worker_id, "lease habis melebihi max_attempts", None):
+            print(f"[JOB] #{job_id} {kind}: lease habis {attempts}x -> dead")
+        else:
+            _lost_lease(job_id, kind)
+        return False
+
+    t0 = time.perf_counter()
+    try:
+        fn(job.get("payload") or {})
+    except Exception as e:
+        retry = retry_delay(attempts) if attempts < max_attempts else None
+        if not pg_fail_job(job_id, worker_id, f"{type(e).__name__}: {e}", retry):
+            _lost_lease(job_id, kind)
+            return False
+        nxt = f"retry {retry:.0f}s" if retry is not None else "dead"
+        print(f"[JOB] #{job_id} {kind} gagal (percobaan {attempts}/{max_attempts}, {nxt}): {e}")
+        return False
+
+    if not pg_complete_job(job_id, worker_id):
+        _lost_lease(job_id, kind)
+        return False
+    print(f"[JOB] #{job_id} {kind} selesai {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return True
+
+
+def work_once(worker_id: str, batch: int = JOB_BATCH) -> int:
+    """Klaim & jalankan 1 batch. Return jumlah job yang diklaim."""
+    jobs = pg_claim_jobs(worker_id, batch, JOB_LEASE_SECONDS)
+    for job in jobs:
+        run_job(job, worker_id)
+    return len(jobs)
+
+
+def run_worker(worker_id: Optional[str] = None, once: bool = False) -> None:
+    """Loop worker: polling JOB_POLL_SECONDS bila antrian kosong, langsung lanjut bila batch penuh.
+
+    once=True: kerjakan sampai antrian kosong lalu berhenti (cron / debug).
+    """
+    if pg_claim_jobs is None:
+        raise RuntimeError("pg_data tidak tersedia; worker tidak bisa jalan")
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    stop = threading.Event()
+
+    def _stop(signum, _frame):
+        print(f"[JOB] sinyal {signum}, berhenti setelah batch ini")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    print(f"[JOB] worker {worker_id} jalan: {', '.join(sorted(JOB_HANDLERS)) or '-'}")
+
+    last_purge = 0.0
+    while not stop.is_set():
+        try:
+            n = work_once(worker_id)
+        except Exception as e:
+            print(f"[JOB] klaim gagal: {e}")
+            stop.wait(JOB_POLL_SECONDS * 5)
+            continue
+
+        if time.time() - last_purge > 3600:
+            last_purge = time.time()
+            try:
+                purged = pg_purge_done_jobs(JOB_KEEP_DONE_HOURS)
+                if purged:
+                    print(f"[JOB] {purged} job selesai (> {JOB_KEEP_DONE_HOURS:g} jam) dihapus")
+            except Exception as e:
+                print(f"[JOB] purge gagal: {e}")
+
+        if n < JOB_BATCH:
+            if once:
+                break
+            stop.wait(JOB_POLL_SECONDS)
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_job_routes(app):
+    print(f"[JOB] antrian {'aktif' if JOBS_ENABLED and pg_enqueue_job else 'nonaktif (job dijalankan langsung)'}")
+
+    @app.route("/api/admin/jobs", methods=["GET"])
+    def api_admin_jobs():
+        """Ringkasan antrian per (kind, status) + daftar dead-letter."""
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+        if pg_get_job_stats is None:
+            return jsonify({"success": False, "error": "pg_data tidak tersedia"}), 503
+        try:
+            limit = max(1, min(int(request.args.get("limit", 100)), 1000))
+        except ValueError:
+            limit = 100
+        try:
+            return jsonify({
+                "success": True,
+                "enabled": JOBS_ENABLED,
+                "stats": pg_get_job_stats(),
+                "dead": pg_get_dead_jobs(limit),
+            })
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    @app.route("/api/admin/jobs/<int:job_id>/retry", methods=["POST"])
+    def api_admin_job_retry(job_id):
+        """Kembalikan 1 job dead ke antrian."""
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+        if pg_retry_dead_job is None:
+            return jsonify({"success": False, "error": "pg_data tidak tersedia"}), 503
+        try:
+            ok = pg_retry_dead_job(job_id)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+        if not ok:
+            return jsonify({"success": False, "error": "Job dead tidak ditemukan"}), 404
+        return jsonify({"success": True, "id": job_id})
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    ap = argparse.ArgumentParser(description="Worker antrian job SATGAS")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    w = sub.add_parser("worker", help="jalankan worker")
+    w.add_argument("--once", action="store_true", help="berhenti bila antrian kosong")
+    w.add_argument("--id", default=None, help="default: <host>:<pid>")
+    d = sub.add_parser("dead", help="tampilkan job dead")
+    d.add_argument("--limit", type=int, default=50)
+    r = sub.add_parser("retry", help="antri ulang job dead")
+    r.add_argument("job_id", type=int)
+    args = ap.parse_args()
+
+    if args.cmd == "worker":
+        # Import app = registrasi handler (@job_handler di app_postgres).
+        # Handler terdaftar di modul `job_queue` (bukan __main__) -> jalankan dari sana.
+        import app_postgres  # noqa: F401
+        import job_queue
+
+        job_queue.run_worker(args.id, once=args.once)
+    elif args.cmd == "dead":
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        print(json.dumps(pg_get_dead_jobs(args.limit), indent=2, default=str))
+    else:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        ok = pg_retry_dead_job(args.job_id)
+        print("ok" if ok else "job dead tidak ditemukan")
+        sys.exit(0 if ok else 1)
@@ -0,0 +1,234 @@
+# log_sink.py
+# SATGAS USU Peduli - Penulis log asinkron (JSON lines) untuk logs/log.txt
+# ---------------------------------------------------------------
+# - Di-setup SEKALI saat startup (init_log_sink); request hanya memasukkan
+#   event ke antrian (tidak menunggu disk). Antrian penuh -> event dibuang
+#   & dihitung, request tidak pernah diblok.
+# - Thread latar mengumpulkan beberapa event lalu menulis dengan 1 os.write
+#   ke fd O_APPEND sambil memegang flock -> baris tidak tercampur antar
+#   worker gunicorn.
+# - Rotasi berdasarkan ukuran (LOG_MAX_BYTES) & umur (LOG_ROTATE_SECONDS),
+#   dikoordinasi antar worker lewat file .lock; file hasil rotasi bisa di-gzip.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import atexit
+import datetime
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import fcntl  # type: ignore
+except Exception:  # Windows/IIS: tanpa flock (1 proses)
+    fcntl = None  # type: ignore
+
+
+# ==========================
+# CONFIG
+# ==========================
+LOG_MAX_BYTES = int(os.environ.get("LOG_MAX_BYTES", str(10 * 1024 * 1024)) or "10485760")
+LOG_ROTATE_SECONDS = int(os.environ.get("LOG_ROTATE_SECONDS", "86400") or "86400")
+LOG_BACKUP_COUNT = int(os.environ.get("LOG_BACKUP_COUNT", "30") or "30")
+LOG_GZIP = str(os.environ.get("LOG_GZIP", "1")).strip().lower() in ("1", "true", "yes")
+LOG_QUEUE_MAX = int(os.environ.get("LOG_QUEUE_MAX", "10000") or "10000")
+BATCH_MAX = 500
+
+
+class LogSink:
+    """Antrian + thread penulis untuk 1 file log JSON lines."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=LOG_QUEUE_MAX)
+        self.dropped = 0
+        self.written = 0
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    # ---------- sisi request ----------
+    def emit(self, event: str, **fields: Any) -> None:
+        self._ensure_thread()
+        rec = {"ts": datetime.datetime.now().astimezone().isoformat(timespec="seconds"), "event": event}
+        rec.update(fields)
+        try:
+            self.queue.put_nowait(rec)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_thread(self) -> None:
+        # Thread tidak ikut ter-fork (gunicorn --preload) -> start ulang per PID
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            if self._pid != os.getpid():
+                self.queue = queue.Queue(maxsize=LOG_QUEUE_MAX)
+                self._fd = None
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 2.0) -> None:
+        """Flush sisa antrian (dipanggil saat proses berhenti)."""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    # ---------- thread penulis ----------
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            batch: List[Dict[str, Any]] = []
+            stop = item is None
+            if item is not None:
+                batch.append(item)
+            while not stop and len(batch) < BATCH_MAX:
+                try:
+                    nxt = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                else:
+                    batch.append(nxt)
+
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    print(f"[LOG] gagal menulis log: {e}")
+            if stop:
+                self._close_fd()
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        data = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in batch).encode("utf-8")
+        lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            self._maybe_rotate(lock_fd)
+            fd = self._open_fd()
+            os.write(fd, data)
+            self.written += len(batch)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            os.close(lock_fd)
+
+    def _open_fd(self) -> int:
+        # Worker lain mungkin sudah merotasi file -> buka ulang bila inode beda
+        if self._fd is not None:
+            try:
+                if os.fstat(self._fd).st_ino == os.stat(self.path).st_ino:
+                    return self._fd
+            except FileNotFoundError:
+                pass
+            self._close_fd()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        return self._fd
+
+    def _close_fd(self) -> None:
+        if self._fd is not None:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+            self._fd = None
+
+    # ---------- rotasi ----------
+    def _opened_at(self, lock_fd: int) -> float:
+        os.lseek(lock_fd, 0, os.SEEK_SET)
+        raw = os.read(lock_fd, 64).decode("ascii", "ignore").strip()
+        try:
+            return float(raw)
+        except ValueError:
+            now = time.time()
+            self._set_opened_at(lock_fd, now)
+            return now
+
+    @staticmethod
+    def _set_opened_at(lock_fd: int, ts: float) -> None:
+        os.ftruncate(lock_fd, 0)
+        os.lseek(lock_fd, 0, os.SEEK_SET)
+        os.write(lock_fd, f"{ts:.0f}".encode("ascii"))
+
+    def _maybe_rotate(self, lock_fd: int) -> None:
+        try:
+            size = os.stat(self.path).st_size
+        except FileNotFoundError:
+            self._set_opened_at(lock_fd, time.time())
+            return
+
+        now = time.time()
+        too_big = LOG_MAX_BYTES > 0 and size >= LOG_MAX_BYTES
+        too_old = LOG_ROTATE_SECONDS > 0 and now - self._opened_at(lock_fd) >= LOG_ROTATE_SECONDS
+        if not (too_big or too_old) or size == 0:
+            return
+
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        rotated = self.path.with_name(f"{self.path.name}.{stamp}")
+        n = 1
+        while rotated.exists() or Path(str(rotated) + ".gz").exists():
+            rotated = self.path.with_name(f"{self.path.name}.{stamp}-{n}")
+            n += 1
+        os.rename(self.path, rotated)
+        self._close_fd()
+        self._set_opened_at(lock_fd, now)
+
+        if LOG_GZIP:
+            try:
+                with open(rotated, "rb") as src, gzip.open(str(rotated) + ".gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(rotated)
+            except Exception as e:
+                print(f"[LOG] gagal gzip {rotated.name}: {e}")
+        self._prune()
+
+    def _prune(self) -> None:
+        if LOG_BACKUP_COUNT <= 0:
+            return
+        olds = sorted(self.path.parent.glob(self.path.name + ".2*"))
+        for p in olds[:-LOG_BACKUP_COUNT]:
+            try:
+                p.unlink()
+            except OSError:
+                pass
+
+
+_SINK: Dict[str, Optional[LogSink]] = {"sink": None}
+
+
+def init_log_sink(log_dir: Path, filename: str = "log.txt") -> LogSink:
+    """Setup sink (sekali per proses); pemanggilan berikutnya mengembalikan sink yang sama."""
+    sink = _SINK["sink"]
+    if sink is None:
+        sink = LogSink(Path(log_dir) / filename)
+        _SINK["sink"] = sink
+        atexit.register(sink.close)
+    return sink
+
+
+def log_event(event: str, **fields: Any) -> bool:
+    """Masukkan 1 event ke antrian log. False bila sink belum di-init."""
+    sink = _SINK["sink"]
+    if sink is None:
+        return False
+    sink.emit(event, **fields)
+    return True
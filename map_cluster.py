@@ -0,0 +1,291 @@
+# map_cluster.py
+# SATGAS USU Peduli - Clustering marker di server (grid per zoom)
+# ---------------------------------------------------------------
+# - Snapshot titik (relawan, asesmen 7 jenis, permintaan logistik) diambil
+#   sekali dari Postgres lalu di-cache (TTL + invalidasi saat submit).
+# - Per zoom, titik di-bin ke grid (ukuran sel ~ 1/CELLS_PER_TILE tile web map)
+#   dan hasil binning di-cache per zoom.
+# - Zoom rendah -> cluster (jumlah per layer & status); zoom >= RAW_ZOOM -> titik mentah.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import jsonify, request
+
+from geo_math import coords_from_rows
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+try:
+    from pg_data import (
+        ASESMEN_KIND_TABLES,
+        pg_get_asesmen_points,
+        pg_get_logistik_permintaan_last24h,
+        pg_get_relawan_locations_last24h,
+    )
+except Exception as _pg_err:
+    print(f"[CLUSTER] Error import pg_data: {_pg_err}")
+    ASESMEN_KIND_TABLES = []
+    pg_get_asesmen_points = None
+    pg_get_logistik_permintaan_last24h = None
+    pg_get_relawan_locations_last24h = None
+
+
+# ==========================
+# CONFIG
+# ==========================
+MAP_CLUSTER_TTL_SECONDS = int(os.environ.get("MAP_CLUSTER_TTL_SECONDS", "120") or "120")
+MAP_CLUSTER_HOURS = int(os.environ.get("MAP_CLUSTER_HOURS", "720") or "720")
+MAP_CLUSTER_RAW_ZOOM = int(os.environ.get("MAP_CLUSTER_RAW_ZOOM", "14") or "14")
+CELLS_PER_TILE = 4  # 256px tile / 4 = sel ~64px
+MAX_RAW_POINTS = 5000
+
+CACHE_CLUSTER: Dict[str, Any] = {"snapshot": None, "timestamp": 0, "bins": {}}
+_CACHE_LOCK = threading.Lock()
+
+
+def invalidate_cluster_cache() -> None:
+    CACHE_CLUSTER["snapshot"] = None
+    CACHE_CLUSTER["timestamp"] = 0
+    CACHE_CLUSTER["bins"] = {}
+
+
+# ==========================
+# SNAPSHOT
+# ==========================
+def _layer_from_rows(rows: List[Dict[str, Any]], status_key: Optional[str]) -> Dict[str, Any]:
+    lat, lon, idx = coords_from_rows(rows)
+    kept = [rows[int(i)] for i in idx]
+    status = [str((r.get(status_key) if status_key else None) or "-").strip() or "-" for r in kept]
+    return {"lat": lat, "lon": lon, "status": status, "rows": kept}
+
+
+def _load_snapshot() -> Dict[str, Dict[str, Any]]:
+    layers: Dict[str, Dict[str, Any]] = {}
+
+    if pg_get_relawan_locations_last24h is not None:
+        try:
+            layers["relawan"] = _layer_from_rows(pg_get_relawan_locations_last24h(MAP_CLUSTER_HOURS) or [], None)
+        except Exception as e:
+            print(f"[CLUSTER] gagal ambil lokasi_relawan: {e}")
+
+    if pg_get_logistik_permintaan_last24h is not None:
+        try:
+            layers["logistik"] = _layer_from_rows(
+                pg_get_logistik_permintaan_last24h(MAP_CLUSTER_HOURS) or [], "status_permintaan"
+            )
+        except Exception as e:
+            print(f"[CLUSTER] gagal ambil logistik_permintaan: {e}")
+
+    if pg_get_asesmen_points is not None:
+        for kind, _env, _default in ASESMEN_KIND_TABLES:
+            try:
+                layers[f"asesmen_{kind}"] = _layer_from_rows(
+                    pg_get_asesmen_points(kind, hours=MAP_CLUSTER_HOURS) or [], "status"
+                )
+            except Exception as e:
+                print(f"[CLUSTER] gagal ambil asesmen {kind}: {e}")
+
+    return layers
+
+
+def get_snapshot(force: bool = False) -> Dict[str, Dict[str, Any]]:
+    snap = CACHE_CLUSTER["snapshot"]
+    if not force and snap is not None and time.time() - CACHE_CLUSTER["timestamp"] < MAP_CLUSTER_TTL_SECONDS:
+        return snap
+
+    with _CACHE_LOCK:
+        snap = CACHE_CLUSTER["snapshot"]
+        if not force and snap is not None and time.time() - CACHE_CLUSTER["timestamp"] < MAP_CLUSTER_TTL_SECONDS:
+            return snap
+        snap = _load_snapshot()
+        CACHE_CLUSTER["snapshot"] = snap
+        CACHE_CLUSTER["timestamp"] = time.time()
+        CACHE_CLUSTER["bins"] = {}
+        return snap
+
+
+# ==========================
+# GRID BINNING
+# ==========================
+def cell_size_deg(zoom: int) -> float:
+    return 360.0 / (2 ** int(zoom)) / CELLS_PER_TILE
+
+
+def bin_layers(layers: Dict[str, Dict[str, Any]], zoom: int) -> Dict[str, Any]:
+    """Bin semua layer ke grid untuk zoom tertentu.
+
+    Return dict kolom (compact):
+      lat, lon   -> centroid tiap sel (np.ndarray)
+      count      -> total titik per sel
+      labels     -> list (layer, status)
+      counts     -> matriks (n_sel, n_label)
+    """
+    cs = cell_size_deg(zoom)
+
+    all_lat: List[Any] = []
+    all_lon: List[Any] = []
+    all_label: List[Any] = []
+    labels: List[Tuple[str, str]] = []
+    label_idx: Dict[Tuple[str, str], int] = {}
+
+    for name, layer in layers.items():
+        if layer["lat"].size == 0:
+            continue
+        codes = np.empty(layer["lat"].size, dtype=np.int64)
+        for i, st in enumerate(layer["status"]):
+            key = (name, st)
+            if key not in label_idx:
+                label_idx[key] = len(labels)
+                labels.append(key)
+            codes[i] = label_idx[key]
+        all_lat.append(layer["lat"])
+        all_lon.append(layer["lon"])
+        all_label.append(codes)
+
+    if not all_lat:
+        return {"lat": np.empty(0), "lon": np.empty(0), "count": np.empty(0, dtype=np.int64), "labels": [], "counts": np.empty((0, 0), dtype=np.int64)}
+
+    lat = np.concatenate(all_lat)
+    lon = np.concatenate(all_lon)
+    code = np.concatenate(all_label)
+
+    ky = np.floor(lat / cs).astype(np.int64)
+    kx = np.floor(lon / cs).astype(np.int64)
+    keys = (ky + (1 << 31)) * (1 << 32) + (kx + (1 << 31))
+    _uniq, inv = np.unique(keys, return_inverse=True)
+    n_cells = _uniq.shape[0]
+
+    count = np.bincount(inv, minlength=n_cells)
+    lat_c = np.bincount(inv, weights=lat, minlength=n_cells) / count
+    lon_c = np.bincount(inv, weights=lon, minlength=n_cells) / count
+
+    counts = np.zeros((n_cells, len(labels)), dtype=np.int64)
+    np.add.at(counts, (inv, code), 1)
+
+    return {"lat": lat_c, "lon": lon_c, "count": count, "labels": labels, "counts": counts}
+
+
+def get_bins(zoom: int) -> Dict[str, Any]:
+    snap = get_snapshot()
+    bins = CACHE_CLUSTER["bins"].get(zoom)
+    if bins is None:
+        bins = bin_layers(snap, zoom)
+        CACHE_CLUSTER["bins"][zoom] = bins
+    return bins
+
+
+def _in_bbox(lat: "np.ndarray", lon: "np.ndarray", bbox: Tuple[float, float, float, float]) -> "np.ndarray":
+    minx, miny, maxx, maxy = bbox
+    return (lon >= minx) & (lon <= maxx) & (lat >= miny) & (lat <= maxy)
+
+
+def _filter_layers(layers: Dict[str, Dict[str, Any]], wanted: Optional[List[str]]) -> Dict[str, Dict[str, Any]]:
+    if not wanted:
+        return layers
+    return {k: v for k, v in layers.items() if k in wanted}
+
+
+def clusters_in_bbox(
+    bbox: Tuple[float, float, float, float],
+    zoom: int,
+    wanted: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    if wanted:
+        # Subset layer: bin on-the-fly (tidak di-cache, jumlah kombinasi layer banyak)
+        bins = bin_layers(_filter_layers(get_snapshot(), wanted), zoom)
+    else:
+        bins = get_bins(zoom)
+
+    m = _in_bbox(bins["lat"], bins["lon"], bbox)
+    labels = bins["labels"]
+    out: List[Dict[str, Any]] = []
+    for i in np.nonzero(m)[0]:
+        kinds: Dict[str, Dict[str, int]] = {}
+        row = bins["counts"][i]
+        for j in np.nonzero(row)[0]:
+            layer, status = labels[j]
+            kinds.setdefault(layer, {})[status] = int(row[j])
+        out.append(
+            {
+                "lat": round(float(bins["lat"][i]), 6),
+                "lon": round(float(bins["lon"][i]), 6),
+                "count": int(bins["count"][i]),
+                "kinds": kinds,
+            }
+        )
+    return out
+
+
+def points_in_bbox(
+    bbox: Tuple[float, float, float, float],
+    wanted: Optional[List[str]] = None,
+    limit: int = MAX_RAW_POINTS,
+) -> Tuple[Dict[str, List[Dict[str, Any]]], bool]:
+    layers = _filter_layers(get_snapshot(), wanted)
+    out: Dict[str, List[Dict[str, Any]]] = {}
+    total = 0
+    truncated = False
+    for name, layer in layers.items():
+        idx = np.nonzero(_in_bbox(layer["lat"], layer["lon"], bbox))[0]
+        if total + idx.size > limit:
+            idx = idx[: max(0, limit - total)]
+            truncated = True
+        out[name] = [layer["rows"][int(i)] for i in idx]
+        total += idx.size
+    return out, truncated
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_map_cluster_routes(app):
+
+    @app.route("/api/map_clusters", methods=["GET"])
+    def api_map_clusters():
+        """Cluster marker untuk area terlihat.
+
+        Query params:
+          - bbox=minx,miny,maxx,maxy   (EPSG:4326)
+          - zoom=<int>
+          - layers=relawan,logistik,asesmen_kesehatan,... (opsional, default semua)
+        """
+        if np is None or pg_get_asesmen_points is None:
+            return jsonify({"success": False, "error": "Fitur belum aktif (numpy/pg_data belum siap)."}), 500
+
+        try:
+            parts = [p.strip() for p in (request.args.get("bbox") or "").split(",")]
+            if len(parts) != 4:
+                raise ValueError("bbox invalid")
+            bbox = tuple(float(x) for x in parts)
+            zoom = max(0, min(20, int(float(request.args.get("zoom") or "9"))))
+        except Exception:
+            return jsonify({"success": False, "error": "Parameter bbox/zoom invalid"}), 400
+
+        wanted = [x.strip() for x in (request.args.get("layers") or "").split(",") if x.strip()] or None
+
+        try:
+            if zoom >= MAP_CLUSTER_RAW_ZOOM:
+                points, truncated = points_in_bbox(bbox, wanted)
+                return jsonify({"success": True, "mode": "raw", "zoom": zoom, "points": points, "truncated": truncated})
+
+            clusters = clusters_in_bbox(bbox, zoom, wanted)
+            return jsonify(
+                {
+                    "success": True,
+                    "mode": "cluster",
+                    "zoom": zoom,
+                    "cell_deg": cell_size_deg(zoom),
+                    "clusters": clusters,
+                }
+            )
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
@@ -0,0 +1,141 @@
+# map_layers.py
+# SATGAS USU Peduli - Data layer peta sebagai endpoint JSON ber-versi
+# ---------------------------------------------------------------
+# - Tiap layer (data_lokasi, relawan_lokasi, status_map, asesmen_*,
+#   permintaan_logistik) diambil lewat loader dari app_postgres, di-serialize
+#   SEKALI lalu di-cache (bytes JSON + ETag hash isi). TTL + invalidasi saat
+#   submit / aksi admin (DATA_CHANGE_LISTENERS). Encode via fast_json.
+# - GET /api/layers            -> {"layers": {nama: versi}}
+# - GET /api/layers/<nama>     -> JSON layer + ETag; If-None-Match cocok -> 304.
+#   ?v=<versi> cocok dengan versi terkini -> boleh di-cache browser (immutable).
+# - /api/refresh_map & halaman peta memakai cache yang sama (tidak
+#   serialize ulang).
+# Catatan: cache per proses; ETag dari isi -> sama antar worker bila data sama.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from flask import jsonify, request
+
+from fast_json import dumps as json_dumps
+
+# ==========================
+# CONFIG
+# ==========================
+MAP_LAYER_TTL_SECONDS = int(os.environ.get("MAP_LAYER_TTL_SECONDS", "60") or "60")
+MAP_LAYER_MAX_AGE = 365 * 24 * 3600
+
+# nama -> loader() -> data (list/dict) ; diisi register_map_layer_routes
+_LOADERS: Dict[str, Callable[[], Any]] = {}
+
+# nama -> {"data", "body", "etag", "timestamp"}
+CACHE_LAYERS: Dict[str, Dict[str, Any]] = {}
+_CACHE_LOCK = threading.Lock()
+_LOAD_LOCKS: Dict[str, threading.Lock] = {}
+
+
+def invalidate_layer_cache() -> None:
+    with _CACHE_LOCK:
+        CACHE_LAYERS.clear()
+
+
+def layer_names() -> List[str]:
+    return list(_LOADERS.keys())
+
+
+def _fresh(entry: Optional[Dict[str, Any]]) -> bool:
+    return entry is not None and time.time() - entry["timestamp"] < MAP_LAYER_TTL_SECONDS
+
+
+def get_layer(name: str) -> Dict[str, Any]:
+    """Entry cache layer (load + serialize bila kadaluarsa). KeyError bila nama tidak dikenal."""
+    loader = _LOADERS[name]
+    with _CACHE_LOCK:
+        entry = CACHE_LAYERS.get(name)
+        lock = _LOAD_LOCKS.setdefault(name, threading.Lock())
+    if _fresh(entry):
+        return entry
+
+    # 1 loader per layer per proses; request lain menunggu hasilnya
+    with lock:
+        with _CACHE_LOCK:
+            entry = CACHE_LAYERS.get(name)
+        if _fresh(entry):
+            return entry
+        data = loader()
+        body = json_dumps(data)
+        entry = {
+            "data": data,
+            "body": body,
+            "etag": hashlib.sha1(body).hexdigest()[:16],
+            "timestamp": time.time(),
+        }
+        with _CACHE_LOCK:
+            CACHE_LAYERS[name] = entry
+        return entry
+
+
+def get_layer_data(name: str) -> Any:
+    return get_layer(name)["data"]
+
+
+def layer_versions(load: bool = True) -> Dict[str, str]:
+    """{nama: etag}. load=False -> hanya layer yang sudah ada di cache (tanpa query)."""
+    if load:
+        return {n: get_layer(n)["etag"] for n in _LOADERS}
+    with _CACHE_LOCK:
+        return {n: e["etag"] for n, e in CACHE_LAYERS.items() if _fresh(e)}
+
+
+def combined_layers_body(names: Iterable[str], extra: Optional[Dict[str, Any]] = None) -> bytes:
+    """Gabung bytes JSON layer yang sudah di-cache jadi 1 objek (tanpa serialize ulang)."""
+    parts = [json.dumps(k).encode("utf-8") + b":" + json.dumps(v).encode("utf-8") for k, v in (extra or {}).items()]
+    parts += [json.dumps(n).encode("utf-8") + b":" + get_layer(n)["body"] for n in names]
+    return b"{" + b",".join(parts) + b"}"
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_map_layer_routes(app, loaders: Dict[str, Callable[[], Any]]):
+    _LOADERS.clear()
+    _LOADERS.update(loaders)
+
+    @app.route("/api/layers", methods=["GET"])
+    def api_layers():
+        """Versi (ETag) terkini semua layer peta."""
+        try:
+            return jsonify({"success": True, "layers": layer_versions()})
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+    @app.route("/api/layers/<name>", methods=["GET"])
+    def api_layer(name):
+        """Data 1 layer peta (JSON mentah: list/dict) dengan ETag."""
+        if name not in _LOADERS:
+            return jsonify({"success": False, "error": "Layer tidak dikenal"}), 404
+        try:
+            entry = get_layer(name)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+        etag = entry["etag"]
+        if request.args.get("v") == etag:
+            cache_control = f"public, max-age={MAP_LAYER_MAX_AGE}, immutable"
+        else:
+            cache_control = "no-cache"
+
+        if request.if_none_match.contains_weak(etag):
+            resp = app.response_class(status=304)
+        else:
+            resp = app.response_class(entry["body"], mimetype="application/json")
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = cache_control
+        return resp
@@ -0,0 +1,152 @@
+# media_serving.py
+# SATGAS USU Peduli - Serve /media/<path> dengan cache HTTP yang benar
+# ---------------------------------------------------------------
+# - ETag kuat = hash isi file. Nama file ber-hash (cas/../<sha256>.<ext> dari
+#   media_store, atau <nama>.<hex>.<ext>) -> hash diambil dari nama, file tidak dibaca.
+#   File lama (nama tetap, bisa ditimpa) -> sha256 dihitung sekali lalu
+#   di-cache per (size, mtime).
+# - URL ber-hash (nama file ber-hash, atau ?v=<etag> yang cocok) -> aman
+#   di-cache selamanya: Cache-Control immutable. Selain itu no-cache
+#   (revalidasi murah via 304).
+# - ?variant=thumb|display -> varian WebP dari image_pipeline bila sudah ada
+#   (fallback file asli, tanpa cache panjang agar varian terpakai nanti).
+# - File internal tidak pernah disajikan langsung (404): sidecar *.meta.json
+#   (berisi GPS/waktu EXIF yang sudah dibuang dari foto), file varian
+#   (hanya lewat ?variant=), dan folder/file tersembunyi (cas/.tmp upload).
+# - Range / If-Range / If-None-Match ditangani send_file (conditional).
+# - MEDIA_OFFLOAD=x-accel  -> header X-Accel-Redirect ke nginx
+#     (location internal MEDIA_ACCEL_PREFIX, alias ke folder media)
+#   MEDIA_OFFLOAD=x-sendfile -> X-Sendfile (Apache mod_xsendfile / lighttpd)
+#   Python hanya menentukan header; byte file dikirim web server.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from typing import Dict, Optional, Tuple
+
+from flask import abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+from image_pipeline import VARIANTS, is_variant_file, variant_path
+
+# ==========================
+# CONFIG
+# ==========================
+MEDIA_OFFLOAD = str(os.environ.get("MEDIA_OFFLOAD", "") or "").strip().lower()
+MEDIA_ACCEL_PREFIX = "/" + str(os.environ.get("MEDIA_ACCEL_PREFIX", "/_protected_media") or "").strip("/")
+MEDIA_MAX_AGE = 365 * 24 * 3600
+HASH_CHUNK = 1024 * 1024
+
+# [<nama>.]<hex 12-64>[.<varian>].<ext>  (lihat media_store.cas_rel_path)
+_HASHED_NAME_RE = re.compile(r"(?:^|[./])([0-9a-f]{12,64})(?:\.(?:%s))?\.[A-Za-z0-9]+$" % "|".join(VARIANTS))
+
+# path absolut -> (size, mtime_ns, digest)
+_DIGESTS: Dict[str, Tuple[int, int, str]] = {}
+_LOCK = threading.Lock()
+
+
+def hashed_name_digest(filename: str) -> Optional[str]:
+    m = _HASHED_NAME_RE.search(filename)
+    return m.group(1) if m else None
+
+
+def file_digest(path: str) -> str:
+    """sha256[:16] isi file, di-cache per (size, mtime_ns)."""
+    st = os.stat(path)
+    with _LOCK:
+        hit = _DIGESTS.get(path)
+    if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+        return hit[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()[:16]
+    with _LOCK:
+        _DIGESTS[path] = (st.st_size, st.st_mtime_ns, digest)
+    return digest
+
+
+def is_private_media(filename: str) -> bool:
+    """Path di bawah media/ yang bukan untuk publik (sidecar, varian, tmp/tersembunyi)."""
+    parts = filename.replace("\\", "/").split("/")
+    return is_variant_file(filename) or any(p.startswith(".") for p in parts if p)
+
+
+def media_etag(media_dir: str, filename: str) -> Optional[str]:
+    path = safe_join(media_dir, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return hashed_name_digest(filename) or file_digest(path)
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_media_routes(app, media_dir: str):
+    if MEDIA_OFFLOAD == "x-sendfile":
+        app.config["USE_X_SENDFILE"] = True
+    print(f"[MEDIA] dir={media_dir} offload={MEDIA_OFFLOAD or 'tidak'}")
+
+    def media_url(filename: str) -> str:
+        """URL /media ber-versi (?v=<etag>) -> bisa di-cache immutable."""
+        etag = None
+        if not hashed_name_digest(filename):
+            try:
+                etag = media_etag(media_dir, filename)
+            except OSError:
+                etag = None
+        if etag:
+            return url_for("media_files", filename=filename, v=etag)
+        return url_for("media_files", filename=filename)
+
+    app.add_template_global(media_url, "media_url")
+
+    @app.route("/media/<path:filename>")
+    def media_files(filename):
+        path = safe_join(media_dir, filename)
+        if path is None or is_private_media(filename) or not os.path.isfile(path):
+            abort(404)
+
+        variant = request.args.get("variant")
+        served_variant = None
+        variant_missing = False
+        if variant in VARIANTS:
+            vpath = variant_path(path, variant)
+            if os.path.isfile(vpath):
+                path, filename, served_variant = vpath, variant_path(filename, variant), variant
+            else:
+                variant_missing = True
+
+        named = hashed_name_digest(filename)
+        etag = named or file_digest(path)
+        if served_variant and named:
+            etag = f"{etag}-{served_variant}"  # beda dengan ETag file asli (fallback)
+        if variant_missing:
+            cache_control = "no-cache"
+        elif named or request.args.get("v") == etag:
+            cache_control = f"public, max-age={MEDIA_MAX_AGE}, immutable"
+        else:
+            cache_control = "no-cache"
+
+        if MEDIA_OFFLOAD == "x-accel":
+            if request.if_none_match.contains_weak(etag):
+                resp = app.response_class(status=304)
+            else:
+                rel = os.path.relpath(path, media_dir).replace(os.sep, "/")
+                resp = app.response_class(mimetype=mimetypes.guess_type(path)[0] or "application/octet-stream")
+                resp.headers["X-Accel-Redirect"] = f"{MEDIA_ACCEL_PREFIX}/{rel}"
+        else:
+            # conditional=True: 304, Range (206), If-Range; X-Sendfile bila USE_X_SENDFILE
+            resp = send_file(path, conditional=True, etag=etag)
+            resp.headers.setdefault("Accept-Ranges", "bytes")
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = cache_control
+        return resp
+
+    return media_url
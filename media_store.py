@@ -0,0 +1,276 @@
+# media_store.py
+# SATGAS USU Peduli - Media store content-addressed (dedup + integritas)
+# ---------------------------------------------------------------
+# - Upload ditulis ke media/cas/<2 hex>/<2 hex>/<sha256>.<ext> sambil
+#   di-hash (streaming, tanpa baca ulang; upload lewat upload_limits cukup
+#   di-rename). File identik (upload ulang saat sinyal putus-sambung) ->
+#   tidak ditulis dua kali.
+# - Foto ber-EXIF dibuang EXIF-nya (image_pipeline.strip_exif) SEBELUM
+#   di-hash & diberi nama -> file CAS tidak pernah ditulis ulang.
+# - Metadata di Postgres (pg_data: media_object): ukuran, mime, dimensi,
+#   hash isi aktual, jumlah upload. media_ref = record yang mereferensikan
+#   (tabel asesmen_* / data_lokasi), diisi ulang setiap GC.
+# - GC: file CAS tanpa referensi & lebih tua dari MEDIA_GC_GRACE_HOURS
+#   (mis. foto tersimpan tapi INSERT DB gagal) dihapus beserta varian
+#   image_pipeline. --verify: cek ulang hash isi file (integritas).
+# - File lama di luar media/cas (asesmen/, photo_lokasi/) tidak disentuh.
+# Jalankan (cron):
+#     python media_store.py gc [--dry-run] [--verify]
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import image_pipeline
+
+try:
+    from pg_data import (
+        pg_upsert_media_object,
+        pg_update_media_object_image,
+        pg_get_media_objects,
+        pg_delete_media_objects,
+        pg_scan_media_refs,
+        pg_replace_media_refs,
+    )
+except Exception as _pg_err:
+    print(f"[MEDIA] Error import pg_data: {_pg_err}")
+    pg_upsert_media_object = None
+    pg_update_media_object_image = None
+    pg_get_media_objects = None
+    pg_delete_media_objects = None
+    pg_scan_media_refs = None
+    pg_replace_media_refs = None
+
+# ==========================
+# CONFIG
+# ==========================
+CAS_DIR = "cas"
+CAS_TMP_DIR = os.path.join(CAS_DIR, ".tmp")
+MEDIA_GC_GRACE_HOURS = float(os.environ.get("MEDIA_GC_GRACE_HOURS", "24") or "24")
+CHUNK = 1024 * 1024
+
+
+def cas_rel_path(sha256: str, ext: str) -> str:
+    return f"{CAS_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cas_sha(rel_or_abs: str) -> Optional[str]:
+    name = os.path.basename(rel_or_abs)
+    stem = name.split(".", 1)[0]
+    if len(stem) == 64 and all(c in "0123456789abcdef" for c in stem):
+        return stem
+    return None
+
+
+def store_upload(file, media_root: str, ext: str) -> Tuple[str, bool]:
+    """Simpan FileStorage ke CAS. Return (path relatif ke media_root, dibuat_baru)."""
+    tmp_dir = os.path.join(media_root, CAS_TMP_DIR)
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, f"{os.getpid()}_{time.time_ns()}{ext}")
+
+    stream = getattr(file, "stream", file)
+    try:
+        detach = getattr(stream, "detach_to_path", None)
+        if detach is not None:
+            # upload_limits: sudah di disk (folder tmp yang sama) & sudah di-hash
+            tmp_path, sha, size = detach()
+        else:
+            h = hashlib.sha256()
+            size = 0
+            with open(tmp_path, "wb") as out:
+                for chunk in iter(lambda: stream.read(CHUNK), b""):
+                    h.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            sha = h.hexdigest()
+
+        # EXIF dibuang sebelum diberi nama -> hash di nama = isi yang disajikan
+        exif_info = image_pipeline.strip_exif(tmp_path)
+        if exif_info is not None:
+            sha = sha256_file(tmp_path)
+            size = os.path.getsize(tmp_path)
+
+        rel = cas_rel_path(sha, ext)
+        abs_path = os.path.join(media_root, rel)
+        created = not os.path.exists(abs_path)
+        if created:
+            os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+            os.replace(tmp_path, abs_path)
+            if exif_info:
+                image_pipeline.save_exif_info(abs_path, exif_info)
+        else:
+            os.utime(abs_path)  # dedup: mulai ulang masa tenggang GC
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    if pg_upsert_media_object is not None:
+        try:
+            pg_upsert_media_object(sha, rel, size, mimetypes.guess_type(rel)[0])
+        except Exception as e:
+            # Metadata tidak boleh menggagalkan upload; GC/backfill melengkapi nanti
+            print(f"[MEDIA] gagal catat metadata {sha[:12]}: {e}")
+    return rel, created
+
+
+def record_processed(abs_path: str, meta: Dict[str, Any]) -> None:
+    """Listener image_pipeline: simpan dimensi + hash isi aktual file CAS."""
+    sha = _cas_sha(abs_path)
+    if sha is None or pg_update_media_object_image is None:
+        return
+    # exif_stripped: file lama yang ditulis ulang di tempat (sebelum strip saat upload)
+    content_sha = sha256_file(abs_path) if meta.get("exif_stripped") else sha
+    try:
+        pg_update_media_object_image(
+            sha, meta.get("width"), meta.get("height"), content_sha, os.path.getsize(abs_path)
+        )
+    except Exception as e:
+        print(f"[MEDIA] gagal update metadata {sha[:12]}: {e}")
+
+
+image_pipeline.PROCESSED_LISTENERS.append(record_processed)
+
+
+# ==========================
+# GARBAGE COLLECTION
+# ==========================
+def _cas_files(media_root: str) -> Dict[str, str]:
+    """sha256 -> path absolut file asli di media/cas (tanpa varian/tmp)."""
+    out: Dict[str, str] = {}
+    root = os.path.join(media_root, CAS_DIR)
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d != ".tmp"]
+        for name in files:
+            p = os.path.join(dirpath, name)
+            sha = _cas_sha(name)
+            if sha and not image_pipeline.is_variant_file(p):
+                out[sha] = p
+    return out
+
+
+def _remove_with_variants(abs_path: str) -> int:
+    freed = 0
+    for p in [abs_path, image_pipeline.meta_path(abs_path)] + [
+        image_pipeline.variant_path(abs_path, v) for v in image_pipeline.VARIANTS
+    ]:
+        try:
+            freed += os.path.getsize(p)
+            os.remove(p)
+        except FileNotFoundError:
+            pass
+    return freed
+
+
+def gc(media_root: str, dry_run: bool = False, verify: bool = False,
+       grace_hours: float = MEDIA_GC_GRACE_HOURS) -> Dict[str, Any]:
+    """Hapus file CAS yatim + rapikan metadata. Butuh Postgres (tanpa DB: abort)."""
+    if pg_scan_media_refs is None:
+        raise RuntimeError("pg_data tidak tersedia; GC dibatalkan")
+
+    refs = pg_scan_media_refs()
+    if not dry_run:
+        pg_replace_media_refs(refs)
+
+    files = _cas_files(media_root)
+    objects = {r["sha256"].strip(): r for r in pg_get_media_objects()}
+    cutoff = time.time() - grace_hours * 3600
+
+    orphans: List[str] = []
+    freed = 0
+    for sha, path in files.items():
+        if sha in refs:
+            continue
+        try:
+            if os.path.getmtime(path) > cutoff:
+                continue  # upload baru; INSERT record mungkin belum selesai
+        except FileNotFoundError:
+            continue
+        orphans.append(sha)
+        if not dry_run:
+            freed += _remove_with_variants(path)
+
+    # tmp sisa upload yang terputus
+    tmp_dir = os.path.join(media_root, CAS_TMP_DIR)
+    stale_tmp = 0
+    if os.path.isdir(tmp_dir):
+        for name in os.listdir(tmp_dir):
+            p = os.path.join(tmp_dir, name)
+            if os.path.getmtime(p) < cutoff:
+                stale_tmp += 1
+                if not dry_run:
+                    os.remove(p)
+
+    missing = sorted(sha for sha in objects if sha not in files and sha not in orphans)
+    gone = orphans + [sha for sha in missing if sha not in refs]
+    if not dry_run and gone:
+        pg_delete_media_objects(gone)
+
+    corrupt: List[str] = []
+    if verify:
+        for sha, path in files.items():
+            if sha in orphans:
+                continue
+            expected = ((objects.get(sha) or {}).get("content_sha256") or "").strip()
+            if not expected:
+                meta = image_pipeline.read_photo_meta(path) or {}
+                if meta.get("exif_stripped"):
+                    continue  # hash isi setelah EXIF dibuang belum tercatat
+                expected = sha
+            if sha256_file(path) != expected:
+                corrupt.append(sha)
+
+    summary = {
+        "dry_run": dry_run,
+        "files": len(files),
+        "referenced": len(refs),
+        "orphans_removed": len(orphans),
+        "bytes_freed": freed,
+        "stale_tmp": stale_tmp,
+        "missing_files": [s for s in missing if s in refs],
+        "corrupt": corrupt,
+    }
+    print(
+        f"[MEDIA] GC{' (dry-run)' if dry_run else ''}: {len(files)} file, {len(orphans)} yatim, "
+        f"{freed // 1024} KB dibebaskan, hilang={len(summary['missing_files'])}, korup={len(corrupt)}"
+    )
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from pathlib import Path
+
+    ap = argparse.ArgumentParser(description="Media store content-addressed")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    g = sub.add_parser("gc", help="hapus file CAS tanpa referensi")
+    g.add_argument("--media-root", default=None, help="default: MEDIA_DIR atau ./media")
+    g.add_argument("--dry-run", action="store_true")
+    g.add_argument("--verify", action="store_true", help="cek ulang sha256 isi file")
+    g.add_argument("--grace-hours", type=float, default=MEDIA_GC_GRACE_HOURS)
+    args = ap.parse_args()
+
+    try:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+    except Exception:
+        pass
+    media_root = args.media_root or os.environ.get("MEDIA_DIR") or str(Path(__file__).resolve().parent / "media")
+    result = gc(media_root, dry_run=args.dry_run, verify=args.verify, grace_hours=args.grace_hours)
+    print(json.dumps(result, indent=2))
+    sys.exit(1 if result["corrupt"] or result["missing_files"] else 0)
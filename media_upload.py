@@ -1,18 +1,26 @@
 # media_upload.py
 import os
-import re
 import json
 import datetime as dt
 from typing import List, Optional
 from werkzeug.utils import secure_filename
 
+from media_store import store_upload
+
 ALLOWED_EXT = {".jpg", ".jpeg", ".png", ".webp"}
 
-def _slug(s: str) -> str:
-    s = (s or "").strip()
-    s = re.sub(r"\s+", "_", s)
-    s = re.sub(r"[^A-Za-z0-9_\-]", "", s)
-    return s or "unknown"
+def _photo_ext(file, default: str = "foto.jpg") -> str:
+    # upload_limits sudah mengecek magic bytes -> tipe asli, bukan nama file
+    detected = getattr(getattr(file, "stream", None), "detected_ext", None)
+    if detected:
+        return detected
+    original = secure_filename(file.filename) or default
+    ext = os.path.splitext(original)[1].lower()
+    if ext == ".jpeg":
+        ext = ".jpg"
+    if ext not in ALLOWED_EXT:
+        raise ValueError("Format foto harus JPG/JPEG/PNG/WEBP.")
+    return ext
 
 def save_asesmen_photos(
     files,
@@ -22,7 +30,12 @@ def save_asesmen_photos(
     waktu_utc: Optional[dt.datetime] = None,
     max_files: int = 2,
 ) -> List[str]:
-    """Return list of relative paths, e.g. ['asesmen/kesehatan_RR001_20251223_083000_1.jpg', ...]"""
+    """Return list of relative paths, e.g. ['cas/3f/9a/3f9a...e1.jpg', ...]
+
+    File disimpan content-addressed (media_store): foto yang sama di-upload
+    ulang tidak menambah file baru. asesmen_name/id_relawan/waktu_utc tidak
+    lagi dipakai untuk nama file (relasi ada di record asesmen / media_ref).
+    """
     if not files:
         return []
 
@@ -32,28 +45,14 @@ def save_asesmen_photos(
     if len(picked) > max_files:
         raise ValueError(f"Maksimal {max_files} foto.")
 
-    asesmen_name = _slug(asesmen_name)
-    id_relawan = _slug(id_relawan)
-
-    waktu_utc = waktu_utc or dt.datetime.utcnow()
-    ts = waktu_utc.strftime("%Y%m%d_%H%M%S")
-
-    out_dir = os.path.join(media_root, "asesmen")
-    os.makedirs(out_dir, exist_ok=True)
+    # Validasi semua dulu -> tidak ada file tersimpan bila salah satu ditolak
+    exts = [_photo_ext(f, f"foto_{i}.jpg") for i, f in enumerate(picked, start=1)]
 
     saved_rel = []
-    for i, f in enumerate(picked, start=1):
-        original = secure_filename(f.filename) or f"foto_{i}.jpg"
-        ext = os.path.splitext(original)[1].lower()
-        if ext not in ALLOWED_EXT:
-            raise ValueError("Format foto harus JPG/JPEG/PNG/WEBP.")
-
-        filename = f"{asesmen_name}_{id_relawan}_{ts}_{i}{ext}"
-        abs_path = os.path.join(out_dir, filename)
-        f.save(abs_path)
-
-        rel_path = os.path.join("asesmen", filename).replace("\\", "/")
-        saved_rel.append(rel_path)
+    for f, ext in zip(picked, exts):
+        rel_path, _ = store_upload(f, media_root, ext)
+        if rel_path not in saved_rel:  # foto sama dipilih 2x
+            saved_rel.append(rel_path)
 
     return saved_rel
 
@@ -62,32 +61,21 @@ def save_lokasi_photo(
     id_lokasi: str,
     media_root: str,
 ) -> Optional[str]:
-    """Simpan 1 foto lokasi ke media/photo_lokasi/<ID_LOKASI>.jpg/png/...
+    """Simpan 1 foto lokasi ke media store content-addressed (media/cas/...).
+
+    Nama file = sha256 isi -> URL berubah bila foto diganti, jadi aman
+    di-cache immutable (lihat media_serving.py).
 
-    Return: nilai untuk kolom photo_path, mis. "media/photo_lokasi/G-TT001.jpg"
+    Return: nilai untuk kolom photo_path, mis. "media/cas/3f/9a/3f9a...e1.jpg"
     """
     if not file or not getattr(file, "filename", ""):
         return None
 
-    sid = _slug(id_lokasi)
-
-    original = secure_filename(file.filename) or "foto.jpg"
-    ext = os.path.splitext(original)[1].lower()
-    if ext == ".jpeg":
-        ext = ".jpg"
-    if ext not in ALLOWED_EXT:
-        raise ValueError("Format foto harus JPG/JPEG/PNG/WEBP.")
-
-    out_dir = os.path.join(media_root, "photo_lokasi")
-    os.makedirs(out_dir, exist_ok=True)
-
-    filename = f"{sid}{ext}"
-    abs_path = os.path.join(out_dir, filename)
-    file.save(abs_path)
+    ext = _photo_ext(file)
+    rel_path, _ = store_upload(file, media_root, ext)
 
     # Disimpan sebagai path relatif yang konsisten dipanggil dari front-end (prefix: media/)
-    rel_path = os.path.join("media", "photo_lokasi", filename).replace("\\", "/")
-    return rel_path
+    return f"media/{rel_path}"
 
 def photos_to_photo_path_value(paths: List[str]) -> Optional[str]:
     """
@@ -0,0 +1,286 @@
+# metrics.py
+# SATGAS USU Peduli - Instrumentasi latency request, query Postgres & Google Sheets
+# ---------------------------------------------------------------
+# - Request: histogram latency per endpoint Flask (+ hitungan per status).
+# - Query: pg_fetchall/pg_execute melapor per "nama query" (= nama fungsi
+#   pg_* pemanggil): latency, jumlah baris, & kegagalan per jenis error
+#   (termasuk percobaan fallback yang gagal lalu diam-diam dicoba ulang).
+# - Google Sheets: sheets_timer("nama") di sekitar panggilan gspread.
+# - Slow-query log: query >= SLOW_QUERY_MS dicetak [SLOWQ] + disimpan di
+#   ring buffer (GET /api/admin/metrics/slow_queries).
+# - GET /metrics: format teks Prometheus, khusus admin (session) atau
+#   header "Authorization: Bearer <METRICS_TOKEN>" untuk scraper.
+# Catatan: registry per proses (tiap worker gunicorn punya angka sendiri).
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import hmac
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+try:
+    from log_sink import log_event
+except Exception:
+    log_event = None
+
+
+# ==========================
+# CONFIG
+# ==========================
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "500") or "500")
+SLOW_QUERY_KEEP = int(os.environ.get("SLOW_QUERY_KEEP", "200") or "200")
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# detik
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_LOCK = threading.Lock()
+_START_TIME = time.time()
+
+
+class Histogram:
+    """Histogram kumulatif ala Prometheus (count, sum, bucket le=...)."""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b:
+                self.counts[i] += 1
+                break
+
+
+# (endpoint, method) -> Histogram ; (endpoint, method, status) -> n
+REQUEST_LATENCY: Dict[Tuple[str, str], Histogram] = {}
+REQUEST_TOTAL: Dict[Tuple[str, str, str], int] = {}
+
+# query -> Histogram / baris / kegagalan per jenis error
+QUERY_LATENCY: Dict[str, Histogram] = {}
+QUERY_ROWS: Dict[str, int] = {}
+QUERY_FAILURES: Dict[Tuple[str, str], int] = {}
+
+SHEETS_LATENCY: Dict[str, Histogram] = {}
+SHEETS_FAILURES: Dict[str, int] = {}
+
+SLOW_QUERIES: Deque[Dict[str, Any]] = deque(maxlen=max(1, SLOW_QUERY_KEEP))
+
+
+# ==========================
+# RECORDERS
+# ==========================
+def observe_request(endpoint: str, method: str, status: int, seconds: float) -> None:
+    with _LOCK:
+        REQUEST_LATENCY.setdefault((endpoint, method), Histogram()).observe(seconds)
+        key = (endpoint, method, str(status))
+        REQUEST_TOTAL[key] = REQUEST_TOTAL.get(key, 0) + 1
+
+
+def _sql_preview(sql: str, limit: int = 300) -> str:
+    s = re.sub(r"\s+", " ", str(sql or "")).strip()
+    return s if len(s) <= limit else s[:limit] + "..."
+
+
+def observe_query(
+    name: str,
+    seconds: float,
+    rows: Optional[int] = None,
+    error: Optional[BaseException] = None,
+    sql: str = "",
+) -> None:
+    """Dipanggil dari pg_fetchall/pg_execute untuk tiap eksekusi query."""
+    with _LOCK:
+        QUERY_LATENCY.setdefault(name, Histogram()).observe(seconds)
+        if rows is not None and rows >= 0:
+            QUERY_ROWS[name] = QUERY_ROWS.get(name, 0) + rows
+        if error is not None:
+            key = (name, type(error).__name__)
+            QUERY_FAILURES[key] = QUERY_FAILURES.get(key, 0) + 1
+
+    ms = seconds * 1000.0
+    if SLOW_QUERY_MS > 0 and ms >= SLOW_QUERY_MS:
+        rec = {
+            "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "query": name,
+            "ms": round(ms, 1),
+            "rows": rows,
+            "error": type(error).__name__ if error is not None else None,
+            "sql": _sql_preview(sql),
+        }
+        with _LOCK:
+            SLOW_QUERIES.append(rec)
+        print(f"[SLOWQ] {name} {ms:.0f}ms rows={rows} {rec['sql'][:120]}")
+        if log_event is not None:
+            try:
+                log_event("SLOW_QUERY", **rec)
+            except Exception:
+                pass
+
+
+def observe_sheets(name: str, seconds: float, ok: bool = True) -> None:
+    with _LOCK:
+        SHEETS_LATENCY.setdefault(name, Histogram()).observe(seconds)
+        if not ok:
+            SHEETS_FAILURES[name] = SHEETS_FAILURES.get(name, 0) + 1
+
+
+@contextmanager
+def sheets_timer(name: str) -> Iterator[None]:
+    """with sheets_timer("rekap_kabkota"): ... (gspread auth + open + get_all_records)"""
+    t0 = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        observe_sheets(name, time.perf_counter() - t0, ok)
+
+
+# ==========================
+# PROMETHEUS TEXT
+# ==========================
+def _esc(v: Any) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**kv: Any) -> str:
+    return "{" + ",".join(f'{k}="{_esc(v)}"' for k, v in kv.items()) + "}"
+
+
+def _hist_lines(metric: str, hists: Dict[Any, Histogram], label_names: Tuple[str, ...]) -> List[str]:
+    out: List[str] = []
+    for key in sorted(hists.keys()):
+        h = hists[key]
+        vals = key if isinstance(key, tuple) else (key,)
+        base = dict(zip(label_names, vals))
+        cum = 0
+        for b, c in zip(BUCKETS, h.counts):
+            cum += c
+            out.append(f"{metric}_bucket{_labels(**base, le=repr(b))} {cum}")
+        out.append(f"{metric}_bucket{_labels(**base, le='+Inf')} {h.count}")
+        out.append(f"{metric}_sum{_labels(**base)} {h.total:.6f}")
+        out.append(f"{metric}_count{_labels(**base)} {h.count}")
+    return out
+
+
+def _counter_lines(metric: str, counters: Dict[Any, int], label_names: Tuple[str, ...]) -> List[str]:
+    out: List[str] = []
+    for key in sorted(counters.keys()):
+        vals = key if isinstance(key, tuple) else (key,)
+        out.append(f"{metric}{_labels(**dict(zip(label_names, vals)))} {counters[key]}")
+    return out
+
+
+def render_prometheus() -> str:
+    with _LOCK:
+        lines: List[str] = [
+            "# HELP satgas_process_start_time_seconds Waktu start proses (unix).",
+            "# TYPE satgas_process_start_time_seconds gauge",
+            f"satgas_process_start_time_seconds{_labels(pid=os.getpid())} {_START_TIME:.0f}",
+            "# HELP satgas_http_request_duration_seconds Latency request per endpoint.",
+            "# TYPE satgas_http_request_duration_seconds histogram",
+        ]
+        lines += _hist_lines("satgas_http_request_duration_seconds", REQUEST_LATENCY, ("endpoint", "method"))
+        lines += [
+            "# HELP satgas_http_requests_total Jumlah request per endpoint & status.",
+            "# TYPE satgas_http_requests_total counter",
+        ]
+        lines += _counter_lines("satgas_http_requests_total", REQUEST_TOTAL, ("endpoint", "method", "status"))
+        lines += [
+            "# HELP satgas_pg_query_duration_seconds Latency query Postgres per nama query.",
+            "# TYPE satgas_pg_query_duration_seconds histogram",
+        ]
+        lines += _hist_lines("satgas_pg_query_duration_seconds", QUERY_LATENCY, ("query",))
+        lines += [
+            "# HELP satgas_pg_query_rows_total Jumlah baris hasil/terpengaruh per nama query.",
+            "# TYPE satgas_pg_query_rows_total counter",
+        ]
+        lines += _counter_lines("satgas_pg_query_rows_total", QUERY_ROWS, ("query",))
+        lines += [
+            "# HELP satgas_pg_query_failures_total Query gagal (termasuk percobaan fallback).",
+            "# TYPE satgas_pg_query_failures_total counter",
+        ]
+        lines += _counter_lines("satgas_pg_query_failures_total", QUERY_FAILURES, ("query", "error"))
+        lines += [
+            "# HELP satgas_sheets_call_duration_seconds Latency panggilan Google Sheets.",
+            "# TYPE satgas_sheets_call_duration_seconds histogram",
+        ]
+        lines += _hist_lines("satgas_sheets_call_duration_seconds", SHEETS_LATENCY, ("call",))
+        lines += [
+            "# HELP satgas_sheets_call_failures_total Panggilan Google Sheets yang gagal.",
+            "# TYPE satgas_sheets_call_failures_total counter",
+        ]
+        lines += _counter_lines("satgas_sheets_call_failures_total", SHEETS_FAILURES, ("call",))
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    with _LOCK:
+        for d in (REQUEST_LATENCY, REQUEST_TOTAL, QUERY_LATENCY, QUERY_ROWS, QUERY_FAILURES, SHEETS_LATENCY, SHEETS_FAILURES):
+            d.clear()
+        SLOW_QUERIES.clear()
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_metrics_routes(app):
+    from flask import g, jsonify, request, session
+
+    def _authorized() -> Optional[Tuple[Any, int]]:
+        auth = request.headers.get("Authorization", "")
+        if METRICS_TOKEN and auth.startswith("Bearer ") and hmac.compare_digest(auth[7:].strip(), METRICS_TOKEN):
+            return None
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+        return None
+
+    @app.before_request
+    def _metrics_start_timer():
+        g._metrics_t0 = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe_request(response):
+        t0 = g.pop("_metrics_t0", None)
+        if t0 is not None:
+            observe_request(request.endpoint or "<unmatched>", request.method, response.status_code, time.perf_counter() - t0)
+        return response
+
+    @app.teardown_request
+    def _metrics_observe_error(exc):
+        # Exception yang tidak tertangani: after_request tidak jalan
+        t0 = g.pop("_metrics_t0", None)
+        if t0 is not None and exc is not None:
+            observe_request(request.endpoint or "<unmatched>", request.method, 500, time.perf_counter() - t0)
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics_prometheus():
+        """Metrik format Prometheus (per proses/worker)."""
+        denied = _authorized()
+        if denied is not None:
+            return denied
+        return app.response_class(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/api/admin/metrics/slow_queries", methods=["GET"])
+    def api_admin_slow_queries():
+        """Query lambat terakhir (>= SLOW_QUERY_MS), terbaru dulu."""
+        denied = _authorized()
+        if denied is not None:
+            return denied
+        with _LOCK:
+            data = list(SLOW_QUERIES)[::-1]
+        return jsonify({"success": True, "threshold_ms": SLOW_QUERY_MS, "data": data})
@@ -33,6 +33,12 @@ ENV opsional:
   - PG_MASTER_LOGISTIK_TABLE     default: public.master_logistik
   - PG_REKAP_KABKOTA_TABLE       default: public.rekapitulasi_data_kabkota
   - PG_PERMINTAAN_POSKO_TABLE    default: public.permintaan_posko
+  - PG_MEDIA_OBJECT_TABLE        default: public.media_object (dibuat otomatis)
+  - PG_MEDIA_REF_TABLE           default: public.media_ref    (dibuat otomatis)
+  - PG_JOB_TABLE                 default: public.job_queue    (dibuat otomatis, + view <tabel>_dead)
+  - PG_IDEMPOTENCY_TABLE         default: public.idempotency_key (dibuat otomatis)
+  (batch offline: kolom client_uuid + unique index ditambahkan otomatis ke
+   lokasi_relawan, data_lokasi & tabel asesmen saat batch pertama)
 
   - GEOJSON_TTL_SECONDS          default: 86400 (1 hari)
   - FORCE_GEOJSON_REFRESH        default: 0
@@ -45,7 +51,10 @@ Catatan:
 from __future__ import annotations
 
 import json
+import math
 import os
+import sys
+import time
 from datetime import datetime, timezone, timedelta, date
 from zoneinfo import ZoneInfo
 from decimal import Decimal
@@ -53,6 +62,8 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple, Sequence, Union
 import re
 
+from fast_json import dumps as json_dumps
+
 # ------------------------------------------------------------------------------
 # Driver selection (psycopg v3 -> psycopg2)
 # ------------------------------------------------------------------------------
@@ -76,6 +87,11 @@ if _DRIVER is None:
     except Exception:
         psycopg2 = None  # type: ignore
 
+try:
+    from metrics import observe_query  # instrumentasi latency/baris/gagal per query
+except Exception:
+    observe_query = None
+
 
 def _get_env(name: str, default: Optional[str] = None) -> Optional[str]:
     v = os.environ.get(name)
@@ -120,7 +136,14 @@ def _json_safe_value(v: Any) -> Any:
 
 
 def _json_safe_row(row: Dict[str, Any]) -> Dict[str, Any]:
-    return {k: _json_safe_value(v) for k, v in row.items()}
+    """Konversi Decimal/datetime IN-PLACE (tanpa copy dict per baris).
+
+    Aman karena row selalu dict baru dari pg_fetchall. Mengembalikan dict yang sama.
+    """
+    for k, v in row.items():
+        if isinstance(v, (Decimal, datetime)):
+            row[k] = _json_safe_value(v)
+    return row
 
 
 # ------------------------------------------------------------------------------
@@ -186,54 +209,91 @@ def _normalize_input_ts(v: Any) -> Optional[datetime]:
 
     return None
 
-def pg_fetchall(sql: str, params: Optional[Tuple[Any, ...]] = None) -> List[Dict[str, Any]]:
-    """Jalankan query dan return list of dict."""
+# Fungsi helper yang dilewati saat mencari "nama query" (fungsi pg_* pemanggil)
+_QUERY_NAME_SKIP = {"pg_fetchall", "pg_fetchone", "pg_execute", "_timed"}
+
+
+def _query_name() -> str:
+    f = sys._getframe(2)
+    while f is not None and f.f_code.co_name in _QUERY_NAME_SKIP:
+        f = f.f_back
+    return f.f_code.co_name if f is not None else "unknown"
+
+
+def _timed(run, sql: str, name: Optional[str]):
+    """Jalankan run() -> (hasil, jumlah_baris) sambil mencatat metrik query."""
+    if observe_query is None:
+        return run()[0]
+    name = name or _query_name()
+    t0 = time.perf_counter()
+    try:
+        result, nrows = run()
+    except Exception as e:
+        observe_query(name, time.perf_counter() - t0, error=e, sql=sql)
+        raise
+    observe_query(name, time.perf_counter() - t0, rows=nrows, sql=sql)
+    return result
+
+
+def pg_fetchall(sql: str, params: Optional[Tuple[Any, ...]] = None, name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Jalankan query dan return list of dict.
+
+    name: label metrik (default: nama fungsi pg_* yang memanggil).
+    """
     dsn = _get_dsn()
 
-    if _DRIVER == "psycopg":
-        assert psycopg is not None  # noqa
-        with psycopg.connect(dsn, row_factory=dict_row) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, params or ())
-                rows = cur.fetchall()
-                return [dict(r) for r in rows]
-
-    if _DRIVER == "psycopg2":
-        assert psycopg2 is not None  # noqa
-        with psycopg2.connect(dsn) as conn:
-            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
-                cur.execute(sql, params or ())
-                rows = cur.fetchall()
-                return [dict(r) for r in rows]
-
-    raise RuntimeError(
-        "Driver PostgreSQL tidak ditemukan. Install salah satu: psycopg[binary] atau psycopg2-binary."
-    )
+    def run():
+        if _DRIVER == "psycopg":
+            assert psycopg is not None  # noqa
+            with psycopg.connect(dsn, row_factory=dict_row) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(sql, params or ())
+                    rows = cur.fetchall()
+                    return [dict(r) for r in rows], len(rows)
+
+        if _DRIVER == "psycopg2":
+            assert psycopg2 is not None  # noqa
+            with psycopg2.connect(dsn) as conn:
+                with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                    cur.execute(sql, params or ())
+                    rows = cur.fetchall()
+                    return [dict(r) for r in rows], len(rows)
+
+        raise RuntimeError(
+            "Driver PostgreSQL tidak ditemukan. Install salah satu: psycopg[binary] atau psycopg2-binary."
+        )
+
+    return _timed(run, sql, name)
 
 
-def pg_execute(sql: str, params: Optional[Tuple[Any, ...]] = None) -> None:
+def pg_execute(sql: str, params: Optional[Tuple[Any, ...]] = None, name: Optional[str] = None) -> None:
     """Execute (INSERT/UPDATE/DELETE)."""
     dsn = _get_dsn()
 
-    if _DRIVER == "psycopg":
-        assert psycopg is not None  # noqa
-        with psycopg.connect(dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, params or ())
-            conn.commit()
-        return
-
-    if _DRIVER == "psycopg2":
-        assert psycopg2 is not None  # noqa
-        with psycopg2.connect(dsn) as conn:
-            with conn.cursor() as cur:
-                cur.execute(sql, params or ())
-            conn.commit()
-        return
+    def run():
+        if _DRIVER == "psycopg":
+            assert psycopg is not None  # noqa
+            with psycopg.connect(dsn) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(sql, params or ())
+                    nrows = cur.rowcount
+                conn.commit()
+            return None, nrows
+
+        if _DRIVER == "psycopg2":
+            assert psycopg2 is not None  # noqa
+            with psycopg2.connect(dsn) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(sql, params or ())
+                    nrows = cur.rowcount
+                conn.commit()
+            return None, nrows
+
+        raise RuntimeError(
+            "Driver PostgreSQL tidak ditemukan. Install salah satu: psycopg[binary] atau psycopg2-binary."
+        )
 
-    raise RuntimeError(
-        "Driver PostgreSQL tidak ditemukan. Install salah satu: psycopg[binary] atau psycopg2-binary."
-    )
+    _timed(run, sql, name)
 
 
 # ------------------------------------------------------------------------------
@@ -374,20 +434,12 @@ def _pick_col(cols: Sequence[str], candidates: Sequence[str]) -> Optional[str]:
     return None
 
 
-def pg_get_kel_desa_featurecollection_bbox(
-    bbox: Tuple[float, float, float, float],
-    zoom: int = 12,
-    limit: int = 5000,
-) -> Dict[str, Any]:
-    """Ambil batas kel/desa dari PostGIS untuk area yang sedang terlihat (bbox).
-
-    - bbox = (minx, miny, maxx, maxy) dalam EPSG:4326
-    - zoom dipakai untuk simplify (agar ringan saat panning/zooming)
+def _kel_desa_table_cols() -> Tuple[str, Optional[str], Optional[str], Optional[str], str]:
+    """Resolve tabel kel/desa + nama kolom (desa, kecamatan, kabkota, geom).
 
     ENV:
       - PG_KELDESA_TABLE  default: geo.batas_kel_desa_sumut
     """
-
     table = _get_env("PG_KELDESA_TABLE", "geo.batas_kel_desa_sumut") or "geo.batas_kel_desa_sumut"
     schema, tname = _parse_schema_table(table)
 
@@ -412,6 +464,19 @@ def pg_get_kel_desa_featurecollection_bbox(
     if not col_geom:
         raise RuntimeError(f"Kolom geometry tidak ditemukan di {table}. Pastikan kolom 'geom' ada.")
 
+    return table, col_desa, col_kec, col_kab, col_geom
+
+
+def _kel_desa_bbox_rows(
+    bbox: Tuple[float, float, float, float],
+    zoom: int,
+    limit: int,
+    geometry_as_text: bool,
+) -> List[Dict[str, Any]]:
+    """Query batas kel/desa dalam bbox. geometry_as_text=True -> geometry string GeoJSON mentah."""
+
+    table, col_desa, col_kec, col_kab, col_geom = _kel_desa_table_cols()
+
     # tolerance simplify (derajat). zoom tinggi -> kecil
     z = int(zoom or 12)
     if z <= 11:
@@ -443,6 +508,8 @@ def pg_get_kel_desa_featurecollection_bbox(
     else:
         geom_out = f"ST_Force2D({qgeom})"
 
+    geom_cast = "" if geometry_as_text else "::json"
+
     # Filter bbox pakai && agar GiST index terpakai
     sql = f"""
         WITH env AS (
@@ -452,7 +519,7 @@ def pg_get_kel_desa_featurecollection_bbox(
             {sel_desa},
             {sel_kec},
             {sel_kab},
-            ST_AsGeoJSON({geom_out})::json AS geometry
+            ST_AsGeoJSON({geom_out}){geom_cast} AS geometry
         FROM {qtbl}, env
         WHERE {qgeom} IS NOT NULL
           AND {qgeom} && env.e
@@ -460,7 +527,23 @@ def pg_get_kel_desa_featurecollection_bbox(
         LIMIT %s;
     """
 
-    rows = pg_fetchall(sql, (minx, miny, maxx, maxy, int(limit)))
+    return pg_fetchall(sql, (minx, miny, maxx, maxy, int(limit)))
+
+
+def pg_get_kel_desa_featurecollection_bbox(
+    bbox: Tuple[float, float, float, float],
+    zoom: int = 12,
+    limit: int = 5000,
+) -> Dict[str, Any]:
+    """Ambil batas kel/desa dari PostGIS untuk area yang sedang terlihat (bbox).
+
+    - bbox = (minx, miny, maxx, maxy) dalam EPSG:4326
+    - zoom dipakai untuk simplify (agar ringan saat panning/zooming)
+
+    ENV:
+      - PG_KELDESA_TABLE  default: geo.batas_kel_desa_sumut
+    """
+    rows = _kel_desa_bbox_rows(bbox, zoom, limit, geometry_as_text=False)
 
     features: List[Dict[str, Any]] = []
     for r in rows:
@@ -481,6 +564,35 @@ def pg_get_kel_desa_featurecollection_bbox(
         )
 
     return {"type": "FeatureCollection", "features": features}
+
+
+def pg_get_kel_desa_geojson_bytes(
+    bbox: Tuple[float, float, float, float],
+    zoom: int = 12,
+    limit: int = 5000,
+) -> bytes:
+    """Sama dengan pg_get_kel_desa_featurecollection_bbox, tapi langsung bytes JSON.
+
+    Geometry dari ST_AsGeoJSON (text) disisipkan apa adanya -> tidak di-parse
+    ke dict lalu di-encode ulang (bagian terbesar payload).
+    """
+    rows = _kel_desa_bbox_rows(bbox, zoom, limit, geometry_as_text=True)
+
+    parts: List[bytes] = []
+    for r in rows:
+        g = r.get("geometry")
+        if not g:
+            continue
+        props = json_dumps(
+            {
+                "kel_desa": r.get("kel_desa") or "-",
+                "kecamatan": r.get("kecamatan") or "-",
+                "kabkota": r.get("kabkota") or "-",
+            }
+        )
+        parts.append(b'{"type":"Feature","geometry":' + g.encode("utf-8") + b',"properties":' + props + b"}")
+
+    return b'{"type":"FeatureCollection","features":[' + b",".join(parts) + b"]}"
 # ------------------------------------------------------------------------------
 # 3) data_lokasi (marker)
 # ------------------------------------------------------------------------------
@@ -612,6 +724,41 @@ def _pg_ref_list(table: str, cols: Union[str, Sequence[str]]) -> List[str]:
     return []
 
 
+def pg_get_table_columns(table: str) -> List[str]:
+    """Daftar kolom tabel (information_schema), untuk resolve nama kolom sekali saja."""
+    schema, tname = _parse_schema_table(table)
+    rows = pg_fetchall(
+        """
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema=%s AND table_name=%s
+        ORDER BY ordinal_position
+        """,
+        (schema, tname),
+    )
+    return [r.get("column_name") for r in rows if r.get("column_name")]
+
+
+def pg_resolve_column(table: str, candidates: Sequence[str]) -> Optional[str]:
+    """Pilih kolom pertama dari kandidat yang benar-benar ada di tabel (None bila tidak ada)."""
+    return _pick_col(pg_get_table_columns(table), candidates)
+
+
+def pg_get_ref_values(table: str, col: str) -> List[str]:
+    """Ambil nilai unik (case-insensitive, urut A-Z) dari kolom yang sudah di-resolve."""
+    qcol = _q_ident(col)
+    rows = pg_fetchall(f"SELECT {qcol}::text AS v FROM {table} WHERE {qcol} IS NOT NULL ORDER BY {qcol} ASC;")
+    out: List[str] = []
+    seen = set()
+    for r in rows:
+        v = (r.get("v") or "").strip()
+        if not v or v.lower() in seen:
+            continue
+        seen.add(v.lower())
+        out.append(v)
+    return out
+
+
 def pg_get_ref_jenis_lokasi() -> List[str]:
     table = _get_env("PG_REF_JENIS_LOKASI_TABLE", "public.ref_jenis_lokasi")
     return _pg_ref_list(table, ["nama", "jenis_lokasi", "value", "label"])
@@ -815,13 +962,15 @@ def pg_update_data_lokasi_photo_path(
 # 4) data_relawan (login)
 # ------------------------------------------------------------------------------
 def pg_get_relawan_list() -> List[Dict[str, Any]]:
-    """Ambil relawan untuk login: id_relawan, nama_relawan, kode_akses."""
+    """Ambil relawan untuk dropdown login: id_relawan, nama_relawan, is_admin.
+
+    Catatan: kode_akses sengaja TIDAK diambil (lihat pg_get_relawan_by_nama untuk login).
+    """
     table = _get_env("PG_RELAWAN_TABLE", "public.data_relawan")
     sql = f"""
         SELECT
             id_relawan,
             nama_relawan,
-            kode_akses,
             COALESCE(is_admin, FALSE) AS is_admin
         FROM {table}
         WHERE nama_relawan IS NOT NULL
@@ -834,16 +983,139 @@ def pg_get_relawan_list() -> List[Dict[str, Any]]:
             {
                 "id_relawan": r.get("id_relawan"),
                 "nama_relawan": r.get("nama_relawan"),
-                "kode_akses": r.get("kode_akses"),
                 "is_admin": r.get("is_admin"),
             }
         )
     return out
 
 
+def pg_ensure_relawan_indexes() -> None:
+    """Index fungsional untuk lookup login: lower(trim(nama_relawan))."""
+    table = _get_env("PG_RELAWAN_TABLE", "public.data_relawan")
+    _schema, tname = _parse_schema_table(table)
+    pg_execute(
+        f"CREATE INDEX IF NOT EXISTS {_q_ident(tname + '_nama_lower_idx')} "
+        f"ON {table} ((lower(trim(nama_relawan))));"
+    )
+
+
+# table -> (ada kolom kode_akses_hash?, waktu cek). True permanen; False dicek ulang
+# tiap _CRED_COL_RECHECK_SECONDS (migrasi bisa jalan dari proses lain).
+_RELAWAN_HASH_COL: Dict[str, Tuple[bool, float]] = {}
+_CRED_COL_RECHECK_SECONDS = 300
+
+
+def pg_relawan_has_hash_column(table: Optional[str] = None) -> bool:
+    """Cek (sekali, lewat information_schema) apakah kolom kode_akses_hash sudah ada."""
+    table = table or _get_env("PG_RELAWAN_TABLE", "public.data_relawan")
+    hit = _RELAWAN_HASH_COL.get(table)
+    if hit is not None and (hit[0] or time.time() - hit[1] < _CRED_COL_RECHECK_SECONDS):
+        return hit[0]
+    has_col = "kode_akses_hash" in pg_get_table_columns(table)
+    _RELAWAN_HASH_COL[table] = (has_col, time.time())
+    return has_col
+
+
+def pg_get_relawan_by_nama(nama: str) -> Optional[Dict[str, Any]]:
+    """Ambil 1 relawan (termasuk kode_akses) berdasarkan nama, case-insensitive.
+
+    Pakai index fungsional lower(trim(nama_relawan)) (pg_ensure_relawan_indexes).
+    """
+    key = str(nama or "").strip().lower()
+    if not key:
+        return None
+    table = _get_env("PG_RELAWAN_TABLE", "public.data_relawan")
+    # Kolom kode_akses_hash belum ada (migrasi credentials belum dijalankan) -> NULL.
+    # Sudah ber-hash -> plaintext tidak dibaca sama sekali.
+    if pg_relawan_has_hash_column(table):
+        cred_cols = "CASE WHEN kode_akses_hash IS NULL THEN kode_akses END AS kode_akses, kode_akses_hash"
+    else:
+        cred_cols = "kode_akses, NULL::text AS kode_akses_hash"
+    sql = f"""
+        SELECT
+            id_relawan,
+            nama_relawan,
+            {cred_cols},
+            COALESCE(is_admin, FALSE) AS is_admin
+        FROM {table}
+        WHERE lower(trim(nama_relawan)) = %s
+        ORDER BY nama_relawan ASC
+        LIMIT 1;
+    """
+    return pg_fetchone(sql, (key,))
+
+
+def pg_ensure_relawan_credential_column() -> None:
+    """Tambah kolom kode_akses_hash (hash bersalt kode akses) bila belum ada."""
+    table = _get_env("PG_RELAWAN_TABLE", "public.data_relawan")
+    pg_execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS kode_akses_hash text;")
+    _RELAWAN_HASH_COL[table] = (True, time.time())
+
+
+def pg_get_relawan_unhashed_codes() -> List[Dict[str, Any]]:
+    """Relawan yang masih punya kode_akses plaintext tapi belum punya hash (untuk migrasi)."""
+    table = _get_env("PG_RELAWAN_TABLE", "public.data_relawan")
+    sql = f"""
+        SELECT id_relawan, kode_akses
+        FROM {table}
+        WHERE NULLIF(TRIM(kode_akses), '') IS NOT NULL
+          AND kode_akses_hash IS NULL;
+    """
+    return pg_fetchall(sql)
+
+
+def pg_set_relawan_kode_hash(id_relawan: Any, kode_hash: str) -> bool:
+    """Simpan hash kode akses sekaligus kosongkan kode_akses plaintext (1 UPDATE).
+
+    Return False tanpa query bila kolom kode_akses_hash belum ada.
+    """
+    table = _get_env("PG_RELAWAN_TABLE", "public.data_relawan")
+    if not pg_relawan_has_hash_column(table):
+        return False
+    rows = pg_fetchall(
+        f"UPDATE {table} SET kode_akses_hash = %s, kode_akses = NULL "
+        f"WHERE id_relawan::text = %s RETURNING id_relawan;",
+        (kode_hash, str(id_relawan)),
+    )
+    return bool(rows)
+
+
+def pg_clear_relawan_plain_codes() -> int:
+    """Kosongkan kode_akses plaintext untuk relawan yang sudah punya hash."""
+    table = _get_env("PG_RELAWAN_TABLE", "public.data_relawan")
+    rows = pg_fetchall(
+        f"UPDATE {table} SET kode_akses = NULL "
+        f"WHERE kode_akses_hash IS NOT NULL AND kode_akses IS NOT NULL RETURNING id_relawan;"
+    )
+    return len(rows)
+
+
 # ------------------------------------------------------------------------------
 # 5) lokasi_relawan (absensi) - insert
 # ------------------------------------------------------------------------------
+# tabel -> kolom kecamatan/desa_kelurahan tersedia? (dicek/ditambah sekali per proses)
+_LOKASI_RELAWAN_WILAYAH: Dict[str, bool] = {}
+
+
+def _lokasi_relawan_wilayah_ready(table: str) -> bool:
+    ready = _LOKASI_RELAWAN_WILAYAH.get(table)
+    if ready is None:
+        try:
+            cols = set(pg_get_table_columns(table))
+            if not {"kecamatan", "desa_kelurahan"} <= cols:
+                pg_execute(
+                    f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS kecamatan text, "
+                    f"ADD COLUMN IF NOT EXISTS desa_kelurahan text;"
+                )
+            ready = True
+        except Exception as e:
+            # Tanpa hak ALTER: simpan absensi tanpa kecamatan/desa (tidak dicoba tiap request)
+            print(f"[PG] kolom kecamatan/desa_kelurahan {table} tidak tersedia: {e}")
+            ready = False
+        _LOKASI_RELAWAN_WILAYAH[table] = ready
+    return ready
+
+
 def pg_insert_lokasi_relawan(
     id_relawan: str,
     latitude: Any,
@@ -853,6 +1125,8 @@ def pg_insert_lokasi_relawan(
     lokasi_posko: Optional[str] = None,
     photo_link: Optional[str] = None,
     waktu: Optional[datetime] = None,
+    kecamatan: Optional[str] = None,
+    desa_kelurahan: Optional[str] = None,
 ) -> bool:
     table = _get_env("PG_LOKASI_RELAWAN_TABLE", "public.lokasi_relawan")
 
@@ -866,7 +1140,22 @@ def pg_insert_lokasi_relawan(
     w = _normalize_input_ts(waktu)
 
     # Urutan percobaan (biar tahan beda nama kolom/atribut)
-    attempts: List[Tuple[str, Tuple[Any, ...]]] = [
+    attempts: List[Tuple[str, Tuple[Any, ...]]] = []
+
+    # Kolom kecamatan/desa_kelurahan (hasil reverse geocoding) dipastikan sekali per proses
+    if (kecamatan or desa_kelurahan) and _lokasi_relawan_wilayah_ready(table):
+        attempts.append(
+            (
+                f"""
+                INSERT INTO {table}
+                (waktu, id_relawan, latitude, longitude, catatan, lokasi, lokasi_posko, photo_link, kecamatan, desa_kelurahan)
+                VALUES (COALESCE(%s, now()),%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                """,
+                (w, id_relawan, lat_f, lon_f, catatan, lokasi, lokasi_posko, photo_link, kecamatan, desa_kelurahan),
+            )
+        )
+
+    attempts += [
         (
             f"""
             INSERT INTO {table}
@@ -2265,8 +2554,12 @@ def pg_update_data_lokasi_jenis(
     actor_id_relawan: Optional[str] = None,
     actor_nama_relawan: Optional[str] = None,
     note: Optional[str] = None,
+    allowed_jenis: Optional[Sequence[str]] = None,
 ) -> bool:
-    """Ubah jenis_lokasi pada data_lokasi (nilai diambil dari ref_jenis_lokasi)."""
+    """Ubah jenis_lokasi pada data_lokasi (nilai diambil dari ref_jenis_lokasi).
+
+    allowed_jenis: daftar valid dari cache ref (ref_registry); None -> baca tabel ref.
+    """
     table = _get_env("PG_DATA_LOKASI_TABLE", "public.data_lokasi")
     sid = str(id_lokasi or '').strip()
     new_jenis = str(jenis_lokasi or '').strip()
@@ -2277,7 +2570,8 @@ def pg_update_data_lokasi_jenis(
 
     # Validasi ringan: pastikan new_jenis ada di daftar ref_jenis_lokasi jika tabelnya tersedia
     try:
-        allowed = set([v.strip() for v in (pg_get_ref_jenis_lokasi() or []) if str(v).strip()])
+        src = allowed_jenis if allowed_jenis is not None else (pg_get_ref_jenis_lokasi() or [])
+        allowed = set([str(v).strip() for v in src if str(v).strip()])
     except Exception:
         allowed = set()
 
@@ -2705,4 +2999,924 @@ def pg_get_asesmen_oxfam_by_id(asesmen_id: int) -> Optional[Dict[str, Any]]:
                 rr["jawaban"] = j
         return rr
     except Exception:
-        return None
\ No newline at end of file
+        return None
+
+# ------------------------------------------------------------------------------
+# 14) ASESMEN - titik ringan (koordinat/radius/waktu) untuk analitik spasial
+# ------------------------------------------------------------------------------
+ASESMEN_KIND_TABLES: List[Tuple[str, str, str]] = [
+    ("kesehatan", "PG_ASESMEN_KESEHATAN_TABLE", "public.asesmen_kesehatan"),
+    ("pendidikan", "PG_ASESMEN_PENDIDIKAN_TABLE", "public.asesmen_pendidikan"),
+    ("psikososial", "PG_ASESMEN_PSIKOSOSIAL_TABLE", "public.asesmen_psikososial"),
+    ("infrastruktur", "PG_ASESMEN_INFRASTRUKTUR_TABLE", "public.asesmen_infrastruktur"),
+    ("wash", "PG_ASESMEN_WASH_TABLE", "public.asesmen_wash"),
+    ("kondisi", "PG_ASESMEN_KONDISI_TABLE", "public.asesmen_kondisi"),
+    ("oxfam", "PG_ASESMEN_OXFAM_TABLE", "public.asesmen_oxfam"),
+]
+
+
+def pg_get_asesmen_points(
+    kind: str,
+    hours: Optional[int] = None,
+    only_active: bool = True,
+    after_id: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Ambil titik asesmen (tanpa jawaban/catatan) untuk analitik spasial.
+
+    Return field: id, epoch (detik UTC), latitude, longitude, radius, skor, status.
+    - hours=None -> semua waktu.
+    - after_id -> hanya baris dengan id > after_id (update inkremental; waktu bisa
+      diisi mundur oleh relawan, jadi patokan delta pakai id bukan waktu).
+    - Kolom radius belum ada -> fallback tanpa radius (radius None).
+    """
+    kind_key = (kind or "").strip().lower()
+    found = [t for t in ASESMEN_KIND_TABLES if t[0] == kind_key]
+    if not found:
+        raise ValueError("kind asesmen tidak dikenal")
+
+    _, table_env, default_table = found[0]
+    table = _get_env(table_env, default_table)
+
+    where = ["latitude IS NOT NULL", "longitude IS NOT NULL"]
+    params: List[Any] = []
+    if only_active:
+        where.append("(is_active IS DISTINCT FROM false)")
+    if hours is not None:
+        where.append("waktu >= NOW() - (%s * INTERVAL '1 hour')")
+        params.append(int(hours))
+    if after_id is not None:
+        where.append("id > %s")
+        params.append(int(after_id))
+
+    where_sql = " AND ".join(where)
+
+    sql_new = f"""
+        SELECT id, EXTRACT(EPOCH FROM waktu)::float8 AS epoch,
+               latitude, longitude, radius, skor, status
+        FROM {table}
+        WHERE {where_sql};
+    """
+    sql_old = f"""
+        SELECT id, EXTRACT(EPOCH FROM waktu)::float8 AS epoch,
+               latitude, longitude, NULL::float8 AS radius, skor, status
+        FROM {table}
+        WHERE {where_sql};
+    """
+
+    try:
+        rows = pg_fetchall(sql_new, tuple(params) if params else None)
+    except Exception:
+        rows = pg_fetchall(sql_old, tuple(params) if params else None)
+
+    out: List[Dict[str, Any]] = []
+    for r in rows:
+        out.append(
+            {
+                "id": r.get("id"),
+                "epoch": _to_float(r.get("epoch")),
+                "latitude": _to_float(r.get("latitude")),
+                "longitude": _to_float(r.get("longitude")),
+                "radius": _to_float(r.get("radius")),
+                "skor": _to_float(r.get("skor")),
+                "status": r.get("status"),
+            }
+        )
+    return out
+
+
+# ------------------------------------------------------------------------------
+# 15) WILAYAH - polygon kel/desa (reverse geocoding) + backfill kecamatan/desa
+# ------------------------------------------------------------------------------
+def pg_get_kel_desa_polygons(simplify: float = 0.0) -> List[Dict[str, Any]]:
+    """Ambil SEMUA polygon kel/desa (EPSG:4326) untuk index reverse geocoding di memori.
+
+    Return field: kel_desa, kecamatan, kabkota, geometry (GeoJSON dict).
+    - simplify > 0 -> ST_SimplifyPreserveTopology (derajat), memperkecil payload.
+    """
+    table, col_desa, col_kec, col_kab, col_geom = _kel_desa_table_cols()
+
+    def sel_or_dash(colname: Optional[str], alias: str) -> str:
+        if colname:
+            return f"COALESCE({_q_ident(colname)}::text,'-') AS {alias}"
+        return f"'-'::text AS {alias}"
+
+    qgeom = _q_ident(col_geom)
+    geom_4326 = f"""
+        CASE
+            WHEN ST_SRID({qgeom}) IN (0, 4326) THEN ST_Force2D({qgeom})
+            ELSE ST_Transform(ST_Force2D({qgeom}), 4326)
+        END
+    """
+    if simplify and simplify > 0:
+        geom_4326 = f"ST_SimplifyPreserveTopology({geom_4326}, {float(simplify)})"
+
+    sql = f"""
+        SELECT
+            {sel_or_dash(col_desa, "kel_desa")},
+            {sel_or_dash(col_kec, "kecamatan")},
+            {sel_or_dash(col_kab, "kabkota")},
+            ST_AsGeoJSON({geom_4326})::json AS geometry
+        FROM {_q_table(table)}
+        WHERE {qgeom} IS NOT NULL;
+    """
+    return [r for r in pg_fetchall(sql) if r.get("geometry")]
+
+
+# (tabel, kolom geom) -> SRID (dibaca sekali; skema tabel batas wilayah statis)
+_KELDESA_SRID: Dict[Tuple[str, str], int] = {}
+
+
+def _kel_desa_srid(table: str, col_geom: str) -> int:
+    key = (table, col_geom)
+    if key not in _KELDESA_SRID:
+        qgeom = _q_ident(col_geom)
+        r = pg_fetchone(f"SELECT ST_SRID({qgeom}) AS srid FROM {_q_table(table)} WHERE {qgeom} IS NOT NULL LIMIT 1;")
+        _KELDESA_SRID[key] = int((r or {}).get("srid") or 4326)
+    return _KELDESA_SRID[key]
+
+
+def pg_reverse_geocode_kel_desa(latitude: Any, longitude: Any) -> Optional[Dict[str, Any]]:
+    """Reverse geocoding via PostGIS (fallback bila index di memori belum siap).
+
+    Pakai ST_Intersects agar GiST index pada kolom geom terpakai.
+    """
+    lat_f = _to_float(latitude)
+    lon_f = _to_float(longitude)
+    if lat_f is None or lon_f is None or not (math.isfinite(lat_f) and math.isfinite(lon_f)):
+        return None
+
+    table, col_desa, col_kec, col_kab, col_geom = _kel_desa_table_cols()
+    qgeom = _q_ident(col_geom)
+
+    def sel_or_dash(colname: Optional[str], alias: str) -> str:
+        if colname:
+            return f"COALESCE({_q_ident(colname)}::text,'-') AS {alias}"
+        return f"'-'::text AS {alias}"
+
+    # Titik dibuat SEKALI (konstanta, bukan per baris) lalu di-transform ke SRID
+    # tabel -> filter && memakai GiST index.
+    srid = _kel_desa_srid(table, col_geom)
+    if srid == 0:
+        point = "ST_SetSRID(ST_MakePoint(%s, %s), 0)"
+    elif srid == 4326:
+        point = "ST_SetSRID(ST_MakePoint(%s, %s), 4326)"
+    else:
+        point = f"ST_Transform(ST_SetSRID(ST_MakePoint(%s, %s), 4326), {int(srid)})"
+
+    sql = f"""
+        WITH pt AS (
+            SELECT {point} AS p
+        )
+        SELECT
+            {sel_or_dash(col_desa, "kel_desa")},
+            {sel_or_dash(col_kec, "kecamatan")},
+            {sel_or_dash(col_kab, "kabkota")}
+        FROM {_q_table(table)}, pt
+        WHERE {qgeom} && pt.p
+          AND ST_Intersects({qgeom}, pt.p)
+        LIMIT 1;
+    """
+    return pg_fetchone(sql, (lon_f, lat_f))
+
+
+# Target backfill: nama -> (env tabel, default tabel, kolom id, isi nama_kabkota?)
+# data_lokasi.nama_kabkota diisi relawan & dipakai untuk prefix ID -> tidak ditimpa.
+WILAYAH_BACKFILL_TARGETS: Dict[str, Tuple[str, str, str, bool]] = {
+    "data_lokasi": ("PG_DATA_LOKASI_TABLE", "public.data_lokasi", "id_lokasi", False),
+}
+for _kind, _env, _default in ASESMEN_KIND_TABLES:
+    WILAYAH_BACKFILL_TARGETS[f"asesmen_{_kind}"] = (_env, _default, "id", True)
+
+
+def pg_ensure_wilayah_columns(target: str) -> None:
+    """Tambah kolom kecamatan/desa_kelurahan (+ nama_kabkota utk asesmen) bila belum ada."""
+    if target not in WILAYAH_BACKFILL_TARGETS:
+        raise ValueError("target backfill tidak dikenal")
+    table_env, default_table, _id_col, with_kabkota = WILAYAH_BACKFILL_TARGETS[target]
+    table = _get_env(table_env, default_table)
+
+    cols = ["ADD COLUMN IF NOT EXISTS kecamatan text", "ADD COLUMN IF NOT EXISTS desa_kelurahan text"]
+    if with_kabkota:
+        cols.append("ADD COLUMN IF NOT EXISTS nama_kabkota text")
+    pg_execute(f"ALTER TABLE {table} {', '.join(cols)};")
+
+
+def pg_get_wilayah_backfill_rows(target: str, only_missing: bool = True, limit: int = 0) -> List[Dict[str, Any]]:
+    """Ambil baris (id, latitude, longitude) yang perlu diisi kecamatan/desa."""
+    if target not in WILAYAH_BACKFILL_TARGETS:
+        raise ValueError("target backfill tidak dikenal")
+    table_env, default_table, id_col, _with_kabkota = WILAYAH_BACKFILL_TARGETS[target]
+    table = _get_env(table_env, default_table)
+
+    where = ["latitude IS NOT NULL", "longitude IS NOT NULL"]
+    if only_missing:
+        where.append("(NULLIF(TRIM(kecamatan), '') IS NULL OR NULLIF(TRIM(desa_kelurahan), '') IS NULL)")
+
+    sql = f"""
+        SELECT {id_col}::text AS id, latitude, longitude
+        FROM {table}
+        WHERE {" AND ".join(where)}
+        ORDER BY {id_col}
+    """
+    params: Tuple[Any, ...] = ()
+    if limit and int(limit) > 0:
+        sql += " LIMIT %s"
+        params = (int(limit),)
+
+    rows = pg_fetchall(sql + ";", params or None)
+    return [
+        {"id": r.get("id"), "latitude": _to_float(r.get("latitude")), "longitude": _to_float(r.get("longitude"))}
+        for r in rows
+    ]
+
+
+# (tabel, kolom) -> tipe SQL (format_type), dibaca sekali
+_COLUMN_TYPES: Dict[Tuple[str, str], str] = {}
+
+
+def _column_type(table: str, col: str) -> str:
+    key = (table, col)
+    if key not in _COLUMN_TYPES:
+        r = pg_fetchone(
+            "SELECT format_type(atttypid, atttypmod) AS t FROM pg_attribute "
+            "WHERE attrelid = %s::regclass AND attname = %s AND NOT attisdropped;",
+            (table, col),
+        )
+        if not r or not r.get("t"):
+            raise RuntimeError(f"Kolom {col} tidak ditemukan di {table}")
+        _COLUMN_TYPES[key] = str(r["t"])
+    return _COLUMN_TYPES[key]
+
+
+def pg_update_wilayah_bulk(target: str, items: Sequence[Dict[str, Any]]) -> int:
+    """Update kecamatan/desa_kelurahan (+ nama_kabkota asesmen) sekaligus (1 statement per batch).
+
+    items: [{"id", "kabkota", "kecamatan", "desa_kelurahan"}, ...]
+    """
+    if target not in WILAYAH_BACKFILL_TARGETS:
+        raise ValueError("target backfill tidak dikenal")
+    if not items:
+        return 0
+    table_env, default_table, id_col, with_kabkota = WILAYAH_BACKFILL_TARGETS[target]
+    table = _get_env(table_env, default_table)
+
+    set_sql = "kecamatan = v.kecamatan, desa_kelurahan = v.desa_kelurahan"
+    if with_kabkota:
+        set_sql += ", nama_kabkota = v.kabkota"
+    # Parameter di-cast ke tipe kolom id (bukan kolom ke text) -> index PK terpakai
+    id_type = _column_type(table, id_col)
+
+    sql = f"""
+        UPDATE {table} AS t
+        SET {set_sql}
+        FROM (
+            SELECT
+                UNNEST(%s::text[]) AS id,
+                UNNEST(%s::text[]) AS kabkota,
+                UNNEST(%s::text[]) AS kecamatan,
+                UNNEST(%s::text[]) AS desa_kelurahan
+        ) AS v
+        WHERE t.{id_col} = v.id::{id_type}
+        RETURNING t.{id_col};
+    """
+    rows = pg_fetchall(
+        sql,
+        (
+            [str(it.get("id")) for it in items],
+            [it.get("kabkota") for it in items],
+            [it.get("kecamatan") for it in items],
+            [it.get("desa_kelurahan") for it in items],
+        ),
+    )
+    return len(rows)
+
+
+# ------------------------------------------------------------------------------
+# 16) MEDIA - metadata file content-addressed (media/cas) + referensi
+# ------------------------------------------------------------------------------
+_MEDIA_TABLES_READY = False
+
+
+def _media_tables() -> Tuple[str, str]:
+    return (
+        _get_env("PG_MEDIA_OBJECT_TABLE", "public.media_object"),
+        _get_env("PG_MEDIA_REF_TABLE", "public.media_ref"),
+    )
+
+
+def pg_ensure_media_tables() -> None:
+    """CREATE TABLE IF NOT EXISTS media_object + media_ref (sekali per proses)."""
+    global _MEDIA_TABLES_READY
+    if _MEDIA_TABLES_READY:
+        return
+    obj_table, ref_table = _media_tables()
+    pg_execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {obj_table} (
+            sha256 char(64) PRIMARY KEY,
+            rel_path text NOT NULL,
+            size_bytes bigint NOT NULL,
+            mime text,
+            width integer,
+            height integer,
+            content_sha256 char(64),
+            upload_count integer NOT NULL DEFAULT 1,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            last_seen_at timestamptz NOT NULL DEFAULT now()
+        );
+        """
+    )
+    # Tanpa PK: isi tabel diganti utuh oleh GC (DELETE + INSERT 1 statement)
+    pg_execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {ref_table} (
+            sha256 char(64) NOT NULL,
+            ref_table text NOT NULL,
+            ref_id text NOT NULL,
+            scanned_at timestamptz NOT NULL DEFAULT now()
+        );
+        """
+    )
+    pg_execute(
+        f"CREATE INDEX IF NOT EXISTS {_q_ident(ref_table.split('.')[-1] + '_sha256_idx')} ON {ref_table} (sha256);"
+    )
+    _MEDIA_TABLES_READY = True
+
+
+def pg_upsert_media_object(sha256: str, rel_path: str, size_bytes: int, mime: Optional[str]) -> None:
+    """Catat file CAS; upload ulang file identik -> upload_count + 1."""
+    pg_ensure_media_tables()
+    obj_table, _ = _media_tables()
+    pg_execute(
+        f"""
+        INSERT INTO {obj_table} (sha256, rel_path, size_bytes, mime)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (sha256) DO UPDATE
+        SET upload_count = {obj_table}.upload_count + 1,
+            last_seen_at = now();
+        """,
+        (sha256, rel_path, int(size_bytes), mime),
+    )
+
+
+def pg_update_media_object_image(
+    sha256: str,
+    width: Optional[int],
+    height: Optional[int],
+    content_sha256: Optional[str],
+    size_bytes: Optional[int] = None,
+) -> None:
+    """Dimensi + hash isi aktual (berbeda dari sha256 bila EXIF asli dibuang)."""
+    pg_ensure_media_tables()
+    obj_table, _ = _media_tables()
+    pg_execute(
+        f"""
+        UPDATE {obj_table}
+        SET width = %s, height = %s, content_sha256 = %s,
+            size_bytes = COALESCE(%s, size_bytes)
+        WHERE sha256 = %s;
+        """,
+        (width, height, content_sha256, size_bytes, sha256),
+    )
+
+
+def pg_get_media_objects() -> List[Dict[str, Any]]:
+    pg_ensure_media_tables()
+    obj_table, _ = _media_tables()
+    return pg_fetchall(
+        f"SELECT sha256, rel_path, size_bytes, mime, width, height, content_sha256, upload_count FROM {obj_table};"
+    )
+
+
+def pg_delete_media_objects(sha256s: Sequence[str]) -> int:
+    if not sha256s:
+        return 0
+    pg_ensure_media_tables()
+    obj_table, _ = _media_tables()
+    rows = pg_fetchall(f"DELETE FROM {obj_table} WHERE sha256 = ANY(%s) RETURNING sha256;", (list(sha256s),))
+    return len(rows)
+
+
+# photo_path berisi "cas/ab/cd/<sha256>.<ext>" (asesmen: JSON array; lokasi: "media/cas/...")
+_CAS_REF_RE = re.compile(r"cas/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})\.")
+
+
+def pg_scan_media_refs() -> Dict[str, List[Tuple[str, str]]]:
+    """sha256 -> [(tabel, id), ...] dari kolom photo_path semua tabel asesmen + data_lokasi.
+
+    Tabel yang tidak ada dilewati; error lain di-raise (GC tidak boleh jalan
+    dengan daftar referensi yang tidak lengkap).
+    """
+    sources: List[Tuple[str, str]] = [
+        (_get_env(env, default), "id") for _, env, default in ASESMEN_KIND_TABLES
+    ]
+    sources.append((_get_env("PG_DATA_LOKASI_TABLE", "public.data_lokasi"), "id_lokasi"))
+
+    refs: Dict[str, List[Tuple[str, str]]] = {}
+    for table, id_col in sources:
+        exists = pg_fetchone("SELECT to_regclass(%s) IS NOT NULL AS ok;", (table,))
+        if not exists or not exists.get("ok"):
+            continue
+        rows = pg_fetchall(
+            f"SELECT {_q_ident(id_col)}::text AS ref_id, photo_path FROM {table} WHERE photo_path LIKE %s;",
+            ("%cas/%",),
+        )
+        for r in rows:
+            for sha in _CAS_REF_RE.findall(str(r.get("photo_path") or "")):
+                refs.setdefault(sha, []).append((table, r.get("ref_id") or ""))
+    return refs
+
+
+def pg_replace_media_refs(refs: Dict[str, List[Tuple[str, str]]]) -> int:
+    """Ganti isi media_ref dengan hasil scan (atomik: 1 statement)."""
+    pg_ensure_media_tables()
+    _, ref_table = _media_tables()
+    shas: List[str] = []
+    tables: List[str] = []
+    ids: List[str] = []
+    for sha, items in refs.items():
+        for table, ref_id in items:
+            shas.append(sha)
+            tables.append(table)
+            ids.append(ref_id)
+    pg_execute(
+        f"""
+        WITH cleared AS (DELETE FROM {ref_table})
+        INSERT INTO {ref_table} (sha256, ref_table, ref_id)
+        SELECT * FROM UNNEST(%s::text[], %s::text[], %s::text[]);
+        """,
+        (shas, tables, ids),
+    )
+    return len(shas)
+
+
+# ------------------------------------------------------------------------------
+# 17) JOB QUEUE - antrian job background (job_queue.py), klaim via SKIP LOCKED
+# ------------------------------------------------------------------------------
+_JOB_TABLE_READY = False
+
+
+def _job_table() -> str:
+    return _get_env("PG_JOB_TABLE", "public.job_queue")
+
+
+def pg_ensure_job_table() -> None:
+    """CREATE TABLE IF NOT EXISTS job_queue + index antrian + view dead-letter (sekali per proses)."""
+    global _JOB_TABLE_READY
+    if _JOB_TABLE_READY:
+        return
+    table = _job_table()
+    name = table.split(".")[-1]
+    pg_execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id bigserial PRIMARY KEY,
+            kind text NOT NULL,
+            payload jsonb NOT NULL DEFAULT '{{}}'::jsonb,
+            status text NOT NULL DEFAULT 'queued',
+            attempts integer NOT NULL DEFAULT 0,
+            max_attempts integer NOT NULL DEFAULT 5,
+            run_at timestamptz NOT NULL DEFAULT now(),
+            locked_at timestamptz,
+            locked_by text,
+            last_error text,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            updated_at timestamptz NOT NULL DEFAULT now()
+        );
+        """
+    )
+    # Partial index: hanya job yang masih bisa diklaim (tabel boleh berisi banyak 'done')
+    pg_execute(
+        f"""
+        CREATE INDEX IF NOT EXISTS {_q_ident(name + '_pending_idx')}
+        ON {table} (run_at, id) WHERE status IN ('queued', 'running');
+        """
+    )
+    pg_execute(f"CREATE OR REPLACE VIEW {table}_dead AS SELECT * FROM {table} WHERE status = 'dead';")
+    _JOB_TABLE_READY = True
+
+
+def pg_enqueue_job(kind: str, payload: Dict[str, Any], delay_seconds: float = 0, max_attempts: int = 5) -> int:
+    pg_ensure_job_table()
+    row = pg_fetchone(
+        f"""
+        INSERT INTO {_job_table()} (kind, payload, max_attempts, run_at)
+        VALUES (%s, %s::jsonb, %s, now() + make_interval(secs => %s))
+        RETURNING id;
+        """,
+        (kind, json_dumps(payload or {}).decode("utf-8"), int(max_attempts), float(delay_seconds or 0)),
+    )
+    return int(row["id"]) if row else 0
+
+
+def pg_claim_jobs(worker_id: str, limit: int, lease_seconds: float) -> List[Dict[str, Any]]:
+    """Klaim s.d. `limit` job siap jalan (1 statement, aman untuk banyak worker).
+
+    FOR UPDATE SKIP LOCKED: baris yang sedang diklaim worker lain dilewati,
+    bukan ditunggu. Job 'running' yang lease-nya habis (worker mati) ikut
+    diklaim ulang.
+    """
+    pg_ensure_job_table()
+    table = _job_table()
+    return pg_fetchall(
+        f"""
+        WITH picked AS (
+            SELECT id FROM {table}
+            WHERE (status = 'queued' AND run_at <= now())
+               OR (status = 'running' AND locked_at < now() - make_interval(secs => %s))
+            ORDER BY run_at, id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        UPDATE {table} j
+        SET status = 'running', attempts = j.attempts + 1,
+            locked_at = now(), locked_by = %s, updated_at = now()
+        FROM picked
+        WHERE j.id = picked.id
+        RETURNING j.id, j.kind, j.payload, j.attempts, j.max_attempts, j.created_at;
+        """,
+        (float(lease_seconds), int(limit), worker_id),
+    )
+
+
+def pg_complete_job(job_id: int, worker_id: str) -> bool:
+    """Tandai selesai. False bila lease sudah habis & job diklaim worker lain."""
+    rows = pg_fetchall(
+        f"""
+        UPDATE {_job_table()}
+        SET status = 'done', locked_at = NULL, last_error = NULL, updated_at = now()
+        WHERE id = %s AND locked_by = %s AND status = 'running'
+        RETURNING id;
+        """,
+        (int(job_id), worker_id),
+    )
+    return bool(rows)
+
+
+def pg_fail_job(job_id: int, worker_id: str, error: str, retry_in_seconds: Optional[float]) -> bool:
+    """Job gagal: retry_in_seconds=None -> dead-letter, selain itu antri ulang.
+
+    False bila lease sudah habis & job diklaim worker lain (tidak diubah).
+    """
+    dead = retry_in_seconds is None
+    rows = pg_fetchall(
+        f"""
+        UPDATE {_job_table()}
+        SET status = %s, last_error = %s, locked_at = NULL, locked_by = NULL,
+            run_at = now() + make_interval(secs => %s), updated_at = now()
+        WHERE id = %s AND locked_by = %s AND status = 'running'
+        RETURNING id;
+        """,
+        ("dead" if dead else "queued", (error or "")[:2000], float(retry_in_seconds or 0), int(job_id), worker_id),
+    )
+    return bool(rows)
+
+
+def pg_get_job_stats() -> List[Dict[str, Any]]:
+    """Jumlah job per (kind, status) + umur job tertua yang belum selesai."""
+    pg_ensure_job_table()
+    rows = pg_fetchall(
+        f"""
+        SELECT kind, status, count(*) AS n,
+               EXTRACT(EPOCH FROM now() - min(created_at)) AS oldest_seconds
+        FROM {_job_table()}
+        GROUP BY kind, status
+        ORDER BY kind, status;
+        """
+    )
+    return [_json_safe_row(r) for r in rows]
+
+
+def pg_get_dead_jobs(limit: int = 100) -> List[Dict[str, Any]]:
+    pg_ensure_job_table()
+    rows = pg_fetchall(
+        f"""
+        SELECT id, kind, payload, attempts, max_attempts, last_error, created_at, updated_at
+        FROM {_job_table()}_dead
+        ORDER BY updated_at DESC
+        LIMIT %s;
+        """,
+        (int(limit),),
+    )
+    return [_json_safe_row(r) for r in rows]
+
+
+def pg_retry_dead_job(job_id: int) -> bool:
+    """Kembalikan job dead ke antrian (attempts direset)."""
+    pg_ensure_job_table()
+    rows = pg_fetchall(
+        f"""
+        UPDATE {_job_table()}
+        SET status = 'queued', attempts = 0, run_at = now(), last_error = NULL, updated_at = now()
+        WHERE id = %s AND status = 'dead'
+        RETURNING id;
+        """,
+        (int(job_id),),
+    )
+    return bool(rows)
+
+
+def pg_purge_done_jobs(older_than_hours: float) -> int:
+    rows = pg_fetchall(
+        f"""
+        DELETE FROM {_job_table()}
+        WHERE status = 'done' AND updated_at < now() - make_interval(secs => %s)
+        RETURNING id;
+        """,
+        (float(older_than_hours) * 3600,),
+    )
+    return len(rows)
+
+
+# ------------------------------------------------------------------------------
+# 18) BATCH OFFLINE - insert banyak baris idempoten (client_uuid) dalam 1 transaksi
+# ------------------------------------------------------------------------------
+# target -> (env tabel, default tabel, kolom id untuk RETURNING (atau None),
+#            [(kolom, tipe SQL), ...]). Semua nilai dikirim sebagai text[] lalu
+# di-cast per kolom -> aman untuk psycopg/psycopg2 & array berisi NULL semua.
+_ASESMEN_BATCH_COLS: List[Tuple[str, str]] = [
+    ("waktu", "timestamp"),
+    ("id_relawan", "text"),
+    ("kode_posko", "text"),
+    ("jawaban", "jsonb"),
+    ("skor", "float8"),
+    ("status", "text"),
+    ("latitude", "float8"),
+    ("longitude", "float8"),
+    ("catatan", "text"),
+    ("radius", "float8"),
+]
+
+BATCH_TARGETS: Dict[str, Tuple[str, str, Optional[str], List[Tuple[str, str]]]] = {
+    "absensi": (
+        "PG_LOKASI_RELAWAN_TABLE", "public.lokasi_relawan", None,
+        [
+            ("waktu", "timestamp"),
+            ("id_relawan", "text"),
+            ("latitude", "float8"),
+            ("longitude", "float8"),
+            ("catatan", "text"),
+            ("lokasi", "text"),
+            ("lokasi_posko", "text"),
+            ("kecamatan", "text"),
+            ("desa_kelurahan", "text"),
+        ],
+    ),
+    "lokasi": (
+        "PG_DATA_LOKASI_TABLE", "public.data_lokasi", "id_lokasi",
+        [
+            ("waktu", "timestamp"),
+            ("id_lokasi", "text"),
+            ("jenis_lokasi", "text"),
+            ("nama_kabkota", "text"),
+            ("status_lokasi", "text"),
+            ("tingkat_akses", "text"),
+            ("kondisi", "text"),
+            ("nama_lokasi", "text"),
+            ("alamat", "text"),
+            ("kecamatan", "text"),
+            ("desa_kelurahan", "text"),
+            ("latitude", "float8"),
+            ("longitude", "float8"),
+            ("lokasi_text", "text"),
+            ("catatan", "text"),
+            ("pic", "text"),
+            ("pic_hp", "text"),
+            ("id_relawan", "text"),
+        ],
+    ),
+}
+for _kind, _env, _default in ASESMEN_KIND_TABLES:
+    if _kind != "oxfam":  # form oxfam punya spec & route sendiri
+        BATCH_TARGETS[f"asesmen_{_kind}"] = (_env, _default, "id", _ASESMEN_BATCH_COLS)
+
+_CLIENT_UUID_READY: set = set()
+
+
+def pg_ensure_client_uuid(target: str) -> None:
+    """Kolom client_uuid + unique index (NULL boleh banyak: insert lama tetap jalan)."""
+    if target in _CLIENT_UUID_READY:
+        return
+    table_env, default_table, _id_col, _cols = BATCH_TARGETS[target]
+    table = _get_env(table_env, default_table)
+    _schema, tname = _parse_schema_table(table)
+    adds = ["ADD COLUMN IF NOT EXISTS client_uuid uuid"]
+    if target == "absensi":
+        # kolom hasil reverse geocoding (opsional di insert biasa)
+        adds += ["ADD COLUMN IF NOT EXISTS kecamatan text", "ADD COLUMN IF NOT EXISTS desa_kelurahan text"]
+    pg_execute(f"ALTER TABLE {table} {', '.join(adds)};")
+    pg_execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS {_q_ident(tname + '_client_uuid_uidx')} ON {table} (client_uuid);"
+    )
+    _CLIENT_UUID_READY.add(target)
+
+
+def _batch_text(v: Any) -> Optional[str]:
+    if v is None:
+        return None
+    if isinstance(v, datetime):
+        return v.isoformat(sep=" ")
+    if isinstance(v, (dict, list)):
+        return json_dumps(v).decode("utf-8")
+    return str(v)
+
+
+def _alloc_lokasi_ids(cur, table: str, rows: List[Dict[str, Any]]) -> None:
+    """Isi id_lokasi kosong: nomor lanjut per prefix (<JENIS>-<KAB>NNN), seperti pg_next_data_lokasi_id.
+
+    Advisory lock transaksi -> 2 batch bersamaan tidak mengambil nomor yang sama.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (table + ":id_lokasi",))
+    next_n: Dict[str, int] = {}
+    for r in rows:
+        if (r.get("id_lokasi") or "").strip():
+            continue
+        base = f"{_jenis_prefix(r.get('jenis_lokasi'))}-{_kabkota_code(r.get('nama_kabkota'))}"
+        if base not in next_n:
+            cur.execute(
+                f"SELECT id_lokasi FROM {table} WHERE id_lokasi LIKE %s ORDER BY id_lokasi DESC LIMIT 1;",
+                (base + "%",),
+            )
+            last = cur.fetchone()
+            m = re.search(r"(\d{3})$", str((last or {}).get("id_lokasi") or ""))
+            next_n[base] = int(m.group(1)) + 1 if m else 1
+        r["id_lokasi"] = f"{base}{next_n[base]:03d}"
+        next_n[base] += 1
+
+
+def _batch_insert(cur, target: str, rows: List[Dict[str, Any]]) -> Dict[str, Optional[str]]:
+    """INSERT ... SELECT FROM UNNEST ... ON CONFLICT (client_uuid) DO NOTHING.
+
+    Return {client_uuid: id} untuk baris yang benar-benar baru.
+    """
+    table_env, default_table, id_col, cols = BATCH_TARGETS[target]
+    table = _get_env(table_env, default_table)
+
+    # Yang sudah ada tidak perlu dialokasikan ID / dikirim ulang
+    uuids = [r["client_uuid"] for r in rows]
+    cur.execute(
+        f"SELECT client_uuid::text AS client_uuid FROM {table} WHERE client_uuid = ANY(%s::uuid[]);",
+        (uuids,),
+    )
+    existing = {row["client_uuid"] for row in cur.fetchall()}
+    rows = [r for r in rows if r["client_uuid"] not in existing]
+    if not rows:
+        return {}
+    if target == "lokasi":
+        _alloc_lokasi_ids(cur, table, rows)
+
+    names = [c for c, _ in cols] + ["client_uuid"]
+    types = [t for _, t in cols] + ["uuid"]
+    select = []
+    for name, typ in zip(names, types):
+        expr = f"v.{name}::{typ}"
+        if name == "waktu":
+            expr = f"COALESCE({expr}, now())"
+        select.append(expr)
+    returning = f"{id_col}::text AS id, client_uuid::text AS client_uuid" if id_col else "client_uuid::text AS client_uuid"
+
+    cur.execute(
+        f"""
+        INSERT INTO {table} ({", ".join(names)})
+        SELECT {", ".join(select)}
+        FROM UNNEST({", ".join(["%s::text[]"] * len(names))}) AS v({", ".join(names)})
+        ON CONFLICT (client_uuid) DO NOTHING
+        RETURNING {returning};
+        """,
+        tuple([_batch_text(r.get(name)) for r in rows] for name in names),
+    )
+    return {row["client_uuid"]: row.get("id") for row in cur.fetchall()}
+
+
+def pg_insert_batch(groups: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Optional[str]]]:
+    """Insert semua grup (target -> baris) dalam SATU transaksi: semua masuk atau tidak sama sekali.
+
+    Baris wajib punya client_uuid; waktu = datetime UTC naive (lihat _normalize_input_ts).
+    Return target -> {client_uuid: id} baris baru (client_uuid yang tidak ada = duplikat).
+    """
+    groups = {t: rows for t, rows in groups.items() if rows}
+    for target in groups:
+        if target not in BATCH_TARGETS:
+            raise ValueError(f"target batch tidak dikenal: {target}")
+        pg_ensure_client_uuid(target)
+    if not groups:
+        return {}
+
+    dsn = _get_dsn()
+    sql_label = "INSERT batch " + ", ".join(f"{t}:{len(r)}" for t, r in groups.items())
+
+    def work(cur):
+        out = {t: _batch_insert(cur, t, rows) for t, rows in groups.items()}
+        return out, sum(len(v) for v in out.values())
+
+    def run():
+        if _DRIVER == "psycopg":
+            assert psycopg is not None  # noqa
+            with psycopg.connect(dsn, row_factory=dict_row) as conn:
+                with conn.transaction():
+                    with conn.cursor() as cur:
+                        return work(cur)
+
+        if _DRIVER == "psycopg2":
+            assert psycopg2 is not None  # noqa
+            conn = psycopg2.connect(dsn)
+            try:
+                with conn:  # commit / rollback
+                    with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+                        return work(cur)
+            finally:
+                conn.close()
+
+        raise RuntimeError(
+            "Driver PostgreSQL tidak ditemukan. Install salah satu: psycopg[binary] atau psycopg2-binary."
+        )
+
+    return _timed(run, sql_label, "pg_insert_batch")
+
+
+# ------------------------------------------------------------------------------
+# 19) IDEMPOTENCY KEY - token submit form (idempotency.py), unik per key
+# ------------------------------------------------------------------------------
+_IDEMPOTENCY_TABLE_READY = False
+
+
+def _idempotency_table() -> str:
+    return _get_env("PG_IDEMPOTENCY_TABLE", "public.idempotency_key")
+
+
+def pg_ensure_idempotency_table() -> None:
+    global _IDEMPOTENCY_TABLE_READY
+    if _IDEMPOTENCY_TABLE_READY:
+        return
+    table = _idempotency_table()
+    pg_execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            key text PRIMARY KEY,
+            endpoint text NOT NULL,
+            id_relawan text,
+            status text NOT NULL DEFAULT 'pending',
+            response jsonb,
+            created_at timestamptz NOT NULL DEFAULT now()
+        );
+        """
+    )
+    pg_execute(
+        f"CREATE INDEX IF NOT EXISTS {_q_ident(table.split('.')[-1] + '_created_idx')} ON {table} (created_at);"
+    )
+    _IDEMPOTENCY_TABLE_READY = True
+
+
+def pg_claim_idempotency_key(
+    key: str, endpoint: str, id_relawan: Optional[str], stale_seconds: float
+) -> Optional[Dict[str, Any]]:
+    """Klaim key (1 statement). Return:
+    - {"claimed": True}                               -> request ini yang memproses
+    - {"claimed": False, "status", "response"}        -> sudah ada (pending / done)
+    - None -> baru saja diklaim request lain (belum commit saat statement mulai)
+
+    Key 'pending' yang lebih tua dari stale_seconds (proses mati) boleh diambil alih.
+    """
+    pg_ensure_idempotency_table()
+    table = _idempotency_table()
+    return pg_fetchone(
+        f"""
+        WITH ins AS (
+            INSERT INTO {table} AS t (key, endpoint, id_relawan)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (key) DO UPDATE
+            SET created_at = now(), status = 'pending', response = NULL
+            WHERE t.status = 'pending' AND t.created_at < now() - make_interval(secs => %s)
+            RETURNING key
+        )
+        SELECT true AS claimed, NULL::text AS status, NULL::jsonb AS response FROM ins
+        UNION ALL
+        SELECT false, status, response FROM {table}
+        WHERE key = %s AND NOT EXISTS (SELECT 1 FROM ins);
+        """,
+        (key, endpoint, id_relawan, float(stale_seconds), key),
+    )
+
+
+def pg_complete_idempotency_key(key: str, response: Dict[str, Any]) -> None:
+    pg_execute(
+        f"UPDATE {_idempotency_table()} SET status = 'done', response = %s::jsonb WHERE key = %s;",
+        (json_dumps(response).decode("utf-8"), key),
+    )
+
+
+def pg_release_idempotency_key(key: str) -> None:
+    """Hapus key 'pending' (request gagal) -> kiriman ulang diproses normal."""
+    pg_execute(f"DELETE FROM {_idempotency_table()} WHERE key = %s AND status = 'pending';", (key,))
+
+
+def pg_purge_idempotency_keys(older_than_hours: float) -> int:
+    rows = pg_fetchall(
+        f"""
+        DELETE FROM {_idempotency_table()}
+        WHERE created_at < now() - make_interval(secs => %s)
+        RETURNING key;
+        """,
+        (float(older_than_hours) * 3600,),
+    )
+    return len(rows)
@@ -0,0 +1,197 @@
+# profiler.py
+# SATGAS USU Peduli - Profiling on-demand (admin) + header Server-Timing
+# ---------------------------------------------------------------
+# - Admin bisa mem-profile SATU request dengan ?_profile=1 atau header
+#   "X-Profile: 1" -> cProfile aktif selama request itu saja.
+# - Hasil (.prof pstats + metadata .json) disimpan di PROFILE_DIR sebagai
+#   ring buffer (maks PROFILE_KEEP file, yang paling lama dihapus).
+# - Admin: GET /api/admin/profiles (daftar), GET /api/admin/profiles/<nama>
+#   (unduh .prof; ?format=txt -> ringkasan pstats teks).
+# - phase_timer("fetch"|"serialize"|"render") mencatat durasi fase; semua
+#   response mendapat header Server-Timing (fase + total).
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import cProfile
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import g, has_request_context, jsonify, request, send_from_directory, session
+
+# ==========================
+# CONFIG
+# ==========================
+PROFILE_KEEP = int(os.environ.get("PROFILE_KEEP", "20") or "20")
+PROFILE_TOP_N = 60
+
+_NAME_RE = re.compile(r"^[\w.-]+\.prof$")
+# cProfile tidak bisa dipakai 2 request bersamaan dengan aman -> 1 per proses
+_PROFILE_LOCK = threading.Lock()
+_SEQ = itertools.count(1)
+
+
+def _profile_dir(app) -> Path:
+    d = Path(os.environ.get("PROFILE_DIR", str(Path(app.root_path) / "logs" / "profiles")))
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+# ==========================
+# PHASE TIMING
+# ==========================
+@contextmanager
+def phase_timer(name: str) -> Iterator[None]:
+    """with phase_timer("fetch"): ...  (akumulatif bila fase sama dipakai berulang)"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        if has_request_context():
+            phases = g.setdefault("_server_timing", {})
+            phases[name] = phases.get(name, 0.0) + (time.perf_counter() - t0)
+
+
+def _server_timing_header(phases: Dict[str, float], total: Optional[float]) -> str:
+    parts = [f"{k};dur={v * 1000:.1f}" for k, v in phases.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# ==========================
+# RING BUFFER
+# ==========================
+def _prune(d: Path) -> None:
+    files = sorted(d.glob("*.prof"), key=lambda p: (p.stat().st_mtime, p.name))
+    for p in files[: max(0, len(files) - PROFILE_KEEP)]:
+        for f in (p, p.with_suffix(".json")):
+            try:
+                f.unlink()
+            except OSError:
+                pass
+
+
+def _save_profile(app, prof: cProfile.Profile, meta: Dict[str, Any]) -> str:
+    d = _profile_dir(app)
+    endpoint = re.sub(r"[^\w-]+", "_", meta.get("endpoint") or "unmatched")[:40]
+    now = time.time()
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{int(now * 1000) % 1000:03d}"
+    name = f"{stamp}-{os.getpid()}-{next(_SEQ)}-{endpoint}-{meta['ms']:.0f}ms.prof"
+    tmp = d / (name + ".tmp")
+    prof.dump_stats(str(tmp))
+    os.replace(tmp, d / name)
+    (d / name).with_suffix(".json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    _prune(d)
+    return name
+
+
+def list_profiles(app) -> List[Dict[str, Any]]:
+    d = _profile_dir(app)
+    out: List[Dict[str, Any]] = []
+    for p in sorted(d.glob("*.prof"), key=lambda p: p.name, reverse=True):
+        meta: Dict[str, Any] = {}
+        try:
+            meta = json.loads(p.with_suffix(".json").read_text(encoding="utf-8"))
+            meta["size"] = p.stat().st_size
+        except Exception:
+            continue  # baru saja dihapus worker lain (prune)
+        out.append({"name": p.name, **meta})
+    return out
+
+
+def _wants_profile() -> bool:
+    flag = request.args.get("_profile") or request.headers.get("X-Profile") or ""
+    return flag.strip().lower() in ("1", "true", "yes") and bool(session.get("is_admin"))
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_profiler_routes(app):
+
+    @app.before_request
+    def _profiler_start():
+        g._req_t0 = time.perf_counter()
+        if _wants_profile() and _PROFILE_LOCK.acquire(blocking=False):
+            prof = cProfile.Profile()
+            g._profiler = prof
+            prof.enable()
+
+    @app.after_request
+    def _profiler_finish(response):
+        t0 = g.pop("_req_t0", None)
+        total = time.perf_counter() - t0 if t0 is not None else None
+        phases = g.pop("_server_timing", {}) or {}
+
+        prof = g.pop("_profiler", None)
+        if prof is not None:
+            prof.disable()
+            _PROFILE_LOCK.release()
+            meta = {
+                "path": request.full_path.rstrip("?"),
+                "method": request.method,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "ms": round((total or 0.0) * 1000, 1),
+                "phases_ms": {k: round(v * 1000, 1) for k, v in phases.items()},
+                "pid": os.getpid(),
+                "ts": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            try:
+                response.headers["X-Profile-Id"] = _save_profile(app, prof, meta)
+            except Exception as e:
+                print(f"[PROFILE] gagal simpan profile: {e}")
+
+        header = _server_timing_header(phases, total)
+        if header:
+            response.headers["Server-Timing"] = header
+        return response
+
+    @app.teardown_request
+    def _profiler_cleanup(exc):
+        # Request berakhir exception -> pastikan profiler dimatikan & lock dilepas
+        prof = g.pop("_profiler", None)
+        if prof is not None:
+            prof.disable()
+            _PROFILE_LOCK.release()
+
+    @app.route("/api/admin/profiles", methods=["GET"])
+    def api_admin_profiles():
+        """Daftar profile tersimpan (terbaru dulu)."""
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+        return jsonify({"success": True, "keep": PROFILE_KEEP, "data": list_profiles(app)})
+
+    @app.route("/api/admin/profiles/<name>", methods=["GET"])
+    def api_admin_profile_download(name):
+        """Unduh 1 profile (.prof untuk snakeviz/pstats) atau ?format=txt ringkasan."""
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+        d = _profile_dir(app)
+        if not _NAME_RE.match(name) or not (d / name).is_file():
+            return jsonify({"success": False, "error": "Profile tidak ditemukan"}), 404
+
+        if (request.args.get("format") or "").lower() == "txt":
+            sort = request.args.get("sort") or "cumulative"
+            buf = io.StringIO()
+            try:
+                pstats.Stats(str(d / name), stream=buf).sort_stats(sort).print_stats(PROFILE_TOP_N)
+            except Exception as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+            return app.response_class(buf.getvalue(), mimetype="text/plain")
+
+        return send_from_directory(str(d), name, as_attachment=True, mimetype="application/octet-stream")
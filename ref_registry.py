@@ -0,0 +1,180 @@
+# ref_registry.py
+# SATGAS USU Peduli - Registry data referensi (ref_* dropdown + master_logistik)
+# ---------------------------------------------------------------
+# - Semua tabel ref dimuat sekaligus lalu disimpan di memori (TTL REFS_TTL_SECONDS).
+# - Nama kolom tiap tabel di-resolve SEKALI lewat information_schema
+#   (tidak lagi mencoba kandidat kolom satu per satu dengan query gagal).
+# - Versi (ETag) = hash isi data; /api/refs mendukung If-None-Match -> 304.
+# - Invalidasi eksplisit: invalidate_refs() / POST /api/admin/refs/refresh.
+# - Tabel yang gagal dimuat tidak di-cache: nilai lama (terakhir sukses)
+#   tetap dipakai dan dimuat ulang pada panggilan berikutnya.
+# - Body /api/refs di-encode sekali per versi (bytes di-cache per ETag);
+#   If-None-Match dicek sebelum serialisasi.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import jsonify, request, session
+
+from fast_json import EncodedCache, dumps as json_dumps
+
+try:
+    from pg_data import _get_env, pg_get_ref_values, pg_resolve_column
+except Exception as _pg_err:
+    print(f"[REFS] Error import pg_data: {_pg_err}")
+    _get_env = None
+    pg_get_ref_values = None
+    pg_resolve_column = None
+
+
+# ==========================
+# CONFIG
+# ==========================
+REFS_TTL_SECONDS = int(os.environ.get("REFS_TTL_SECONDS", "600") or "600")
+
+# nama -> (env tabel, default tabel, kandidat kolom)
+REF_SPECS: Dict[str, Tuple[str, str, List[str]]] = {
+    "jenis_lokasi": ("PG_REF_JENIS_LOKASI_TABLE", "public.ref_jenis_lokasi", ["nama", "jenis_lokasi", "value", "label"]),
+    "kabkota": ("PG_REF_KABKOTA_TABLE", "public.ref_kabkota", ["nama_kabkota", "kabkota", "nama", "value", "label"]),
+    "status_lokasi": ("PG_REF_STATUS_LOKASI_TABLE", "public.ref_status_lokasi", ["nama", "status_lokasi", "value", "label"]),
+    "tingkat_akses": ("PG_REF_TINGKAT_AKSES_TABLE", "public.ref_tingkat_akses", ["nama", "tingkat_akses", "akses", "value", "label"]),
+    "kondisi": ("PG_REF_KONDISI_TABLE", "public.ref_kondisi", ["nama", "kondisi", "kondisi_umum", "value", "label"]),
+    "master_logistik": ("PG_MASTER_LOGISTIK_TABLE", "public.master_logistik", ["kode_barang", "kode"]),
+}
+
+CACHE_REFS: Dict[str, Any] = {"data": None, "etag": None, "timestamp": 0}
+# Kolom hasil resolve disimpan terpisah: tidak ikut di-invalidate (skema jarang berubah)
+_RESOLVED_COLS: Dict[str, Optional[str]] = {}
+_CACHE_LOCK = threading.Lock()
+# etag (penuh / subset names=) -> body JSON /api/refs yang sudah di-encode
+CACHE_REFS_BODY = EncodedCache(maxsize=64, ttl=REFS_TTL_SECONDS)
+
+
+def invalidate_refs() -> None:
+    CACHE_REFS["data"] = None
+    CACHE_REFS["etag"] = None
+    CACHE_REFS["timestamp"] = 0
+    CACHE_REFS_BODY.clear()
+
+
+def _resolve(name: str, table: str, candidates: List[str]) -> Optional[str]:
+    col = _RESOLVED_COLS.get(name)
+    if col:
+        return col
+    col = pg_resolve_column(table, candidates)
+    if col:
+        _RESOLVED_COLS[name] = col  # None tidak di-cache: tabel mungkin dibuat belakangan
+    return col
+
+
+def _load_all(previous: Optional[Dict[str, List[str]]] = None) -> Tuple[Dict[str, List[str]], bool]:
+    """Muat semua tabel ref. Return (data, semua_sukses); yang gagal pakai nilai `previous`."""
+    data: Dict[str, List[str]] = {}
+    ok = True
+    for name, (env, default_table, candidates) in REF_SPECS.items():
+        table = _get_env(env, default_table) or default_table
+        try:
+            col = _resolve(name, table, candidates)
+            data[name] = pg_get_ref_values(table, col) if col else []
+        except Exception as e:
+            print(f"[REFS] gagal muat {name} ({table}): {e}")
+            _RESOLVED_COLS.pop(name, None)
+            data[name] = list((previous or {}).get(name) or [])
+            ok = False
+    return data, ok
+
+
+def _etag_of(data: Dict[str, List[str]]) -> str:
+    raw = json.dumps(data, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def get_refs(force: bool = False) -> Dict[str, List[str]]:
+    """Semua data referensi {nama: [nilai, ...]} dari cache (muat ulang bila expired)."""
+    if pg_get_ref_values is None:
+        return {name: [] for name in REF_SPECS}
+
+    data = CACHE_REFS["data"]
+    if not force and data is not None and time.time() - CACHE_REFS["timestamp"] < REFS_TTL_SECONDS:
+        return data
+
+    with _CACHE_LOCK:
+        data = CACHE_REFS["data"]
+        if not force and data is not None and time.time() - CACHE_REFS["timestamp"] < REFS_TTL_SECONDS:
+            return data
+        data, ok = _load_all(CACHE_REFS["data"])
+        CACHE_REFS["data"] = data
+        CACHE_REFS["etag"] = _etag_of(data)
+        # Gagal sebagian -> timestamp tidak diperbarui, panggilan berikutnya mencoba lagi
+        if ok:
+            CACHE_REFS["timestamp"] = time.time()
+        return data
+
+
+def get_ref(name: str) -> List[str]:
+    return list(get_refs().get(name) or [])
+
+
+def get_refs_etag() -> str:
+    get_refs()
+    return CACHE_REFS["etag"] or _etag_of({})
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_ref_routes(app):
+
+    @app.route("/api/refs", methods=["GET"])
+    def api_refs():
+        """Data referensi dropdown (ETag-versioned).
+
+        Query params (opsional):
+          - names=kabkota,kondisi   hanya sebagian
+        """
+        try:
+            data = get_refs()
+            etag = get_refs_etag()
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+        names = [n.strip() for n in (request.args.get("names") or "").split(",") if n.strip()]
+        if names:
+            etag = f"{etag}-{hashlib.sha1(','.join(names).encode('utf-8')).hexdigest()[:8]}"
+
+        if request.if_none_match.contains_weak(etag):
+            resp = app.response_class(status=304)
+        else:
+            body = CACHE_REFS_BODY.get(etag)
+            if body is None:
+                if names:
+                    data = {n: data.get(n, []) for n in names}
+                body = json_dumps({"success": True, "version": etag, "data": data})
+                CACHE_REFS_BODY.put(etag, body)
+            resp = app.response_class(body, mimetype="application/json")
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "no-cache"  # selalu revalidasi, murah via 304
+        return resp
+
+    @app.route("/api/admin/refs/refresh", methods=["POST"])
+    def api_admin_refs_refresh():
+        """Paksa muat ulang data referensi (setelah tabel ref diubah langsung di DB)."""
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+
+        _RESOLVED_COLS.clear()
+        invalidate_refs()
+        try:
+            get_refs(force=True)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify({"success": True, "version": get_refs_etag()})
@@ -0,0 +1,117 @@
+# relawan_directory.py
+# SATGAS USU Peduli - Direktori relawan (dropdown login + lookup autentikasi)
+# ---------------------------------------------------------------
+# - Dropdown: proyeksi ringan {id_relawan, nama_relawan} TANPA kode_akses,
+#   di-cache per proses (TTL RELAWAN_DIR_TTL_SECONDS) & diurutkan sekali.
+# - Login: 1 query terindeks (lower(trim(nama_relawan)) = ...), bukan
+#   ambil semua relawan lalu scan linear.
+# - Refresh: TTL, invalidate_relawan_directory(), endpoint admin, dan otomatis
+#   bila ada relawan yang berhasil login tapi belum ada di cache dropdown.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from flask import jsonify, session
+
+try:
+    from pg_data import pg_ensure_relawan_indexes, pg_get_relawan_by_nama, pg_get_relawan_list
+except Exception as _pg_err:
+    print(f"[RELAWAN] Error import pg_data: {_pg_err}")
+    pg_ensure_relawan_indexes = None
+    pg_get_relawan_by_nama = None
+    pg_get_relawan_list = None
+
+
+# ==========================
+# CONFIG
+# ==========================
+RELAWAN_DIR_TTL_SECONDS = int(os.environ.get("RELAWAN_DIR_TTL_SECONDS", "300") or "300")
+
+CACHE_RELAWAN: Dict[str, Any] = {"data": None, "names": None, "timestamp": 0}
+_CACHE_LOCK = threading.Lock()
+_INDEX_READY = {"done": False}
+
+
+def invalidate_relawan_directory() -> None:
+    CACHE_RELAWAN["data"] = None
+    CACHE_RELAWAN["names"] = None
+    CACHE_RELAWAN["timestamp"] = 0
+
+
+def _ensure_index() -> None:
+    # Sekali per proses; gagal (mis. user DB tanpa hak CREATE) tidak fatal
+    if _INDEX_READY["done"] or pg_ensure_relawan_indexes is None:
+        return
+    _INDEX_READY["done"] = True
+    try:
+        pg_ensure_relawan_indexes()
+    except Exception as e:
+        print(f"[RELAWAN] gagal membuat index nama_relawan: {e}")
+
+
+def get_relawan_dropdown(force: bool = False) -> List[Dict[str, Any]]:
+    """Daftar relawan untuk dropdown login (A-Z, tanpa kode akses)."""
+    if pg_get_relawan_list is None:
+        return []
+
+    data = CACHE_RELAWAN["data"]
+    if not force and data is not None and time.time() - CACHE_RELAWAN["timestamp"] < RELAWAN_DIR_TTL_SECONDS:
+        return data
+
+    with _CACHE_LOCK:
+        data = CACHE_RELAWAN["data"]
+        if not force and data is not None and time.time() - CACHE_RELAWAN["timestamp"] < RELAWAN_DIR_TTL_SECONDS:
+            return data
+
+        rows = pg_get_relawan_list() or []
+        data = [
+            {"id_relawan": r.get("id_relawan"), "nama_relawan": (r.get("nama_relawan") or "").strip()}
+            for r in rows
+            if (r.get("nama_relawan") or "").strip()
+        ]
+        data.sort(key=lambda x: x["nama_relawan"].lower())
+
+        CACHE_RELAWAN["data"] = data
+        CACHE_RELAWAN["names"] = {x["nama_relawan"].lower() for x in data}
+        CACHE_RELAWAN["timestamp"] = time.time()
+        return data
+
+
+def find_relawan_for_login(nama: str) -> Optional[Dict[str, Any]]:
+    """Lookup 1 relawan (termasuk kode_akses) untuk autentikasi."""
+    if pg_get_relawan_by_nama is None:
+        return None
+    _ensure_index()
+    row = pg_get_relawan_by_nama(nama)
+
+    # Relawan baru (belum ada di cache dropdown) -> refresh dropdown berikutnya
+    names = CACHE_RELAWAN["names"]
+    if row and names is not None and (row.get("nama_relawan") or "").strip().lower() not in names:
+        invalidate_relawan_directory()
+    return row
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_relawan_routes(app):
+
+    @app.route("/api/admin/relawan/refresh", methods=["POST"])
+    def api_admin_relawan_refresh():
+        """Muat ulang cache dropdown relawan (setelah data_relawan diubah di DB)."""
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+
+        invalidate_relawan_directory()
+        try:
+            data = get_relawan_dropdown(force=True)
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+        return jsonify({"success": True, "jumlah": len(data)})
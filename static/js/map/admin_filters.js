@@ -0,0 +1,30 @@
+// Panel admin: default tanggal filter
+document.addEventListener("DOMContentLoaded", function () {
+  const startInput = document.getElementById("filterAsesmenAdminStart");
+  const endInput = document.getElementById("filterAsesmenAdminEnd");
+  const pStartInput = document.getElementById("filterPermintaanAdminStart");
+  const pEndInput = document.getElementById("filterPermintaanAdminEnd");
+  const lStartInput = document.getElementById("filterAdminLokasiStart");
+  const lEndInput = document.getElementById("filterAdminLokasiEnd");
+
+  const today = new Date();
+  const thirtyDaysAgo = new Date();
+  thirtyDaysAgo.setDate(today.getDate() - 30);
+
+  const formatDate = (date) => {
+    const yyyy = date.getFullYear();
+    const mm = String(date.getMonth() + 1).padStart(2, "0");
+    const dd = String(date.getDate()).padStart(2, "0");
+    return `${yyyy}-${mm}-${dd}`;
+  };
+
+  const thirtyStr = formatDate(thirtyDaysAgo);
+  const todayStr = formatDate(today);
+
+  if (startInput) startInput.value = startInput.value || thirtyStr;
+  if (endInput)   endInput.value   = endInput.value || todayStr;
+  if (pStartInput) pStartInput.value = pStartInput.value || thirtyStr;
+  if (pEndInput)   pEndInput.value   = pEndInput.value || todayStr;
+  if (lStartInput) lStartInput.value = lStartInput.value || thirtyStr;
+  if (lEndInput)   lEndInput.value   = lEndInput.value || todayStr;
+});
@@ -0,0 +1,10 @@
+// Auto-hide flash alert
+document.addEventListener("DOMContentLoaded", function () {
+  const alerts = document.querySelectorAll(".alert");
+  alerts.forEach(function (alert) {
+    setTimeout(function () {
+      let bsAlert = new bootstrap.Alert(alert);
+      bsAlert.close();
+    }, 3000);
+  });
+});
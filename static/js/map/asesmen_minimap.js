@@ -0,0 +1,574 @@
+// Mini map asesmen + GPS terbaik (sama dengan absensi)
+      // MINI MAP ASESMEN: konsep sama seperti absensi (GPS -> marker, bisa geser / klik peta)
+      // Catatan: absensi sudah punya modul sendiri. Di sini khusus untuk asesmen (kesehatan & pendidikan).
+
+      (function () {
+        const DEFAULT_CENTER = [3.5952, 98.6722]; // Medan
+
+        const cfg = {
+            lokasi: {
+        modalId: "inputLokasiModal",
+        mapId: "inputLokasiMiniMap",
+        latId: "lokasi_lat",
+        lonId: "lokasi_lon",
+        textId: "lokasi-location-text",
+        btnId: "btn-submit-lokasi",
+        statusId: "lokasi-location-status",
+        autoOnOpen: true,
+      },
+          kesehatan: {
+            modalId: "asesmenKesehatanModal",
+            mapId: "kesehatanMiniMap",
+            latId: "kesehatan_lat",
+            lonId: "kesehatan_lon",
+            textId: "kesehatan-location-text",
+            btnId: "btn-submit-kesehatan",
+            statusId: "kesehatan-location-status",
+          },
+          pendidikan: {
+            modalId: "asesmenPendidikanModal",
+            mapId: "pendidikanMiniMap",
+            latId: "pendidikan_lat",
+            lonId: "pendidikan_lon",
+            textId: "pendidikan-location-text",
+            btnId: "btn-submit-pendidikan",
+            statusId: "pendidikan-location-status",
+          },
+          psikososial: {
+            modalId: "asesmenPsikososialModal",
+            mapId: "psikososialMiniMap",
+            latId: "psikososial_lat",
+            lonId: "psikososial_lon",
+            textId: "psikososial-location-text",
+            btnId: "btn-submit-psikososial",
+            statusId: "psikososial-location-status",
+          },
+          infrastruktur: {
+            modalId: "asesmenInfrastrukturModal",
+            mapId: "infrastrukturMiniMap",
+            latId: "infrastruktur_lat",
+            lonId: "infrastruktur_lon",
+            textId: "infrastruktur-location-text",
+            btnId: "btn-submit-infrastruktur",
+            statusId: "infrastruktur-location-status",
+          },
+          wash: {
+            modalId: "asesmenWashModal",
+            mapId: "washMiniMap",
+            latId: "wash_lat",
+            lonId: "wash_lon",
+            textId: "wash-location-text",
+            btnId: "btn-submit-wash",
+            statusId: "wash-location-status",
+          },
+          kondisi: {
+            modalId: "asesmenKondisiModal",
+            mapId: "kondisiMiniMap",
+            latId: "kondisi_lat",
+            lonId: "kondisi_lon",
+            textId: "kondisi-location-text",
+            btnId: "btn-submit-kondisi",
+            statusId: "kondisi-location-status",
+          },
+          kondisi_banjir: {
+            modalId: "asesmenKondisiModal",
+            mapId: "kondisiBanjirMiniMap",
+            latId: "kondisiBanjir_lat",
+            lonId: "kondisiBanjir_lon",
+            textId: "kondisi-location-text",
+            btnId: "btn-submit-kondisi",
+            statusId: "kondisi-location-status",
+            listId: "kondisi-points-list",
+            mode: "multiple",
+          },
+          permintaan: {
+            modalId: "permintaanModal",
+            mapId: "permintaanMiniMap",
+            latId: "permintaan_lat",
+            lonId: "permintaan_lon",
+            textId: "permintaan-location-text",
+            btnId: "btn-submit-permintaan",
+            statusId: "permintaan-location-status",
+          },
+        };
+
+        const state = {
+          kesehatan: {
+            map: null,
+            marker: null,
+            watchId: null,
+            timeoutId: null,
+          },
+          pendidikan: {
+            map: null,
+            marker: null,
+            watchId: null,
+            timeoutId: null,
+          },
+          psikososial: {
+            map: null,
+            marker: null,
+            watchId: null,
+            timeoutId: null,
+          },
+          infrastruktur: {
+            map: null,
+            marker: null,
+            watchId: null,
+            timeoutId: null,
+          },
+          wash: { map: null, marker: null, watchId: null, timeoutId: null },
+          kondisi: { map: null, marker: null, watchId: null, timeoutId: null },
+          kondisi_banjir: {
+            map: null,
+            markers: {}, // multiple
+            points: {},
+            watchId: null,
+            timeoutId: null,
+          },
+          permintaan: {
+            map: null,
+            marker: null,
+            watchId: null,
+            timeoutId: null,
+          },
+            lokasi: { map: null, marker: null, watchId: null, timeoutId: null },
+
+        };
+
+        function _el(id) {
+          return document.getElementById(id);
+        }
+
+        function _stopWatch(kind) {
+          try {
+            const st = state[kind];
+            if (st && st.watchId) {
+              navigator.geolocation.clearWatch(st.watchId);
+              st.watchId = null;
+            }
+            if (st && st.timeoutId) {
+              clearTimeout(st.timeoutId);
+              st.timeoutId = null;
+            }
+          } catch (e) {}
+        }
+
+window.getLocationForLokasi = function () {
+  const kind = 'lokasi';
+  if (!cfg[kind]) return;
+  _initMap(kind);
+  _getBestLocation(kind);
+};
+
+        function _initMap(kind) {
+          const c = cfg[kind];
+          const st = state[kind];
+          if (!c || !st) return;
+
+          if (st.map) return;
+
+          const mapEl = _el(c.mapId);
+          if (!mapEl) return;
+
+          st.map = L.map(c.mapId).setView(DEFAULT_CENTER, 14);
+          L.tileLayer("https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png", {
+            attribution: "&copy; OpenStreetMap contributors",
+          }).addTo(st.map);
+
+          // ================= MULTIPLE =================
+          // ===== MULTIPLE =====
+          if (c.mode === "multiple") {
+            st.markers = {};
+            st.points = {};
+
+            st.map.on("click", (e) => {
+              const key = nextKey(st.points);
+
+              const marker = L.marker(e.latlng, { draggable: true }).addTo(
+                st.map
+              );
+
+              st.markers[key] = marker;
+              st.points[key] = [e.latlng.lat, e.latlng.lng];
+
+              renderPointList(kind);
+
+              marker.on("dragend", (ev) => {
+                const pos = ev.target.getLatLng();
+                st.points[key] = [pos.lat, pos.lng];
+                renderPointList(kind);
+              });
+            });
+            return;
+          }
+          // marker default (draggable)
+          //Single
+          st.marker = L.marker(DEFAULT_CENTER, { draggable: true }).addTo(
+            st.map
+          );
+
+          st.marker.on("dragend", function (e) {
+            const pos = e.target.getLatLng();
+            _setPoint(kind, pos.lat, pos.lng, { manual: true });
+          });
+
+          st.map.on("click", function (e) {
+            _setPoint(kind, e.latlng.lat, e.latlng.lng, { manual: true });
+          });
+        }
+
+        function _setText(kind, msg, isError = false) {
+          const c = cfg[kind];
+          const txt = _el(c.textId);
+          if (txt) txt.textContent = msg;
+          const st = _el(c.statusId);
+          if (st) {
+            st.textContent = isError ? "Gagal" : "OK";
+            st.className = "badge " + (isError ? "bg-danger" : "bg-success");
+          }
+        }
+
+        function _setPoint(kind, lat, lon, opts = {}) {
+          const c = cfg[kind];
+          const st = state[kind];
+
+          if (!c || !st) return;
+
+          const latNum = parseFloat(lat);
+          const lonNum = parseFloat(lon);
+
+          if (isNaN(latNum) || isNaN(lonNum)) {
+            _setText(kind, "Koordinat tidak valid.", true);
+            return;
+          }
+
+          // Update hidden inputs
+          const latEl = _el(c.latId);
+          const lonEl = _el(c.lonId);
+          if (latEl) latEl.value = latNum.toFixed(6);
+          if (lonEl) lonEl.value = lonNum.toFixed(6);
+
+          // Update marker
+          if (st.marker) st.marker.setLatLng([latNum, lonNum]);
+          if (st.map) st.map.panTo([latNum, lonNum]);
+
+          // Deteksi wilayah (pakai fungsi yang sudah ada di file ini)
+          let wilayah = "";
+          try {
+            wilayah = cekWilayah ? cekWilayah(latNum, lonNum) : "";
+          } catch (e) {
+            wilayah = "";
+          }
+
+          const base = wilayah ? `📍 ${wilayah}` : "📍 Lokasi dipilih";
+          const extra = opts.accuracy
+            ? ` (akurasi ±${Math.round(opts.accuracy)}m)`
+            : "";
+          _setText(kind, base + extra, false);
+
+          // Enable submit
+          const btn = _el(c.btnId);
+          if (btn) btn.disabled = false;
+
+          // Notif jika manual
+          if (opts.manual) {
+            try {
+              showNotification("Lokasi diperbarui manual di peta.", "info");
+            } catch (e) {}
+          }
+        }
+
+        function _getBestLocation(kind, opts = {}) {
+          // Teknik: ambil beberapa sample + watchPosition, pilih yang akurasi paling kecil.
+          const st = state[kind];
+          const maxSamples = opts.maxSamples || 6;
+          const maxWaitMs = opts.maxWaitMs || 12000;
+
+          if (!navigator.geolocation) {
+            _setText(kind, "Browser tidak mendukung GPS.", true);
+            return;
+          }
+
+          _stopWatch(kind);
+
+          _setText(kind, "Mencari lokasi GPS terbaik...", false);
+
+          let best = null;
+          let samples = 0;
+
+          function consider(pos) {
+            if (!pos || !pos.coords) return;
+            const acc = pos.coords.accuracy || 999999;
+            if (!best || acc < best.accuracy) {
+              best = {
+                lat: pos.coords.latitude,
+                lon: pos.coords.longitude,
+                accuracy: acc,
+              };
+              _setPoint(kind, best.lat, best.lon, { accuracy: best.accuracy });
+            }
+            samples += 1;
+            if (samples >= maxSamples) finish();
+          }
+
+          function finish() {
+            _stopWatch(kind);
+            if (!best) {
+              _setText(
+                kind,
+                "Gagal mendapatkan lokasi. Silakan pilih manual di peta.",
+                true
+              );
+              return;
+            }
+            _setText(
+              kind,
+              `📍 Lokasi ditemukan (akurasi ±${Math.round(best.accuracy)}m)`,
+              false
+            );
+          }
+
+          function onError(err) {
+            // Jika ditolak / error, tetap biarkan user pilih manual
+            _stopWatch(kind);
+            const msg = err && err.message ? err.message : "Error GPS";
+            _setText(kind, `Gagal GPS (${msg}). Pilih manual di peta.`, true);
+          }
+
+          // 1) High accuracy
+          navigator.geolocation.getCurrentPosition(consider, onError, {
+            enableHighAccuracy: true,
+            timeout: 8000,
+            maximumAge: 0,
+          });
+
+          // 2) Low accuracy fallback (kadang lebih cepat)
+          navigator.geolocation.getCurrentPosition(consider, function () {}, {
+            enableHighAccuracy: false,
+            timeout: 6000,
+            maximumAge: 0,
+          });
+
+          // 3) Watch for improvements
+          try {
+            st.watchId = navigator.geolocation.watchPosition(
+              consider,
+              function () {},
+              { enableHighAccuracy: true, maximumAge: 0, timeout: 8000 }
+            );
+          } catch (e) {}
+
+          // Stop after maxWait
+          st.timeoutId = setTimeout(finish, maxWaitMs);
+        }
+
+        //============= Start Multiple Points ====================//
+        function renderPointList(kind) {
+          const c = cfg[kind];
+          const st = state[kind];
+          const box = document.getElementById(c.listId);
+          if (!box) return;
+
+          box.innerHTML = "";
+
+          Object.entries(st.points).forEach(([key, val]) => {
+            const [lat, lng] = val;
+
+            const row = document.createElement("div");
+            row.className =
+              "d-flex align-items-center gap-2 p-2 border rounded bg-light";
+
+            row.innerHTML = `
+      <span class="badge bg-primary">${key}</span>
+      <input class="form-control form-control-sm" value="${lat.toFixed(
+        6
+      )}" readonly>
+      <input class="form-control form-control-sm" value="${lng.toFixed(
+        6
+      )}" readonly>
+      <button class="btn btn-danger btn-sm">
+        <i class="fas fa-trash"></i>
+      </button>
+    `;
+
+            row.querySelector("button").onclick = () => removePoint(kind, key);
+
+            box.appendChild(row);
+          });
+        }
+
+        function nextKey(points) {
+          return "b" + (Object.keys(points).length + 1);
+        }
+
+        function removePoint(kind, key) {
+          const st = state[kind];
+
+          if (st.markers[key]) {
+            st.map.removeLayer(st.markers[key]);
+            delete st.markers[key];
+          }
+
+          delete st.points[key];
+          renderPointList(kind);
+        }
+
+        //============= END Multiple Points ====================//
+
+        function syncBanjirPointsToForm(form) {
+          // hapus input lama
+          form.querySelectorAll(".banjir-point").forEach((e) => e.remove());
+
+          // buat input baru untuk setiap titik
+          Object.values(state.kondisi_banjir.points || {}).forEach((pt) => {
+            const lat = document.createElement("input");
+            lat.type = "hidden";
+            lat.name = "banjir_lat[]";
+            lat.value = pt[0];
+            lat.className = "banjir-point";
+
+            const lon = document.createElement("input");
+            lon.type = "hidden";
+            lon.name = "banjir_lon[]";
+            lon.value = pt[1];
+            lon.className = "banjir-point";
+
+            form.appendChild(lat);
+            form.appendChild(lon);
+          });
+        }
+        const formKondisi = document.querySelector("#asesmenKondisiModal form");
+
+        formKondisi.addEventListener("submit", function (e) {
+          e.preventDefault();
+          syncBanjirPointsToForm(formKondisi);
+          formKondisi.submit();
+        });
+
+        // Public handler (dipakai tombol "Ambil Lokasi GPS")
+        window.getLocationForAsesmen = function (jenis) {
+          const kind = String(jenis || "").toLowerCase();
+          if (!cfg[kind]) return;
+
+          _initMap(kind);
+          _getBestLocation(kind);
+        };
+
+        // Public handler (dipakai tombol permintaan)
+        window.getLocationForPermintaan = function () {
+          const kind = "permintaan";
+          if (!cfg[kind]) return;
+          _initMap(kind);
+          _getBestLocation(kind);
+        };
+
+        // Auto-run saat modal dibuka
+        Object.keys(cfg).forEach(function (kind) {
+          const c = cfg[kind];
+
+          const modal = _el(c.modalId);
+          if (!modal) return;
+
+          modal.addEventListener("show.bs.modal", function () {
+            // Reset state
+            _setText(kind, "Menunggu lokasi...", false);
+            const btn = _el(c.btnId);
+            if (btn) btn.disabled = true;
+
+            // Init map dan ambil GPS
+            _initMap(kind);
+            _getBestLocation(kind);
+          });
+
+          modal.addEventListener("shown.bs.modal", function () {
+            // Fix ukuran map dalam modal
+            setTimeout(function () {
+              if (state[kind].map) state[kind].map.invalidateSize();
+            }, 200);
+          });
+
+          modal.addEventListener("hidden.bs.modal", function () {
+            _stopWatch(kind);
+          });
+        });
+      })();
+
+        document.getElementById('filterTanggal').addEventListener('change', function() {
+        const selectedDate = this.value; // Format: YYYY-MM-DD
+        const slides = document.querySelectorAll('.filter-item');
+        let visibleCount = 0;
+
+        slides.forEach(slide => {
+            // Ambil data tanggal dari atribut HTML
+            // Asumsi format di Excel/DB bisa jadi DD/MM/YYYY atau YYYY-MM-DD
+            // Kita ambil raw stringnya
+            let slideDateRaw = slide.getAttribute('data-tanggal'); 
+
+            // Konversi sederhana jika format beda (opsional, sesuaikan dengan data sheetmu)
+            // Kalau di sheetmu sudah YYYY-MM-DD, logic ini lebih simpel:
+
+            if (slideDateRaw === selectedDate) {
+                slide.style.display = 'block'; // Tampilkan
+                visibleCount++;
+            } else {
+                slide.style.display = 'none'; // Sembunyikan
+            }
+        });
+
+        // Tampilkan pesan jika kosong
+        const noDataMsg = document.getElementById('noDataMessage');
+        if (visibleCount === 0) {
+            noDataMsg.style.display = 'block';
+        } else {
+            noDataMsg.style.display = 'none';
+        }
+    });
+
+    function resetFilter() {
+        document.getElementById('filterTanggal').value = '';
+        const slides = document.querySelectorAll('.filter-item');
+        slides.forEach(slide => {
+            slide.style.display = 'block';
+        });
+        document.getElementById('noDataMessage').style.display = 'none';
+    }
+
+    document.addEventListener("DOMContentLoaded", function() {
+
+        const filterInput = document.getElementById('filterTanggal');
+        const slides = document.querySelectorAll('.filter-item');
+        const noDataMsg = document.getElementById('noDataMessage');
+
+        // Event saat tanggal diganti
+        filterInput.addEventListener('change', function() {
+            const selectedDate = this.value; // Hasilnya format: '2025-12-28'
+            let visibleCount = 0;
+
+            slides.forEach(slide => {
+                // Ambil data tanggal dari HTML (yang sudah kita set jadi ISO juga)
+                const itemDate = slide.getAttribute('data-tanggal');
+                if (itemDate === selectedDate) {
+                    slide.style.display = 'block'; // Muncul
+                    visibleCount++;
+                } else {
+                    slide.style.display = 'none'; // Sembunyi
+                }
+            });
+
+            // Tampilkan pesan jika tidak ada yang cocok
+            if (visibleCount === 0) {
+                noDataMsg.style.display = 'block';
+            } else {
+                noDataMsg.style.display = 'none';
+            }
+        });
+
+        // Fungsi Reset (Opsional, pasang di tombol Reset)
+        window.resetFilter = function() {
+            filterInput.value = ''; // Kosongkan input
+            slides.forEach(slide => slide.style.display = 'block'); // Tampilkan semua
+            noDataMsg.style.display = 'none';
+        };
+
+    });  
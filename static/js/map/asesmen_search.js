@@ -0,0 +1,70 @@
+// Dropdown asesmen searchable (debounce)
+document.addEventListener("DOMContentLoaded", function () {
+  const searchInput = document.getElementById("asesmenSearchInput");
+  const dropdownBtn = document.getElementById("asesmenDropdownBtn");
+  const dropdownMenu = document.getElementById("asesmenDropdownMenu");
+  const items = dropdownMenu.querySelectorAll(".asesmen-item");
+
+  let searchTimeout;
+
+  if (searchInput && dropdownBtn && dropdownMenu) {
+    const bsDropdown = bootstrap.Dropdown.getOrCreateInstance(dropdownBtn);
+
+    const performSearch = () => {
+      const filter = searchInput.value.toLowerCase();
+      let hasVisible = false;
+
+      items.forEach((item) => {
+        const text = item.textContent.toLowerCase();
+        if (text.includes(filter)) {
+          item.parentElement.style.display = "";
+          hasVisible = true;
+        } else {
+          item.parentElement.style.display = "none";
+        }
+      });
+
+      // Tampilkan dropdown jika ada hasil
+      if (filter.length > 0) {
+        if (hasVisible) {
+          if (!dropdownMenu.classList.contains('show')) {
+            bsDropdown.show();
+          }
+        } else {
+          bsDropdown.hide();
+        }
+      } else {
+        // Jika kosong, kembalikan semua tampilan
+        items.forEach(item => item.parentElement.style.display = "");
+      }
+    };
+
+    searchInput.addEventListener("input", function () {
+      // Bersihkan timeout sebelumnya (Debounce)
+      clearTimeout(searchTimeout);
+
+      // Tunggu 500ms sebelum melakukan pencarian agar user bisa mengetik
+      searchTimeout = setTimeout(performSearch, 500);
+    });
+
+    // Fokus input saat dropdown dibuka
+    dropdownBtn.addEventListener("click", function () {
+      setTimeout(() => searchInput.focus(), 150);
+    });
+
+    // Klik pada input juga memicu dropdown muncul jika belum tampil
+    searchInput.addEventListener("click", function (e) {
+      e.stopPropagation(); 
+      if (!dropdownMenu.classList.contains('show')) {
+        bsDropdown.show();
+      }
+    });
+
+    // Pastikan dropdown tidak tertutup saat mengetik spasi atau tombol lainnya
+    searchInput.addEventListener("keydown", function(e) {
+      if (e.key === " ") {
+        e.stopPropagation();
+      }
+    });
+  }
+});
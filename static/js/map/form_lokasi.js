@@ -0,0 +1,55 @@
+// Form lokasi: dropdown berjenjang kab/kota -> kecamatan -> desa
+document.addEventListener("DOMContentLoaded", function () {
+  // ===== Form Lokasi: dropdown berjenjang kab/kota -> kecamatan -> desa =====
+  const kabSel = document.getElementById("lokKabkota");
+  const kecInput = document.getElementById("lokKecamatan");
+  const desaInput = document.getElementById("lokDesa");
+  const kecList = document.getElementById("kecamatanDatalist");
+  const desaList = document.getElementById("desaDatalist");
+  if (!kabSel || !kecInput || !desaInput) return;
+
+  const fillList = (dl, items) => {
+    dl.innerHTML = "";
+    items.forEach((it) => {
+      const o = document.createElement("option");
+      o.value = it.nama;
+      dl.appendChild(o);
+    });
+  };
+
+  let timer = null;
+  const load = (dl, params) => {
+    clearTimeout(timer);
+    timer = setTimeout(() => {
+      const qs = new URLSearchParams(params);
+      fetch("/api/wilayah/search?" + qs.toString())
+        .then((r) => r.json())
+        .then((res) => fillList(dl, (res && res.success && res.data) || []))
+        .catch(() => {});
+    }, 200);
+  };
+
+  const loadKec = () => {
+    if (!kabSel.value) return fillList(kecList, []);
+    load(kecList, { kab: kabSel.value, level: "kecamatan", q: kecInput.value || "", limit: 200 });
+  };
+  const loadDesa = () => {
+    if (!kabSel.value) return fillList(desaList, []);
+    const p = { kab: kabSel.value, level: "desa", q: desaInput.value || "", limit: 200 };
+    if (kecInput.value) p.kec = kecInput.value;
+    load(desaList, p);
+  };
+
+  kabSel.addEventListener("change", () => {
+    kecInput.value = "";
+    desaInput.value = "";
+    loadKec();
+  });
+  kecInput.addEventListener("input", loadKec);
+  kecInput.addEventListener("change", () => {
+    desaInput.value = "";
+    loadDesa();
+  });
+  desaInput.addEventListener("input", loadDesa);
+  desaInput.addEventListener("focus", loadDesa);
+});
@@ -0,0 +1,44 @@
+// Overlay loading global saat form POST
+// Global loading overlay helpers
+function showGlobalLoading(msg) {
+  const ov = document.getElementById("globalLoadingOverlay");
+  if (!ov) return;
+  const textEl = ov.querySelector(".loading-text");
+  if (msg) textEl.textContent = msg;
+  ov.style.display = "flex";
+}
+function hideGlobalLoading() {
+  const ov = document.getElementById("globalLoadingOverlay");
+  if (!ov) return;
+  ov.style.display = "none";
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+  // Attach submit handler to all POST forms to show loading and prevent double submits
+  document
+    .querySelectorAll('form[method="POST"]')
+    .forEach(function (form) {
+      form.addEventListener("submit", function () {
+        showGlobalLoading("Mengirim data...");
+        form
+          .querySelectorAll('button, input[type="submit"]')
+          .forEach(function (el) {
+            el.disabled = true;
+          });
+      });
+    });
+
+  const confirmLogoutBtn = document.getElementById("confirmLogoutBtn");
+  const logoutForm = document.getElementById("logoutForm");
+  if (confirmLogoutBtn && logoutForm) {
+    confirmLogoutBtn.addEventListener("click", function () {
+      const modalEl = document.getElementById("logoutConfirmModal");
+      const modal =
+        bootstrap.Modal.getInstance(modalEl) ||
+        new bootstrap.Modal(modalEl);
+      modal.hide();
+      showGlobalLoading("Logging out...");
+      logoutForm.submit();
+    });
+  }
+});
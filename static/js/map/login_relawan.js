@@ -0,0 +1,96 @@
+// Login relawan: datalist nama + dropdown
+document.addEventListener("DOMContentLoaded", function () {
+  // ===== Login Relawan: datalist (A-Z) + dropdown click =====
+  const dl = document.getElementById("relawanDatalist");
+  const namaInput = document.getElementById("nama");
+  const menu = document.getElementById("relawanDropdownMenu");
+  const dropdownWrap = document.getElementById("relawanDropdownWrap");
+  const dropdownBtn = document.getElementById("relawanDropdownBtn");
+
+  if (dl) {
+    const opts = Array.from(dl.querySelectorAll("option"))
+      .map((o) => (o.value || "").trim())
+      .filter(Boolean)
+      .sort((a, b) => a.localeCompare(b, "id", { sensitivity: "base" }));
+
+    // Rebuild datalist (sorted)
+    dl.innerHTML = "";
+    opts.forEach((v) => {
+      const o = document.createElement("option");
+      o.value = v;
+      dl.appendChild(o);
+    });
+
+    // Build dropdown menu for click selection (keeps typing support)
+    if (menu && namaInput) {
+      const renderMenu = (q) => {
+        const query = (q || "").toLowerCase();
+        const filtered = opts
+          .filter((v) => v.toLowerCase().includes(query))
+          .slice(0, 200);
+
+        menu.innerHTML = "";
+        if (filtered.length === 0) {
+          const li = document.createElement("li");
+          const span = document.createElement("span");
+          span.className = "dropdown-item-text";
+          span.textContent = "Tidak ada hasil";
+          li.appendChild(span);
+          menu.appendChild(li);
+          return;
+        }
+
+        filtered.forEach((v) => {
+          const li = document.createElement("li");
+          const btn = document.createElement("button");
+          btn.type = "button";
+          btn.className = "dropdown-item";
+          btn.textContent = v;
+          btn.addEventListener("click", () => {
+            namaInput.value = v;
+            namaInput.focus();
+          });
+          li.appendChild(btn);
+          menu.appendChild(li);
+        });
+      };
+
+      renderMenu("");
+
+      namaInput.addEventListener("input", () => {
+        renderMenu(namaInput.value);
+      });
+
+      // Refresh menu content when dropdown opened
+      if (dropdownWrap) {
+        dropdownWrap.addEventListener("show.bs.dropdown", () => {
+          renderMenu(namaInput.value);
+        });
+      }
+
+      if (dropdownBtn) {
+        dropdownBtn.addEventListener("click", () => {
+          // Pastikan input fokus agar user bisa langsung mengetik
+          if (namaInput) namaInput.focus();
+        });
+      }
+    }
+  }
+
+  // ===== Toggle show/hide untuk Kode Akses =====
+  const kodeInput = document.getElementById("kode_akses");
+  const toggleBtn = document.getElementById("toggleKodeAkses");
+
+  if (kodeInput && toggleBtn) {
+    toggleBtn.addEventListener("click", () => {
+      const isPassword = kodeInput.getAttribute("type") === "password";
+      kodeInput.setAttribute("type", isPassword ? "text" : "password");
+
+      const icon = toggleBtn.querySelector("i");
+      if (icon) {
+        icon.classList.toggle("fa-eye", !isPassword);
+        icon.classList.toggle("fa-eye-slash", isPassword);
+      }
+    });
+  }
+});
@@ -0,0 +1,3041 @@
+// Peta utama: layer, marker, popup, refresh, filter (data awal dari bootstrap di map.html)
+              // ================== DATA LAYER (/api/layers/<nama>) ==================
+              // Tiap layer punya ETag sendiri: refresh -> layer yang tidak berubah cukup 304.
+              // Versi layer yang sudah di-cache server ikut di HTML (MAP_LAYER_VERSIONS)
+              // -> ?v=<versi> boleh langsung diambil dari cache browser.
+              const MAP_LAYER_NAMES = [
+                'data_lokasi', 'status_map', 'relawan_lokasi',
+                'asesmen_kesehatan', 'asesmen_pendidikan', 'asesmen_psikososial',
+                'asesmen_infrastruktur', 'asesmen_wash', 'asesmen_kondisi', 'asesmen_oxfam',
+                'permintaan_logistik',
+              ];
+
+              async function fetchMapLayers(useVersions) {
+                  const result = { success: true };
+                  await Promise.all(MAP_LAYER_NAMES.map(async (name) => {
+                      const v = useVersions ? (MAP_LAYER_VERSIONS[name] || '') : '';
+                      const url = '/api/layers/' + encodeURIComponent(name) + (v ? '?v=' + encodeURIComponent(v) : '');
+                      const res = await fetch(url, { cache: v ? 'default' : 'no-cache' });
+                      if (!res.ok) throw new Error(name + ': HTTP ' + res.status);
+                      result[name] = await res.json();
+                  }));
+                  return result;
+              }
+
+              // Mulai ambil data secepatnya (paralel dengan inisialisasi peta & GeoJSON)
+              const MAP_DATA_READY = fetchMapLayers(true);
+              // =====================================================================
+
+              // Inisialisasi Peta
+              // Cek apakah ada parameter URL untuk fokus ke lokasi tertentu
+              const urlParams = new URLSearchParams(window.location.search);
+              const urlLat = urlParams.get('lat');
+              const urlLon = urlParams.get('lon');
+              const urlZoom = urlParams.get('zoom');
+
+              let initialCenter = [2.3693, 99.0763]; // Koordinat tengah Sumatera Utara
+              let initialZoom = 9;
+
+              if (urlLat && urlLon) {
+                const lat = parseFloat(urlLat);
+                const lon = parseFloat(urlLon);
+                if (!isNaN(lat) && !isNaN(lon)) {
+                  initialCenter = [lat, lon];
+                  initialZoom = urlZoom ? parseInt(urlZoom) : 15;
+                }
+              }
+
+              var map = L.map('map').setView(initialCenter, initialZoom);
+
+              // ================== PANE LAYER (URUTAN Z) ==================
+              // Kab/Kota di bawah, buffer asesmen di atas (agar buffer bisa diklik)
+              map.createPane('kabkotaPane');
+              map.getPane('kabkotaPane').style.zIndex = 350;
+
+              map.createPane('kelDesaPane');
+              map.getPane('kelDesaPane').style.zIndex = 360; // sedikit di atas kab/kota
+
+              map.createPane('asesmenPane');
+              map.getPane('asesmenPane').style.zIndex = 450;
+
+              map.createPane('permintaanPane');
+              map.getPane('permintaanPane').style.zIndex = 500;
+              // ============================================================
+
+
+              // Layer group untuk marker lokasi (agar bisa dihapus saat refresh)
+              let markerLayerGroup = L.layerGroup().addTo(map);
+              let relawanLayerGroup = L.layerGroup().addTo(map);
+              let permintaanLayerGroup = L.layerGroup().addTo(map);
+              // ================== LAYER ASESMEN (BUFFER 2KM) ==================
+      let asesmenKesehatanLayer = L.layerGroup().addTo(map);
+      let asesmenPendidikanLayer = L.layerGroup().addTo(map);
+      let asesmenPsikososialLayer = L.layerGroup().addTo(map);
+      let asesmenInfrastrukturLayer = L.layerGroup().addTo(map);
+      let asesmenWashLayer = L.layerGroup().addTo(map);
+      let asesmenKondisiLayer = L.layerGroup().addTo(map);
+      let asesmenOxfamLayer = L.layerGroup().addTo(map);
+
+
+
+      function escapeHtml(s){
+        return String(s ?? "").replace(/[&<>"']/g, m => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[m]));
+      }
+
+      function _parseTsToEpochUtc(ts){
+        if (!ts) return null;
+        const s = String(ts).trim();
+
+        // Ambil bagian tanggal + jam saja, abaikan offset (+0700 / Z / +07:00)
+        // Contoh: "2025-12-19 01:57:33.518 +0700" -> parse "2025-12-19 01:57:33.518" sebagai UTC
+        const m = s.match(/^(\d{4})-(\d{2})-(\d{2})[ T](\d{2}):(\d{2}):(\d{2})(?:\.(\d{1,6}))?/);
+        if (m) {
+          const Y  = parseInt(m[1], 10);
+          const Mo = parseInt(m[2], 10) - 1;
+          const Da = parseInt(m[3], 10);
+          const H  = parseInt(m[4], 10);
+          const Mi = parseInt(m[5], 10);
+          const Se = parseInt(m[6], 10);
+
+          // ms (ambil 3 digit pertama, pad dengan nol jika perlu)
+          const frac = String(m[7] || "0");
+          const ms = parseInt((frac + "000").slice(0, 3), 10);
+
+          // epoch UTC (offset diabaikan)
+          return Date.UTC(Y, Mo, Da, H, Mi, Se, ms);
+        }
+
+        // Fallback (kalau format tidak match), coba Date()
+        const d = new Date(s);
+        if (isNaN(d.getTime())) return null;
+        return d.getTime();
+      }
+
+      function _formatEpochUtcToWIB(epochUtc){
+        // Konversi sederhana: UTC + 7 jam (WIB)
+        const wibEpoch = epochUtc + (7 * 60 * 60 * 1000);
+        const d = new Date(wibEpoch);
+
+        const pad = (n) => String(n).padStart(2, "0");
+        return `${d.getUTCFullYear()}-${pad(d.getUTCMonth() + 1)}-${pad(d.getUTCDate())} ${pad(d.getUTCHours())}:${pad(d.getUTCMinutes())}:${pad(d.getUTCSeconds())} WIB`;
+      }
+
+      function formatWIB(ts){
+        if (!ts) return "-";
+        const epochUtc = _parseTsToEpochUtc(ts);
+        if (epochUtc === null) return escapeHtml(ts);
+        return _formatEpochUtcToWIB(epochUtc);
+      }
+
+      function statusColor(status){
+        const s = String(status || "").toLowerCase();
+        if (s.includes("kritis")) return "#ef4444";
+        if (s.includes("waspada")) return "#f59e0b";
+        if (s.includes("aman")) return "#22c55e";
+        return "#3b82f6";
+      }
+
+      function jawabanHtml(j, kind){
+        if (!j) return "<div class='text-muted'>-</div>";
+
+        let obj = j;
+        if (typeof obj === "string") {
+          try { obj = JSON.parse(obj); } catch(e) { return `<pre class="mb-0">${escapeHtml(obj)}</pre>`; }
+        }
+
+        const keys = Object.keys(obj || {});
+        keys.sort((a,b)=>{
+          const na = parseInt(String(a).replace(/\D/g,"") || "0",10);
+          const nb = parseInt(String(b).replace(/\D/g,"") || "0",10);
+          return na - nb;
+        });
+
+        const qList = (ASESMEN_QUESTIONS && ASESMEN_QUESTIONS[kind]) ? ASESMEN_QUESTIONS[kind] : [];
+        const label = {1:"Sangat Baik",2:"Baik",3:"Cukup",4:"Kurang",5:"Sangat Kurang"};
+
+        let html = "<ul class='mb-0 ps-3'>";
+        keys.forEach(k=>{
+          const v = obj[k];
+          const vv = Number(v);
+          const info = (isFinite(vv) && label[vv]) ? ` (${label[vv]})` : "";
+
+          const idx = parseInt(String(k).replace(/\D/g,"") || "0",10) - 1;
+          let qText = (idx >= 0 && idx < (qList || []).length) ? String(qList[idx] || "") : "";
+          // buang prefix "1. " agar tidak dobel dengan p1/p2
+          qText = qText.replace(/^\s*\d+\.\s*/, "").trim();
+
+          html += `
+            <li style="margin-bottom:6px;">
+              <div><b>${escapeHtml(k)}</b>${qText ? ` - ${escapeHtml(qText)}` : ""}</div>
+              <div>Jawaban: <b>${escapeHtml(v)}</b>${escapeHtml(info)}</div>
+            </li>
+          `;
+        });
+        html += "</ul>";
+        return html;
+      }
+
+      function renderAsesmenLayer(layer, rows, jenisLabel, kind){
+        layer.clearLayers();
+        (rows || []).forEach(r=>{
+          const lat = parseFloat(r.latitude);
+          const lon = parseFloat(r.longitude);
+          if (!isFinite(lat) || !isFinite(lon)) return;
+
+          // is_active: skip item yang sudah dinonaktifkan (soft delete)
+          if (r.is_active === false) return;
+          if (typeof r.is_active === "string" && r.is_active.toLowerCase() === "false") return;
+
+
+          const col = statusColor(r.status);
+          const catatanTextRaw = (r.catatan && String(r.catatan).trim()) ? String(r.catatan) : '-';
+
+          const catatanHtml = escapeHtml(catatanTextRaw).replace(/\r?\n/g, "<br>");
+
+
+          // Buffer radius (meters) — default 2km, override dari kolom 'radius' (km) jika ada
+          let radiusMeters = 2000;
+          const rk = parseFloat(r.radius);
+          if (isFinite(rk) && rk > 0) radiusMeters = rk * 1000;
+
+          let photoPath = r.photo_path ? JSON.parse(r.photo_path) : [];
+
+          let photoPathHtml = photoPath.length
+            ? `
+              <div class="simple-gallery"
+                  data-images='${JSON.stringify(
+                    photoPath.map(p => _photoVariantUrl(_normalizePhotoUrl("media/" + p), 'display'))
+                  )}'
+                  style="cursor:pointer;">
+                <img src="${_photoVariantUrl(_normalizePhotoUrl('media/' + photoPath[0]), 'thumb')}" loading="lazy"
+                    style="width:78px;height:78px;object-fit:cover;
+                            border-radius:10px;border:1px solid #e5e7eb;">
+              </div>
+            `
+            : `
+              <div style="width:78px;height:78px;border-radius:10px;
+                          border:1px solid #e5e7eb;display:flex;
+                          align-items:center;justify-content:center;
+                          background:#f8fafc;">
+                <i class="fas fa-image" style="opacity:.45;"></i>
+              </div>
+            `;
+
+          const popup = `
+            <div style="min-width:260px;">
+              <div style="display:flex;gap:10px;align-items:flex-start;">
+                <div>
+                  ${photoPathHtml}
+                </div>
+                <div style="margin-bottom:5px;">
+                     <div style="font-weight:700;line-height:1.1;">
+                      <span class="text-primary">${escapeHtml(jenisLabel)}</span>
+                    </div>
+
+                    <div style="margin-top:6px;">
+                      <small class="text-muted">ID Relawan:</small>
+                      <small><b>${escapeHtml(r.id_relawan)}</b></small>
+                    </div>
+
+                    <div style="margin-top:2px;">
+                      <small class="text-muted">Nama Relawan:</small>
+                      <small><b>${escapeHtml(r.nama_relawan)}</b></small>
+                    </div>
+
+                    <div style="margin-top:2px;">
+                      <small class="text-muted">Skor:</small>
+                      <small><b>${escapeHtml(r.skor)}</b></small>
+                    </div>
+
+                    <div style="margin-top:2px;">
+                      <small class="text-muted">Status:</small>
+                      <small>
+                        <b style="color:${col};font-weight:700;">
+                          ${escapeHtml(r.status)}
+                        </b>
+                      </small>
+                    </div>
+
+                    <div style="margin-top:6px;">
+                      <small class="text-muted">Waktu:</small>
+                      <small><b>${formatWIB(r.waktu)}</b></small>
+                    </div>
+
+                    <div style="margin-top:6px;">
+                      <small class="text-muted">Catatan:</small><br>
+                      <small>${catatanHtml}</small>
+                    </div>
+
+                </div>
+              </div>
+
+              <hr class="my-2"/>
+              <div class="fw-bold mb-1">Jawaban</div>
+              ${jawabanHtml(r.jawaban, kind)}
+            </div>
+          `;
+
+          const circle = L.circle([lat, lon], {
+            pane: 'asesmenPane',
+            radius: radiusMeters,
+            color: col,
+            weight: 2,
+            fill: true,
+            fillColor: col,
+            fillOpacity: 0.25,
+            bubblingMouseEvents: false
+          }).bindPopup(popup);
+
+          const dot = L.circleMarker([lat, lon], {
+            pane: 'asesmenPane',
+            radius: 5,
+            color: col,
+            weight: 2,
+            fillColor: col,
+            fillOpacity: 0.95,
+            bubblingMouseEvents: false
+          }).bindPopup(popup);
+
+          layer.addLayer(circle);
+          layer.addLayer(dot);
+
+          [circle, dot].forEach(m => {
+            m.on('popupopen', function(e) {
+
+              // Gallery Jika Ada
+              var popupEl = e.popup && e.popup.getElement();
+              if (!popupEl) return;
+
+              popupEl.querySelectorAll('.simple-gallery').forEach(gallery => {
+                initSimpleGallery(gallery);
+              });
+            });
+          });
+        });
+      }
+
+      function jawabanKondisiHtml(j, kind) {
+        if (!j) return "<div class='text-muted'>-</div>";
+
+        let obj = j;
+        if (typeof obj === "string") {
+          try { obj = JSON.parse(obj); } catch(e) {
+            return `<pre class="mb-0">${escapeHtml(obj)}</pre>`;
+          }
+        }
+
+        // Ambil daftar pertanyaan untuk kind tertentu (tetap boleh ada kalau dipakai di tempat lain)
+        const qList = (ASESMEN_QUESTIONS && ASESMEN_QUESTIONS[kind]) ? ASESMEN_QUESTIONS[kind] : [];
+
+        const kondisiAngka = [
+          "Total Alamat Pengungsian",
+          "Total Jumlah Pengungsi (Jiwa)",
+          "Jumlah Warga yang Bertahan di Rumah (Jiwa)",
+          "Jumlah Korban Meninggal Dunia (Jiwa)",
+          "Total Alamat Dapur Umum",
+          "Jumlah Kebutuhan Layanan Air Bersih",
+          "Sekolah Rusak",
+          "Sekolah Layak Digunakan",
+          "Guru Tersedia"
+        ];
+
+        const htmlKeys = ["p1","p3","p4","p5","p6","p7","p8","p9", 'p10', 'p11'];
+        let html = "<ul class='mb-0 ps-3'>";
+
+        htmlKeys.forEach(k => {
+          if (obj[k] === undefined) return;
+
+          let qText = "";
+
+          // p1 khusus
+          if (k === 'p1') {
+            qText = 'Nama Desa/Kecamatan';
+
+          // p3 ke atas → kondisi angka
+          } else if (/^p\d+$/.test(k)) {
+            const num = parseInt(k.replace('p', ''), 10);
+            const idx = num - 3; // p3 = index 0
+
+            if (idx >= 0 && idx < kondisiAngka.length) {
+              qText = kondisiAngka[idx];
+            }
+          }
+
+          const v = obj[k];
+
+          html += `
+            <li style="margin-bottom:6px;">
+              <div><b>${escapeHtml(k)}</b>${qText ? ` - ${escapeHtml(qText)}` : ""}</div>
+              <div>Jawaban: <b>${escapeHtml(v)}</b></div>
+            </li>
+          `;
+        });
+
+        html += "</ul>";
+
+
+        html += "</ul>";
+        return html;
+      }
+
+
+      function renderAsesmenKondisiLayer(layer, rows, jenisLabel, kind) {
+        layer.clearLayers();
+
+        (rows || []).forEach(r => {
+          const lat = parseFloat(r.latitude);
+          const lon = parseFloat(r.longitude);
+          if (!isFinite(lat) || !isFinite(lon)) return;
+
+          // is_active: skip item yang sudah dinonaktifkan (soft delete)
+          if (r.is_active === false) return;
+          if (typeof r.is_active === "string" && r.is_active.toLowerCase() === "false") return;
+
+
+          const col = statusColor(r.status);
+          const catatanTextRaw = (r.catatan && String(r.catatan).trim()) ? String(r.catatan) : '-';
+          const catatanHtml = escapeHtml(catatanTextRaw).replace(/\r?\n/g, "<br>");
+
+          let radiusMeters = 2000;
+          const rk = parseFloat(r.radius);
+          if (isFinite(rk) && rk > 0) radiusMeters = rk * 1000;
+
+          let photoPath = r.photo_path ? JSON.parse(r.photo_path) : [];
+
+          let photoPathHtml = photoPath.length
+            ? `
+              <div class="simple-gallery"
+                  data-images='${JSON.stringify(
+                    photoPath.map(p => _photoVariantUrl(_normalizePhotoUrl("media/" + p), 'display'))
+                  )}'
+                  style="cursor:pointer;">
+                <img src="${_photoVariantUrl(_normalizePhotoUrl('media/' + photoPath[0]), 'thumb')}" loading="lazy"
+                    style="width:78px;height:78px;object-fit:cover;
+                            border-radius:10px;border:1px solid #e5e7eb;">
+              </div>
+            `
+            : `
+              <div style="width:78px;height:78px;border-radius:10px;
+                          border:1px solid #e5e7eb;display:flex;
+                          align-items:center;justify-content:center;
+                          background:#f8fafc;">
+                <i class="fas fa-image" style="opacity:.45;"></i>
+              </div>
+            `;
+
+          // Buat popup unik per relawan
+          const popupId = `popupKondisiMap${r.id_relawan}`;
+
+          // HTML popup
+          const popupContent = `
+            <div style="min-width:260px;">
+              <div style="display:flex;gap:10px;align-items:flex-start;">
+                <div>
+                  ${photoPathHtml}
+                </div>
+                <div style="margin-bottom:5px;">
+                  <div style="font-weight:700;line-height:1.1;">
+                    <span class="text-primary">${escapeHtml(jenisLabel)}</span>
+                  </div>
+
+                  <div style="margin-top:6px;">
+                    <small class="text-muted">ID Relawan:</small>
+                    <small><b>${escapeHtml(r.id_relawan)}</b></small>
+                  </div>
+
+                  <div style="margin-top:2px;">
+                    <small class="text-muted">Nama Relawan:</small>
+                    <small><b>${escapeHtml(r.nama_relawan)}</b></small>
+                  </div>
+
+                  <div style="margin-top:2px;">
+                    <small class="text-muted">Skor:</small>
+                    <small><b>${escapeHtml(r.skor)}</b></small>
+                  </div>
+
+                  <div style="margin-top:2px;">
+                    <small class="text-muted">Status:</small>
+                    <small>
+                      <b style="color:${col};font-weight:700;">
+                        ${escapeHtml(r.status)}
+                      </b>
+                    </small>
+                  </div>
+
+                  <div style="margin-top:6px;">
+                    <small class="text-muted">Waktu:</small>
+                    <small><b>${formatWIB(r.waktu)}</b></small>
+                  </div>
+
+                  <div style="margin-top:6px;">
+                    <small class="text-muted">Catatan:</small><br>
+                    <small>${catatanHtml}</small>
+                  </div>
+
+                </div>
+              </div>
+              <hr class="my-2"/>
+              <div class="fw-bold mb-1">Jawaban</div>
+              ${jawabanKondisiHtml(r.jawaban, kind)}
+              <hr class="my-2"/>
+              <div><b>Lokasi Titik Banjir</b></div>
+              <div id="${popupId}" style="height:200px; margin-top:5px;"></div>
+            </div>
+          `;
+
+          // Circle & dot
+          const circle = L.circle([lat, lon], {
+            pane: 'asesmenPane',
+            radius: radiusMeters,
+            color: '#555555',
+            weight: 2,
+            fill: true,
+            fillColor: '#555555',
+            fillOpacity: 0.25,
+            bubblingMouseEvents: false
+          }).bindPopup(popupContent);
+
+          const dot = L.circleMarker([lat, lon], {
+            pane: 'asesmenPane',
+            radius: 5,
+            color: '#555555',
+            weight: 2,
+            fillColor: '#555555',
+            fillOpacity: 0.95,
+            bubblingMouseEvents: false
+          }).bindPopup(popupContent);
+
+          // Tambahkan ke layer
+          layer.addLayer(circle);
+          layer.addLayer(dot);
+
+          // Render map di popup saat dibuka
+          [circle, dot].forEach(m => {
+            m.on('popupopen', function(e) {
+              const mapDiv = document.getElementById(popupId);
+              if (!mapDiv) return;
+
+              // Reset map jika sudah ada
+              if (mapDiv._leaflet_map) {
+                mapDiv._leaflet_map.remove();
+              }
+
+              // Gallery Jika Ada
+              var popupEl = e.popup && e.popup.getElement();
+              if (!popupEl) return;
+
+              popupEl.querySelectorAll('.simple-gallery').forEach(gallery => {
+                initSimpleGallery(gallery);
+              });
+
+              const popupMap = L.map(mapDiv).setView([0,0], 5);
+              mapDiv._leaflet_map = popupMap;
+
+              L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+                attribution: '© OpenStreetMap contributors'
+              }).addTo(popupMap);
+
+              // Plot titik p2
+              let j = r.jawaban;
+              if (typeof j === "string") {
+                try { j = JSON.parse(j); } catch(e) { console.error(e); j = {}; }
+              }
+              if (j.p2) {
+                const bounds = [];
+                Object.values(j.p2).forEach(pt => {
+                  if (Array.isArray(pt) && pt.length === 2) {
+                    L.marker(pt).addTo(popupMap);
+                    bounds.push(pt);
+                  }
+                });
+                if (bounds.length) popupMap.fitBounds(bounds, {padding:[10,10]});
+              }
+            });
+          });
+        });
+      }
+
+
+
+
+
+      // ================== ASESMEN OXFAM (RIEA) ==================
+      function renderAsesmenOxfamLayer(layer, rows){
+        layer.clearLayers();
+        (rows || []).forEach(r=>{
+          const lat = parseFloat(r.latitude);
+          const lon = parseFloat(r.longitude);
+          if (!isFinite(lat) || !isFinite(lon)) return;
+
+          // soft delete
+          if (r.is_active === false) return;
+          if (typeof r.is_active === "string" && r.is_active.toLowerCase() === "false") return;
+
+          const col = statusColor(r.status);
+          const detailUrl = `/asesmen_oxfam/view/${encodeURIComponent(r.id)}`;
+
+          // ringkas jawaban: ambil max 8 key pertama (sorted)
+          let j = r.jawaban;
+          if (typeof j === "string") {
+            try { j = JSON.parse(j); } catch(e) { j = null; }
+          }
+          let summaryHtml = "<div class='text-muted'>-</div>";
+          if (j && typeof j === "object") {
+            const keys = Object.keys(j);
+            keys.sort();
+            const take = keys.slice(0, 8);
+            summaryHtml = "<ul class='mb-0 ps-3'>" + take.map(k=>{
+              let v = j[k];
+              if (Array.isArray(v)) v = v.join(", ");
+              if (v && typeof v === "object") v = JSON.stringify(v);
+              return `<li><b>${escapeHtml(k)}</b>: ${escapeHtml(v)}</li>`;
+            }).join("") + (keys.length>take.length ? "<li class='text-muted'>... (lebih lengkap di detail)</li>" : "") + "</ul>";
+          }
+
+          const popupContent = `
+            <div style="min-width:280px;">
+              <div style="font-weight:700;">Asesmen Oxfam (RIEA)</div>
+              <div style="margin-top:4px;"><small class="text-muted">ID:</small> <small><b>${escapeHtml(r.id)}</b></small></div>
+              <div><small class="text-muted">Relawan:</small> <small><b>${escapeHtml(r.nama_relawan || r.id_relawan || '-') }</b></small></div>
+              <div><small class="text-muted">Posko:</small> <small><b>${escapeHtml(r.kode_posko || '-') }</b></small></div>
+              <div><small class="text-muted">Waktu:</small> <small><b>${formatWIB(r.waktu)}</b></small></div>
+              <div><small class="text-muted">Status:</small> <small><b style="color:${col};">${escapeHtml(r.status || '-') }</b></small></div>
+              <hr class="my-2"/>
+              <div class="fw-bold mb-1">Ringkasan Jawaban</div>
+              ${summaryHtml}
+              <hr class="my-2"/>
+              <a class="btn btn-sm btn-primary" href="${detailUrl}" target="_blank" rel="noopener">Lihat Detail</a>
+            </div>
+          `;
+
+          // buffer (2km) + dot
+          const circle = L.circle([lat, lon], {
+            pane: 'asesmenPane',
+            radius: 2000,
+            color: '#2563eb',
+            weight: 2,
+            fill: true,
+            fillColor: '#2563eb',
+            fillOpacity: 0.18,
+            bubblingMouseEvents: false
+          }).bindPopup(popupContent);
+
+          const dot = L.circleMarker([lat, lon], {
+            pane: 'asesmenPane',
+            radius: 5,
+            color: '#2563eb',
+            weight: 2,
+            fillColor: '#2563eb',
+            fillOpacity: 0.95,
+            bubblingMouseEvents: false
+          }).bindPopup(popupContent);
+
+          layer.addLayer(circle);
+          layer.addLayer(dot);
+        });
+      }
+      // ===========================================================
+
+function renderAsesmenBuffers(){
+        renderAsesmenLayer(asesmenKesehatanLayer, asesmenKesehatan, "Asesmen Kesehatan", "kesehatan");
+        renderAsesmenLayer(asesmenPendidikanLayer, asesmenPendidikan, "Asesmen Pendidikan", "pendidikan");
+        renderAsesmenLayer(asesmenPsikososialLayer,asesmenPsikososial, "Asesmen Psikososial", "psikososial");
+        renderAsesmenLayer(asesmenInfrastrukturLayer,asesmenInfrastruktur,"Asesmen Infrastruktur", "infrastruktur");
+        renderAsesmenLayer(asesmenWashLayer, asesmenWash, "Asesmen Wash", "wash");
+        renderAsesmenKondisiLayer(asesmenKondisiLayer, asesmenKondisi, "Asesmen Kondisi", "kondisi");
+        renderAsesmenOxfamLayer(asesmenOxfamLayer, asesmenOxfam);
+      }
+      renderAsesmenBuffers();
+
+      // Toggle checkbox
+      const ckAsesmenAll = document.getElementById("toggleAsesmenAll");
+      const ckKes = document.getElementById("toggleAsesmenKesehatan");
+      const ckPen = document.getElementById("toggleAsesmenPendidikan");
+      const ckInf = document.getElementById("toggleAsesmenInfrastruktur");
+      const ckPsi = document.getElementById("toggleAsesmenPsikososial");
+      const ckWas = document.getElementById("toggleAsesmenWash");
+      const ckKond = document.getElementById("toggleAsesmenKondisi");
+      const ckOxfam = document.getElementById("toggleAsesmenOxfam");
+
+      function setLayerVisible(layer, visible){
+        if (visible) {
+          if (!map.hasLayer(layer)) layer.addTo(map);
+        } else {
+          if (map.hasLayer(layer)) map.removeLayer(layer);
+        }
+      }
+
+      function applyAsesmenVisibility(){
+        const master = ckAsesmenAll ? ckAsesmenAll.checked : true;
+        const showKes = ckKes ? ckKes.checked : true;
+        const showPen = ckPen ? ckPen.checked : true;
+        const showInf = ckInf ? ckInf.checked : true;
+        const showPsi = ckPsi ? ckPsi.checked : true;
+        const showWas = ckWas ? ckWas.checked : true;
+        const showKond = ckKond ? ckKond.checked : true;
+        const showOxfam = ckOxfam ? ckOxfam.checked : true;
+
+        setLayerVisible(asesmenKesehatanLayer, master && showKes);
+        setLayerVisible(asesmenPendidikanLayer, master && showPen);
+        setLayerVisible(asesmenInfrastrukturLayer, master && showInf);
+        setLayerVisible(asesmenPsikososialLayer, master && showPsi);
+        setLayerVisible(asesmenWashLayer, master && showWas);
+        setLayerVisible(asesmenKondisiLayer, master && showKond);
+        setLayerVisible(asesmenOxfamLayer, master && showOxfam);
+      }
+
+      // (visibility asesmen akan di-handle oleh blok sinkronisasi filter di bawah)
+      // ================================================================
+
+
+              // 2. Fungsi Penentu Warna
+              function getColorByStatus(status) {
+                  if (!status) return '#22c55e'; // Default Hijau
+                  let s = status.toLowerCase(); // Ubah ke huruf kecil semua
+
+                  if (s.includes('tanggap') || s.includes('awas') || s.includes('merah')) {
+                      return '#ef4444'; // Merah
+                  } else if (s.includes('siaga') || s.includes('waspada') || s.includes('kuning')) {
+                      return '#eab308'; // Kuning
+                  } else {
+                      return '#22c55e'; // Hijau
+                  }
+              }
+
+              function cleanName(name) {
+                  if (!name) return "";
+
+                  return name.toUpperCase()
+                      // 1. Buang kata-kata atribut wilayah
+                      .replace("KABUPATEN", "")
+                      .replace("KOTA", "")
+                      .replace("KAB.", "")
+                      .replace("KAB ", "")
+
+                      // 2. HAPUS SEMUA KECUALI HURUF A-Z
+                      // (Spasi, titik, koma, strip, angka -> HILANG SEMUA)
+                      .replace(/[^A-Z]/g, "");
+              }
+
+              // ---------------------------------------------------------
+              // UPDATE FUNGSI PENCARI DATA (LEBIH PINTAR)
+              // ---------------------------------------------------------
+              function getFeatureData(feature) {
+                  // 1. Ambil nama dari GeoJSON (Sesuai file .dbf kamu: 'kabkota')
+                  let namaAsli = feature.properties.kabkota ||      // <--- INI YANG PALING MUNGKIN BENAR
+                      feature.properties.KABKOTA ||      // Jaga-jaga kalau huruf besar
+                      feature.properties.NAMOBJ ||
+                      feature.properties.WADMKK ||
+                      "Wilayah";
+
+                  // 2. Bersihkan nama dari Peta (misal: "Kab. Karo" -> "KARO")
+                  let namaGeoClean = cleanName(namaAsli);
+
+                  let status = "Normal";
+
+                  // 3. Loop data dari Excel/Sheet
+                  for (let key in statusData) {
+                      // Bersihkan nama dari Sheet
+                      let keyClean = cleanName(key);
+
+                      // Bandingkan INTINYA SAJA
+                      if (namaGeoClean === keyClean) {
+                          status = statusData[key];
+                          break;
+                      }
+                  }
+
+                  return { nama: namaAsli, status: status };
+              }
+
+              // ================== BOUNDARY TOGGLE (KAB/KOTA <-> KEL/DESA) ==================
+const KELDESA_ZOOM_THRESHOLD = 11;
+
+let kabkotaLayer = null;
+let kelDesaLayer = null;
+
+let _kelDesaLastKey = "";
+let _kelDesaTimer = null;
+let _kelDesaLoading = false;
+
+function _bboxParamFromMap(){
+  const b = map.getBounds();
+  const minx = b.getWest();
+  const miny = b.getSouth();
+  const maxx = b.getEast();
+  const maxy = b.getNorth();
+  return `${minx},${miny},${maxx},${maxy}`;
+}
+
+function _showKabkota(){
+  if (kabkotaLayer && !map.hasLayer(kabkotaLayer)) kabkotaLayer.addTo(map);
+}
+function _hideKabkota(){
+  if (kabkotaLayer && map.hasLayer(kabkotaLayer)) map.removeLayer(kabkotaLayer);
+}
+
+function _hideKelDesa(){
+  if (kelDesaLayer && map.hasLayer(kelDesaLayer)) map.removeLayer(kelDesaLayer);
+  kelDesaLayer = null;
+  _kelDesaLastKey = "";
+}
+
+function _syncBoundaryByZoom(){
+  const z = map.getZoom();
+  if (z >= KELDESA_ZOOM_THRESHOLD) {
+    _hideKabkota();
+    _scheduleLoadKelDesa();
+  } else {
+    _hideKelDesa();
+    _showKabkota();
+  }
+}
+
+function _scheduleLoadKelDesa(){
+  clearTimeout(_kelDesaTimer);
+  _kelDesaTimer = setTimeout(_loadKelDesaForView, 250);
+}
+
+function _loadKelDesaForView(){
+  const z = map.getZoom();
+  if (z < KELDESA_ZOOM_THRESHOLD) return;
+
+  const bbox = _bboxParamFromMap();
+  // key dibulatkan biar tidak fetch terus-terusan saat geser sedikit
+  const b = map.getBounds();
+  const key = [
+    z,
+    b.getWest().toFixed(3),
+    b.getSouth().toFixed(3),
+    b.getEast().toFixed(3),
+    b.getNorth().toFixed(3)
+  ].join(",");
+
+  if (_kelDesaLoading) return;
+  if (key === _kelDesaLastKey) return;
+  _kelDesaLastKey = key;
+
+  _kelDesaLoading = true;
+
+  const url = `/api/geo/kel_desa?bbox=${encodeURIComponent(bbox)}&zoom=${encodeURIComponent(z)}&limit=5000`;
+
+  fetch(url)
+    .then(r => r.json())
+    .then(fc => {
+      if (!fc || !fc.features) return;
+
+      // replace layer agar tidak numpuk
+      if (kelDesaLayer && map.hasLayer(kelDesaLayer)) map.removeLayer(kelDesaLayer);
+
+      kelDesaLayer = L.geoJSON(fc, {
+        pane: 'kelDesaPane',
+        style: function(){
+          return {
+            weight: 1,
+            opacity: 1,
+            color: '#2563eb',      // outline
+            fillOpacity: 0.0       // transparan (biar tidak ganggu status map)
+          };
+        },
+        onEachFeature: function(feature, layer){
+          const p = (feature && feature.properties) ? feature.properties : {};
+          const kel = p.kel_desa || '-';
+          const kec = p.kecamatan || '-';
+          const kab = p.kabkota || '-';
+
+          layer.bindPopup(`
+            <div>
+              <div><b>Kel/Desa:</b> ${escapeHtml(kel)}</div>
+              <div><b>Kecamatan:</b> ${escapeHtml(kec)}</div>
+              <div><b>Kab/Kota:</b> ${escapeHtml(kab)}</div>
+            </div>
+          `);
+        }
+      });
+
+      // tampilkan jika masih zoom tinggi
+      if (map.getZoom() >= KELDESA_ZOOM_THRESHOLD) {
+        kelDesaLayer.addTo(map);
+      }
+    })
+    .catch(e => console.error("Error kel/desa GeoJSON:", e))
+    .finally(() => { _kelDesaLoading = false; });
+}
+// ============================================================================
+
+
+              // 3. Load Peta (tunggu status_map agar warna awal benar)
+              Promise.all([fetch(KABKOTA_GEOJSON_URL).then(res => res.json()), MAP_DATA_READY.catch(() => null)])
+                  .then(([data]) => {
+                      // Simpan ke variabel agar bisa di-hide saat zoom tinggi (kel/desa tampil)
+                      kabkotaLayer = L.geoJSON(data, {
+                          pane: 'kabkotaPane',
+                          // --- STYLE AWAL ---
+                          style: function (feature) {
+                              // Panggil fungsi pencari data
+                              let info = getFeatureData(feature);
+
+                              return {
+                                  fillColor: getColorByStatus(info.status),
+                                  weight: 1,
+                                  opacity: 1,
+                                  color: 'white',
+                                  dashArray: '3',
+                                  fillOpacity: 0.7
+                              };
+                          },
+
+                          // --- INTERAKSI ---
+                          onEachFeature: function (feature, layer) {
+                              // Panggil fungsi pencari data LAGI (Pasti hasilnya sama dengan style)
+                              let info = getFeatureData(feature);
+                              let statusColor = getColorByStatus(info.status);
+
+                              // Badge Class untuk Popup
+                              let badgeClass = 'success';
+                              let s = info.status.toLowerCase();
+                              if (s.includes('tanggap') || s.includes('merah')) badgeClass = 'danger';
+                              else if (s.includes('siaga') || s.includes('kuning')) badgeClass = 'warning';
+
+                              // Popup & Tooltip
+                              layer.bindTooltip(`<b>${info.nama}</b>: ${info.status}`, { sticky: true, direction: 'top' });
+                              layer.bindPopup(`
+                              <div class="text-center">
+                                  <h6 class="mb-1 fw-bold">${info.nama}</h6>
+                                  <span class="badge bg-${badgeClass}">${info.status}</span>
+                              </div>
+                          `);
+
+                              // Logic Hover (Frame Effect)
+                              layer.on({
+                                  mouseover: function (e) {
+                                      var l = e.target;
+                                      l.setStyle({
+                                          weight: 4,              // Frame Tebal
+                                          color: statusColor,     // Warna Frame = Warna Status
+                                          dashArray: '',          // Garis Solid
+                                          fillColor: 'white',     // Isi Putih
+                                          fillOpacity: 0.2
+                                      });
+                                      if (!L.Browser.ie && !L.Browser.opera && !L.Browser.edge) l.bringToFront();
+                                  },
+                                  mouseout: function (e) {
+                                      var l = e.target;
+                                      l.setStyle({
+                                          weight: 1,              // Reset Tipis
+                                          color: 'white',         // Reset Putih
+                                          dashArray: '3',         // Reset Putus-putus
+                                          fillColor: statusColor, // ISI BALIK KE WARNA ASAL (Kuning/Merah/Hijau)
+                                          fillOpacity: 0.7
+                                      });
+                                  },
+                                  click: function (e) { this.openPopup(); }
+                              });
+                          }
+                      });
+
+                      kabkotaLayer.addTo(map);
+
+                      // Sync pertama kali (kalau halaman dibuka langsung zoom tinggi dari URL)
+                      _syncBoundaryByZoom();
+
+                      // Listener untuk toggle boundary + fetch kel/desa saat zoom tinggi
+                      map.on('zoomend', _syncBoundaryByZoom);
+                      map.on('moveend', function () {
+                          if (map.getZoom() >= KELDESA_ZOOM_THRESHOLD) _scheduleLoadKelDesa();
+                      });
+                  })
+                  .catch(e => console.error("Error GeoJSON:", e));
+
+              L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+                  attribution: '&copy; <a href="http://osm.org/copyright">OpenStreetMap</a> contributors'
+              }).addTo(map);
+
+              // Definisi Ikon Kustom dengan Font Awesome
+              function getIcon(jenis) {
+                  let iconClass, iconColor, bgColor;
+
+                  if (jenis.includes('Posko')) {
+                      // Icon Tenda untuk Posko Pengungsian
+                      iconClass = 'fas fa-campground';
+                      iconColor = '#ffffff';
+                      bgColor = '#ef4444'; // Merah
+                  } else if (jenis.includes('Gudang')) {
+                      // Icon Gudang
+                      iconClass = 'fas fa-warehouse';
+                      iconColor = '#ffffff';
+                      bgColor = '#10b981'; // Hijau
+                  } else if (String(jenis || '').toLowerCase().includes('starlink')) {
+                      iconClass = 'fas fa-satellite-dish';
+                      iconColor = '#ffffff';
+                      bgColor = '#8b5cf6'; // ungu
+                  // =====================
+                  // INFRA / BENCANA
+                      // =====================
+                  } else if (
+                    ['jalan putus','akses putus','jalan terputus','jalan tertutup','road closed','road block']
+                    .some(k => String(jenis || '').toLowerCase().includes(k))
+                    ) {
+        // Kalau FontAwesome kamu v6, bisa ganti jadi: 'fas fa-road-barrier' atau 'fa-solid fa-road-barrier'
+  iconClass = 'fas fa-road';
+  iconColor = '#ffffff';
+  bgColor = '#ef4444'; // merah (akses putus)
+} else if (
+  ['longsor','titik longsor','landslide','rockslide','tanah longsor']
+    .some(k => String(jenis || '').toLowerCase().includes(k))
+) {
+  // Kalau FontAwesome kamu v6, bisa ganti jadi: 'fas fa-hill-rockslide' / 'fas fa-landslide'
+  iconClass = 'fas fa-mountain';
+  iconColor = '#ffffff';
+  bgColor = '#f97316'; // oranye (longsor)
+
+} else if (
+  ['jembatan rusak','jembatan putus','bridge damaged','bridge']
+    .some(k => String(jenis || '').toLowerCase().includes(k))
+) {
+  // Kalau FontAwesome kamu v6, bisa ganti jadi: 'fas fa-bridge' / 'fas fa-bridge-water'
+  iconClass = 'fas fa-archway';
+  iconColor = '#ffffff';
+  bgColor = '#2563eb'; // biru (jembatan)
+} else if (
+  ['sumur bor','sumur','air mata sumur','well']
+    .some(k => String(jenis || '').toLowerCase().includes(k))
+) {
+  // Kalau FontAwesome kamu v6, bisa ganti jadi: 'fas fa-bridge' / 'fas fa-bridge-water'
+  iconClass = 'fas fa-faucet';
+  iconColor = '#ffffff';
+  bgColor = '#2563eb'; // biru (jembatan)
+}
+                   else {
+                      iconClass = 'fas fa-map-marker-alt';
+                      iconColor = '#ffffff';
+                      bgColor = '#3b82f6'; // Biru
+                  }
+
+                  // Buat custom HTML icon dengan Font Awesome
+                  const iconHtml = `
+                      <div style="
+                          background-color: ${bgColor};
+                          width: 40px;
+                          height: 40px;
+                          border-radius: 50% 50% 50% 0;
+                          transform: rotate(-45deg);
+                          display: flex;
+                          align-items: center;
+                          justify-content: center;
+                          box-shadow: 0 3px 10px rgba(0,0,0,0.3);
+                          border: 3px solid white;
+                      ">
+                          <i class="${iconClass}" style="
+                              color: ${iconColor};
+                              transform: rotate(45deg);
+                              font-size: 18px;
+                          "></i>
+                      </div>
+                  `;
+
+                  return L.divIcon({
+                      html: iconHtml,
+                      className: 'custom-marker-icon',
+                      iconSize: [40, 40],
+                      iconAnchor: [20, 40],
+                      popupAnchor: [0, -40]
+                  });
+              }
+              // Relawan Marker
+              function getRelawanIcon() {
+        const iconHtml = `
+          <div style="
+            background-color:#0ea5e9;width:40px;height:40px;
+            border-radius:50% 50% 50% 0;transform:rotate(-45deg);
+            display:flex;align-items:center;justify-content:center;
+            box-shadow:0 3px 10px rgba(0,0,0,.3);border:3px solid #fff;">
+            <i class="fas fa-user" style="color:#fff;transform:rotate(45deg);font-size:18px;"></i>
+          </div>`;
+        return L.divIcon({
+          html: iconHtml,
+          className: 'custom-marker-icon',
+          iconSize: [40, 40],
+          iconAnchor: [20, 40],
+          popupAnchor: [0, -40]
+        });
+      }
+
+      function _formatWaktuGMT7(v) {
+        try {
+          if (!v) return '-';
+          const out = formatWIB(v);
+          return out || String(v);
+        } catch (e) {
+          return String(v);
+        }
+      }
+
+      function _normalizePhotoUrl(p) {
+        if (!p) return '';
+        const s = String(p).trim();
+        if (!s) return '';
+        if (s.startsWith('http://') || s.startsWith('https://')) return s;
+        if (s.startsWith('/')) return s;
+        return '/' + s;
+      }
+
+      // Varian hasil image_pipeline (thumb/display WebP); server fallback ke file asli
+      function _photoVariantUrl(url, variant) {
+        if (!url || !url.startsWith('/media/')) return url;
+        return url + (url.includes('?') ? '&' : '?') + 'variant=' + variant;
+      }
+
+
+      function _permintaanStatusKey(status){
+        const s = String(status || '').toLowerCase();
+        if (s.includes('usulan')) return 'usulan';
+        if (s.includes('diproses')) return 'diproses';
+        if (s.includes('dikirim')) return 'dikirim';
+        if (s.includes('diterima')) return 'diterima';
+        if (s.includes('ditolak')) return 'ditolak';
+        // if (s.includes('selesai')) return 'selesai';
+        return 'usulan';
+      }
+
+      function permintaanStatusColor(status){
+        const k = _permintaanStatusKey(status);
+        if (k === 'diproses') return '#f59e0b';
+        if (k === 'dikirim') return '#3b82f6';
+        if (k === 'diterima') return '#22c55e';
+        if (k === 'ditolak') return '#ef4444';
+        // if (k === 'selesai') return '#10b981';
+        return '#64748b'; // Usulan
+      }
+
+      function getPermintaanIcon(status) {
+        const bg = permintaanStatusColor(status);
+        const iconHtml = `
+          <div style="
+            width: 40px;
+            height: 40px;
+            background-color: ${bg};
+            border-radius: 50% 50% 50% 0;
+            transform: rotate(-45deg);
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            border: 2px solid white;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.3);
+          ">
+            <i class="fas fa-box-open" style="
+              color: white;
+              font-size: 18px;
+              transform: rotate(45deg);
+            "></i>
+          </div>
+        `;
+
+        return L.divIcon({
+          html: iconHtml,
+          className: 'custom-marker-icon',
+          iconSize: [40, 40],
+          iconAnchor: [20, 40],
+          popupAnchor: [0, -40]
+        });
+      }
+
+      function _poskoNameByKode(kode) {
+  try {
+    const k = String(kode || '').trim();
+    if (!k) return '-';
+
+    const found = (dataLokasi || []).find(d => String(d.kode_lokasi || d.kode || '').trim() === k);
+    if (!found) return k;
+
+    const kab = String(found.kabupaten_kota || found.kabkota || '').trim();
+    const nama = String(found.nama_lokasi || found.nama || '').trim();
+
+    const kabN = kab.toLowerCase();
+    const namaN = nama.toLowerCase();
+
+    // Jika nama kosong -> tampilkan kab saja (jangan bikin "kab - kab")
+    if (kab && !nama) return kab;
+
+    // Jika nama ada tapi sama persis dengan kab -> tampilkan kab saja
+    if (kab && nama && namaN === kabN) return kab;
+
+    // Jika nama sudah mengandung kab (mis. "Medan - Posko A") -> pakai nama saja biar tidak double
+    if (kab && nama && namaN.includes(kabN)) return nama;
+
+    // Normal case
+    if (kab && nama) return `${kab} - ${nama}`;
+    if (nama) return nama;
+
+    return k;
+  } catch (e) {
+    return kode || '-';
+  }
+}
+
+      function renderPermintaanMarkers(rows) {
+        permintaanLayerGroup.clearLayers();
+        (rows || []).forEach(r => {
+          const lat = parseFloat(r.latitude);
+          const lon = parseFloat(r.longitude);
+          if (!isFinite(lat) || !isFinite(lon)) return;
+
+          // is_active: skip item yang sudah dinonaktifkan (soft delete)
+          if (r.is_active === false) return;
+          if (typeof r.is_active === "string" && r.is_active.toLowerCase() === "false") return;
+
+
+          const waktuText = _formatWaktuGMT7(r.tanggal || r.waktu || r.timestamp);
+          const status = r.status_permintaan || r.status || 'Usulan';
+          const kodePosko = r.kode_posko || '-';
+          const namaPosko = _poskoNameByKode(kodePosko);
+          const idRelawan = r.id_relawan || '-';
+          const namaRelawan = r.nama_relawan;
+
+          const ket = (r.keterangan || '-');
+          const ketHtml = escapeHtml(ket).replace(/\n/g, '<br>');
+
+          L.marker([lat, lon], { icon: getPermintaanIcon(status), pane: 'permintaanPane' })
+            .addTo(permintaanLayerGroup)
+            .bindPopup(
+              `<div style="min-width:260px;">
+                 <div class="fw-bold mb-1">Permintaan Logistik</div>
+                 <div><b>Posko:</b> ${escapeHtml(namaPosko)} <span class="text-muted">(${escapeHtml(kodePosko)})</span></div>
+                 <div><b>Status:</b> ${escapeHtml(status)}</div>
+                 <div><b>Relawan:</b> ${escapeHtml(idRelawan)} - ${escapeHtml(namaRelawan)}</div>
+                 <div><b>Waktu:</b> ${escapeHtml(waktuText)}</div>
+                 <hr class="my-2"/>
+                 <div class="fw-bold mb-1">Keterangan</div>
+                 <div style="white-space:normal;">${ketHtml}</div>
+               </div>`
+            );
+        });
+      }
+
+
+      // =============================================================================
+      // ADMIN: PENGATURAN STATUS PERMINTAAN LOGISTIK (khusus is_admin)
+      // =============================================================================
+      const PERMINTAAN_STATUS_OPTIONS = ["Usulan", "Diproses", "Dikirim", "Diterima", "Ditolak"];
+
+      function _renderPermintaanStatusBadge(status) {
+        const bg = permintaanStatusColor(status);
+        const label = status || 'Usulan';
+        return `<span class="badge" style="background:${bg};">${escapeHtml(label)}</span>`;
+      }
+
+      let ADMIN_PERMINTAAN_DISPLAY_COUNT = 10;
+
+      function loadMorePermintaanAdmin() {
+        ADMIN_PERMINTAAN_DISPLAY_COUNT += 10;
+        renderPermintaanAdminTable();
+      }
+
+      function renderPermintaanAdminTable(resetCount = false) {
+        if (resetCount) {
+          ADMIN_PERMINTAAN_DISPLAY_COUNT = 10;
+        }
+
+        const tbody = document.getElementById('permintaanAdminTableBody');
+        const loadMoreBtn = document.getElementById('btnPermintaanAdminLoadMore');
+        const loadMoreContainer = document.getElementById('permintaanAdminLoadMoreContainer');
+        if (!tbody) return;
+
+        const rows = Array.isArray(permintaanLogistik) ? permintaanLogistik : [];
+        tbody.innerHTML = '';
+
+        // Filter tanggal default
+        const now = new Date();
+        const yyyy = now.getFullYear();
+        const mm = String(now.getMonth() + 1).padStart(2, "0");
+        const dd = String(now.getDate()).padStart(2, "0");
+
+        const past = new Date();
+        past.setDate(now.getDate() - 30);
+        const yyyy30 = past.getFullYear();
+        const mm30 = String(past.getMonth() + 1).padStart(2, "0");
+        const dd30 = String(past.getDate()).padStart(2, "0");
+
+        const start = document.getElementById('filterPermintaanAdminStart')?.value || `${yyyy30}-${mm30}-${dd30}`;
+        const end   = document.getElementById('filterPermintaanAdminEnd')?.value || `${yyyy}-${mm}-${dd}`;
+
+        const filteredRows = rows.filter(r => {
+          const rawWaktu = r.waktu || r.tanggal || r.timestamp;
+          if (!rawWaktu) return true;
+          // Ambil YYYY-MM-DD saja dari string waktu
+          const tanggal = String(rawWaktu).substring(0, 10);
+          return tanggal >= start && tanggal <= end;
+        });
+
+        if (!filteredRows.length) {
+          tbody.innerHTML = '<tr><td colspan="6" class="text-muted text-center">Belum ada permintaan.</td></tr>';
+          if (loadMoreContainer) loadMoreContainer.classList.add('d-none');
+          return;
+        }
+
+        // Slicing untuk pagination frontend
+        const displayRows = filteredRows.slice(0, ADMIN_PERMINTAAN_DISPLAY_COUNT);
+        const hasMore = filteredRows.length > ADMIN_PERMINTAAN_DISPLAY_COUNT;
+
+        if (loadMoreContainer) {
+          if (hasMore) {
+            loadMoreContainer.classList.remove('d-none');
+          } else {
+            loadMoreContainer.classList.add('d-none');
+          }
+        }
+
+        displayRows.forEach(r => {
+          const id = r.id;
+          const kodePosko = r.kode_posko || '-';
+          const namaPosko = _poskoNameByKode(kodePosko);
+          const waktuText = _formatWaktuGMT7(r.waktu || r.tanggal || r.timestamp);
+          const status = r.status_permintaan || r.status || 'Usulan';
+          const ket = String(r.keterangan || '').trim();
+          const ketShort = ket.length > 120 ? (ket.slice(0, 120) + '…') : (ket || '-');
+
+          const selId = `permintaanStatusSelect_${id}`;
+          const btnId = `permintaanStatusBtn_${id}`;
+
+          const optionsHtml = PERMINTAAN_STATUS_OPTIONS.map(s => {
+            const selected = (_permintaanStatusKey(s) === _permintaanStatusKey(status)) ? ' selected' : '';
+            return `<option value="${escapeHtml(s)}"${selected}>${escapeHtml(s)}</option>`;
+          }).join('');
+
+          tbody.insertAdjacentHTML('beforeend', `
+            <tr>
+              <td><code>${escapeHtml(id)}</code></td>
+              <td>
+                <div class="fw-bold">${escapeHtml(namaPosko)}</div>
+                <div class="text-muted small">${escapeHtml(kodePosko)}</div>
+              </td>
+              <td class="small">${escapeHtml(waktuText)}</td>
+              <td class="small" style="white-space:normal;">${escapeHtml(ketShort)}</td>
+              <td>${_renderPermintaanStatusBadge(status)}</td>
+              <td>
+                <div class="d-flex gap-2">
+                  <select class="form-select form-select-sm" id="${escapeHtml(selId)}">
+                    ${optionsHtml}
+                  </select>
+                  <button class="btn btn-sm btn-primary" id="${escapeHtml(btnId)}" type="button"
+                          onclick="adminUpdatePermintaanStatus('${escapeHtml(id)}')">Simpan</button>
+                </div>
+              </td>
+            </tr>
+          `);
+        });
+      }
+
+      async function adminUpdatePermintaanStatus(id) {
+        if (!CURRENT_IS_ADMIN) {
+          showNotification('Anda bukan admin.', 'danger', true);
+          return;
+        }
+
+        const sel = document.getElementById(`permintaanStatusSelect_${id}`);
+        const btn = document.getElementById(`permintaanStatusBtn_${id}`);
+        if (!sel || !btn) return;
+
+        const newStatus = String(sel.value || '').trim();
+        if (!newStatus) return;
+
+        sel.disabled = true;
+        btn.disabled = true;
+
+        const oldBtnHtml = btn.innerHTML;
+        btn.innerHTML = '<i class="fas fa-spinner fa-spin"></i>';
+
+        try {
+          const resp = await fetch('/api/update_permintaan_status', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ id: id, status: newStatus })
+          });
+
+          const result = await resp.json().catch(() => ({}));
+          if (resp.ok && result && result.success) {
+            // Update local data
+            const item = (permintaanLogistik || []).find(x => String(x.id) === String(id));
+            if (item) item.status_permintaan = newStatus;
+
+            // Refresh marker permintaan (warna/icon)
+            applyPermintaanVisibility();
+
+            // Refresh tabel admin
+            renderPermintaanAdminTable();
+            loadAdminAsesmen();
+            loadAdminLokasi();
+            loadAdminLogs();
+
+            showNotification('Status permintaan berhasil diperbarui.', 'success', true);
+          } else {
+            showNotification('Gagal update status: ' + (result.error || 'Unknown error'), 'danger', true);
+          }
+        } catch (e) {
+          console.error(e);
+          showNotification('Error saat update status.', 'danger', true);
+        } finally {
+          sel.disabled = false;
+          btn.disabled = false;
+          btn.innerHTML = oldBtnHtml;
+        }
+      }
+
+
+      // =============================================================================
+      // ADMIN: Kelola Asesmen (is_active) + Log Admin
+      // =============================================================================
+      const ASESMEN_KIND_LABELS = {
+        kesehatan: 'Kesehatan',
+        pendidikan: 'Pendidikan',
+        psikososial: 'Psikososial',
+        infrastruktur: 'Infrastruktur',
+        wash: 'WASH',
+        kondisi: 'Kondisi'
+      };
+
+      let ADMIN_ASESMEN_ROWS = [];
+      let ADMIN_ASESMEN_OFFSET = 0;
+      const ADMIN_ASESMEN_LIMIT = 10;
+
+      function _asesmenKindLabel(kind) {
+        const k = String(kind || '').trim().toLowerCase();
+        return ASESMEN_KIND_LABELS[k] || (k || '-');
+      }
+
+      function _isActiveValue(v) {
+        if (v === false) return false;
+        if (typeof v === 'string' && v.toLowerCase() === 'false') return false;
+        return true;
+      }
+
+      function _poskoNameByKode(kode) {
+        if (!kode || kode === '-') return '-';
+        if (typeof DATA_POSKO !== 'undefined' && Array.isArray(DATA_POSKO)) {
+          const found = DATA_POSKO.find(p => p.kode === kode);
+          if (found) return found.nama;
+        }
+        return kode;
+      }
+
+      async function loadAdminAsesmen(isLoadMore = false) {
+        const tbody = document.getElementById('asesmenAdminTableBody');
+        const loadMoreBtn = document.getElementById('btnAsesmenAdminLoadMore');
+        const loadMoreContainer = document.getElementById('asesmenAdminLoadMoreContainer');
+
+        if (!isLoadMore) {
+          ADMIN_ASESMEN_OFFSET = 0;
+          if (tbody) {
+            tbody.innerHTML = '<tr><td colspan="8" class="text-muted text-center">Memuat...</td></tr>';
+          }
+        } else {
+          if (loadMoreBtn) {
+            loadMoreBtn.disabled = true;
+            loadMoreBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i> Memuat...';
+          }
+        }
+
+        if (!CURRENT_IS_ADMIN) {
+          if (tbody) {
+            tbody.innerHTML = '<tr><td colspan="8" class="text-muted text-center">Bukan admin.</td></tr>';
+          }
+          ADMIN_ASESMEN_ROWS = [];
+          if (loadMoreContainer) loadMoreContainer.classList.add('d-none');
+          return;
+        }
+
+        // Filter tanggal default
+        const now = new Date();
+        const yyyy = now.getFullYear();
+        const mm = String(now.getMonth() + 1).padStart(2, "0");
+        const dd = String(now.getDate()).padStart(2, "0");
+
+        const past = new Date();
+        past.setDate(now.getDate() - 30);
+        const yyyy30 = past.getFullYear();
+        const mm30 = String(past.getMonth() + 1).padStart(2, "0");
+        const dd30 = String(past.getDate()).padStart(2, "0");
+
+        const start = document.getElementById('filterAsesmenAdminStart')?.value || `${yyyy30}-${mm30}-${dd30}`;
+        const end   = document.getElementById('filterAsesmenAdminEnd')?.value || `${yyyy}-${mm}-${dd}`;
+        const kind  = document.getElementById('filterAsesmenAdminKind')?.value || '';
+
+        try {
+          const url = `/api/admin_asesmen_list?limit=${ADMIN_ASESMEN_LIMIT}&offset=${ADMIN_ASESMEN_OFFSET}&start=${start}&end=${end}&kind=${kind}&t=${Date.now()}`;
+          const resp = await fetch(url);
+          const result = await resp.json().catch(() => ({}));
+
+          if (resp.ok && result && result.success) {
+            const newRows = Array.isArray(result.rows) ? result.rows : [];
+
+            if (!isLoadMore) {
+              ADMIN_ASESMEN_ROWS = newRows;
+            } else {
+              ADMIN_ASESMEN_ROWS = ADMIN_ASESMEN_ROWS.concat(newRows);
+            }
+
+            ADMIN_ASESMEN_OFFSET += newRows.length;
+            renderAsesmenAdminTable();
+
+            if (loadMoreContainer) {
+              if (result.has_more) {
+                loadMoreContainer.classList.remove('d-none');
+              } else {
+                loadMoreContainer.classList.add('d-none');
+              }
+            }
+          } else {
+            const err = (result && result.error) ? result.error : 'Unknown error';
+            if (!isLoadMore && tbody) {
+              tbody.innerHTML = `<tr><td colspan="8" class="text-muted text-center">Gagal memuat asesmen: ${escapeHtml(err)}</td></tr>`;
+            }
+          }
+        } catch (e) {
+          console.error(e);
+          if (!isLoadMore && tbody) {
+            tbody.innerHTML = '<tr><td colspan="8" class="text-muted text-center">Error memuat data asesmen.</td></tr>';
+          }
+        } finally {
+          if (loadMoreBtn) {
+            loadMoreBtn.disabled = false;
+            loadMoreBtn.innerHTML = '<i class="fas fa-arrow-down me-1"></i> Muat Lebih Banyak';
+          }
+        }
+      }
+
+      function renderAsesmenAdminTable() {
+        const tbody = document.getElementById('asesmenAdminTableBody');
+        if (!tbody) return;
+
+        const rows = ADMIN_ASESMEN_ROWS || [];
+        tbody.innerHTML = '';
+
+        if (!rows.length) {
+          tbody.innerHTML = '<tr><td colspan="8" class="text-muted text-center">Belum ada data asesmen.</td></tr>';
+          return;
+        }
+
+        rows.forEach(row => {
+          const kind = String(row.kind || '').trim().toLowerCase();
+          const id = row.id ?? '-';
+          const kodePosko = row.kode_posko || '-';
+          const namaPosko = _poskoNameByKode(kodePosko);
+          const relawanText = `${row.id_relawan || '-'} - ${row.nama_relawan || '-'}`;
+          const waktuText = formatWIB(row.waktu);
+          const skor = (row.skor ?? '-');
+          const status = (row.status ?? '-');
+
+          const active = _isActiveValue(row.is_active);
+          const activeBadge = active
+            ? '<span class="badge bg-success">Aktif</span>'
+            : '<span class="badge bg-secondary">Nonaktif</span>';
+
+          const btnHtml = active
+            ? `<button type="button" class="btn btn-sm btn-danger"
+                       onclick="adminSetAsesmenActive('${escapeHtml(kind)}','${escapeHtml(id)}',false)">
+                 Nonaktifkan
+               </button>`
+            : `<button type="button" class="btn btn-sm btn-success"
+                       onclick="adminSetAsesmenActive('${escapeHtml(kind)}','${escapeHtml(id)}',true)">
+                 Aktifkan
+               </button>`;
+
+          tbody.insertAdjacentHTML('beforeend', `
+            <tr>
+              <td>
+                <div class="d-flex align-items-center gap-2">
+                  <span class="badge bg-secondary">${escapeHtml(_asesmenKindLabel(kind))}</span>
+                  ${activeBadge}
+                </div>
+              </td>
+              <td><code>${escapeHtml(id)}</code></td>
+              <td>
+                <div class="fw-bold">${escapeHtml(namaPosko)}</div>
+                <div class="text-muted small">${escapeHtml(kodePosko)}</div>
+              </td>
+              <td class="small">${escapeHtml(relawanText)}</td>
+              <td class="small">${escapeHtml(waktuText)}</td>
+              <td class="small">${escapeHtml(skor)}</td>
+              <td class="small">${escapeHtml(status)}</td>
+              <td>${btnHtml}</td>
+            </tr>
+          `);
+        });
+      }
+
+      async function adminSetAsesmenActive(kind, id, isActive) {
+        if (!CURRENT_IS_ADMIN) {
+          showNotification('Anda bukan admin.', 'danger', true);
+          return;
+        }
+
+        const k = String(kind || '').trim().toLowerCase();
+        const sid = String(id || '').trim();
+        if (!k || !sid) return;
+
+        const label = _asesmenKindLabel(k);
+        const verb = isActive ? 'aktifkan' : 'nonaktifkan';
+        const ok = confirm(`Anda yakin ingin ${verb} asesmen ${label} (ID: ${sid})?`);
+        if (!ok) return;
+
+        try {
+          const resp = await fetch('/api/set_asesmen_active', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ kind: k, id: sid, is_active: !!isActive })
+          });
+
+          const result = await resp.json().catch(() => ({}));
+          if (resp.ok && result && result.success) {
+            // Refresh panel admin (aktif + nonaktif)
+            await loadAdminAsesmen();
+            await loadAdminLogs();
+
+            // Refresh data map (hanya yang aktif) via tombol refresh yang sudah ada
+            const btnRefresh = document.getElementById('btnRefreshPermintaanAdmin');
+            if (btnRefresh) btnRefresh.click();
+
+            showNotification('Berhasil memperbarui is_active asesmen.', 'success', true);
+          } else {
+            showNotification('Gagal: ' + (result.error || 'Unknown error'), 'danger', true);
+          }
+        } catch (e) {
+          console.error(e);
+          showNotification('Error saat update is_active asesmen.', 'danger', true);
+        }
+      }
+
+      function renderAdminLogs(logs) {
+        const tbody = document.getElementById('adminLogTableBody');
+        if (!tbody) return;
+
+        const rows = Array.isArray(logs) ? logs : [];
+        tbody.innerHTML = '';
+
+        if (!rows.length) {
+          tbody.innerHTML = '<tr><td colspan="5" class="text-muted text-center">Belum ada log.</td></tr>';
+          return;
+        }
+
+        rows.forEach(l => {
+          const waktu = formatWIB(l.waktu);
+          const adminText = `${l.actor_id_relawan || '-'} - ${l.actor_nama_relawan || '-'}`;
+          const aksi = (l.action || '-');
+          const target = `${l.target_kind || '-'} #${(l.target_ref || l.target_id || '-')}`;
+          const note = (l.note && String(l.note).trim()) ? String(l.note) : '-';
+
+          tbody.insertAdjacentHTML('beforeend', `
+            <tr>
+              <td class="small">${escapeHtml(waktu)}</td>
+              <td class="small">${escapeHtml(adminText)}</td>
+              <td class="small">${escapeHtml(aksi)}</td>
+              <td class="small">${escapeHtml(target)}</td>
+              <td class="small" style="white-space:normal;">${escapeHtml(note)}</td>
+            </tr>
+          `);
+        });
+      }
+
+
+
+      // ============================================================================
+      // ADMIN: KELOLA DATA LOKASI (is_active + jenis_lokasi)
+      // ============================================================================
+      const adminLokasiTableBody = document.getElementById('adminLokasiTableBody');
+      const adminLokasiAlert = document.getElementById('adminLokasiAlert');
+      const btnRefreshLokasiAdmin = document.getElementById('btnRefreshLokasiAdmin');
+
+      function _normalizeBool(val) {
+        if (val === true) return true;
+        if (val === false) return false;
+        if (typeof val === 'string') {
+          const v = val.trim().toLowerCase();
+          if (v === 'true' || v === '1' || v === 'yes' || v === 'y' || v === 'on') return true;
+          if (v === 'false' || v === '0' || v === 'no' || v === 'n' || v === 'off') return false;
+        }
+        return Boolean(val);
+      }
+
+      function _showAdminLokasiAlert(msg, type) {
+        if (!adminLokasiAlert) return;
+        const t = (type || 'info').toLowerCase();
+        adminLokasiAlert.classList.remove('d-none', 'alert-info', 'alert-success', 'alert-warning', 'alert-danger');
+        if (t === 'success') adminLokasiAlert.classList.add('alert-success');
+        else if (t === 'warning') adminLokasiAlert.classList.add('alert-warning');
+        else if (t === 'danger' || t === 'error') adminLokasiAlert.classList.add('alert-danger');
+        else adminLokasiAlert.classList.add('alert-info');
+        adminLokasiAlert.textContent = String(msg || '');
+      }
+
+      function _buildJenisOptions(currentValue) {
+        const cur = (currentValue || '').trim();
+        const refs = Array.isArray(REF_JENIS_LOKASI) ? REF_JENIS_LOKASI : [];
+
+        // Uniq + keep order
+        const seen = {};
+        const list = [];
+        refs.forEach(v => {
+          const s = String(v || '').trim();
+          if (!s) return;
+          if (!seen[s]) {
+            seen[s] = true;
+            list.push(s);
+          }
+        });
+
+        if (cur && !seen[cur]) {
+          list.unshift(cur);
+        }
+
+        let html = '';
+        list.forEach(v => {
+          const sel = (v === cur) ? ' selected' : '';
+          html += `<option value="${escapeHtml(v)}"${sel}>${escapeHtml(v)}</option>`;
+        });
+        return html;
+      }
+
+      let LIMIT_ADMIN_LOKASI = 10;
+      let OFFSET_ADMIN_LOKASI = 0;
+      let ADMIN_LOKASI_ROWS = [];
+
+      function renderAdminLokasiTable(rows = null) {
+        if (!adminLokasiTableBody) return;
+
+        const dataRows = (rows !== null) ? rows : ADMIN_LOKASI_ROWS;
+
+        if (!dataRows || !dataRows.length) {
+          adminLokasiTableBody.innerHTML = `<tr><td colspan="6" class="text-muted text-center">Tidak ada data.</td></tr>`;
+          return;
+        }
+
+        let html = '';
+        dataRows.forEach(r => {
+          const idLok = String(r.id_lokasi || '').trim();
+          const kab = String(r.nama_kabkota || r.kabupaten_kota || '').trim();
+          const nama = String(r.nama_lokasi || '').trim();
+          const jenis = String(r.jenis_lokasi || '').trim();
+          const isAct = _normalizeBool(r.is_active);
+
+          const badge = isAct
+            ? '<span class="badge bg-success">Ya</span>'
+            : '<span class="badge bg-secondary">Tidak</span>';
+
+          const btnText = isAct ? 'Nonaktifkan' : 'Aktifkan';
+          const btnClass = isAct ? 'btn-outline-danger' : 'btn-outline-success';
+
+          html += `
+            <tr>
+              <td><code>${escapeHtml(idLok || '-')}</code></td>
+              <td>${escapeHtml(kab || '-')}</td>
+              <td>${escapeHtml(nama || '-')}</td>
+              <td>
+                <select class="form-select form-select-sm admin-jenis-select" data-id="${escapeHtml(idLok)}">
+                  ${_buildJenisOptions(jenis)}
+                </select>
+              </td>
+              <td class="text-center">${badge}</td>
+              <td class="text-center">
+                <button type="button" class="btn btn-sm ${btnClass} admin-lokasi-toggle" data-id="${escapeHtml(idLok)}" data-active="${isAct ? '1' : '0'}">
+                  ${btnText}
+                </button>
+              </td>
+            </tr>
+          `;
+        });
+
+        adminLokasiTableBody.innerHTML = html;
+
+        // Bind toggle buttons
+        (adminLokasiTableBody.querySelectorAll('.admin-lokasi-toggle') || []).forEach(btn => {
+          btn.addEventListener('click', async () => {
+            const idLok = btn.getAttribute('data-id') || '';
+            const curAct = (btn.getAttribute('data-active') || '0') === '1';
+            const nextAct = !curAct;
+            await adminSetLokasiActive(idLok, nextAct);
+          });
+        });
+
+        // Bind jenis select
+        (adminLokasiTableBody.querySelectorAll('.admin-jenis-select') || []).forEach(sel => {
+          sel.addEventListener('change', async () => {
+            const idLok = sel.getAttribute('data-id') || '';
+            const newJenis = sel.value;
+            await adminUpdateLokasiJenis(idLok, newJenis);
+          });
+        });
+      }
+
+      async function loadAdminLokasi(isLoadMore = false) {
+        if (!CURRENT_IS_ADMIN) return;
+        if (!adminLokasiTableBody) return;
+
+        const loadMoreBtn = document.getElementById('btnAdminLokasiLoadMore');
+        const loadMoreContainer = document.getElementById('adminLokasiLoadMoreContainer');
+
+        if (!isLoadMore) {
+          OFFSET_ADMIN_LOKASI = 0;
+          ADMIN_LOKASI_ROWS = [];
+          adminLokasiTableBody.innerHTML = `<tr><td colspan="6" class="text-muted text-center">Memuat...</td></tr>`;
+        } else {
+          if (loadMoreBtn) {
+            loadMoreBtn.disabled = true;
+            loadMoreBtn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i> Memuat...';
+          }
+        }
+
+        // Filter tanggal default
+        const now = new Date();
+        const yyyy = now.getFullYear();
+        const mm = String(now.getMonth() + 1).padStart(2, "0");
+        const dd = String(now.getDate()).padStart(2, "0");
+
+        const past = new Date();
+        past.setDate(now.getDate() - 30);
+        const yyyy30 = past.getFullYear();
+        const mm30 = String(past.getMonth() + 1).padStart(2, "0");
+        const dd30 = String(past.getDate()).padStart(2, "0");
+
+        const filterSearch = document.getElementById('filterAdminLokasiSearch')?.value || '';
+        const filterKind = document.getElementById('filterAdminLokasiKind')?.value || '';
+        const filterStart = document.getElementById('filterAdminLokasiStart')?.value || `${yyyy30}-${mm30}-${dd30}`;
+        const filterEnd = document.getElementById('filterAdminLokasiEnd')?.value || `${yyyy}-${mm}-${dd}`;
+
+        try {
+          const res = await fetch(`/api/admin_lokasi_list?limit=${LIMIT_ADMIN_LOKASI}&offset=${OFFSET_ADMIN_LOKASI}&search=${filterSearch}&kind=${filterKind}&start=${filterStart}&end=${filterEnd}`, { method: 'GET', credentials: 'same-origin' });
+          const data = await res.json();
+          if (!data || !data.success) {
+            _showAdminLokasiAlert((data && data.error) ? data.error : 'Gagal memuat data lokasi.', 'danger');
+            renderAdminLokasiTable();
+            return;
+          }
+
+          const newRows = data.rows || [];
+          ADMIN_LOKASI_ROWS = ADMIN_LOKASI_ROWS.concat(newRows);
+          OFFSET_ADMIN_LOKASI += newRows.length;
+
+          _showAdminLokasiAlert('Data lokasi dimuat.', 'success');
+          renderAdminLokasiTable();
+
+          if (loadMoreContainer) {
+            if (data.has_more) {
+              loadMoreContainer.classList.remove('d-none');
+            } else {
+              loadMoreContainer.classList.add('d-none');
+            }
+          }
+        } catch (e) {
+          console.error(e);
+          _showAdminLokasiAlert('Terjadi error saat memuat data lokasi.', 'danger');
+          renderAdminLokasiTable();
+        } finally {
+          if (loadMoreBtn) {
+            loadMoreBtn.disabled = false;
+            loadMoreBtn.innerHTML = '<i class="fas fa-arrow-down me-1"></i> Muat Lebih Banyak';
+          }
+        }
+      }
+
+      async function adminSetLokasiActive(idLokasi, isActive) {
+        if (!CURRENT_IS_ADMIN) return;
+        const idLok = String(idLokasi || '').trim();
+        if (!idLok) return;
+
+        try {
+          _showAdminLokasiAlert('Menyimpan perubahan...', 'info');
+          const res = await fetch('/api/set_lokasi_active', {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ id_lokasi: idLok, is_active: Boolean(isActive) })
+          });
+          const data = await res.json();
+          if (!data || !data.success) {
+            _showAdminLokasiAlert((data && data.error) ? data.error : 'Gagal menyimpan.', 'danger');
+            return;
+          }
+
+          _showAdminLokasiAlert('Berhasil disimpan.', 'success');
+
+          // Refresh map + panel admin
+          try { await refreshMap(); } catch (e) {}
+          await loadAdminLokasi();
+          try { loadAdminLogs(); } catch (e) {}
+        } catch (e) {
+          console.error(e);
+          _showAdminLokasiAlert('Terjadi error saat menyimpan.', 'danger');
+        }
+      }
+
+      async function adminUpdateLokasiJenis(idLokasi, jenisLokasi) {
+        if (!CURRENT_IS_ADMIN) return;
+        const idLok = String(idLokasi || '').trim();
+        const j = String(jenisLokasi || '').trim();
+        if (!idLok || !j) return;
+
+        try {
+          _showAdminLokasiAlert('Menyimpan perubahan jenis...', 'info');
+          const res = await fetch('/api/update_lokasi_jenis', {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ id_lokasi: idLok, jenis_lokasi: j })
+          });
+          const data = await res.json();
+          if (!data || !data.success) {
+            _showAdminLokasiAlert((data && data.error) ? data.error : 'Gagal update jenis.', 'danger');
+            return;
+          }
+
+          _showAdminLokasiAlert('Jenis lokasi berhasil diupdate.', 'success');
+
+          // Refresh map + panel admin
+          try { await refreshMap(); } catch (e) {}
+          await loadAdminLokasi();
+          try { loadAdminLogs(); } catch (e) {}
+        } catch (e) {
+          console.error(e);
+          _showAdminLokasiAlert('Terjadi error saat update jenis.', 'danger');
+        }
+      }
+
+      if (btnRefreshLokasiAdmin) {
+        btnRefreshLokasiAdmin.addEventListener('click', () => {
+          loadAdminLokasi();
+        });
+      }
+      async function loadAdminLogs() {
+        const tbody = document.getElementById('adminLogTableBody');
+        if (!tbody) return;
+
+        tbody.innerHTML = '<tr><td colspan="5" class="text-muted text-center">Memuat...</td></tr>';
+
+        if (!CURRENT_IS_ADMIN) {
+          tbody.innerHTML = '<tr><td colspan="5" class="text-muted text-center">Bukan admin.</td></tr>';
+          return;
+        }
+
+        try {
+          const resp = await fetch('/api/admin_action_logs?limit=200');
+          const result = await resp.json().catch(() => ({}));
+          if (resp.ok && result && result.success) {
+            renderAdminLogs(result.logs || []);
+          } else {
+            tbody.innerHTML = `<tr><td colspan="5" class="text-muted text-center">Gagal memuat log: ${escapeHtml(result.error || 'Unknown error')}</td></tr>`;
+          }
+        } catch (e) {
+          console.error(e);
+          tbody.innerHTML = '<tr><td colspan="5" class="text-muted text-center">Error memuat log.</td></tr>';
+        }
+      }
+
+      // Hook modal admin (render table saat dibuka / refresh)
+      document.addEventListener('DOMContentLoaded', function() {
+        const modalEl = document.getElementById('permintaanAdminModal');
+        if (modalEl) {
+          modalEl.addEventListener('shown.bs.modal', function() {
+            renderPermintaanAdminTable();
+            loadAdminAsesmen();
+            loadAdminLokasi();
+            loadAdminLogs();
+          });
+        }
+
+        const btnRefresh = document.getElementById('btnRefreshPermintaanAdmin');
+        if (btnRefresh) {
+          btnRefresh.addEventListener('click', async function() {
+            try {
+              const response = await fetch('/api/refresh_map');
+              const result = await response.json();
+              if (result && result.success) {
+                permintaanLogistik = Array.isArray(result.permintaan_logistik)
+                  ? result.permintaan_logistik
+                  : (result.permintaan_logistik || []);
+
+                // Update data asesmen (jika tersedia dari refresh_map)
+                asesmenKesehatan = Array.isArray(result.asesmen_kesehatan)
+                  ? result.asesmen_kesehatan
+                  : (result.asesmen_kesehatan || []);
+                asesmenPendidikan = Array.isArray(result.asesmen_pendidikan)
+                  ? result.asesmen_pendidikan
+                  : (result.asesmen_pendidikan || []);
+                asesmenPsikososial = Array.isArray(result.asesmen_psikososial)
+                  ? result.asesmen_psikososial
+                  : (result.asesmen_psikososial || []);
+                asesmenInfrastruktur = Array.isArray(result.asesmen_infrastruktur)
+                  ? result.asesmen_infrastruktur
+                  : (result.asesmen_infrastruktur || []);
+                asesmenWash = Array.isArray(result.asesmen_wash)
+                  ? result.asesmen_wash
+                  : (result.asesmen_wash || []);
+                asesmenKondisi = Array.isArray(result.asesmen_kondisi)
+                  ? result.asesmen_kondisi
+                  : (result.asesmen_kondisi || []);
+
+                applyAsesmenVisibility();
+                applyPermintaanVisibility();
+                renderPermintaanAdminTable();
+                loadAdminAsesmen();
+                loadAdminLokasi();
+                loadAdminLogs();
+                showNotification('Data admin diperbarui.', 'success', true);
+              } else {
+                showNotification('Gagal refresh permintaan: ' + (result.error || 'Unknown error'), 'danger', true);
+              }
+            } catch (e) {
+              console.error(e);
+              showNotification('Error refresh permintaan.', 'danger', true);
+            }
+          });
+        }
+
+        const btnRefreshAsesmen = document.getElementById('btnRefreshAsesmenAdmin');
+        if (btnRefreshAsesmen && btnRefresh) {
+          btnRefreshAsesmen.addEventListener('click', function() {
+            btnRefresh.click();
+          });
+        }
+
+        const btnRefreshLogs = document.getElementById('btnRefreshAdminLogs');
+        if (btnRefreshLogs) {
+          btnRefreshLogs.addEventListener('click', function() {
+            loadAdminLogs();
+          });
+        }
+      });
+
+
+
+      function renderRelawanMarkers(relawanData) {
+        relawanLayerGroup.clearLayers();
+
+        (relawanData || []).forEach(r => {
+          const lat = parseFloat(r.latitude);
+          const lon = parseFloat(r.longitude);
+          if (!isFinite(lat) || !isFinite(lon)) return;
+
+          const photoUrl = _photoVariantUrl(_normalizePhotoUrl(r.photo_path), 'thumb');
+          const waktuText = _formatWaktuGMT7(r.waktu);
+
+          const unitText = r.unit ? String(r.unit) : '';
+          const catatanTextRaw = (r.catatan && String(r.catatan).trim()) ? String(r.catatan) : '-';
+          const catatanHtml = escapeHtml(catatanTextRaw).replace(/\n/g, "<br>");
+
+          // === FORMAT TAMPILAN PERSIS SEPERTI YANG KAMU MAU ===
+          const photoHtml = photoUrl
+            ? `<img src="${escapeHtml(photoUrl)}" alt="Foto Relawan"
+                    style="width:78px;height:78px;object-fit:cover;border-radius:10px;border:1px solid #e5e7eb;">`
+            : `<div style="width:78px;height:78px;border-radius:10px;border:1px solid #e5e7eb;display:flex;align-items:center;justify-content:center;background:#f8fafc;">
+                 <i class="fas fa-image" style="opacity:.45;"></i>
+               </div>`;
+
+          L.marker([lat, lon], { icon: getRelawanIcon() })
+            .addTo(relawanLayerGroup)
+            .bindPopup(
+              `<div style="min-width:250px;">
+                 <div style="display:flex;gap:10px;align-items:flex-start;">
+                   ${photoHtml}
+                   <div style="flex:1;">
+                     <div style="font-weight:700;line-height:1.1;">
+                       ${escapeHtml(r.id_relawan || '-')} - ${escapeHtml(r.nama_relawan || r.nama || '-')}
+                     </div>
+
+                     ${unitText
+                       ? `<div style="margin-top:4px;">
+                            <small class="text-muted">Unit:</small>
+                            <small><b>${escapeHtml(unitText)}</b></small>
+                          </div>`
+                       : ''}
+
+                     <div style="margin-top:4px;">
+                       <small class="text-muted">Waktu:</small>
+                       <small><b>${escapeHtml(waktuText)}</b></small>
+                     </div>
+
+                     <div style="margin-top:6px;">
+                       <small class="text-muted">Catatan:</small><br>
+                       <small>${catatanHtml}</small>
+                     </div>
+                   </div>
+                 </div>
+               </div>`,
+              { maxWidth: 380 }
+            );
+        });
+      }
+
+
+              // 4. Fungsi untuk render marker lokasi ke peta
+              function renderMarkers(lokasiData, filterState) {
+                  const fs = filterState || {};
+                  const showPosko = fs.showPosko !== false;
+                  const showGudang = fs.showGudang !== false;
+                  const showStarlink = fs.showStarlink !== false;
+                  const showJembatanRusak = fs.showJembatanRusak !== false;
+                  const showJalanPutus = fs.showJalanPutus !== false;
+                  const showTitikLongsor = fs.showTitikLongsor !== false;
+                  const showSumurBor = fs.showSumurBor !== false;
+                  const showLain = fs.showLain !== false;
+                  // Hapus marker lama
+                  markerLayerGroup.clearLayers();
+
+                  // Tambah marker baru
+                  lokasiData.forEach(lokasi => {
+
+        // ADMIN_SKIP_INACTIVE_LOKASI: hanya tampilkan lokasi yang is_active = True
+        const _activeRaw = lokasi.is_active;
+        if (_activeRaw === false) return;
+        if (typeof _activeRaw === 'string') {
+          const _av = _activeRaw.trim().toLowerCase();
+          if (_av === 'false' || _av === '0' || _av === 'no' || _av === 'n') return;
+        }
+                      const lat = parseFloat(lokasi.latitude);
+                      const lon = parseFloat(lokasi.longitude);
+                      if (!isNaN(lat) && !isNaN(lon)) {
+                          const jenis = String(lokasi.jenis_lokasi || '');
+                          const isPosko = /posko/i.test(jenis);
+                          const isGudang = /gudang/i.test(jenis);
+                          // kategori baru
+const isStarlink = /starlink/i.test(jenis);
+const isJembatanRusak = /jembatan/i.test(jenis) && /rusak/i.test(jenis);
+const isJalanPutus = /jalan/i.test(jenis) && /putus/i.test(jenis);
+const isTitikLongsor = /longsor/i.test(jenis);
+const isSumurBor = /sumur/i.test(jenis) && /bor/i.test(jenis);
+                          if (isPosko && !showPosko) return;
+                          if (isGudang && !showGudang) return;
+                          if (isStarlink && !showStarlink) return;
+if (isJembatanRusak && !showJembatanRusak) return;
+if (isJalanPutus && !showJalanPutus) return;
+if (isTitikLongsor && !showTitikLongsor) return;
+if (isSumurBor && !showSumurBor) return;
+                          // sisanya dianggap "Lain"
+const isKnown =
+  isPosko || isGudang || isStarlink || isJembatanRusak || isJalanPutus || isTitikLongsor || isSumurBor;
+
+if (!isKnown && !showLain) return;
+
+                          let icon = getIcon(lokasi.jenis_lokasi);
+
+                          const photoUrl = _photoVariantUrl(_normalizePhotoUrl(lokasi.photo_path), 'thumb');
+                          const photoHtml = photoUrl
+                              ? `<img src="${photoUrl}" alt="Foto Lokasi" style="width:78px;height:78px;object-fit:cover;border-radius:10px;border:1px solid #e5e7eb;">`
+                              : `<div style="width:78px;height:78px;border-radius:10px;border:1px solid #e5e7eb;display:flex;align-items:center;justify-content:center;background:#f8fafc;">
+                                   <i class="fas fa-image" style="opacity:.45;"></i>
+                                 </div>`;
+
+                          const kabkotaText = lokasi.nama_kabkota || lokasi.kabupaten_kota || '-';
+                          const idLokasiText = lokasi.id_lokasi || lokasi.kode_lokasi || lokasi.kode || '-';
+                          const namaLokasiText = lokasi.nama_lokasi || '-';
+                          const statusLokasiText = lokasi.status_lokasi || '-';
+                          const aksesText = lokasi.tingkat_akses || lokasi.akses || '-';
+                          const kondisiText = lokasi.kondisi || lokasi.kondisi_umum || '-';
+                          const catatanText = lokasi.catatan || '-';
+                          const latLonText = lokasi.latitude + ', ' + lokasi.longitude || '-';
+
+                          const kondisiHtml = escapeHtml(kondisiText).replace(/\r?\n/g, '<br>');
+                          const catatanHtml = escapeHtml(catatanText).replace(/\r?\n/g, '<br>');
+
+                          L.marker([lat, lon], { icon: icon })
+                              .addTo(markerLayerGroup)
+                              .bindPopup(
+                                  `<div style="min-width:270px;">
+                                      <div style="display:flex;gap:10px;align-items:flex-start;">
+                                          ${photoHtml}
+                                          <div style="flex:1;">
+                                              <div style="font-weight:700;line-height:1.1;">
+                                                  <span class="text-primary">${lokasi.jenis_lokasi || '-'}</span>
+                                              </div>
+                                              <div style="margin-top:2px;">${kabkotaText}</div>
+
+                                              <div style="margin-top:6px;">
+                                                  <small class="text-muted">ID Lokasi:</small>
+                                                  <small><b>${idLokasiText}</b></small>
+                                              </div>
+                                              <div style="margin-top:2px;">
+                                                  <small class="text-muted">Nama Lokasi:</small>
+                                                  <small><b>${namaLokasiText}</b></small>
+                                              </div>
+
+                                              <div style="margin-top:6px;">
+                                                  <small class="text-muted">Status:</small>
+                                                  <small><b>${statusLokasiText}</b></small>
+                                                  <small class="text-muted"> | Akses:</small>
+                                                  <small><b>${aksesText}</b></small>
+                                                  <small class="text-muted"> | Kondisi:</small>
+                                                  <small><b>${kondisiHtml}</b></small>
+                                              </div>
+
+                                              <div style="margin-top:2px;">
+                                                  <small class="text-muted">Koordinat:</small>
+                                                  <small><b>${latLonText}</b></small>
+                                              </div>
+
+                                              <div style="margin-top:6px;">
+                                                  <small class="text-muted">Catatan:</small><br>
+                                                  <small>${catatanHtml}</small>
+                                              </div>
+                                          </div>
+                                      </div>
+                                  </div>`
+                              );
+                      }
+                  });
+              }
+
+
+
+              // ==============================================================================
+              // FILTER LAYER (CHECKLIST) - Lokasi, Relawan, Permintaan, Asesmen
+              // ==============================================================================
+              const ckLokPosko = document.getElementById('toggleLokasiPosko');
+              const ckLokGudang = document.getElementById('toggleLokasiGudang');
+              const ckLokStarlink = document.getElementById('toggleLokasiStarlink');
+              const ckLokJembatanRusak = document.getElementById('toggleLokasiJembatanRusak');
+              const ckLokJalanPutus = document.getElementById('toggleLokasiJalanPutus');
+              const ckLokTitikLongsor = document.getElementById('toggleLokasiTitikLongsor');
+              const ckLokSumurBor = document.getElementById('toggleLokasiSumurBor');
+              const ckLokLain = document.getElementById('toggleLokasiLain');
+
+              const ckRelawanLok = document.getElementById('toggleLokasiRelawan');
+
+              const ckPermintaan = document.getElementById('togglePermintaanLogistik');
+              const ckPermUsulan = document.getElementById('togglePermintaanUsulan');
+              const ckPermDiproses = document.getElementById('togglePermintaanDiproses');
+              const ckPermDikirim = document.getElementById('togglePermintaanDikirim');
+              const ckPermDiterima = document.getElementById('togglePermintaanDiterima');
+              const ckPermDitolak = document.getElementById('togglePermintaanDitolak');
+              // const ckPermSelesai = document.getElementById('togglePermintaanSelesai');
+
+
+              // Master checkbox + collapse body elements (agar filter bisa di-hide/show dan parent mengikuti child)
+              const ckLokAll = document.getElementById('toggleLokasiAll');
+              const ckRelAll = document.getElementById('toggleRelawanAll');
+
+              const elAsesmenBody = document.getElementById('filterAsesmenBody');
+              const elLokasiBody = document.getElementById('filterLokasiBody');
+              const elRelawanBody = document.getElementById('filterRelawanBody');
+              const elPermintaanBody = document.getElementById('filterPermintaanBody');
+
+              let _isSyncingFilter = false;
+
+              function _setCollapseVisible(el, visible){
+                  if (!el) return;
+                  try {
+                      if (window.bootstrap && bootstrap.Collapse) {
+                          const inst = bootstrap.Collapse.getOrCreateInstance(el, { toggle: false });
+                          if (visible) inst.show(); else inst.hide();
+                      } else {
+                          el.style.display = visible ? '' : 'none';
+                      }
+                  } catch(e) {
+                      el.style.display = visible ? '' : 'none';
+                  }
+              }
+
+              function _setChildrenState(children, checked, disabled){
+                  (children || []).forEach(ch => {
+                      if (!ch) return;
+                      if (typeof checked === 'boolean') ch.checked = checked;
+                      if (typeof disabled === 'boolean') ch.disabled = disabled;
+                  });
+              }
+
+              function _anyChecked(children){
+                  return (children || []).some(ch => ch && ch.checked);
+              }
+
+              function syncGroupFromMaster(masterEl, bodyEl, children, onApply){
+                  if (_isSyncingFilter) return;
+                  _isSyncingFilter = true;
+
+                  const masterOn = masterEl ? !!masterEl.checked : true;
+                  if (!masterOn) {
+                      _setChildrenState(children, false, false);
+                      _setCollapseVisible(bodyEl, false);
+                  } else {
+                      _setChildrenState(children, undefined, false);
+                      if (!_anyChecked(children)) _setChildrenState(children, true, false);
+                      _setCollapseVisible(bodyEl, true);
+                  }
+
+                  _isSyncingFilter = false;
+                  if (onApply) onApply();
+              }
+
+              function syncMasterFromChildren(masterEl, bodyEl, children, onApply){
+                  if (_isSyncingFilter) return;
+                  _isSyncingFilter = true;
+
+                  const any = _anyChecked(children);
+                  if (masterEl) masterEl.checked = any;
+                  _setChildrenState(children, undefined, false);
+                  _setCollapseVisible(bodyEl, any);
+
+                  _isSyncingFilter = false;
+                  if (onApply) onApply();
+              }
+
+              function getLokasiFilterState(){
+                  return {
+                      showPosko: ckLokPosko ? ckLokPosko.checked : true,
+                      showGudang: ckLokGudang ? ckLokGudang.checked : true,
+                      showStarlink: ckLokStarlink ? ckLokStarlink.checked : true,
+                      showJembatanRusak: ckLokJembatanRusak ? ckLokJembatanRusak.checked : true,
+                      showJalanPutus: ckLokJalanPutus ? ckLokJalanPutus.checked : true,
+                      showTitikLongsor: ckLokTitikLongsor ? ckLokTitikLongsor.checked : true,
+                      showSumurBor: ckLokSumurBor ? ckLokSumurBor.checked : true,
+                      showLain: ckLokLain ? ckLokLain.checked : true,
+                  };
+              }
+
+              function applyLokasiFilter(){
+                  const fs = getLokasiFilterState();
+                  renderMarkers(dataLokasi, fs);
+              }
+
+              function applyRelawanVisibility(){
+                  const visible = ckRelawanLok ? ckRelawanLok.checked : true;
+                  setLayerVisible(relawanLayerGroup, visible);
+              }
+
+              function _permintaanAllowedMap(){
+                  const m = {
+                      usulan: ckPermUsulan ? ckPermUsulan.checked : true,
+                      diproses: ckPermDiproses ? ckPermDiproses.checked : true,
+                      dikirim: ckPermDikirim ? ckPermDikirim.checked : true,
+                      diterima: ckPermDiterima ? ckPermDiterima.checked : true,
+                      ditolak: ckPermDitolak ? ckPermDitolak.checked : true,
+                      // selesai: ckPermSelesai ? ckPermSelesai.checked : true,
+                  };
+                  return m;
+              }
+
+              function applyPermintaanVisibility(){
+                  const master = ckPermintaan ? ckPermintaan.checked : true;
+                  if (!master) {
+                      setLayerVisible(permintaanLayerGroup, false);
+                      return;
+                  }
+
+                  const allowed = _permintaanAllowedMap();
+                  const filtered = (permintaanLogistik || []).filter(r => {
+                      const k = _permintaanStatusKey(r.status_permintaan || r.status || 'Usulan');
+                      return allowed[k] !== false;
+                  });
+
+                  renderPermintaanMarkers(filtered);
+                  setLayerVisible(permintaanLayerGroup, true);
+              }
+
+              // Event listeners
+              // Lokasi (master + child)
+              if (ckLokAll) ckLokAll.addEventListener('change', () => syncGroupFromMaster(ckLokAll, elLokasiBody, [ckLokPosko, ckLokGudang, ckLokStarlink,ckLokJembatanRusak, ckLokJalanPutus, ckLokTitikLongsor, ckLokSumurBor, ckLokLain], applyLokasiFilter));
+              [ckLokPosko, ckLokGudang,ckLokStarlink,ckLokJembatanRusak, ckLokJalanPutus, ckLokTitikLongsor, ckLokSumurBor, ckLokLain].forEach(el => {
+                  if (el) el.addEventListener('change', () => syncMasterFromChildren(ckLokAll, elLokasiBody, [ckLokPosko, ckLokGudang,ckLokStarlink,ckLokJembatanRusak, ckLokJalanPutus, ckLokTitikLongsor, ckLokSumurBor,  ckLokLain], applyLokasiFilter));
+              });
+
+              // Relawan
+              if (ckRelAll) ckRelAll.addEventListener('change', () => syncGroupFromMaster(ckRelAll, elRelawanBody, [ckRelawanLok], applyRelawanVisibility));
+              if (ckRelawanLok) ckRelawanLok.addEventListener('change', () => syncMasterFromChildren(ckRelAll, elRelawanBody, [ckRelawanLok], applyRelawanVisibility));
+
+              // Permintaan (master + status)
+              if (ckPermintaan) ckPermintaan.addEventListener('change', () => syncGroupFromMaster(ckPermintaan, elPermintaanBody, [ckPermUsulan, ckPermDiproses, ckPermDikirim, ckPermDiterima, ckPermDitolak], applyPermintaanVisibility));
+              [ckPermUsulan, ckPermDiproses, ckPermDikirim, ckPermDiterima, ckPermDitolak].forEach(el => {
+                  if (el) el.addEventListener('change', () => syncMasterFromChildren(ckPermintaan, elPermintaanBody, [ckPermUsulan, ckPermDiproses, ckPermDikirim, ckPermDiterima, ckPermDitolak], applyPermintaanVisibility));
+              });
+
+              // Asesmen (master + child)
+// NOTE: termasuk Asesmen Oxfam (RIEA) agar sinkron dengan master Asesmen
+const _asesmenChildren = [ckKes, ckPen, ckPsi, ckInf, ckWas, ckKond, ckOxfam];
+
+if (ckAsesmenAll) {
+  ckAsesmenAll.addEventListener("change", () =>
+    syncGroupFromMaster(ckAsesmenAll, elAsesmenBody, _asesmenChildren, applyAsesmenVisibility)
+  );
+}
+
+_asesmenChildren.forEach((el) => {
+  if (el) {
+    el.addEventListener("change", () =>
+      syncMasterFromChildren(ckAsesmenAll, elAsesmenBody, _asesmenChildren, applyAsesmenVisibility)
+    );
+  }
+});
+
+              // Initial sync + render
+              syncGroupFromMaster(ckAsesmenAll, elAsesmenBody, _asesmenChildren, applyAsesmenVisibility);
+              syncGroupFromMaster(ckLokAll, elLokasiBody, [ckLokPosko, ckLokGudang, ckLokStarlink,ckLokJembatanRusak, ckLokJalanPutus, ckLokTitikLongsor, ckLokSumurBor, ckLokLain], applyLokasiFilter);
+              syncGroupFromMaster(ckRelAll, elRelawanBody, [ckRelawanLok], applyRelawanVisibility);
+              syncGroupFromMaster(ckPermintaan, elPermintaanBody, [ckPermUsulan, ckPermDiproses, ckPermDikirim, ckPermDiterima, ckPermDitolak], applyPermintaanVisibility);
+
+              // Render marker awal
+              applyLokasiFilter();
+              renderRelawanMarkers(relawanLokasi);
+              applyRelawanVisibility();
+              applyPermintaanVisibility();
+
+              // Jika ada parameter URL untuk fokus ke lokasi, tambahkan marker dan popup
+              if (urlLat && urlLon) {
+                const lat = parseFloat(urlLat);
+                const lon = parseFloat(urlLon);
+                if (!isNaN(lat) && !isNaN(lon)) {
+                  // Tunggu sebentar agar map sudah ter-render
+                  setTimeout(() => {
+                    // Buat marker khusus untuk lokasi yang difokuskan
+                    const focusMarker = L.marker([lat, lon], {
+                      icon: L.divIcon({
+                        className: 'custom-marker-icon',
+                        html: `
+                          <div style="
+                            background-color: #ef4444;
+                            width: 50px;
+                            height: 50px;
+                            border-radius: 50% 50% 50% 0;
+                            transform: rotate(-45deg);
+                            display: flex;
+                            align-items: center;
+                            justify-content: center;
+                            box-shadow: 0 4px 15px rgba(239, 68, 68, 0.5);
+                            border: 4px solid white;
+                            animation: pulse 2s infinite;
+                          ">
+                            <i class="fas fa-map-pin" style="
+                              color: white;
+                              transform: rotate(45deg);
+                              font-size: 20px;
+                            "></i>
+                          </div>
+                        `,
+                        iconSize: [50, 50],
+                        iconAnchor: [25, 50],
+                        popupAnchor: [0, -50]
+                      })
+                    }).addTo(map);
+
+                    // Buka popup
+                    focusMarker.bindPopup(`
+                      <div style="text-align: center; padding: 10px;">
+                        <h6 style="margin: 0 0 8px 0; font-weight: 700; color: #ef4444;">
+                          <i class="fas fa-map-marker-alt"></i> Lokasi Asesmen
+                        </h6>
+                        <p style="margin: 0; font-size: 12px; color: #64748b;">
+                          Lat: ${lat.toFixed(6)}<br>
+                          Lon: ${lon.toFixed(6)}
+                        </p>
+                      </div>
+                    `).openPopup();
+
+                    // Tambahkan animasi pulse
+                    const style = document.createElement('style');
+                    style.textContent = `
+                      @keyframes pulse {
+                        0%, 100% {
+                          transform: rotate(-45deg) scale(1);
+                          opacity: 1;
+                        }
+                        50% {
+                          transform: rotate(-45deg) scale(1.1);
+                          opacity: 0.8;
+                        }
+                      }
+                    `;
+                    document.head.appendChild(style);
+                  }, 500);
+                }
+              }
+              // ==============================================================================
+              // FUNGSI REFRESH MAP
+              // ==============================================================================
+              const refreshMapBtn = document.getElementById('refreshMapBtn');
+              let isRefreshingMap = false;
+
+              function applyMapLayers(result, reloadKabkota) {
+                  // Update data
+                  dataLokasi = result.data_lokasi;
+                  relawanLokasi = result.relawan_lokasi || [];
+                  statusData = result.status_map;
+
+                  if (reloadKabkota) {
+                      // Update status wilayah di peta (reload kab/kota layer)
+                      // Hapus layer kab/kota lama jika ada (jangan hapus semua GeoJSON agar fitur lain tidak terganggu)
+                      try {
+                          if (kabkotaLayer && map.hasLayer(kabkotaLayer)) {
+                              map.removeLayer(kabkotaLayer);
+                          }
+                          kabkotaLayer = null;
+                      } catch (e) {
+                          console.warn('Gagal remove kabkotaLayer:', e);
+                      }
+
+                      // Reload GeoJSON kab/kota dengan status terbaru
+                      fetch(KABKOTA_GEOJSON_URL)
+                          .then(res => res.json())
+                          .then(geoData => {
+                              kabkotaLayer = L.geoJSON(geoData, {
+                                  pane: 'kabkotaPane',
+                                  style: function (feature) {
+                                      let info = getFeatureData(feature);
+                                      return {
+                                          fillColor: getColorByStatus(info.status),
+                                          weight: 1,
+                                          opacity: 1,
+                                          color: 'white',
+                                          dashArray: '3',
+                                          fillOpacity: 0.7
+                                      };
+                                  },
+                                  onEachFeature: function (feature, layer) {
+                                      let info = getFeatureData(feature);
+                                      let statusColor = getColorByStatus(info.status);
+                                      let badgeClass = 'success';
+                                      let s = info.status.toLowerCase();
+                                      if (s.includes('tanggap') || s.includes('merah')) badgeClass = 'danger';
+                                      else if (s.includes('siaga') || s.includes('kuning')) badgeClass = 'warning';
+
+                                      layer.bindTooltip(`<b>${info.nama}</b>: ${info.status}`, { sticky: true, direction: 'top' });
+                                      layer.bindPopup(`
+                                          <div class="text-center">
+                                              <h6 class="mb-1 fw-bold">${info.nama}</h6>
+                                              <span class="badge bg-${badgeClass}">${info.status}</span>
+                                          </div>
+                                      `);
+
+                                      layer.on({
+                                          mouseover: function (e) {
+                                              var l = e.target;
+                                              l.setStyle({
+                                                  weight: 4,
+                                                  color: statusColor,
+                                                  dashArray: '',
+                                                  fillColor: 'white',
+                                                  fillOpacity: 0.2
+                                              });
+                                              if (!L.Browser.ie && !L.Browser.opera && !L.Browser.edge) l.bringToFront();
+                                          },
+                                          mouseout: function (e) {
+                                              var l = e.target;
+                                              l.setStyle({
+                                                  weight: 1,
+                                                  color: 'white',
+                                                  dashArray: '3',
+                                                  fillColor: statusColor,
+                                                  fillOpacity: 0.7
+                                              });
+                                          },
+                                          click: function (e) { this.openPopup(); }
+                                      });
+                                  }
+                              });
+
+                              kabkotaLayer.addTo(map);
+
+                              // Pastikan rule boundary tetap berlaku setelah refresh
+                              _syncBoundaryByZoom();
+                              if (map.getZoom() >= KELDESA_ZOOM_THRESHOLD) _scheduleLoadKelDesa();
+                          })
+                          .catch(e => console.error("Error reloading GeoJSON:", e));
+                  }
+
+                  // Update marker lokasi (mengikuti filter layer)
+                  applyLokasiFilter();
+                  renderRelawanMarkers(relawanLokasi);
+                  applyRelawanVisibility();
+
+                  permintaanLogistik = Array.isArray(result.permintaan_logistik) ? result.permintaan_logistik : (result.permintaan_logistik || []);
+                  applyPermintaanVisibility();
+
+              // Asemen buffers (kesehatan & pendidikan)
+                  asesmenKesehatan = Array.isArray(result.asesmen_kesehatan) ? result.asesmen_kesehatan : (result.asesmen_kesehatan || []);
+                  asesmenPendidikan = Array.isArray(result.asesmen_pendidikan) ? result.asesmen_pendidikan : (result.asesmen_pendidikan || []);
+                  asesmenPsikososial = Array.isArray(result.asesmen_psikososial) ? result.asesmen_psikososial : (result.asesmen_psikososial || []);
+                  asesmenInfrastruktur = Array.isArray(result.asesmen_infrastruktur) ? result.asesmen_infrastruktur : (result.asesmen_infrastruktur || []);
+                  asesmenWash = Array.isArray(result.asesmen_wash) ? result.asesmen_wash : (result.asesmen_wash || []);
+                  asesmenKondisi = Array.isArray(result.asesmen_kondisi) ? result.asesmen_kondisi : (result.asesmen_kondisi || []);
+                  asesmenOxfam = Array.isArray(result.asesmen_oxfam) ? result.asesmen_oxfam : (result.asesmen_oxfam || []);
+                  renderAsesmenBuffers();
+                  applyAsesmenVisibility();
+              }
+
+              async function refreshMap() {
+                  if (isRefreshingMap) return;
+
+                  isRefreshingMap = true;
+                  const originalHtml = refreshMapBtn.innerHTML;
+                  refreshMapBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Refreshing...';
+                  refreshMapBtn.disabled = true;
+
+                  try {
+                      const result = await fetchMapLayers(false);
+
+                      if (result.success) {
+                          applyMapLayers(result, true);
+                          // Tampilkan notifikasi sukses (centered)
+                          showNotification('Map berhasil di-refresh!', 'success', true);
+                      } else {
+                          showNotification('Gagal refresh map: ' + (result.error || 'Unknown error'), 'danger');
+                      }
+                  } catch (error) {
+                      console.error('Error refreshing map:', error);
+                      showNotification('Error saat refresh map. Silakan coba lagi.', 'danger');
+                  } finally {
+                      isRefreshingMap = false;
+                      refreshMapBtn.innerHTML = originalHtml;
+                      refreshMapBtn.disabled = false;
+                  }
+              }
+
+              // Data awal layer (diambil sejak awal script, lihat MAP_DATA_READY)
+              MAP_DATA_READY
+                  .then(result => applyMapLayers(result, false))
+                  .catch(error => {
+                      console.error('Error memuat layer peta:', error);
+                      showNotification('Gagal memuat data peta. Silakan tekan Refresh.', 'danger');
+                  });
+
+              refreshMapBtn.addEventListener('click', refreshMap);
+
+              // ==============================================================================
+              // FUNGSI NOTIFIKASI
+              // ==============================================================================
+              function showNotification(message, type = 'info', center = false) {
+                  const alertDiv = document.createElement('div');
+                  alertDiv.className = `alert alert-${type} alert-dismissible fade show shadow`;
+                  if (center) {
+                      alertDiv.style.cssText = 'position: fixed; top: 70px; left: 50%; transform: translateX(-50%); z-index: 10000; min-width: 300px; max-width: 700px; text-align: center;';
+                  } else {
+                      alertDiv.style.cssText = 'position: fixed; top: 70px; left: 15px; z-index: 10000; min-width: 300px; max-width: 400px;';
+                  }
+                  alertDiv.innerHTML = `
+                      <i class="fas fa-${type === 'success' ? 'check-circle' : type === 'danger' ? 'exclamation-circle' : 'info-circle'} me-2"></i>
+                      ${message}
+                      <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+                  `;
+                  document.body.appendChild(alertDiv);
+
+                  setTimeout(() => {
+                      if (alertDiv.parentNode) {
+                          alertDiv.remove();
+                      }
+                  }, 3000);
+              }
+
+              // ==============================================================================
+              // LOGIKA ABSENSI LOKASI RELAWAN (GEOLOCATION API)
+              // ==============================================================================
+              const btnSubmitAbsensi = document.getElementById('btn-submit-absensi');
+              const absensiLat = document.getElementById('absensi_lat');
+              const absensiLon = document.getElementById('absensi_lon');
+              const currentLocationSpan = document.getElementById('current-location');
+              const refreshLocationBtn = document.getElementById('refreshLocationBtn');
+
+               // ====================== MINI MAP ABSENSI (KOREKSI TITIK) ======================
+              let absensiMiniMap = null;
+              let absensiMiniMarker = null;
+              let absensiGeoWatchId = null;
+              let absensiGeoTimer = null;
+
+              function initAbsensiMiniMap() {
+                  const el = document.getElementById('absensiMiniMap');
+                  if (!el) return;
+                  if (absensiMiniMap) return;
+
+                  absensiMiniMap = L.map('absensiMiniMap', {
+                      zoomControl: true,
+                      attributionControl: false,
+                      scrollWheelZoom: false
+                  }).setView([2.3693, 99.0763], 9);
+
+                  L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+                      attribution: '&copy; OpenStreetMap contributors'
+                  }).addTo(absensiMiniMap);
+
+                  // Klik peta -> pindah pin (manual koreksi)
+                  absensiMiniMap.on('click', function (e) {
+                      setAbsensiPoint(e.latlng.lat, e.latlng.lng, { manual: true });
+                      showNotification('Titik absensi diperbarui (klik peta).', 'success', true);
+                  });
+              }
+
+              function stopAbsensiGeoWatch() {
+                  if (absensiGeoWatchId !== null) {
+                      try { navigator.geolocation.clearWatch(absensiGeoWatchId); } catch (e) {}
+                      absensiGeoWatchId = null;
+                  }
+                  if (absensiGeoTimer) {
+                      clearTimeout(absensiGeoTimer);
+                      absensiGeoTimer = null;
+                  }
+              }
+
+              function setAbsensiPoint(lat, lon, opts = {}) {
+                  const isManual = !!opts.manual;
+                  const accuracy = typeof opts.accuracy === 'number' ? opts.accuracy : null;
+
+                  absensiLat.value = lat;
+                  absensiLon.value = lon;
+
+                  const accHtml = (accuracy !== null)
+                      ? `<br>Akurasi: ±${Math.round(accuracy)}m`
+                      : (isManual ? `<br><span class="text-muted">Titik dikoreksi manual</span>` : '');
+
+                  currentLocationSpan.innerHTML = `
+                      <i class="fas fa-check-circle"></i> Lokasi ditemukan!<br>
+                      <small>Lat: ${lat.toFixed(6)}, Lon: ${lon.toFixed(6)}${accHtml}</small>
+                  `;
+                  currentLocationSpan.classList.remove('text-danger', 'text-primary');
+                  currentLocationSpan.classList.add('text-success');
+                  btnSubmitAbsensi.disabled = false;
+
+                  initAbsensiMiniMap();
+                  if (absensiMiniMap) {
+                      if (!absensiMiniMarker) {
+                          absensiMiniMarker = L.marker([lat, lon], { draggable: true }).addTo(absensiMiniMap);
+
+                          // Geser pin -> update koordinat (manual koreksi)
+                          absensiMiniMarker.on('dragend', function (ev) {
+                              const p = ev.target.getLatLng();
+                              setAbsensiPoint(p.lat, p.lng, { manual: true });
+                              showNotification('Titik absensi diperbarui (geser pin).', 'success', true);
+                          });
+                      } else {
+                          absensiMiniMarker.setLatLng([lat, lon]);
+                      }
+
+                      // Zoom menyesuaikan (kalau akurasi sangat besar, jangan zoom terlalu dekat)
+                      const targetZoom = (accuracy !== null && accuracy <= 1000) ? 17 : 14;
+                      absensiMiniMap.setView([lat, lon], Math.max(absensiMiniMap.getZoom(), targetZoom), { animate: true });
+                  }
+              }
+
+              // Best-effort: ambil beberapa update lokasi, pilih yang akurasinya paling kecil.
+              // Catatan: di laptop/PC akurasi bisa sangat besar karena bukan GPS (lebih ke estimasi jaringan).
+              function getBestAbsensiLocation(opts) {
+                  opts = opts || {};
+                  const targetAcc = typeof opts.targetAccuracy === 'number' ? opts.targetAccuracy : 50;
+                  const maxWaitMs = typeof opts.maxWaitMs === 'number' ? opts.maxWaitMs : 20000;
+                  const onUpdate = typeof opts.onUpdate === 'function' ? opts.onUpdate : null;
+                  const onDone = typeof opts.onDone === 'function' ? opts.onDone : null;
+
+                  let bestPos = null;
+                  let lastErr = null;
+                  let done = false;
+
+                  function accOf(pos) {
+                      return pos && pos.coords && typeof pos.coords.accuracy === 'number'
+                          ? pos.coords.accuracy
+                          : 9999999;
+                  }
+
+                  function consider(pos) {
+                      if (!pos || !pos.coords) return;
+                      if (!bestPos || accOf(pos) < accOf(bestPos)) bestPos = pos;
+                      if (onUpdate) onUpdate(bestPos);
+                      if (accOf(pos) <= targetAcc) finish();
+                  }
+
+                  function fail(err) {
+                      lastErr = err || lastErr;
+                  }
+
+                  function finish() {
+                      if (done) return;
+                      done = true;
+                      stopAbsensiGeoWatch();
+                      if (onDone) onDone(bestPos, lastErr);
+                  }
+
+                  stopAbsensiGeoWatch();
+                  absensiGeoTimer = setTimeout(finish, maxWaitMs);
+
+                  // 1) cepat: high accuracy
+                  try {
+                      navigator.geolocation.getCurrentPosition(
+                          consider,
+                          fail,
+                          { enableHighAccuracy: true, timeout: Math.min(12000, maxWaitMs), maximumAge: 0 }
+                      );
+                  } catch (e) {}
+
+                  // 2) cepat: network-based (kadang lebih baik di laptop)
+                  try {
+                      navigator.geolocation.getCurrentPosition(
+                          consider,
+                          fail,
+                          { enableHighAccuracy: false, timeout: Math.min(12000, maxWaitMs), maximumAge: 0 }
+                      );
+                  } catch (e) {}
+
+                  // 3) watchPosition untuk cari yang paling akurat
+                  try {
+                      absensiGeoWatchId = navigator.geolocation.watchPosition(
+                          consider,
+                          fail,
+                          { enableHighAccuracy: true, maximumAge: 0 }
+                      );
+                  } catch (e) {}
+              }
+
+
+              // Fungsi untuk mendapatkan lokasi dengan retry
+              function getCurrentLocation(retryCount = 0, onComplete = null) {
+                  const maxRetries = 3;
+
+                  initAbsensiMiniMap();
+
+                  if (!navigator.geolocation) {
+                      currentLocationSpan.innerHTML = '<i class="fas fa-exclamation-triangle"></i> Geolocation tidak didukung. Silakan klik peta untuk set titik manual.';
+                      currentLocationSpan.classList.remove('text-success', 'text-primary');
+                      currentLocationSpan.classList.add('text-danger');
+                      btnSubmitAbsensi.disabled = true;
+                      if (onComplete) onComplete();
+                      showNotification('Geolocation tidak didukung. Klik peta untuk set titik manual.', 'danger');
+                      return;
+                  }
+
+                  // Loading state
+                  currentLocationSpan.innerHTML = '<i class="fas fa-sync fa-spin"></i> Mencari lokasi (akurasi terbaik)...';
+                  currentLocationSpan.classList.remove('text-success', 'text-danger');
+                  currentLocationSpan.classList.add('text-primary');
+                  btnSubmitAbsensi.disabled = true;
+
+                  // Reset koordinat
+                  absensiLat.value = '';
+                  absensiLon.value = '';
+
+                  getBestAbsensiLocation({
+                      targetAccuracy: 50,
+                      maxWaitMs: 20000,
+                      onUpdate: function (bestPos) {
+                          if (!bestPos || !bestPos.coords) return;
+
+                          const lat = bestPos.coords.latitude;
+                          const lon = bestPos.coords.longitude;
+                          const accuracy = bestPos.coords.accuracy;
+
+                          if (isNaN(lat) || isNaN(lon) || lat === 0 || lon === 0) return;
+
+                          // Update UI + mini map + marker
+                          setAbsensiPoint(lat, lon, { accuracy: accuracy, manual: false });
+                      },
+                      onDone: function (bestPos, err) {
+                          if (bestPos && bestPos.coords) {
+                              const lat = bestPos.coords.latitude;
+                              const lon = bestPos.coords.longitude;
+                              const accuracy = bestPos.coords.accuracy;
+
+                              setAbsensiPoint(lat, lon, { accuracy: accuracy, manual: false });
+
+                              // Jika akurasi sangat besar, arahkan user koreksi manual
+                              if (accuracy && accuracy > 5000) {
+                                  showNotification('Akurasi GPS rendah. Silakan geser pin/klik peta untuk koreksi titik sebelum submit.', 'warning', true);
+                              } else {
+                                  showNotification(`Lokasi berhasil diperbarui! Akurasi: ±${Math.round(accuracy)}m`, 'success', true);
+                              }
+
+                              if (onComplete) onComplete();
+                              return;
+                          }
+
+                          // Kalau gagal total -> retry atau arahkan ke manual map
+                          let errorMessage = '';
+                          let shouldRetry = false;
+                          let notificationMsg = '';
+
+                          if (err && err.code === err.PERMISSION_DENIED) {
+                              errorMessage = '<i class="fas fa-ban"></i> Akses lokasi ditolak. Anda masih bisa klik peta untuk set titik manual.';
+                              notificationMsg = 'Akses lokasi ditolak. Klik peta untuk set titik manual.';
+                          } else if (err && err.code === err.POSITION_UNAVAILABLE) {
+                              errorMessage = '<i class="fas fa-question-circle"></i> Informasi lokasi tidak tersedia. Anda bisa klik peta untuk set titik manual.';
+                              notificationMsg = 'Lokasi tidak tersedia. Klik peta untuk set titik manual.';
+                              shouldRetry = retryCount < maxRetries;
+                          } else if (err && err.code === err.TIMEOUT) {
+                              errorMessage = '<i class="fas fa-clock"></i> Waktu tunggu habis. Mencoba lagi...';
+                              notificationMsg = 'Waktu tunggu habis. Mencoba lagi...';
+                              shouldRetry = retryCount < maxRetries;
+                          } else {
+                              errorMessage = '<i class="fas fa-exclamation-triangle"></i> Gagal mengambil lokasi. Anda bisa klik peta untuk set titik manual.';
+                              notificationMsg = 'Gagal mengambil lokasi. Klik peta untuk set titik manual.';
+                              shouldRetry = retryCount < maxRetries;
+                          }
+
+                          currentLocationSpan.innerHTML = errorMessage;
+                          currentLocationSpan.classList.remove('text-success', 'text-primary');
+                          currentLocationSpan.classList.add('text-danger');
+                          btnSubmitAbsensi.disabled = true;
+
+                          console.error('Geolocation error:', {
+                              code: err ? err.code : null,
+                              message: err ? err.message : null,
+                              retryCount: retryCount
+                          });
+
+                          if (shouldRetry) {
+                              setTimeout(() => {
+                                  currentLocationSpan.innerHTML = `<i class="fas fa-sync fa-spin"></i> Mencoba lagi... (${retryCount + 1}/${maxRetries})`;
+                                  getCurrentLocation(retryCount + 1, onComplete);
+                              }, 2000);
+                          } else {
+                              if (onComplete) onComplete();
+                              if (notificationMsg) showNotification(notificationMsg, 'danger');
+                          }
+                      }
+                  });
+              }
+
+              // Event listener untuk tombol refresh lokasi
+              if (refreshLocationBtn) {
+                  refreshLocationBtn.addEventListener('click', function(e) {
+                      e.preventDefault();
+                      e.stopPropagation();
+
+                      // Tampilkan loading state
+                      const originalHtml = refreshLocationBtn.innerHTML;
+                      refreshLocationBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Refreshing...';
+                      refreshLocationBtn.disabled = true;
+
+                      // Update status lokasi
+                      currentLocationSpan.innerHTML = '<i class="fas fa-sync fa-spin"></i> Mencari lokasi...';
+                      currentLocationSpan.classList.remove('text-success', 'text-danger');
+                      currentLocationSpan.classList.add('text-primary');
+
+                      // Reset koordinat
+                      absensiLat.value = '';
+                      absensiLon.value = '';
+                      btnSubmitAbsensi.disabled = true;
+
+                      // Panggil fungsi getCurrentLocation dengan callback untuk restore button
+                      getCurrentLocation(0, function() {
+                          // Restore button setelah selesai
+                          refreshLocationBtn.innerHTML = originalHtml;
+                          refreshLocationBtn.disabled = false;
+                      });
+                  });
+              }
+
+              // Panggil Geolocation saat modal absensi dibuka
+              document.getElementById('absensiModal').addEventListener('show.bs.modal', function () {
+                  currentLocationSpan.innerHTML = '<i class="fas fa-sync fa-spin"></i> Mencari lokasi...';
+                  currentLocationSpan.classList.remove('text-success', 'text-danger');
+                  currentLocationSpan.classList.add('text-primary');
+                  btnSubmitAbsensi.disabled = true;
+
+                  // Reset nilai koordinat
+                  absensiLat.value = '';
+                  absensiLon.value = '';
+
+                  // Mulai proses mendapatkan lokasi
+                  getCurrentLocation();
+              });
+
+              // Pastikan mini map terbaca ukurannya saat modal sudah tampil
+              document.getElementById('absensiModal').addEventListener('shown.bs.modal', function () {
+                  initAbsensiMiniMap();
+                  if (absensiMiniMap) absensiMiniMap.invalidateSize();
+              });
+
+              // Stop watcher GPS saat modal ditutup
+              document.getElementById('absensiModal').addEventListener('hidden.bs.modal', function () {
+                  stopAbsensiGeoWatch();
+              });
+
+
+              // Validasi form sebelum submit
+              document.getElementById('absensiForm').addEventListener('submit', function(e) {
+                  const lat = absensiLat.value;
+                  const lon = absensiLon.value;
+
+                  if (!lat || !lon || lat === '' || lon === '') {
+                      e.preventDefault();
+                      currentLocationSpan.innerHTML = '<i class="fas fa-exclamation-triangle"></i> Lokasi belum ditemukan. Silakan tunggu atau refresh halaman.';
+                      currentLocationSpan.classList.remove('text-success', 'text-primary');
+                      currentLocationSpan.classList.add('text-danger');
+                      btnSubmitAbsensi.disabled = true;
+
+                      // Coba lagi mendapatkan lokasi
+                      getCurrentLocation();
+                      return false;
+                  }
+
+                  // Validasi koordinat valid (bukan 0,0)
+                  if (parseFloat(lat) === 0 && parseFloat(lon) === 0) {
+                      e.preventDefault();
+                      currentLocationSpan.innerHTML = '<i class="fas fa-exclamation-triangle"></i> Koordinat tidak valid. Silakan coba lagi.';
+                      currentLocationSpan.classList.remove('text-success', 'text-primary');
+                      currentLocationSpan.classList.add('text-danger');
+                      btnSubmitAbsensi.disabled = true;
+                      return false;
+                  }
+              });
+
+              // Carousel untuk Data Bencana & Korban
+              (function () {
+                  const carousel = document.getElementById('bencanaCarousel');
+                  const pagination = document.getElementById('bencanaPagination');
+
+                  if (!carousel || !pagination) return;
+
+                  const slides = carousel.querySelectorAll('.bencana-slide');
+                  const totalSlides = slides.length;
+
+                  if (totalSlides === 0) return;
+
+                  let currentIndex = 0;
+
+                  // --- LOGIKA PAGINATION DOTS ---
+                  for (let i = 0; i < totalSlides; i++) {
+                      const dot = document.createElement('button');
+                      dot.className = 'bencana-pagination-dot';
+                      if (i === 0) dot.classList.add('active');
+                      dot.setAttribute('aria-label', `Slide ${i + 1}`);
+                      dot.addEventListener('click', () => {
+                          goToSlide(i);
+                          stopAutoPlay(); // Reset timer saat user interaksi manual
+                          startAutoPlay();
+                      });
+                      pagination.appendChild(dot);
+                  }
+
+                  // --- FUNGSI PINDAH SLIDE UTAMA ---
+                  function goToSlide(index) {
+                      // Logika looping (infinite loop effect)
+                      if (index < 0) {
+                          index = totalSlides - 1; // Ke slide terakhir
+                      } else if (index >= totalSlides) {
+                          index = 0; // Ke slide pertama
+                      }
+
+                      currentIndex = index;
+                      carousel.style.transform = `translateX(-${index * 100}%)`;
+
+                      // Update active dot
+                      const dots = pagination.querySelectorAll('.bencana-pagination-dot');
+                      dots.forEach((dot, i) => {
+                          dot.classList.toggle('active', i === index);
+                      });
+                  }
+
+                  // --- AUTO PLAY ---
+                  let autoPlayInterval;
+                  function startAutoPlay() {
+                      stopAutoPlay();
+                      autoPlayInterval = setInterval(() => {
+                          const nextIndex = currentIndex + 1;
+                          goToSlide(nextIndex);
+                      }, 4000);
+                  }
+
+                  function stopAutoPlay() {
+                      if (autoPlayInterval) {
+                          clearInterval(autoPlayInterval);
+                      }
+                  }
+
+                  if (totalSlides > 1) {
+                      startAutoPlay();
+                      const container = carousel.closest('.bencana-carousel-container');
+                      if (container) {
+                          container.addEventListener('mouseenter', stopAutoPlay);
+                          container.addEventListener('mouseleave', startAutoPlay);
+                      }
+                  }
+              })();
@@ -0,0 +1,72 @@
+// Sidebar: buka/tutup
+document.addEventListener("DOMContentLoaded", function () {
+  const sidebar = document.getElementById("sidebar");
+  const toggleBtn = document.getElementById("sidebarToggle");
+  const closeBtn = document.getElementById("sidebarClose");
+
+  // 1. Fungsi Buka Sidebar
+  toggleBtn.addEventListener("click", function (e) {
+    e.stopPropagation();
+    e.preventDefault();
+    sidebar.classList.add("active");
+    toggleBtn.style.visibility = "hidden";
+  });
+
+  // 2. Fungsi Tutup Sidebar (Tombol X)
+  closeBtn.addEventListener("click", function (e) {
+    e.stopPropagation();
+    sidebar.classList.remove("active");
+    setTimeout(() => {
+      toggleBtn.style.visibility = "visible";
+    }, 300);
+  });
+
+  // 3. Logic Tutup Sidebar saat klik di luar (Global Click)
+  document.addEventListener("click", function (e) {
+    if (sidebar.classList.contains("active")) {
+      const clickInsideSidebar = sidebar.contains(e.target);
+      const clickToggle = toggleBtn.contains(e.target);
+      const clickInsideModal = e.target.closest(".modal-content");
+      if (!clickInsideSidebar && !clickToggle && !clickInsideModal) {
+        sidebar.classList.remove("active");
+        setTimeout(() => {
+          toggleBtn.style.visibility = "visible";
+        }, 300);
+      }
+    }
+  });
+
+  // Sort datalist relawan A-Z (client-side)
+  const dl = document.getElementById("relawanDatalist");
+  if (dl) {
+    const opts = Array.from(dl.querySelectorAll("option"));
+    opts.sort((a, b) =>
+      (a.value || "").localeCompare(b.value || "", "id", {
+        sensitivity: "base",
+      })
+    );
+    dl.innerHTML = "";
+    opts.forEach((o) => dl.appendChild(o));
+  }
+
+  // Toggle show/hide kode akses (password)
+  const kodeAksesInput = document.getElementById("kode_akses");
+  const toggleKodeAksesBtn =
+    document.getElementById("toggleKodeAksesBtn");
+  if (kodeAksesInput && toggleKodeAksesBtn) {
+    toggleKodeAksesBtn.addEventListener("click", function () {
+      const isPassword =
+        (kodeAksesInput.getAttribute("type") || "password") ===
+        "password";
+      kodeAksesInput.setAttribute(
+        "type",
+        isPassword ? "text" : "password"
+      );
+      const icon = toggleKodeAksesBtn.querySelector("i");
+      if (icon) {
+        icon.classList.toggle("fa-eye", !isPassword);
+        icon.classList.toggle("fa-eye-slash", isPassword);
+      }
+    });
+  }
+});
@@ -0,0 +1,160 @@
+# static_assets.py
+# SATGAS USU Peduli - Aset statis ber-fingerprint (tanpa build step)
+# ---------------------------------------------------------------
+# - Saat startup: hash isi (sha256) tiap file JS/CSS/SVG di static/ ->
+#   manifest "js/map/map_core.js" -> "/assets/<hash>/js/map/map_core.js".
+# - Template memakai {{ asset_url('js/map/map_core.js') }}; URL berubah
+#   otomatis saat isi file berubah -> aman di-cache 1 tahun (immutable).
+# - Varian gzip (& brotli bila modul `brotli` terpasang) dibuat sekali di
+#   memori saat startup; response memilih sesuai Accept-Encoding.
+# - Hash di URL tidak cocok (mis. HTML lama di cache browser) -> file
+#   terbaru tetap dikirim tapi tanpa cache panjang.
+# - Mode debug / ASSET_RELOAD=1: file yang berubah di-hash ulang saat dipakai.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from flask import Response, abort, request, url_for
+
+try:
+    import brotli  # type: ignore
+except Exception:
+    brotli = None
+
+# ==========================
+# CONFIG
+# ==========================
+ASSET_EXTENSIONS = (".js", ".css", ".svg")
+ASSET_SKIP_DIRS = ("data",)  # static/data: GeoJSON/CSV di-generate saat runtime
+ASSET_MIN_COMPRESS = 1024
+ASSET_MAX_AGE = 365 * 24 * 3600
+ASSET_RELOAD = str(os.environ.get("ASSET_RELOAD", "0")).strip().lower() in ("1", "true", "yes")
+
+_LOCK = threading.Lock()
+
+
+class Asset:
+    """1 file statis + varian terkompresi (semua di memori)."""
+
+    __slots__ = ("path", "mtime", "digest", "mimetype", "variants")
+
+    def __init__(self, path: Path):
+        data = path.read_bytes()
+        self.path = path
+        self.mtime = path.stat().st_mtime
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        if self.mimetype.startswith("text/") or self.mimetype.endswith("javascript"):
+            self.mimetype += "; charset=utf-8"
+        self.variants: Dict[str, bytes] = {"identity": data}
+        if len(data) >= ASSET_MIN_COMPRESS:
+            gz = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gz) < len(data):
+                self.variants["gzip"] = gz
+            if brotli is not None:
+                try:
+                    br = brotli.compress(data, quality=11)
+                    if len(br) < len(data):
+                        self.variants["br"] = br
+                except Exception as e:
+                    print(f"[ASSET] brotli gagal {path.name}: {e}")
+
+
+# rel path (posix, relatif ke static/) -> Asset
+_MANIFEST: Dict[str, Asset] = {}
+
+
+def build_manifest(static_dir: Path) -> Dict[str, Asset]:
+    manifest: Dict[str, Asset] = {}
+    for p in sorted(static_dir.rglob("*")):
+        if not p.is_file() or p.suffix.lower() not in ASSET_EXTENSIONS:
+            continue
+        rel = p.relative_to(static_dir).as_posix()
+        if rel.split("/", 1)[0] in ASSET_SKIP_DIRS:
+            continue
+        try:
+            manifest[rel] = Asset(p)
+        except OSError as e:
+            print(f"[ASSET] gagal baca {rel}: {e}")
+    return manifest
+
+
+def _get_asset(rel: str, reload: bool) -> Optional[Asset]:
+    with _LOCK:
+        asset = _MANIFEST.get(rel)
+    if asset is None or not reload:
+        return asset
+    try:
+        if asset.path.stat().st_mtime != asset.mtime:
+            asset = Asset(asset.path)
+            with _LOCK:
+                _MANIFEST[rel] = asset
+    except OSError:
+        pass
+    return asset
+
+
+def _pick_encoding(asset: Asset) -> str:
+    accepted = request.accept_encodings
+    for enc in ("br", "gzip"):
+        if enc in asset.variants and accepted[enc]:
+            return enc
+    return "identity"
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_static_assets(app):
+    static_dir = Path(app.static_folder)
+    manifest = build_manifest(static_dir)
+    with _LOCK:
+        _MANIFEST.clear()
+        _MANIFEST.update(manifest)
+    raw = sum(len(a.variants["identity"]) for a in manifest.values())
+    gz = sum(len(a.variants.get("gzip", a.variants["identity"])) for a in manifest.values())
+    print(f"[ASSET] {len(manifest)} aset, {raw // 1024} KB -> gzip {gz // 1024} KB, brotli={'ya' if brotli else 'tidak'}")
+
+    def _reload() -> bool:
+        return ASSET_RELOAD or app.debug
+
+    def asset_url(filename: str) -> str:
+        """URL ber-fingerprint untuk file di static/ (fallback: url_for static biasa)."""
+        asset = _get_asset(filename, _reload())
+        if asset is None:
+            return url_for("static", filename=filename)
+        return url_for("static_asset", digest=asset.digest, filename=filename)
+
+    app.add_template_global(asset_url, "asset_url")
+
+    @app.route("/assets/<digest>/<path:filename>")
+    def static_asset(digest, filename):
+        asset = _get_asset(filename, _reload())
+        if asset is None:
+            abort(404)
+
+        enc = _pick_encoding(asset)
+        etag = f"{asset.digest}-{enc}"
+        fresh = digest == asset.digest
+        headers = {
+            "Vary": "Accept-Encoding",
+            "ETag": f'"{etag}"',
+            "Cache-Control": f"public, max-age={ASSET_MAX_AGE}, immutable" if fresh else "no-cache",
+        }
+        if etag in request.if_none_match:
+            return Response(status=304, headers=headers)
+
+        body = asset.variants[enc]
+        if enc != "identity":
+            headers["Content-Encoding"] = enc
+        return Response(body, content_type=asset.mimetype, headers=headers)
+
+    return asset_url
@@ -0,0 +1,74 @@
+"""Validasi item batch offline (batch_ingest) tanpa DATABASE_URL.
+
+Jalankan:
+    python -m pytest -q tests
+"""
+
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from batch_ingest import _parse_waktu, _radius, parse_item  # noqa: E402
+
+
+def test_radius_default_dan_batas():
+    assert _radius(None) == 2.0
+    assert _radius("") == 2.0
+    assert _radius("abc") == 2.0
+    assert _radius("-1") == 2.0
+    assert _radius("0") == 2.0
+    assert _radius("3.5") == 3.5
+    assert _radius("500") == 50.0
+
+
+def test_radius_nan_inf_pakai_default():
+    assert _radius("nan") == 2.0
+    assert _radius(float("nan")) == 2.0
+    assert _radius("inf") == 2.0
+    assert _radius("-inf") == 2.0
+
+
+def test_parse_item_asesmen_radius_nan():
+    item = {"type": "asesmen_kondisi", "kode_posko": "P-01", "lokasi": "Desa A", "radius": "nan"}
+    kind, row = parse_item(item, "R-001")
+    assert kind == "asesmen_kondisi"
+    assert math.isfinite(row["radius"])
+    assert row["radius"] == 2.0
+
+
+@pytest.mark.parametrize("waktu", [
+    "0001-01-01T00:00",  # astimezone() ke UTC -> OverflowError
+    "0001-01-01T00:00+14:00",
+    "9999-12-31T23:59-12:00",
+    "1970-01-01T07:00",
+    "2025-13-01T08:00",
+    "bukan-waktu",
+])
+def test_parse_waktu_tidak_valid(waktu):
+    with pytest.raises(ValueError):
+        _parse_waktu(waktu)
+
+
+def test_parse_waktu_wib_ke_utc():
+    assert _parse_waktu("") is None
+    assert _parse_waktu("2025-01-02T08:30").isoformat() == "2025-01-02T01:30:00"
+    assert _parse_waktu("2025-01-02T08:30Z").isoformat() == "2025-01-02T08:30:00"
+
+
+@pytest.mark.parametrize("lat,lon", [("nan", "98.6"), ("3.5", "inf"), (float("-inf"), 98.6)])
+def test_kondisi_titik_banjir_nan_inf_ditolak(lat, lon):
+    item = {"type": "asesmen_kondisi", "kode_posko": "P-01", "lokasi": "Desa A",
+            "banjir": [[3.5, 98.6], [lat, lon]]}
+    with pytest.raises(ValueError):
+        parse_item(item, "R-001")
+
+
+def test_kondisi_titik_banjir_valid():
+    item = {"type": "asesmen_kondisi", "kode_posko": "P-01", "lokasi": "Desa A",
+            "banjir_lat[]": ["3.5"], "banjir_lon[]": ["98.6"]}
+    _, row = parse_item(item, "R-001")
+    assert row["jawaban"]["p2"] == {"b1": [3.5, 98.6]}
@@ -0,0 +1,81 @@
+"""Hash kode akses relawan (credentials) tanpa DATABASE_URL.
+
+Jalankan:
+    python -m pytest -q tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import credentials  # noqa: E402
+
+
+@pytest.fixture()
+def saved(monkeypatch):
+    """Catat pemanggilan pg_set_relawan_kode_hash (pengganti UPDATE ke DB)."""
+    calls = []
+    monkeypatch.setattr(credentials, "pg_relawan_has_hash_column", lambda: True)
+    monkeypatch.setattr(credentials, "pg_set_relawan_kode_hash", lambda i, h: calls.append((i, h)) or True)
+    credentials.clear_verify_cache()
+    yield calls
+    credentials.clear_verify_cache()
+
+
+def test_hash_verify_case_insensitive():
+    stored = credentials.hash_kode(" Rahasia1 ")
+    assert stored.startswith("scrypt$")
+    assert credentials.verify_kode("rahasia1", stored)
+    assert not credentials.verify_kode("rahasia2", stored)
+    assert not credentials.verify_kode("rahasia1", "bukan-hash")
+
+
+def test_hash_dipakai_bila_ada(saved):
+    row = {"id_relawan": 1, "kode_akses": None, "kode_akses_hash": credentials.hash_kode("abc")}
+    assert credentials.verify_relawan_kode(row, "ABC")
+    assert not credentials.verify_relawan_kode(row, "abd")
+    assert saved == []  # parameter KDF sama -> tidak ada rehash
+
+
+def test_plaintext_ditolak_setelah_rotasi(saved):
+    # Kode dirotasi lewat `credentials.py hash`, plaintext lama masih tersisa di baris
+    row = {"id_relawan": 1, "kode_akses": "lama", "kode_akses_hash": credentials.hash_kode("baru")}
+    assert not credentials.verify_relawan_kode(row, "lama")
+    assert saved == []  # hash baru tidak ditimpa
+    assert credentials.verify_relawan_kode(row, "baru")
+
+
+def test_plaintext_tanpa_hash_dimigrasi_saat_login(saved):
+    row = {"id_relawan": 7, "kode_akses": "Kode7", "kode_akses_hash": None}
+    assert not credentials.verify_relawan_kode(row, "salah")
+    assert saved == []
+    assert credentials.verify_relawan_kode(row, "kode7")
+    assert len(saved) == 1 and saved[0][0] == 7
+    assert credentials.verify_kode("kode7", saved[0][1])
+
+
+def test_plaintext_tanpa_kolom_hash_tidak_di_hash(saved, monkeypatch):
+    monkeypatch.setattr(credentials, "pg_relawan_has_hash_column", lambda: False)
+    row = {"id_relawan": 7, "kode_akses": "kode7", "kode_akses_hash": None}
+    assert credentials.verify_relawan_kode(row, "kode7")
+    assert saved == []
+
+
+def test_rehash_bila_parameter_kdf_berubah(saved, monkeypatch):
+    stored = credentials.hash_kode("abc")
+    monkeypatch.setattr(credentials, "SCRYPT_N", credentials.SCRYPT_N // 2)
+    assert credentials.needs_rehash(stored)
+    row = {"id_relawan": 3, "kode_akses": None, "kode_akses_hash": stored}
+    assert credentials.verify_relawan_kode(row, "abc")
+    assert len(saved) == 1
+    assert saved[0][1].split("$")[1] == str(credentials.SCRYPT_N)
+    assert not credentials.needs_rehash(saved[0][1])
+
+
+def test_relawan_has_kode():
+    assert credentials.relawan_has_kode({"kode_akses_hash": "scrypt$..."})
+    assert credentials.relawan_has_kode({"kode_akses": "x"})
+    assert not credentials.relawan_has_kode({"kode_akses": " ", "kode_akses_hash": None})
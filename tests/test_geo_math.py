@@ -0,0 +1,100 @@
+"""Join radius & overlap buffer (geo_math) vs brute-force haversine.
+
+Jalankan:
+    python -m pytest -q tests
+"""
+
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import geo_math as gm  # noqa: E402
+
+KM_PER_DEG = gm.EARTH_RADIUS_KM * math.pi / 180.0
+
+
+def _brute_pairs(a_lat, a_lon, b_lat, b_lon, radius):
+    out = set()
+    for i in range(len(a_lat)):
+        for j in range(len(b_lat)):
+            r = radius[j] if np.ndim(radius) else radius
+            if gm.haversine_km(a_lat[i], a_lon[i], b_lat[j], b_lon[j]) <= r:
+                out.add((i, j))
+    return out
+
+
+def test_pasangan_tepat_di_tepi_radius():
+    # Regresi: titik 9.999 km (radius 10 km) yang melintasi batas sel grid dulu
+    # lolos dari 3x3 sel tetangga. Titik awal digeser melintasi >1 lebar sel
+    # supaya pasti ada yang tepat di batas sel.
+    d = 9.999 / KM_PER_DEG
+    a_lat = 3.0 + np.arange(0.0, 0.1, 0.0002)
+    b_lat = a_lat + d
+    lon = np.full(a_lat.shape, 98.0)
+
+    ia, ib, dist = gm.within_radius_pairs(a_lat, lon, b_lat, lon, 10)
+    found = set(zip(ia.tolist(), ib.tolist()))
+    assert all((i, i) in found for i in range(a_lat.shape[0]))
+    assert found == _brute_pairs(a_lat, lon, b_lat, lon, 10)
+
+    for i in range(0, a_lat.shape[0], 25):
+        counts = gm.buffer_overlap_counts([a_lat[i], b_lat[i]], [98.0, 98.0], 5.0)
+        assert counts.tolist() == [1, 1]
+
+
+def test_tepi_radius_arah_bujur():
+    d = 9.999 / (KM_PER_DEG * math.cos(math.radians(3.0)))
+    a_lon = 98.0 + np.arange(0.0, 0.1, 0.0002)
+    lat = np.full(a_lon.shape, 3.0)
+    ia, ib, _ = gm.within_radius_pairs(lat, a_lon, lat, a_lon + d, 10)
+    found = set(zip(ia.tolist(), ib.tolist()))
+    assert all((i, i) in found for i in range(a_lon.shape[0]))
+
+
+@pytest.mark.parametrize("bearing", [0.0, 45.0, 90.0, 135.0])
+@pytest.mark.parametrize("lat0", [0.0, 2.5, 4.3, -1.0])
+def test_tepi_radius_semua_arah(lat0, bearing):
+    radius = 10.0
+    a_lat, a_lon = [], []
+    b_lat, b_lon = [lat0], [98.0]
+    # Titik pada jarak radius*(1 - eps) & radius*(1 + eps) pada arah `bearing`
+    for frac in (0.9999, 1.0001):
+        dist = radius * frac / gm.EARTH_RADIUS_KM
+        br = math.radians(bearing)
+        la1, lo1 = math.radians(lat0), math.radians(98.0)
+        la2 = math.asin(math.sin(la1) * math.cos(dist) + math.cos(la1) * math.sin(dist) * math.cos(br))
+        lo2 = lo1 + math.atan2(math.sin(br) * math.sin(dist) * math.cos(la1), math.cos(dist) - math.sin(la1) * math.sin(la2))
+        a_lat.append(math.degrees(la2))
+        a_lon.append(math.degrees(lo2))
+
+    ia, ib, _ = gm.within_radius_pairs(a_lat, a_lon, b_lat, b_lon, radius)
+    assert set(zip(ia.tolist(), ib.tolist())) == {(0, 0)}
+
+
+def test_sama_dengan_brute_force_radius_per_titik():
+    rng = np.random.default_rng(42)
+    a_lat, a_lon = rng.uniform(2.0, 2.6, 150), rng.uniform(98.4, 99.0, 150)
+    b_lat, b_lon = rng.uniform(2.0, 2.6, 80), rng.uniform(98.4, 99.0, 80)
+    radius = rng.uniform(0.5, 12.0, 80)
+
+    ia, ib, dist = gm.within_radius_pairs(a_lat, a_lon, b_lat, b_lon, radius)
+    assert set(zip(ia.tolist(), ib.tolist())) == _brute_pairs(a_lat, a_lon, b_lat, b_lon, radius)
+    for i, j, d in zip(ia, ib, dist):
+        assert d == pytest.approx(gm.haversine_km(a_lat[i], a_lon[i], b_lat[j], b_lon[j]), rel=1e-9)
+
+
+def test_overlap_sama_dengan_brute_force():
+    rng = np.random.default_rng(7)
+    lat, lon = rng.uniform(2.0, 2.3, 120), rng.uniform(98.6, 98.9, 120)
+    radius = rng.uniform(0.2, 3.0, 120)
+
+    expected = [
+        sum(1 for j in range(120) if j != i and gm.haversine_km(lat[i], lon[i], lat[j], lon[j]) <= radius[i] + radius[j])
+        for i in range(120)
+    ]
+    assert gm.buffer_overlap_counts(lat, lon, radius).tolist() == expected
@@ -0,0 +1,102 @@
+"""Agregat heatmap hexagon (heatmap_hex) tanpa DATABASE_URL.
+
+Jalankan:
+    python -m pytest -q tests
+"""
+
+import copy
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import heatmap_hex as hh  # noqa: E402
+
+T0 = 1_717_200_000.0  # 2024-06-01
+
+
+def _rows(n, seed, start_id=1):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "id": start_id + i,
+            "latitude": float(rng.uniform(2.0, 3.0)),
+            "longitude": float(rng.uniform(98.5, 99.5)),
+            "epoch": T0 + float(rng.uniform(0, 5 * 86400)),
+            "skor": float(rng.uniform(0, 100)),
+            "status": ["Aman", "Waspada", "Kritis"][int(rng.integers(0, 3))],
+        }
+        for i in range(n)
+    ]
+
+
+def _full(rows_by_kind):
+    agg = {}
+    for kind, rows in rows_by_kind.items():
+        hh.aggregate_points(agg, kind, rows)
+    return agg
+
+
+def test_delta_sama_dengan_rebuild_penuh():
+    a1, a2 = _rows(300, 1), _rows(120, 2, start_id=301)
+    b1, b2 = _rows(50, 3), _rows(40, 4, start_id=51)
+
+    base = _full({"kesehatan": a1, "wash": b1})
+    delta = _full({"kesehatan": a2, "wash": b2})
+    merged = hh.merge_aggregate(base, delta)
+    expected = _full({"kesehatan": a1 + a2, "wash": b1 + b2})
+
+    assert merged.keys() == expected.keys()
+    for res in expected:
+        assert merged[res].keys() == expected[res].keys()
+        for gkey in expected[res]:
+            assert merged[res][gkey].keys() == expected[res][gkey].keys()
+            for hkey, cell in expected[res][gkey].items():
+                got = merged[res][gkey][hkey]
+                assert got[0] == cell[0] and got[2:] == cell[2:]
+                assert got[1] == pytest.approx(cell[1])
+
+    for res in hh.HEX_RESOLUTIONS:
+        q_m = hh.query_hex(merged, res)
+        q_e = hh.query_hex(expected, res)
+        assert q_m["n"] == q_e["n"] and q_m["latest_status"] == q_e["latest_status"]
+
+
+def test_merge_tidak_mengubah_base():
+    base = _full({"kesehatan": _rows(200, 5)})
+    snapshot = copy.deepcopy(base)
+    hh.merge_aggregate(base, _full({"kesehatan": _rows(200, 6, start_id=201)}))
+    assert base == snapshot
+
+
+def test_get_aggregate_delta_copy_on_write(monkeypatch):
+    first, extra = _rows(100, 7), _rows(30, 8, start_id=101)
+    db = {"kesehatan": list(first)}
+
+    def points(kind, hours=None, after_id=None):
+        rows = db.get(kind, [])
+        return [r for r in rows if after_id is None or r["id"] > after_id]
+
+    monkeypatch.setattr(hh, "pg_get_asesmen_points", points)
+    monkeypatch.setattr(hh, "ASESMEN_KIND_TABLES", [("kesehatan", "", ""), ("wash", "", "")])
+    monkeypatch.setattr(hh, "CACHE_HEATMAP", {"agg": None, "last_id": {}, "timestamp": 0, "dirty": False})
+
+    old = hh.get_aggregate()
+    old_snapshot = copy.deepcopy(old)
+    assert hh.CACHE_HEATMAP["last_id"]["kesehatan"] == 100
+
+    db["kesehatan"] += extra
+    hh.CACHE_HEATMAP["dirty"] = True
+    new = hh.get_aggregate()
+
+    assert new is not old
+    assert old == old_snapshot  # pembaca agregat lama tidak melihat delta setengah jadi
+    assert hh.CACHE_HEATMAP["last_id"]["kesehatan"] == 130
+    assert hh.query_hex(new, 1)["n"] == hh.query_hex(_full({"kesehatan": first + extra}), 1)["n"]
+
+    # Tidak ada baris baru -> agregat yang sama dipakai ulang
+    hh.CACHE_HEATMAP["dirty"] = True
+    assert hh.get_aggregate() is new
@@ -0,0 +1,104 @@
+"""Index polygon kel/desa di memori (wilayah_geocoder) tanpa PostGIS.
+
+Jalankan:
+    python -m pytest -q tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import wilayah_geocoder as wg  # noqa: E402
+
+# Desa persegi 98.60..98.70 x 3.50..3.60 dengan hole 98.64..98.66 x 3.54..3.56,
+# desa kedua mengisi hole tersebut.
+DESA_A = {
+    "kel_desa": "Desa A",
+    "kecamatan": "Kec A",
+    "kabkota": "Kota Medan",
+    "geometry": {
+        "type": "Polygon",
+        "coordinates": [
+            [[98.60, 3.50], [98.70, 3.50], [98.70, 3.60], [98.60, 3.60], [98.60, 3.50]],
+            [[98.64, 3.54], [98.66, 3.54], [98.66, 3.56], [98.64, 3.56], [98.64, 3.54]],
+        ],
+    },
+}
+DESA_B = {
+    "kel_desa": "Desa B",
+    "kecamatan": "Kec A",
+    "kabkota": "Kota Medan",
+    "geometry": {
+        "type": "MultiPolygon",
+        "coordinates": [[[[98.64, 3.54], [98.66, 3.54], [98.66, 3.56], [98.64, 3.56]]]],
+    },
+}
+CSV_ROWS = [
+    {"kabkota": "Kota Medan", "status_kabkota": "Kota", "kecamatan": "KEC. A",
+     "desa_kelurahan": "DESA A", "status_desa": "Desa"},
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return wg.build_kel_desa_index([DESA_A, DESA_B], CSV_ROWS)
+
+
+def test_lookup_dalam_polygon(index):
+    hit = wg.lookup_index(index, 3.52, 98.62)
+    assert hit["desa_kelurahan"] == "DESA A"  # ejaan CSV
+    assert hit["csv_match"] is True
+
+
+def test_lookup_hole_milik_polygon_lain(index):
+    hit = wg.lookup_index(index, 3.55, 98.65)
+    assert hit["desa_kelurahan"] == "Desa B"
+    assert hit["csv_match"] is False
+
+
+def test_lookup_di_luar(index):
+    assert wg.lookup_index(index, 3.65, 98.65) is None
+    assert wg.lookup_index(index, -3.55, 98.65) is None
+
+
+@pytest.mark.parametrize("lat,lon", [
+    (float("nan"), 98.65),
+    (3.55, float("nan")),
+    (float("inf"), 98.65),
+    (3.55, float("-inf")),
+    ("nan", "98.65"),
+])
+def test_lookup_nan_inf(index, lat, lon):
+    assert wg.lookup_index(index, lat, lon) is None
+
+
+def test_reverse_geocode_nan_inf(index, monkeypatch):
+    monkeypatch.setattr(wg, "get_kel_desa_index", lambda force=False: index)
+    assert wg.reverse_geocode("nan", "98.65") is None
+    assert wg.reverse_geocode("3.55", "inf") is None
+    assert wg.reverse_geocode("abc", "98.65") is None
+    assert wg.reverse_geocode("3.52", "98.62")["desa_kelurahan"] == "DESA A"
+    assert wg.reverse_geocode_many([(3.52, 98.62), ("nan", 1), (1e400, 1), (None, 1)]) == [
+        wg.lookup_index(index, 3.52, 98.62), None, None, None,
+    ]
+
+
+def test_gagal_muat_index_tidak_diulang_tiap_panggilan(monkeypatch):
+    calls = []
+
+    def boom(_simplify):
+        calls.append(1)
+        raise RuntimeError("PostGIS tidak ada")
+
+    monkeypatch.setattr(wg, "pg_get_kel_desa_polygons", boom)
+    monkeypatch.setattr(wg, "CACHE_KELDESA", {"index": None, "timestamp": 0, "failed_at": 0})
+    assert wg.get_kel_desa_index() is None
+    assert wg.get_kel_desa_index() is None
+    assert len(calls) == 1
+
+    wg.CACHE_KELDESA["failed_at"] -= wg.KELDESA_RETRY_SECONDS + 1
+    assert wg.get_kel_desa_index() is None
+    assert len(calls) == 2
@@ -0,0 +1,183 @@
+# upload_limits.py
+# SATGAS USU Peduli - Upload foto streaming dengan batas ukuran
+# ---------------------------------------------------------------
+# - MAX_CONTENT_LENGTH (UPLOAD_MAX_REQUEST_MB): request multipart yang lebih
+#   besar ditolak 413 sebelum body dibaca (Content-Length) atau saat
+#   terbaca (chunked).
+# - Tiap file part langsung ditulis ke file temp di folder media
+#   (MEDIA_DIR/cas/.tmp, filesystem sama) sambil:
+#     * dihitung ukurannya -> > UPLOAD_MAX_FILE_MB: 413 saat itu juga
+#     * dicek magic bytes di chunk pertama (JPEG/PNG/WEBP) -> selain itu 415
+#     * di-hash sha256 -> media_store tinggal rename (tanpa baca ulang/copy)
+#   Tidak ada buffer file di memori (beda dengan SpooledTemporaryFile bawaan).
+# - File temp yang tidak dipakai dihapus saat request selesai.
+# - mkstemp membuat file 0600; sebelum diserahkan ke media_store izinnya
+#   disamakan dengan open() biasa (0666 & ~umask) agar nginx/Apache
+#   (X-Accel-Redirect / X-Sendfile) bisa membacanya.
+# - Ditolak -> form biasa: flash + redirect balik; /api/*: JSON.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+from flask import Request, flash, jsonify, redirect, request, url_for
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# ==========================
+# CONFIG
+# ==========================
+UPLOAD_MAX_FILE_MB = float(os.environ.get("UPLOAD_MAX_FILE_MB", "10") or "10")
+UPLOAD_MAX_REQUEST_MB = float(os.environ.get("UPLOAD_MAX_REQUEST_MB", "25") or "25")
+SNIFF_BYTES = 12
+
+# umask proses dibaca sekali saat import (os.umask hanya bisa dibaca dengan mengubahnya)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+# magic bytes -> ekstensi
+_MAGIC: List[Tuple[bytes, str]] = [
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+]
+
+
+def sniff_image_ext(head: bytes) -> Optional[str]:
+    """Ekstensi dari magic bytes (JPEG/PNG/WEBP), None bila bukan foto yang didukung."""
+    for magic, ext in _MAGIC:
+        if head.startswith(magic):
+            return ext
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+class LimitedUploadFile:
+    """File part upload: langsung ke disk, dibatasi ukurannya, di-sniff & di-hash saat ditulis."""
+
+    def __init__(self, tmp_dir: str, max_bytes: int):
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=tmp_dir, prefix="up_", suffix=".part")
+        self._fh = os.fdopen(fd, "w+b")
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.detected_ext: Optional[str] = None
+        self._head = b""
+        self._hash = hashlib.sha256()
+        self._detached = False
+
+    # --- dipanggil parser multipart werkzeug ---
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise RequestEntityTooLarge(f"Ukuran foto maksimal {UPLOAD_MAX_FILE_MB:g} MB.")
+        if self.detected_ext is None and len(self._head) < SNIFF_BYTES:
+            self._head += data[: SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+        self._hash.update(data)
+        return self._fh.write(data)
+
+    def _sniff(self) -> None:
+        self.detected_ext = sniff_image_ext(self._head)
+        if self.detected_ext is None:
+            raise UnsupportedMediaType("Format foto harus JPG/JPEG/PNG/WEBP.")
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        # Akhir part: file < SNIFF_BYTES belum sempat dicek (part kosong = tidak pilih file)
+        if self.detected_ext is None and self.size > 0:
+            self._sniff()
+        return self._fh.seek(offset, whence)
+
+    def read(self, *args) -> bytes:
+        return self._fh.read(*args)
+
+    def readline(self, *args) -> bytes:
+        return self._fh.readline(*args)
+
+    def tell(self) -> int:
+        return self._fh.tell()
+
+    def flush(self) -> None:
+        self._fh.flush()
+
+    def __iter__(self):
+        return iter(self._fh)
+
+    @property
+    def closed(self) -> bool:
+        return self._fh.closed
+
+    # --- dipakai media_store ---
+    @property
+    def sha256_hex(self) -> str:
+        return self._hash.hexdigest()
+
+    def detach_to_path(self) -> Tuple[str, str, int]:
+        """Tutup & serahkan file temp ke pemanggil (untuk di-rename). Return (path, sha256, size)."""
+        os.fchmod(self._fh.fileno(), FILE_MODE)
+        self._fh.close()
+        self._detached = True
+        return self.path, self.sha256_hex, self.size
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+        if not self._detached:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self._detached = True
+
+
+def _make_request_class(tmp_dir: str, max_file_bytes: int):
+    class UploadRequest(Request):
+        def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+            f = LimitedUploadFile(tmp_dir, max_file_bytes)
+            # dicatat agar tetap dihapus walau parsing gagal di tengah jalan
+            self.__dict__.setdefault("_upload_files", []).append(f)
+            return f
+
+        def close(self) -> None:
+            try:
+                super().close()
+            finally:
+                for f in self.__dict__.pop("_upload_files", []):
+                    f.close()
+
+    return UploadRequest
+
+
+# ==========================
+# REGISTRATION
+# ==========================
+def register_upload_limits(app, tmp_dir: str):
+    max_file = int(UPLOAD_MAX_FILE_MB * 1024 * 1024)
+    app.config["MAX_CONTENT_LENGTH"] = int(UPLOAD_MAX_REQUEST_MB * 1024 * 1024)
+    app.request_class = _make_request_class(tmp_dir, max_file)
+    print(f"[UPLOAD] maks {UPLOAD_MAX_FILE_MB:g} MB/foto, {UPLOAD_MAX_REQUEST_MB:g} MB/request, tmp={tmp_dir}")
+
+    def _reject(e, status: int):
+        message = str(getattr(e, "description", "") or "")
+        if "foto" not in message:
+            if status != 413:
+                return e  # 415 lain (mis. request.get_json) -> penanganan bawaan
+            # deskripsi bawaan werkzeug = MAX_CONTENT_LENGTH terlampaui
+            message = f"Upload terlalu besar (maks {UPLOAD_MAX_REQUEST_MB:g} MB per kirim)."
+        if request.path.startswith("/api/"):
+            return jsonify({"success": False, "error": message}), status
+        flash(message, "danger")
+        return redirect(request.referrer or url_for("map_view"))
+
+    @app.errorhandler(RequestEntityTooLarge)
+    def _upload_too_large(e):
+        return _reject(e, 413)
+
+    @app.errorhandler(UnsupportedMediaType)
+    def _upload_bad_type(e):
+        return _reject(e, 415)
@@ -0,0 +1,497 @@
+# wilayah_geocoder.py
+# SATGAS USU Peduli - Reverse geocoding titik -> kab/kota, kecamatan, desa/kelurahan
+# ---------------------------------------------------------------
+# - Polygon geo.batas_kel_desa_sumut dimuat SEKALI dari PostGIS ke memori,
+#   lalu di-index dengan grid bucket (sel GRID_DEG derajat -> daftar polygon
+#   yang bbox-nya menyentuh sel). Lookup: 1 sel -> cek bbox -> ray casting
+#   NumPy per ring (hole diperhitungkan). Target < 1 ms per titik.
+# - Nama hasil polygon dicocokkan ke static/data/kelurahan_desa_sumut.csv
+#   (ejaan baku); hasil cross-check bisa dilihat admin.
+# - Batch API admin untuk backfill kecamatan/desa di data_lokasi & asesmen.
+# - Index belum siap / gagal dimuat -> fallback query PostGIS (GiST index).
+#   Gagal muat dicatat: dicoba lagi paling cepat KELDESA_RETRY_SECONDS kemudian
+#   (bukan query polygon penuh di setiap submit).
+# - Koordinat NaN/inf -> None (tidak pernah exception).
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import csv
+import math
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import jsonify, request, session
+
+try:
+    import numpy as np  # type: ignore
+except Exception:
+    np = None  # type: ignore
+
+try:
+    from pg_data import (
+        WILAYAH_BACKFILL_TARGETS,
+        pg_ensure_wilayah_columns,
+        pg_get_kel_desa_polygons,
+        pg_get_wilayah_backfill_rows,
+        pg_reverse_geocode_kel_desa,
+        pg_update_wilayah_bulk,
+    )
+except Exception as _pg_err:
+    print(f"[WILAYAH] Error import pg_data: {_pg_err}")
+    WILAYAH_BACKFILL_TARGETS = {}
+    pg_ensure_wilayah_columns = None
+    pg_get_kel_desa_polygons = None
+    pg_get_wilayah_backfill_rows = None
+    pg_reverse_geocode_kel_desa = None
+    pg_update_wilayah_bulk = None
+
+
+# ==========================
+# CONFIG
+# ==========================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+WILAYAH_CSV_PATH = os.path.join(BASE_DIR, "static", "data", "kelurahan_desa_sumut.csv")
+
+KELDESA_INDEX_TTL_SECONDS = int(os.environ.get("KELDESA_INDEX_TTL_SECONDS", "86400") or "86400")
+# Simplify polygon saat dimuat (derajat, ~5 m) agar memori & waktu muat kecil
+KELDESA_INDEX_SIMPLIFY = float(os.environ.get("KELDESA_INDEX_SIMPLIFY", "0.00005") or "0")
+KELDESA_RETRY_SECONDS = 300
+GRID_DEG = 0.05
+BACKFILL_BATCH_SIZE = 1000
+
+CACHE_KELDESA: Dict[str, Any] = {"index": None, "timestamp": 0, "failed_at": 0}
+CACHE_WILAYAH_CSV: Dict[str, Any] = {"data": None}
+_CACHE_LOCK = threading.Lock()
+
+
+# ==========================
+# NORMALISASI NAMA
+# ==========================
+_PREFIXES = (
+    "KABUPATEN ", "KAB ", "KOTA ", "KECAMATAN ", "KEC ",
+    "KELURAHAN ", "KEL ", "DESA ",
+)
+
+
+def norm_wilayah(nama: Any) -> str:
+    """Normalisasi nama wilayah untuk pencocokan (UPPER, tanpa tanda baca & prefix).
+
+    "Kab. Deli Serdang" / "KABUPATEN DELI SERDANG" / "deli-serdang" -> "DELI SERDANG"
+    """
+    s = re.sub(r"[^0-9A-Z]+", " ", str(nama or "").upper()).strip()
+    s = " ".join(s.split())
+    for p in _PREFIXES:
+        if s.startswith(p):
+            s = s[len(p):].strip()
+            break
+    return s
+
+
+def _key(nama: Any) -> str:
+    # Kunci kompak: "PADANG SIDEMPUAN" == "PADANGSIDEMPUAN"
+    return norm_wilayah(nama).replace(" ", "")
+
+
+# ==========================
+# CSV kelurahan_desa_sumut
+# ==========================
+def load_wilayah_csv(path: str = WILAYAH_CSV_PATH) -> List[Dict[str, str]]:
+    """Baca CSV wilayah (dibaca sekali per proses).
+
+    Return list: {kabkota, status_kabkota, kecamatan, desa_kelurahan, status_desa}
+    kabkota sudah diberi prefix status, mis. "Kabupaten Asahan" / "Kota Medan".
+    """
+    data = CACHE_WILAYAH_CSV["data"]
+    if data is not None and path == WILAYAH_CSV_PATH:
+        return data
+
+    out: List[Dict[str, str]] = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f, delimiter=";")
+        next(reader, None)  # header
+        for row in reader:
+            if len(row) < 4:
+                continue
+            kab, st_kab, kec, desa = (c.strip() for c in row[:4])
+            st_desa = row[4].strip() if len(row) > 4 else ""
+            if not kab or not desa:
+                continue
+            out.append(
+                {
+                    "kabkota": f"{st_kab} {kab}".strip() if st_kab else kab,
+                    "status_kabkota": st_kab,
+                    "kecamatan": kec,
+                    "desa_kelurahan": desa,
+                    "status_desa": st_desa,
+                }
+            )
+
+    if path == WILAYAH_CSV_PATH:
+        CACHE_WILAYAH_CSV["data"] = out
+    return out
+
+
+def _csv_lookup_maps(rows: List[Dict[str, str]]) -> Tuple[Dict[Tuple[str, str, str], Dict[str, str]], Dict[Tuple[str, str], Dict[str, str]]]:
+    full: Dict[Tuple[str, str, str], Dict[str, str]] = {}
+    kab_desa: Dict[Tuple[str, str], Dict[str, str]] = {}
+    for r in rows:
+        kk, kc, kd = _key(r["kabkota"]), _key(r["kecamatan"]), _key(r["desa_kelurahan"])
+        full.setdefault((kk, kc, kd), r)
+        kab_desa.setdefault((kk, kd), r)
+    return full, kab_desa
+
+
+# ==========================
+# INDEX POLYGON
+# ==========================
+def _rings_from_geometry(geom: Dict[str, Any]) -> List[List[Any]]:
+    """GeoJSON (Multi)Polygon -> list polygon, tiap polygon = list ring (exterior + holes)."""
+    t = (geom or {}).get("type")
+    coords = (geom or {}).get("coordinates") or []
+    if t == "Polygon":
+        return [coords]
+    if t == "MultiPolygon":
+        return list(coords)
+    return []
+
+
+def _ring_arrays(ring: Sequence[Sequence[float]]) -> Optional[Tuple[Any, Any, Any, Any]]:
+    a = np.asarray(ring, dtype=np.float64)
+    if a.ndim != 2 or a.shape[0] < 3:
+        return None
+    a = a[:, :2]
+    if not np.array_equal(a[0], a[-1]):
+        a = np.vstack([a, a[:1]])
+    x1, y1 = a[:-1, 0], a[:-1, 1]
+    x2, y2 = a[1:, 0], a[1:, 1]
+    return x1, y1, x2 - x1, y2 - y1
+
+
+def _ring_contains(ring: Tuple[Any, Any, Any, Any], x: float, y: float) -> bool:
+    """Ray casting (vektor NumPy) untuk 1 titik terhadap 1 ring."""
+    x1, y1, dx, dy = ring
+    cross = (y1 > y) != ((y1 + dy) > y)
+    if not cross.any():
+        return False
+    xs = x1[cross] + dx[cross] * (y - y1[cross]) / dy[cross]
+    return bool(np.count_nonzero(x < xs) & 1)
+
+
+def build_kel_desa_index(rows: Iterable[Dict[str, Any]], csv_rows: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+    """Bangun index dari baris polygon {kel_desa, kecamatan, kabkota, geometry}.
+
+    Nama dicocokkan ke CSV: cocok -> pakai ejaan CSV, csv_match=True.
+    """
+    full_map, kab_desa_map = _csv_lookup_maps(csv_rows or [])
+
+    feats: List[Dict[str, Any]] = []
+    bbox: List[Tuple[float, float, float, float]] = []
+
+    for r in rows:
+        polys = []
+        minx = miny = float("inf")
+        maxx = maxy = float("-inf")
+        for poly in _rings_from_geometry(r.get("geometry")):
+            rings = [ra for ra in (_ring_arrays(ring) for ring in poly) if ra is not None]
+            if not rings:
+                continue
+            x1, y1, _dx, _dy = rings[0]
+            minx, maxx = min(minx, float(x1.min())), max(maxx, float(x1.max()))
+            miny, maxy = min(miny, float(y1.min())), max(maxy, float(y1.max()))
+            polys.append(rings)
+        if not polys:
+            continue
+
+        kab, kec, desa = r.get("kabkota") or "-", r.get("kecamatan") or "-", r.get("kel_desa") or "-"
+        kk, kc, kd = _key(kab), _key(kec), _key(desa)
+        match = full_map.get((kk, kc, kd)) or kab_desa_map.get((kk, kd))
+        feats.append(
+            {
+                "kabkota": match["kabkota"] if match else kab,
+                "kecamatan": match["kecamatan"] if match else kec,
+                "desa_kelurahan": match["desa_kelurahan"] if match else desa,
+                "csv_match": bool(match),
+                "raw": (kab, kec, desa),
+                "polys": polys,
+            }
+        )
+        bbox.append((minx, miny, maxx, maxy))
+
+    bb = np.asarray(bbox, dtype=np.float64).reshape(-1, 4)
+
+    # Grid bucket: sel -> id polygon yang bbox-nya menyentuh sel
+    grid: Dict[Tuple[int, int], List[int]] = {}
+    if bb.shape[0]:
+        cx0 = np.floor(bb[:, 0] / GRID_DEG).astype(np.int64)
+        cy0 = np.floor(bb[:, 1] / GRID_DEG).astype(np.int64)
+        cx1 = np.floor(bb[:, 2] / GRID_DEG).astype(np.int64)
+        cy1 = np.floor(bb[:, 3] / GRID_DEG).astype(np.int64)
+        for i in range(bb.shape[0]):
+            for cx in range(int(cx0[i]), int(cx1[i]) + 1):
+                for cy in range(int(cy0[i]), int(cy1[i]) + 1):
+                    grid.setdefault((cx, cy), []).append(i)
+
+    return {"features": feats, "bbox": bb, "grid": grid}
+
+
+def lookup_index(index: Dict[str, Any], latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+    """Cari polygon kel/desa yang memuat titik (None bila di luar semua polygon / NaN/inf)."""
+    x, y = float(longitude), float(latitude)
+    if not (math.isfinite(x) and math.isfinite(y)):
+        return None
+    cand = index["grid"].get((int(np.floor(x / GRID_DEG)), int(np.floor(y / GRID_DEG))))
+    if not cand:
+        return None
+
+    bb = index["bbox"]
+    for i in cand:
+        minx, miny, maxx, maxy = bb[i]
+        if x < minx or x > maxx or y < miny or y > maxy:
+            continue
+        f = index["features"][i]
+        for rings in f["polys"]:
+            if _ring_contains(rings[0], x, y) and not any(_ring_contains(h, x, y) for h in rings[1:]):
+                return {
+                    "kabkota": f["kabkota"],
+                    "kecamatan": f["kecamatan"],
+                    "desa_kelurahan": f["desa_kelurahan"],
+                    "csv_match": f["csv_match"],
+                }
+    return None
+
+
+def get_kel_desa_index(force: bool = False) -> Optional[Dict[str, Any]]:
+    """Index dari cache; muat ulang dari PostGIS bila belum ada / expired."""
+    if np is None or pg_get_kel_desa_polygons is None:
+        return None
+
+    def _cached() -> Tuple[bool, Optional[Dict[str, Any]]]:
+        idx = CACHE_KELDESA["index"]
+        now = time.time()
+        if idx is not None and now - CACHE_KELDESA["timestamp"] < KELDESA_INDEX_TTL_SECONDS:
+            return True, idx
+        # Baru saja gagal (mis. tanpa PostGIS) -> jangan ulangi query polygon penuh
+        if now - CACHE_KELDESA["failed_at"] < KELDESA_RETRY_SECONDS:
+            return True, idx
+        return False, None
+
+    if not force:
+        hit, idx = _cached()
+        if hit:
+            return idx
+
+    with _CACHE_LOCK:
+        if not force:
+            hit, idx = _cached()
+            if hit:
+                return idx
+
+        t0 = time.time()
+        try:
+            rows = pg_get_kel_desa_polygons(KELDESA_INDEX_SIMPLIFY)
+            try:
+                csv_rows = load_wilayah_csv()
+            except Exception as e:
+                print(f"[WILAYAH] gagal baca CSV wilayah: {e}")
+                csv_rows = []
+            idx = build_kel_desa_index(rows, csv_rows)
+        except Exception as e:
+            print(f"[WILAYAH] gagal muat index kel/desa (coba lagi {KELDESA_RETRY_SECONDS}s): {e}")
+            CACHE_KELDESA["failed_at"] = time.time()
+            # Pakai index lama (kalau ada) daripada tidak ada sama sekali
+            return CACHE_KELDESA["index"]
+
+        CACHE_KELDESA["index"] = idx
+        CACHE_KELDESA["timestamp"] = time.time()
+        CACHE_KELDESA["failed_at"] = 0
+        print(f"[WILAYAH] index kel/desa: {len(idx['features'])} polygon ({time.time() - t0:.1f}s)")
+        return idx
+
+
+def reverse_geocode(latitude: Any, longitude: Any) -> Optional[Dict[str, Any]]:
+    """Titik -> {kabkota, kecamatan, desa_kelurahan, csv_match}; None bila tidak ketemu."""
+    try:
+        lat = float(latitude)
+        lon = float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (math.isfinite(lat) and math.isfinite(lon)):
+        return None
+
+    idx = get_kel_desa_index()
+    if idx is not None:
+        return lookup_index(idx, lat, lon)
+
+    if pg_reverse_geocode_kel_desa is None:
+        return None
+    try:
+        r = pg_reverse_geocode_kel_desa(lat, lon)
+    except Exception as e:
+        print(f"[WILAYAH] reverse geocode PostGIS gagal: {e}")
+        return None
+    if not r:
+        return None
+    return {
+        "kabkota": r.get("kabkota") or "-",
+        "kecamatan": r.get("kecamatan") or "-",
+        "desa_kelurahan": r.get("kel_desa") or "-",
+        "csv_match": False,
+    }
+
+
+def reverse_geocode_many(points: Sequence[Tuple[Any, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """Batch reverse geocoding: [(lat, lon), ...] -> list hasil (urutan sama)."""
+    idx = get_kel_desa_index()
+    if idx is None:
+        return [reverse_geocode(lat, lon) for lat, lon in points]
+
+    out: List[Optional[Dict[str, Any]]] = []
+    for lat, lon in points:
+        try:
+            out.append(lookup_index(idx, float(lat), float(lon)))
+        except (TypeError, ValueError, OverflowError):
+            out.append(None)
+    return out
+
+
+def crosscheck_csv(index: Dict[str, Any], csv_rows: List[Dict[str, str]], limit: int = 200) -> Dict[str, Any]:
+    """Bandingkan nama polygon vs CSV: polygon tanpa pasangan CSV & desa CSV tanpa polygon."""
+    matched_keys = set()
+    unmatched: List[Dict[str, str]] = []
+    for f in index["features"]:
+        if f["csv_match"]:
+            matched_keys.add((_key(f["kabkota"]), _key(f["desa_kelurahan"])))
+        else:
+            kab, kec, desa = f["raw"]
+            unmatched.append({"kabkota": kab, "kecamatan": kec, "desa_kelurahan": desa})
+
+    missing = [
+        r for r in csv_rows
+        if (_key(r["kabkota"]), _key(r["desa_kelurahan"])) not in matched_keys
+    ]
+
+    return {
+        "polygon_total": len(index["features"]),
+        "polygon_cocok_csv": len(index["features"]) - len(unmatched),
+        "polygon_tidak_cocok": len(unmatched),
+        "csv_total": len(csv_rows),
+        "csv_tanpa_polygon": len(missing),
+        "contoh_polygon_tidak_cocok": unmatched[:limit],
+        "contoh_csv_tanpa_polygon": [
+            {"kabkota": r["kabkota"], "kecamatan": r["kecamatan"], "desa_kelurahan": r["desa_kelurahan"]}
+            for r in missing[:limit]
+        ],
+    }
+
+
+def backfill_wilayah(target: str, only_missing: bool = True, limit: int = 0) -> Dict[str, Any]:
+    """Isi kecamatan/desa (dan kab/kota untuk asesmen) dari koordinat untuk 1 tabel."""
+    pg_ensure_wilayah_columns(target)
+    rows = pg_get_wilayah_backfill_rows(target, only_missing=only_missing, limit=limit)
+    hits = reverse_geocode_many([(r["latitude"], r["longitude"]) for r in rows])
+
+    items = [
+        {"id": r["id"], "kabkota": h["kabkota"], "kecamatan": h["kecamatan"], "desa_kelurahan": h["desa_kelurahan"]}
+        for r, h in zip(rows, hits)
+        if h
+    ]
+
+    updated = 0
+    for i in range(0, len(items), BACKFILL_BATCH_SIZE):
+        updated += pg_update_wilayah_bulk(target, items[i:i + BACKFILL_BATCH_SIZE])
+
+    return {"target": target, "kandidat": len(rows), "terdeteksi": len(items), "diupdate": updated}
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_wilayah_geocoder_routes(app):
+
+    def _admin_guard():
+        if not session.get("logged_in"):
+            return jsonify({"success": False, "error": "Unauthorized"}), 401
+        if not session.get("is_admin"):
+            return jsonify({"success": False, "error": "Forbidden"}), 403
+        return None
+
+    @app.route("/api/wilayah/reverse", methods=["GET", "POST"])
+    def api_wilayah_reverse():
+        """Reverse geocoding.
+
+        GET  ?lat=..&lon=..                    -> 1 titik
+        POST {"points": [[lat, lon], ...]}     -> batch (maks 5000 titik, wajib login)
+        """
+        if request.method == "POST":
+            if not session.get("logged_in"):
+                return jsonify({"success": False, "error": "Unauthorized"}), 401
+            payload = request.get_json(silent=True) or {}
+            pts = payload.get("points") or []
+            if not isinstance(pts, list) or len(pts) > 5000:
+                return jsonify({"success": False, "error": "points harus list (maks 5000)"}), 400
+            try:
+                pairs = [(p[0], p[1]) for p in pts]
+            except Exception:
+                return jsonify({"success": False, "error": "format points invalid"}), 400
+            return jsonify({"success": True, "data": reverse_geocode_many(pairs)})
+
+        lat = request.args.get("lat")
+        lon = request.args.get("lon")
+        if not lat or not lon:
+            return jsonify({"success": False, "error": "Parameter lat/lon wajib"}), 400
+        return jsonify({"success": True, "data": reverse_geocode(lat, lon)})
+
+    @app.route("/api/admin/wilayah/backfill", methods=["POST"])
+    def api_admin_wilayah_backfill():
+        """Backfill kecamatan/desa dari koordinat (admin).
+
+        JSON body (opsional):
+          - targets: ["data_lokasi", "asesmen_kesehatan", ...]  (default semua)
+          - overwrite: true -> isi ulang semua baris (default hanya yang kosong)
+          - limit: batas baris per tabel
+        """
+        guard = _admin_guard()
+        if guard:
+            return guard
+        if pg_update_wilayah_bulk is None:
+            return jsonify({"success": False, "error": "DATABASE_URL/pg_data belum siap."}), 500
+
+        payload = request.get_json(silent=True) or {}
+        targets = payload.get("targets") or list(WILAYAH_BACKFILL_TARGETS.keys())
+        unknown = [t for t in targets if t not in WILAYAH_BACKFILL_TARGETS]
+        if unknown:
+            return jsonify({"success": False, "error": f"target tidak dikenal: {', '.join(unknown)}"}), 400
+        only_missing = not bool(payload.get("overwrite"))
+        try:
+            limit = int(payload.get("limit") or 0)
+        except Exception:
+            limit = 0
+
+        results = []
+        for t in targets:
+            try:
+                results.append(backfill_wilayah(t, only_missing=only_missing, limit=limit))
+            except Exception as e:
+                results.append({"target": t, "error": str(e)})
+
+        return jsonify({"success": True, "data": results})
+
+    @app.route("/api/admin/wilayah/crosscheck", methods=["GET"])
+    def api_admin_wilayah_crosscheck():
+        """Laporan kecocokan nama polygon kel/desa vs kelurahan_desa_sumut.csv (admin)."""
+        guard = _admin_guard()
+        if guard:
+            return guard
+
+        idx = get_kel_desa_index()
+        if idx is None:
+            return jsonify({"success": False, "error": "Index kel/desa belum tersedia."}), 500
+        try:
+            limit = int(request.args.get("limit", "200") or 200)
+        except Exception:
+            limit = 200
+        return jsonify({"success": True, "data": crosscheck_csv(idx, load_wilayah_csv(), limit=limit)})
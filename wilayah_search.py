@@ -0,0 +1,269 @@
+# wilayah_search.py
+# SATGAS USU Peduli - Autocomplete / pencarian wilayah (kab/kota -> kecamatan -> desa)
+# ---------------------------------------------------------------
+# - Sumber: static/data/kelurahan_desa_sumut.csv (dibaca sekali per proses).
+# - Index: daftar token ter-normalisasi yang terurut (prefix lookup via bisect,
+#   setara trie tapi lebih ringan di Python) + index "hapus-1-huruf" untuk
+#   toleransi salah ketik (edit distance 1).
+# - Prefix "Kab."/"Kabupaten"/"Kota"/"Kec."/"Desa" diabaikan (norm_wilayah).
+# - Filter hierarkis: kab -> kec -> desa, untuk dropdown berjenjang di form lokasi.
+# ---------------------------------------------------------------
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from flask import jsonify, request
+
+from wilayah_geocoder import load_wilayah_csv, norm_wilayah
+
+# ==========================
+# CONFIG
+# ==========================
+LEVELS = ("kabkota", "kecamatan", "desa")
+LEVEL_RANK = {"kabkota": 0, "kecamatan": 1, "desa": 2}
+MAX_LIMIT = 200
+FUZZY_MIN_LEN = 4
+
+CACHE_WILAYAH_SEARCH: Dict[str, Any] = {"index": None}
+_CACHE_LOCK = threading.Lock()
+
+
+def _key(nama: Any) -> str:
+    return norm_wilayah(nama).replace(" ", "")
+
+
+def _deletes1(tok: str) -> Set[str]:
+    return {tok[:i] + tok[i + 1:] for i in range(len(tok))}
+
+
+# ==========================
+# INDEX
+# ==========================
+def build_search_index(rows: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Bangun index dari baris CSV (lihat wilayah_geocoder.load_wilayah_csv)."""
+    entries: List[Dict[str, Any]] = []
+    seen: Dict[Tuple[str, ...], int] = {}
+
+    def add(level: str, nama: str, kab: str, kec: str, desa: str, status: str) -> None:
+        k = (level, _key(kab), _key(kec) if level != "kabkota" else "", _key(desa) if level == "desa" else "")
+        if k in seen:
+            return
+        seen[k] = len(entries)
+        entries.append(
+            {
+                "level": level,
+                "nama": nama,
+                "kabkota": kab,
+                "kecamatan": kec if level != "kabkota" else None,
+                "desa_kelurahan": desa if level == "desa" else None,
+                "status": status,
+                "_kab": k[1],
+                "_kec": k[2],
+                "_norm": norm_wilayah(nama),
+            }
+        )
+
+    for r in rows:
+        add("kabkota", r["kabkota"], r["kabkota"], "", "", r.get("status_kabkota") or "")
+        if r.get("kecamatan"):
+            add("kecamatan", r["kecamatan"], r["kabkota"], r["kecamatan"], "", "Kecamatan")
+        add("desa", r["desa_kelurahan"], r["kabkota"], r.get("kecamatan") or "", r["desa_kelurahan"], r.get("status_desa") or "")
+
+    # token -> id entri; nama kompak juga jadi token ("PADANGSIDEMPUAN")
+    postings: Dict[str, Set[int]] = {}
+    for i, e in enumerate(entries):
+        toks = set(e["_norm"].split())
+        toks.add(e["_norm"].replace(" ", ""))
+        for t in toks:
+            if t:
+                postings.setdefault(t, set()).add(i)
+
+    tokens = sorted(postings.keys())
+    token_ids = [sorted(postings[t]) for t in tokens]
+
+    deletes: Dict[str, Set[str]] = {}
+    for t in tokens:
+        if len(t) >= FUZZY_MIN_LEN:
+            for d in _deletes1(t):
+                deletes.setdefault(d, set()).add(t)
+
+    by_parent: Dict[Tuple[str, str, str], List[int]] = {}
+    for i, e in enumerate(entries):
+        by_parent.setdefault((e["level"], e["_kab"], e["_kec"] if e["level"] == "desa" else ""), []).append(i)
+    for ids in by_parent.values():
+        ids.sort(key=lambda i: entries[i]["_norm"])
+
+    return {
+        "entries": entries,
+        "tokens": tokens,
+        "token_ids": token_ids,
+        "token_pos": {t: i for i, t in enumerate(tokens)},
+        "deletes": deletes,
+        "by_parent": by_parent,
+    }
+
+
+def get_search_index() -> Dict[str, Any]:
+    idx = CACHE_WILAYAH_SEARCH["index"]
+    if idx is not None:
+        return idx
+    with _CACHE_LOCK:
+        if CACHE_WILAYAH_SEARCH["index"] is None:
+            CACHE_WILAYAH_SEARCH["index"] = build_search_index(load_wilayah_csv())
+        return CACHE_WILAYAH_SEARCH["index"]
+
+
+def _prefix_ids(idx: Dict[str, Any], prefix: str) -> Set[int]:
+    tokens = idx["tokens"]
+    out: Set[int] = set()
+    i = bisect_left(tokens, prefix)
+    while i < len(tokens) and tokens[i].startswith(prefix):
+        out.update(idx["token_ids"][i])
+        i += 1
+    return out
+
+
+def _fuzzy_ids(idx: Dict[str, Any], tok: str) -> Set[int]:
+    """Token dengan jarak edit 1 (hapus/sisip/ganti 1 huruf)."""
+    if len(tok) < FUZZY_MIN_LEN:
+        return set()
+    cand: Set[str] = set(idx["deletes"].get(tok, ()))  # query kurang 1 huruf
+    for d in _deletes1(tok):
+        if d in idx["token_pos"]:
+            cand.add(d)  # query kelebihan 1 huruf
+        cand.update(idx["deletes"].get(d, ()))  # 1 huruf salah ketik
+    out: Set[int] = set()
+    for t in cand:
+        out.update(idx["token_ids"][idx["token_pos"][t]])
+    return out
+
+
+def _public(e: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in e.items() if not k.startswith("_")}
+
+
+def search_wilayah(
+    q: str = "",
+    kab: Optional[str] = None,
+    kec: Optional[str] = None,
+    level: Optional[str] = None,
+    limit: int = 20,
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Cari wilayah. Return (hasil, fuzzy_dipakai).
+
+    - q kosong -> daftar anak dari filter (kab -> kecamatan, kab+kec -> desa),
+      untuk mengisi dropdown berjenjang.
+    - q diisi  -> semua token query harus cocok prefix token nama; bila kosong
+      hasilnya, token yang gagal dicoba fuzzy (edit distance 1).
+    """
+    idx = get_search_index()
+    entries = idx["entries"]
+    kab_k = _key(kab) if kab else ""
+    kec_k = _key(kec) if kec else ""
+    limit = max(1, min(int(limit or 20), MAX_LIMIT))
+    if level not in LEVELS:
+        level = None
+
+    def keep(e: Dict[str, Any]) -> bool:
+        if level and e["level"] != level:
+            return False
+        if kab_k and e["_kab"] != kab_k:
+            return False
+        if kec_k and e["_kec"] != kec_k:
+            return False
+        return True
+
+    qn = norm_wilayah(q)
+    if not qn:
+        if not level:
+            level = "desa" if kec_k else ("kecamatan" if kab_k else "kabkota")
+        ids = idx["by_parent"].get((level, kab_k if level != "kabkota" else "", kec_k if level == "desa" else ""), [])
+        return [_public(entries[i]) for i in ids[:limit]], False
+
+    toks = qn.split()
+    fuzzy = False
+    ids: Optional[Set[int]] = None
+    for t in toks:
+        hit = _prefix_ids(idx, t)
+        ids = hit if ids is None else ids & hit
+        if not ids:
+            break
+
+    if not ids:
+        # Ulangi dengan fuzzy untuk token yang tidak punya hasil prefix
+        fuzzy = True
+        ids = None
+        for t in toks:
+            hit = _prefix_ids(idx, t) or _fuzzy_ids(idx, t)
+            ids = hit if ids is None else ids & hit
+            if not ids:
+                break
+
+    qc = qn.replace(" ", "")
+    res = [entries[i] for i in (ids or ()) if keep(entries[i])]
+    res.sort(
+        key=lambda e: (
+            e["_norm"].replace(" ", "") != qc,  # nama persis sama dulu
+            not e["_norm"].startswith(qn),  # lalu nama diawali query
+            LEVEL_RANK[e["level"]],
+            len(e["_norm"]),
+            e["_norm"],
+        )
+    )
+    return [_public(e) for e in res[:limit]], fuzzy
+
+
+def canonical_wilayah(kabkota: Any, kecamatan: Any = None, desa: Any = None) -> Optional[Dict[str, Any]]:
+    """Cocokkan input bebas ke ejaan baku CSV (None bila tidak ditemukan)."""
+    idx = get_search_index()
+    kab_k = _key(kabkota)
+    kec_k = _key(kecamatan) if kecamatan else ""
+    desa_k = _key(desa) if desa else ""
+    level = "desa" if desa_k else ("kecamatan" if kec_k else "kabkota")
+    parent = (level, kab_k if level != "kabkota" else "", kec_k if level == "desa" else "")
+    for i in idx["by_parent"].get(parent, []):
+        e = idx["entries"][i]
+        target = desa_k if level == "desa" else (kec_k if level == "kecamatan" else kab_k)
+        if e["_norm"].replace(" ", "") == target:
+            return _public(e)
+    return None
+
+
+# ==========================
+# ROUTE REGISTRATION
+# ==========================
+def register_wilayah_search_routes(app):
+
+    @app.route("/api/wilayah/search", methods=["GET"])
+    def api_wilayah_search():
+        """Autocomplete wilayah Sumut.
+
+        Query params:
+          - q=<teks>                             (opsional; kosong -> daftar anak)
+          - kab=<kab/kota>  kec=<kecamatan>      filter hierarkis
+          - level=kabkota|kecamatan|desa
+          - limit=<int>                          default 20, maks 200
+        """
+        try:
+            limit = int(request.args.get("limit", "20") or 20)
+        except Exception:
+            limit = 20
+
+        try:
+            data, fuzzy = search_wilayah(
+                q=request.args.get("q") or "",
+                kab=request.args.get("kab"),
+                kec=request.args.get("kec"),
+                level=(request.args.get("level") or "").strip().lower() or None,
+                limit=limit,
+            )
+        except Exception as e:
+            return jsonify({"success": False, "error": str(e)}), 500
+
+        resp = jsonify({"success": True, "fuzzy": fuzzy, "data": data})
+        # Data statis (CSV ikut deploy) -> aman di-cache browser
+        resp.headers["Cache-Control"] = "public, max-age=3600"
+        return resp